@@ -235,17 +235,22 @@ class CodeGenerationEngine:
         
         return result
     
-    async def validate_code(self, code: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def validate_code(self, code: str, context: Dict[str, Any] = None,
+                            incremental: bool = False) -> Dict[str, Any]:
         """
         Валидация существующего кода
         
         Args:
             code: Код для валидации
             context: Контекст валидации
+            incremental: Валидация по процедурам (повторно проверяются
+                только измененные процедуры модуля)
             
         Returns:
             Результат валидации
         """
+        if incremental:
+            return await self.code_validator.validate_procedures(code, context or {})
         return await self.code_validator.validate_code(code, context or {})
     
     async def optimize_code(self, code: str, optimization_goal: str = "performance") -> Dict[str, Any]:
@@ -282,7 +287,9 @@ class CodeGenerationEngine:
                 'success': True,
                 'original_code': code,
                 'optimized_code': optimized_code,
-                'optimization_improvements': self._compare_code_quality(code, optimized_code),
+                'optimization_improvements': self._compare_code_quality(
+                    code, optimized_code, validation_result, optimized_validation
+                ),
                 'validation_result': optimized_validation
             }
             
@@ -607,14 +614,28 @@ Return the optimized code in the same structure format."""
         
         return prompt
     
-    def _compare_code_quality(self, original: str, optimized: str) -> Dict[str, Any]:
-        """Сравнение качества оригинального и оптимизированного кода"""
+    def _compare_code_quality(self, original: str, optimized: str,
+                              original_validation: Dict[str, Any] = None,
+                              optimized_validation: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Сравнение качества оригинального и оптимизированного кода
+        
+        Результаты валидации передаются из optimize_code, чтобы не проверять
+        тот же код повторно.
+        """
         
         # Простые метрики сравнения
-        return {
+        comparison = {
             'original_lines': len(original.split('\n')),
             'optimized_lines': len(optimized.split('\n')),
             'improvement_percentage': ((len(original) - len(optimized)) / len(original)) * 100 if original else 0,
             'readability_improvement': 'estimated',  # В реальной системе - сложный анализ
             'performance_improvement': 'estimated'
-        }
\ No newline at end of file
+        }
+        
+        if original_validation and optimized_validation:
+            comparison['original_score'] = original_validation.get('score', 0)
+            comparison['optimized_score'] = optimized_validation.get('score', 0)
+            comparison['score_improvement'] = comparison['optimized_score'] - comparison['original_score']
+        
+        return comparison
\ No newline at end of file
@@ -18,8 +18,96 @@ from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+from ..utils.rule_engine import RuleEngine, ScanResult, ScanRule
+
 logger = logging.getLogger(__name__)
 
+# Построчные правила угроз: group - префикс threat_id, tag - threat_type
+THREAT_RULES = (
+    # SQL-инъекции
+    ScanRule('sql_exec_concat', 'sql_injection', r'Выполнить\s*\(\s*["\'].*\+.*["\']', 'critical',
+             'Выполнение SQL с конкатенацией строк',
+             'Используйте параметризованные запросы', 'CWE-89', tag='sql_injection'),
+    ScanRule('sql_query_text_concat', 'sql_injection', r'Запрос\s*\.\s*Текст\s*=.*\+', 'high',
+             'Конкатенация в тексте SQL запроса',
+             'Используйте параметризованные запросы', 'CWE-89', tag='sql_injection'),
+    ScanRule('sql_str_replace_concat', 'sql_injection', r'СтрЗаменить\s*\(\s*["\'].*["\']\s*,\s*.*\+.*\)', 'medium',
+             'СтрЗаменить с конкатенацией может быть небезопасным',
+             'Проверьте входные данные перед заменой', 'CWE-20', tag='sql_injection'),
+    ScanRule('sql_contains_concat', 'sql_injection', r'Содержит\s*\(\s*.*\+.*\)', 'medium',
+             'Конкатенация в функции Содержит',
+             'Используйте параметризованные запросы', 'CWE-89', tag='sql_injection'),
+    # XSS уязвимости
+    ScanRule('xss_form_value_concat', 'xss', r'ЭлементыФормы\.[^.]+\.Значение\s*=.*\+', 'high',
+             'Присваивание значения с конкатенацией в элементы формы',
+             'Проверьте и экранируйте входные данные', 'CWE-79', tag='xss'),
+    ScanRule('xss_html_concat', 'xss', r'ТекстHTML\s*=.*\+', 'high',
+             'Установка HTML с конкатенацией',
+             'Используйте безопасные методы установки HTML', 'CWE-79', tag='xss'),
+    ScanRule('xss_navigation_link_concat', 'xss', r'НавигационнаяСсылка\s*=.*\+', 'medium',
+             'Установка навигационной ссылки с конкатенацией',
+             'Валидируйте и экранируйте URL', 'CWE-20', tag='xss'),
+    ScanRule('xss_page_title_concat', 'xss', r'Страница\s*\.\s*Заголовок\s*=.*\+', 'medium',
+             'Установка заголовка страницы с конкатенацией',
+             'Экранируйте пользовательский ввод', 'CWE-79', tag='xss'),
+    # Инъекции кода
+    ScanRule('code_execute', 'code_injection', r'Выполнить\s*\(', 'critical',
+             'Выполнение произвольного кода',
+             'Избегайте использования Выполнить()', 'CWE-94', tag='code_injection'),
+    ScanRule('code_load_from_file', 'code_injection', r'ЗагрузитьИзФайла\s*\(', 'high',
+             'Загрузка произвольного файла',
+             'Проверяйте путь к файлу и тип файла', 'CWE-73', tag='code_injection'),
+    ScanRule('code_get_file', 'code_injection', r'ПолучитьФайл\s*\(', 'high',
+             'Получение файла из внешнего источника',
+             'Проверяйте источник файла', 'CWE-22', tag='code_injection'),
+    ScanRule('code_external_processing', 'code_injection', r'ПодключитьВнешнююОбработку\s*\(', 'critical',
+             'Подключение внешней обработки',
+             'Используйте только проверенные обработки', 'CWE-94', tag='code_injection'),
+    # Эскалация привилегий
+    ScanRule('privilege_full_rights', 'privilege_escalation', r'Роли\s*\.\s*ПолныеПрава', 'high',
+             'Использование роли с полными правами',
+             'Используйте минимально необходимые права', 'CWE-732', tag='privilege_escalation'),
+    ScanRule('privilege_admin_role', 'privilege_escalation', r'Роли\s*\.\s*АдминистраторСистемы', 'medium',
+             'Использование роли администратора',
+             'Ограничьте использование админских прав', 'CWE-732', tag='privilege_escalation'),
+    ScanRule('privilege_mode', 'privilege_escalation', r'УстановитьПривилегированныйРежим\s*\(', 'high',
+             'Установка привилегированного режима',
+             'Используйте привилегированный режим только при необходимости', 'CWE-269',
+             tag='privilege_escalation'),
+    # Утечки информации
+    ScanRule('disclosure_message_password', 'information_disclosure', r'Сообщить\s*\(\s*.*[Пп]ароль.*\)', 'high',
+             'Вывод пароля в сообщении',
+             'Не выводите пароли и другие секретные данные', 'CWE-532', tag='information_disclosure'),
+    ScanRule('disclosure_message_key', 'information_disclosure', r'Сообщить\s*\(\s*.*[Кк]люч.*\)', 'high',
+             'Вывод ключа в сообщении',
+             'Не выводите криптографические ключи', 'CWE-532', tag='information_disclosure'),
+    ScanRule('disclosure_log_password', 'information_disclosure', r'ЗаписьЛога.*пароль', 'medium',
+             'Запись пароля в лог',
+             'Не записывайте пароли в логи', 'CWE-532', tag='information_disclosure'),
+    ScanRule('disclosure_log_key', 'information_disclosure', r'ЗаписьЛога.*ключ', 'medium',
+             'Запись ключа в лог',
+             'Не записывайте ключи в логи', 'CWE-532', tag='information_disclosure'),
+    ScanRule('disclosure_message_token', 'information_disclosure', r'Сообщить\s*\(\s*.*token.*\)', 'medium',
+             'Вывод токена в сообщении',
+             'Не выводите токены и маркеры доступа', 'CWE-532', tag='information_disclosure'),
+    # Чувствительные данные
+    ScanRule('sensitive_password', 'sensitive_data', r'["\']?[Пп]ароль["\']?\s*=\s*["\'][^"\']*["\']', 'high',
+             'Хранение пароля в коде',
+             'Используйте безопасное хранение паролей', tag='sensitive_data_exposure'),
+    ScanRule('sensitive_key', 'sensitive_data', r'["\']?[Кк]люч["\']?\s*=\s*["\'][^"\']*["\']', 'high',
+             'Хранение ключа в коде',
+             'Используйте безопасное хранение ключей', tag='sensitive_data_exposure'),
+    ScanRule('sensitive_token', 'sensitive_data', r'["\']?[Тт]окен["\']?\s*=\s*["\'][^"\']*["\']', 'medium',
+             'Хранение токена в коде',
+             'Используйте безопасное хранение токенов', tag='sensitive_data_exposure'),
+    ScanRule('sensitive_connection_string', 'sensitive_data', r'connection_string\s*=', 'medium',
+             'Хранение строки подключения в коде',
+             'Используйте безопасное хранение строк подключения', tag='sensitive_data_exposure'),
+)
+
+# Все встроенные правила компилируются один раз на процесс
+_THREAT_ENGINE = RuleEngine(THREAT_RULES)
+
 @dataclass
 class SecurityThreat:
     """Описание угрозы безопасности"""
@@ -66,6 +154,9 @@ class SecurityManager:
         
         # Правила безопасности
         self.threat_rules = self._initialize_threat_rules()
+        self._threat_engine = _THREAT_ENGINE
+        self._blocked_engine: Optional[RuleEngine] = None
+        self._blocked_engine_key: Tuple[str, ...] = ()
         self.compliance_standards = self._initialize_compliance_standards()
         
         # Статистика
@@ -103,36 +194,19 @@ class SecurityManager:
             }
         
         try:
-            # Выполнение различных типов проверок
-            threats = []
-            
-            # SQL-инъекции
-            sql_threats = await self._detect_sql_injections(code)
-            threats.extend(sql_threats)
-            
-            # XSS уязвимости
-            xss_threats = await self._detect_xss_vulnerabilities(code)
-            threats.extend(xss_threats)
+            # Все построчные правила - за один проход по коду
+            scan = self._threat_engine.scan(code)
             
-            # Код-инъекции
-            code_threats = await self._detect_code_injections(code)
-            threats.extend(code_threats)
-            
-            # Эскалация привилегий
-            privilege_threats = await self._detect_privilege_escalation(code)
-            threats.extend(privilege_threats)
-            
-            # Утечки информации
-            disclosure_threats = await self._detect_information_disclosure(code)
-            threats.extend(disclosure_threats)
+            threats = []
+            for group in ('sql_injection', 'xss', 'code_injection',
+                          'privilege_escalation', 'information_disclosure'):
+                threats.extend(self._detect_threats(scan, group))
             
             # Проверка заблокированных паттернов
-            blocked_threats = await self._detect_blocked_patterns(code)
-            threats.extend(blocked_threats)
+            threats.extend(self._detect_blocked_patterns(code))
             
             # Анализ чувствительных данных
-            sensitive_threats = await self._detect_sensitive_data(code)
-            threats.extend(sensitive_threats)
+            threats.extend(self._detect_threats(scan, 'sensitive_data'))
             
             # Вычисление общего уровня риска
             risk_level = self._calculate_overall_risk_level(threats)
@@ -171,296 +245,25 @@ class SecurityManager:
                 'error': str(e)
             }
     
-    async def _detect_sql_injections(self, code: str) -> List[SecurityThreat]:
-        """Обнаружение SQL-инъекций"""
-        
-        threats = []
-        
-        # Паттерны SQL-инъекций
-        sql_injection_patterns = [
-            {
-                'pattern': r'Выполнить\s*\(\s*["\'].*\+.*["\']',
-                'threat_type': 'sql_injection',
-                'severity': 'critical',
-                'description': 'Выполнение SQL с конкатенацией строк',
-                'remediation': 'Используйте параметризованные запросы',
-                'cwe_id': 'CWE-89'
-            },
-            {
-                'pattern': r'Запрос\s*\.\s*Текст\s*=.*\+',
-                'threat_type': 'sql_injection',
-                'severity': 'high',
-                'description': 'Конкатенация в тексте SQL запроса',
-                'remediation': 'Используйте параметризованные запросы',
-                'cwe_id': 'CWE-89'
-            },
-            {
-                'pattern': r'СтрЗаменить\s*\(\s*["\'].*["\']\s*,\s*.*\+.*\)',
-                'threat_type': 'sql_injection',
-                'severity': 'medium',
-                'description': 'СтрЗаменить с конкатенацией может быть небезопасным',
-                'remediation': 'Проверьте входные данные перед заменой',
-                'cwe_id': 'CWE-20'
-            },
-            {
-                'pattern': r'Содержит\s*\(\s*.*\+.*\)',
-                'threat_type': 'sql_injection',
-                'severity': 'medium',
-                'description': 'Конкатенация в функции Содержит',
-                'remediation': 'Используйте параметризованные запросы',
-                'cwe_id': 'CWE-89'
-            }
-        ]
-        
-        lines = code.split('\n')
-        
-        for pattern_info in sql_injection_patterns:
-            pattern = pattern_info['pattern']
-            
-            for line_num, line in enumerate(lines, 1):
-                if re.search(pattern, line, re.IGNORECASE):
-                    threat = SecurityThreat(
-                        threat_id=f"sql_injection_{len(threats)}",
-                        threat_type=pattern_info['threat_type'],
-                        severity=pattern_info['severity'],
-                        description=pattern_info['description'],
-                        affected_lines=[line_num],
-                        remediation=pattern_info['remediation'],
-                        cwe_id=pattern_info.get('cwe_id')
-                    )
-                    threats.append(threat)
-        
-        return threats
-    
-    async def _detect_xss_vulnerabilities(self, code: str) -> List[SecurityThreat]:
-        """Обнаружение XSS уязвимостей"""
-        
-        threats = []
-        
-        # Паттерны XSS уязвимостей
-        xss_patterns = [
-            {
-                'pattern': r'ЭлементыФормы\.[^.]+\.Значение\s*=.*\+',
-                'severity': 'high',
-                'description': 'Присваивание значения с конкатенацией в элементы формы',
-                'remediation': 'Проверьте и экранируйте входные данные',
-                'cwe_id': 'CWE-79'
-            },
-            {
-                'pattern': r'ТекстHTML\s*=.*\+',
-                'severity': 'high',
-                'description': 'Установка HTML с конкатенацией',
-                'remediation': 'Используйте безопасные методы установки HTML',
-                'cwe_id': 'CWE-79'
-            },
-            {
-                'pattern': r'НавигационнаяСсылка\s*=.*\+',
-                'severity': 'medium',
-                'description': 'Установка навигационной ссылки с конкатенацией',
-                'remediation': 'Валидируйте и экранируйте URL',
-                'cwe_id': 'CWE-20'
-            },
-            {
-                'pattern': r'Страница\s*\.\s*Заголовок\s*=.*\+',
-                'severity': 'medium',
-                'description': 'Установка заголовка страницы с конкатенацией',
-                'remediation': 'Экранируйте пользовательский ввод',
-                'cwe_id': 'CWE-79'
-            }
-        ]
-        
-        lines = code.split('\n')
-        
-        for pattern_info in xss_patterns:
-            pattern = pattern_info['pattern']
-            
-            for line_num, line in enumerate(lines, 1):
-                if re.search(pattern, line, re.IGNORECASE):
-                    threat = SecurityThreat(
-                        threat_id=f"xss_{len(threats)}",
-                        threat_type='xss',
-                        severity=pattern_info['severity'],
-                        description=pattern_info['description'],
-                        affected_lines=[line_num],
-                        remediation=pattern_info['remediation'],
-                        cwe_id=pattern_info.get('cwe_id')
-                    )
-                    threats.append(threat)
-        
-        return threats
-    
-    async def _detect_code_injections(self, code: str) -> List[SecurityThreat]:
-        """Обнаружение инъекций кода"""
-        
-        threats = []
-        
-        # Паттерны инъекций кода
-        code_injection_patterns = [
-            {
-                'pattern': r'Выполнить\s*\(',
-                'severity': 'critical',
-                'description': 'Выполнение произвольного кода',
-                'remediation': 'Избегайте использования Выполнить()',
-                'cwe_id': 'CWE-94'
-            },
-            {
-                'pattern': r'ЗагрузитьИзФайла\s*\(',
-                'severity': 'high',
-                'description': 'Загрузка произвольного файла',
-                'remediation': 'Проверяйте путь к файлу и тип файла',
-                'cwe_id': 'CWE-73'
-            },
-            {
-                'pattern': r'ПолучитьФайл\s*\(',
-                'severity': 'high',
-                'description': 'Получение файла из внешнего источника',
-                'remediation': 'Проверяйте источник файла',
-                'cwe_id': 'CWE-22'
-            },
-            {
-                'pattern': r'ПодключитьВнешнююОбработку\s*\(',
-                'severity': 'critical',
-                'description': 'Подключение внешней обработки',
-                'remediation': 'Используйте только проверенные обработки',
-                'cwe_id': 'CWE-94'
-            }
-        ]
-        
-        lines = code.split('\n')
-        
-        for pattern_info in code_injection_patterns:
-            pattern = pattern_info['pattern']
-            
-            for line_num, line in enumerate(lines, 1):
-                if re.search(pattern, line, re.IGNORECASE):
-                    threat = SecurityThreat(
-                        threat_id=f"code_injection_{len(threats)}",
-                        threat_type='code_injection',
-                        severity=pattern_info['severity'],
-                        description=pattern_info['description'],
-                        affected_lines=[line_num],
-                        remediation=pattern_info['remediation'],
-                        cwe_id=pattern_info.get('cwe_id')
-                    )
-                    threats.append(threat)
-        
-        return threats
-    
-    async def _detect_privilege_escalation(self, code: str) -> List[SecurityThreat]:
-        """Обнаружение попыток эскалации привилегий"""
-        
-        threats = []
-        
-        # Паттерны эскалации привилегий
-        privilege_patterns = [
-            {
-                'pattern': r'Роли\s*\.\s*ПолныеПрава',
-                'severity': 'high',
-                'description': 'Использование роли с полными правами',
-                'remediation': 'Используйте минимально необходимые права',
-                'cwe_id': 'CWE-732'
-            },
-            {
-                'pattern': r'Роли\s*\.\s*АдминистраторСистемы',
-                'severity': 'medium',
-                'description': 'Использование роли администратора',
-                'remediation': 'Ограничьте использование админских прав',
-                'cwe_id': 'CWE-732'
-            },
-            {
-                'pattern': r'УстановитьПривилегированныйРежим\s*\(',
-                'severity': 'high',
-                'description': 'Установка привилегированного режима',
-                'remediation': 'Используйте привилегированный режим только при необходимости',
-                'cwe_id': 'CWE-269'
-            }
+    def _detect_threats(self, scan: ScanResult, group: str) -> List[SecurityThreat]:
+        """Угрозы одной группы правил (в порядке правил, затем строк)"""
+        
+        findings = sorted(scan.group(group), key=lambda finding: finding.rule_index)
+        
+        return [
+            SecurityThreat(
+                threat_id=f"{group}_{index}",
+                threat_type=finding.rule.tag,
+                severity=finding.rule.severity,
+                description=finding.rule.description,
+                affected_lines=[finding.line_number],
+                remediation=finding.rule.remediation,
+                cwe_id=finding.rule.cwe_id
+            )
+            for index, finding in enumerate(findings)
         ]
-        
-        lines = code.split('\n')
-        
-        for pattern_info in privilege_patterns:
-            pattern = pattern_info['pattern']
-            
-            for line_num, line in enumerate(lines, 1):
-                if re.search(pattern, line, re.IGNORECASE):
-                    threat = SecurityThreat(
-                        threat_id=f"privilege_escalation_{len(threats)}",
-                        threat_type='privilege_escalation',
-                        severity=pattern_info['severity'],
-                        description=pattern_info['description'],
-                        affected_lines=[line_num],
-                        remediation=pattern_info['remediation'],
-                        cwe_id=pattern_info.get('cwe_id')
-                    )
-                    threats.append(threat)
-        
-        return threats
     
-    async def _detect_information_disclosure(self, code: str) -> List[SecurityThreat]:
-        """Обнаружение утечек информации"""
-        
-        threats = []
-        
-        # Паттерны утечек информации
-        disclosure_patterns = [
-            {
-                'pattern': r'Сообщить\s*\(\s*.*[Пп]ароль.*\)',
-                'severity': 'high',
-                'description': 'Вывод пароля в сообщении',
-                'remediation': 'Не выводите пароли и другие секретные данные',
-                'cwe_id': 'CWE-532'
-            },
-            {
-                'pattern': r'Сообщить\s*\(\s*.*[Кк]люч.*\)',
-                'severity': 'high',
-                'description': 'Вывод ключа в сообщении',
-                'remediation': 'Не выводите криптографические ключи',
-                'cwe_id': 'CWE-532'
-            },
-            {
-                'pattern': r'ЗаписьЛога.*пароль',
-                'severity': 'medium',
-                'description': 'Запись пароля в лог',
-                'remediation': 'Не записывайте пароли в логи',
-                'cwe_id': 'CWE-532'
-            },
-            {
-                'pattern': r'ЗаписьЛога.*ключ',
-                'severity': 'medium',
-                'description': 'Запись ключа в лог',
-                'remediation': 'Не записывайте ключи в логи',
-                'cwe_id': 'CWE-532'
-            },
-            {
-                'pattern': r'Сообщить\s*\(\s*.*token.*\)',
-                'severity': 'medium',
-                'description': 'Вывод токена в сообщении',
-                'remediation': 'Не выводите токены и маркеры доступа',
-                'cwe_id': 'CWE-532'
-            }
-        ]
-        
-        lines = code.split('\n')
-        
-        for pattern_info in disclosure_patterns:
-            pattern = pattern_info['pattern']
-            
-            for line_num, line in enumerate(lines, 1):
-                if re.search(pattern, line, re.IGNORECASE):
-                    threat = SecurityThreat(
-                        threat_id=f"information_disclosure_{len(threats)}",
-                        threat_type='information_disclosure',
-                        severity=pattern_info['severity'],
-                        description=pattern_info['description'],
-                        affected_lines=[line_num],
-                        remediation=pattern_info['remediation'],
-                        cwe_id=pattern_info.get('cwe_id')
-                    )
-                    threats.append(threat)
-        
-        return threats
-    
-    async def _detect_blocked_patterns(self, code: str) -> List[SecurityThreat]:
+    def _detect_blocked_patterns(self, code: str) -> List[SecurityThreat]:
         """Обнаружение заблокированных паттернов"""
         
         threats = []
@@ -468,76 +271,39 @@ class SecurityManager:
         if not self.blocked_patterns:
             return threats
         
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            for pattern in self.blocked_patterns:
-                if pattern in line:
-                    threat = SecurityThreat(
-                        threat_id=f"blocked_pattern_{len(threats)}",
-                        threat_type='blocked_pattern',
-                        severity='critical',
-                        description=f'Обнаружен заблокированный паттерн: {pattern}',
-                        affected_lines=[line_num],
-                        remediation='Удалите заблокированный код',
-                        cwe_id='CWE-184'  # Incomplete Blacklist
-                    )
-                    threats.append(threat)
-                    self.scan_stats['blocks_executed'] += 1
+        for finding in self._get_blocked_engine().scan(code).findings:
+            threat = SecurityThreat(
+                threat_id=f"blocked_pattern_{len(threats)}",
+                threat_type='blocked_pattern',
+                severity='critical',
+                description=finding.rule.description,
+                affected_lines=[finding.line_number],
+                remediation='Удалите заблокированный код',
+                cwe_id='CWE-184'  # Incomplete Blacklist
+            )
+            threats.append(threat)
+            self.scan_stats['blocks_executed'] += 1
         
         return threats
     
-    async def _detect_sensitive_data(self, code: str) -> List[SecurityThreat]:
-        """Обнаружение чувствительных данных в коде"""
-        
-        threats = []
-        
-        # Паттерны чувствительных данных
-        sensitive_patterns = [
-            {
-                'pattern': r'["\']?[Пп]ароль["\']?\s*=\s*["\'][^"\']*["\']',
-                'severity': 'high',
-                'description': 'Хранение пароля в коде',
-                'remediation': 'Используйте безопасное хранение паролей'
-            },
-            {
-                'pattern': r'["\']?[Кк]люч["\']?\s*=\s*["\'][^"\']*["\']',
-                'severity': 'high',
-                'description': 'Хранение ключа в коде',
-                'remediation': 'Используйте безопасное хранение ключей'
-            },
-            {
-                'pattern': r'["\']?[Тт]окен["\']?\s*=\s*["\'][^"\']*["\']',
-                'severity': 'medium',
-                'description': 'Хранение токена в коде',
-                'remediation': 'Используйте безопасное хранение токенов'
-            },
-            {
-                'pattern': r'connection_string\s*=',
-                'severity': 'medium',
-                'description': 'Хранение строки подключения в коде',
-                'remediation': 'Используйте безопасное хранение строк подключения'
-            }
-        ]
-        
-        lines = code.split('\n')
-        
-        for pattern_info in sensitive_patterns:
-            pattern = pattern_info['pattern']
-            
-            for line_num, line in enumerate(lines, 1):
-                if re.search(pattern, line, re.IGNORECASE):
-                    threat = SecurityThreat(
-                        threat_id=f"sensitive_data_{len(threats)}",
-                        threat_type='sensitive_data_exposure',
-                        severity=pattern_info['severity'],
-                        description=pattern_info['description'],
-                        affected_lines=[line_num],
-                        remediation=pattern_info['remediation']
-                    )
-                    threats.append(threat)
-        
-        return threats
+    def _get_blocked_engine(self) -> RuleEngine:
+        """Движок заблокированных паттернов (пересобирается при изменении списка)"""
+        
+        key = tuple(self.blocked_patterns)
+        if self._blocked_engine is None or self._blocked_engine_key != key:
+            self._blocked_engine = RuleEngine(
+                ScanRule(
+                    rule_id=f"blocked_{index}",
+                    group='blocked_pattern',
+                    pattern=re.escape(pattern),
+                    severity='critical',
+                    description=f'Обнаружен заблокированный паттерн: {pattern}',
+                    flags=0
+                )
+                for index, pattern in enumerate(key)
+            )
+            self._blocked_engine_key = key
+        return self._blocked_engine
     
     def _calculate_overall_risk_level(self, threats: List[SecurityThreat]) -> str:
         """Вычисление общего уровня риска"""
@@ -12,6 +12,10 @@ Utils Package для 1C AI MCP Code Generation
 
 from .audit import AuditEvent, AuditLogger
 from .context import ConfigurationContext, ContextCollector
+from .rule_engine import RuleEngine, RuleFinding, ScanResult, ScanRule, SourceLines, split_source
 
 __version__ = "1.0.0"
-__all__ = ['AuditLogger', 'AuditEvent', 'ContextCollector', 'ConfigurationContext']
\ No newline at end of file
+__all__ = [
+    'AuditLogger', 'AuditEvent', 'ContextCollector', 'ConfigurationContext',
+    'RuleEngine', 'RuleFinding', 'ScanResult', 'ScanRule', 'SourceLines', 'split_source'
+]
\ No newline at end of file
@@ -0,0 +1,168 @@
+# [NEXUS IDENTITY] ID: 7390218465501837244 | DATE: 2026-10-17
+
+#!/usr/bin/env python3
+"""
+Rule Engine для 1C AI MCP Code Generation
+
+Общий движок построчных правил для проверок безопасности и валидации кода.
+
+- Код разбивается на строки один раз (SourceLines, с кэшем), результат
+  используют все проверки.
+- Все правила компилируются один раз в общий matcher: одна альтернатива
+  на правило. Общий regex находит строки-кандидаты за один проход по
+  тексту, и только на них проверяются отдельные правила.
+- Семантика совпадает с прежней проверкой "re.search(pattern, line) для
+  каждой строки и каждого паттерна": одна находка на пару (правило, строка).
+
+Версия: 1.0
+Дата: 17.10.2026
+"""
+
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ScanRule:
+    """Построчное правило проверки"""
+    rule_id: str
+    group: str  # sql_injection, xss, dangerous_function, ...
+    pattern: str
+    severity: str  # critical, high, medium, low
+    description: str
+    remediation: str = ''
+    cwe_id: Optional[str] = None
+    flags: int = re.IGNORECASE
+    tag: Optional[str] = None  # произвольная метка правила (например, имя функции)
+
+
+@dataclass(frozen=True)
+class RuleFinding:
+    """Срабатывание правила на строке"""
+    rule: ScanRule
+    rule_index: int
+    line_number: int
+    column: int
+    line_content: str
+
+
+@dataclass(frozen=True)
+class SourceLines:
+    """Код, один раз разбитый на строки"""
+    code: str
+    lines: Tuple[str, ...]
+    stripped: Tuple[str, ...]
+    line_starts: Tuple[int, ...]
+
+    def line_index(self, pos: int) -> int:
+        """Индекс строки (с 0) для позиции в тексте"""
+        return bisect_right(self.line_starts, pos) - 1
+
+
+@lru_cache(maxsize=64)
+def split_source(code: str) -> SourceLines:
+    """Разбиение кода на строки (результат кэшируется для повторных проверок)"""
+    lines = tuple(code.split('\n'))
+    line_starts = []
+    pos = 0
+    for line in lines:
+        line_starts.append(pos)
+        pos += len(line) + 1
+    return SourceLines(
+        code=code,
+        lines=lines,
+        stripped=tuple(line.strip() for line in lines),
+        line_starts=tuple(line_starts)
+    )
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    """Все срабатывания правил на коде, по строкам"""
+    source: SourceLines
+    findings: Tuple[RuleFinding, ...]
+
+    def group(self, *groups: str) -> List[RuleFinding]:
+        """Срабатывания правил указанных групп (порядок: строка, затем правило)"""
+        return [finding for finding in self.findings if finding.rule.group in groups]
+
+
+class RuleEngine:
+    """Набор правил, скомпилированный в общий matcher"""
+
+    def __init__(self, rules: Iterable[ScanRule], cache_size: int = 32):
+        """
+        Инициализация движка
+
+        Args:
+            rules: Правила (порядок правил задает порядок находок на строке)
+            cache_size: Размер кэша результатов по тексту кода
+        """
+        self.rules: Tuple[ScanRule, ...] = tuple(rules)
+        self._compiled = [
+            (index, rule, re.compile(rule.pattern, rule.flags))
+            for index, rule in enumerate(self.rules)
+        ]
+        self._combined = self._compile_combined(self._compiled)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, ScanResult]" = OrderedDict()
+
+    @staticmethod
+    def _compile_combined(compiled) -> Optional[re.Pattern]:
+        """Одна альтернатива на правило, флаги правила - локально для альтернативы"""
+        if not compiled:
+            return None
+        alternatives = []
+        for _, rule, regex in compiled:
+            prefix = '(?i:' if rule.flags & re.IGNORECASE else '(?:'
+            alternatives.append(prefix + regex.pattern + ')')
+        return re.compile('|'.join(alternatives))
+
+    def scan(self, code: str) -> ScanResult:
+        """
+        Проверка кода всеми правилами за один проход
+
+        Args:
+            code: Код для проверки
+
+        Returns:
+            Срабатывания правил с номерами строк
+        """
+        cached = self._cache.get(code)
+        if cached is not None:
+            self._cache.move_to_end(code)
+            return cached
+
+        source = split_source(code)
+        findings: List[RuleFinding] = []
+
+        if self._combined is not None:
+            search = self._combined.search
+            line_starts = source.line_starts
+            lines_count = len(line_starts)
+            pos = 0
+            while True:
+                match = search(code, pos)
+                if match is None:
+                    break
+                line_index = source.line_index(match.start())
+                line = source.lines[line_index]
+                stripped = source.stripped[line_index]
+                for index, rule, regex in self._compiled:
+                    hit = regex.search(line)
+                    if hit is not None:
+                        findings.append(RuleFinding(rule, index, line_index + 1, hit.start(), stripped))
+                if line_index + 1 >= lines_count:
+                    break
+                pos = line_starts[line_index + 1]
+
+        result = ScanResult(source=source, findings=tuple(findings))
+        if self.cache_size:
+            self._cache[code] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
@@ -10,9 +10,10 @@ Validation Package для 1C AI MCP Code Generation
 Дата: 30.10.2025
 """
 
-from .validator import (CodeValidator, SecurityAnalysisResult,
+from .cache import ValidationCache
+from .validator import (CodeSegment, CodeValidator, SecurityAnalysisResult,
                         StandardComplianceResult, SyntaxValidationResult,
-                        ValidationResult)
+                        ValidationResult, split_procedures)
 
 __version__ = "1.0.0"
 __all__ = [
@@ -20,5 +21,8 @@ __all__ = [
     'ValidationResult', 
     'SyntaxValidationResult', 
     'StandardComplianceResult', 
-    'SecurityAnalysisResult'
+    'SecurityAnalysisResult',
+    'ValidationCache',
+    'CodeSegment',
+    'split_procedures'
 ]
\ No newline at end of file
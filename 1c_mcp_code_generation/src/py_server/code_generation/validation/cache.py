@@ -0,0 +1,197 @@
+# [NEXUS IDENTITY] ID: 6049183372651840917 | DATE: 2026-10-17
+
+#!/usr/bin/env python3
+"""
+Validation Cache для 1C AI MCP Code Generation
+
+Кэш результатов валидации с адресацией по содержимому: ключ - хэш кода
+и отпечаток конфигурации валидатора. Кэш ограничен по размеру (LRU),
+записи устаревают по TTL, содержимое может сохраняться на диск.
+
+Версия: 1.0
+Дата: 17.10.2026
+"""
+
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Версия формата файла кэша (записи другой версии при загрузке игнорируются)
+CACHE_FORMAT_VERSION = 1
+
+
+class ValidationCache:
+    """Ограниченный LRU-кэш результатов валидации с TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600,
+                 persist_path: Optional[str] = None, persist_every: int = 50):
+        """
+        Инициализация кэша
+
+        Args:
+            max_entries: Максимальное количество записей
+            ttl: Время жизни записи в секундах (0 - без ограничения)
+            persist_path: Файл для сохранения кэша (None - только в памяти)
+            persist_every: Сохранение на диск после каждых N новых записей
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.persist_every = persist_every
+
+        # ключ -> (время записи, сериализованный результат): вызывающий код
+        # дополняет результат, поэтому каждый get() отдает новую копию, а
+        # pickle.loads заметно быстрее copy.deepcopy
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+        if self.persist_path:
+            self.load()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Получение результата из кэша
+
+        Returns:
+            Копия сохраненного результата или None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            stored_at, blob = entry
+            if self._is_expired(stored_at):
+                del self._entries[key]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return pickle.loads(blob)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Сохранение результата в кэш"""
+
+        with self._lock:
+            self._entries[key] = (time.time(), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+            self._unsaved += 1
+            should_save = self.persist_path and self._unsaved >= self.persist_every
+
+        if should_save:
+            self.save()
+
+    def clear(self):
+        """Очистка кэша"""
+
+        with self._lock:
+            self._entries.clear()
+            self._unsaved = 0
+
+    def save(self) -> bool:
+        """
+        Сохранение кэша на диск (атомарная замена файла)
+
+        Returns:
+            True, если кэш сохранен
+        """
+        if not self.persist_path:
+            return False
+
+        with self._lock:
+            entries = [
+                [key, stored_at, pickle.loads(blob)]
+                for key, (stored_at, blob) in self._entries.items()
+                if not self._is_expired(stored_at)
+            ]
+            self._unsaved = 0
+
+        try:
+            directory = os.path.dirname(self.persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_FORMAT_VERSION, 'entries': entries}, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.persist_path)
+            return True
+
+        except Exception as e:
+            logger.error(f"Ошибка сохранения кэша валидации {self.persist_path}: {e}")
+            return False
+
+    def load(self) -> int:
+        """
+        Загрузка кэша с диска (устаревшие записи пропускаются)
+
+        Returns:
+            Количество загруженных записей
+        """
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить кэш валидации {self.persist_path}: {e}")
+            return 0
+
+        if data.get('version') != CACHE_FORMAT_VERSION:
+            logger.info(f"Кэш валидации {self.persist_path} другой версии - пропущен")
+            return 0
+
+        loaded = 0
+        with self._lock:
+            for key, stored_at, value in data.get('entries', []):
+                if self._is_expired(stored_at):
+                    continue
+                self._entries[key] = (stored_at, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+                loaded += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        logger.info(f"Загружено записей кэша валидации: {loaded}")
+        return loaded
+
+    def _is_expired(self, stored_at: float) -> bool:
+        """Проверка истечения TTL записи"""
+        return bool(self.ttl) and time.time() - stored_at >= self.ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'persist_path': self.persist_path
+        }
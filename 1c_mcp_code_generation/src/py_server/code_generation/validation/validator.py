@@ -11,6 +11,7 @@ Code Validator для 1C AI MCP Code Generation
 """
 
 import ast
+import asyncio
 import hashlib
 import json
 import logging
@@ -19,8 +20,79 @@ from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+from ..utils.rule_engine import RuleEngine, ScanRule, SourceLines, split_source
+from .cache import ValidationCache
+
 logger = logging.getLogger(__name__)
 
+# Построчные правила безопасности (группа = тип уязвимости в результате)
+_SQL_DESCRIPTION = 'Потенциальная SQL-инъекция через конкатенацию строк'
+_XSS_DESCRIPTION = 'Потенциальная XSS уязвимость через конкатенацию'
+_LEAK_DESCRIPTION = 'Потенциальная утечка конфиденциальной информации'
+
+_DANGEROUS_FUNCTIONS = {
+    'Выполнить': {'severity': 'high', 'description': 'Выполнение произвольного кода'},
+    'ЗагрузитьИзФайла': {'severity': 'medium', 'description': 'Загрузка произвольного файла'},
+    'ПолучитьФайл': {'severity': 'medium', 'description': 'Получение файла из внешнего источника'},
+    'ПодключитьВнешнююОбработку': {'severity': 'high', 'description': 'Подключение внешней обработки'},
+}
+
+SECURITY_RULES = (
+    ScanRule('sql_execute_concat', 'sql_injection', r'Выполнить\s*\(\s*["\'].*\+.*["\']', 'high', _SQL_DESCRIPTION),
+    ScanRule('sql_query_text_concat', 'sql_injection', r'Запрос\s*\.\s*Текст\s*=.*\+', 'high', _SQL_DESCRIPTION),
+    ScanRule('sql_str_replace_concat', 'sql_injection', r'СтрЗаменить.*["\']\s*\+', 'high', _SQL_DESCRIPTION),
+    ScanRule('xss_form_value_concat', 'xss', r'ЭлементыФормы\.[^.]+\.Значение\s*=.*\+', 'medium', _XSS_DESCRIPTION),
+    ScanRule('xss_html_concat', 'xss', r'ТекстHTML\s*=.*\+', 'medium', _XSS_DESCRIPTION),
+    ScanRule('xss_navigation_link_concat', 'xss', r'НавигационнаяСсылка\s*=.*\+', 'medium', _XSS_DESCRIPTION),
+    *(
+        ScanRule(f'dangerous_{name}', 'dangerous_function', r'\b' + name + r'\s*\(', info['severity'],
+                 f"Использование опасной функции: {info['description']}", tag=name)
+        for name, info in _DANGEROUS_FUNCTIONS.items()
+    ),
+    ScanRule('leak_message_password', 'information_leak', r'Сообщить\s*\(\s*.*[Пп]ароль.*\)', 'high', _LEAK_DESCRIPTION),
+    ScanRule('leak_message_key', 'information_leak', r'Сообщить\s*\(\s*.*[Кк]люч.*\)', 'high', _LEAK_DESCRIPTION),
+    ScanRule('leak_log_password', 'information_leak', r'ЗаписьЛога.*пароль', 'high', _LEAK_DESCRIPTION),
+    ScanRule('leak_log_key', 'information_leak', r'ЗаписьЛога.*ключ', 'high', _LEAK_DESCRIPTION),
+)
+
+# Все правила компилируются один раз на процесс
+_SECURITY_ENGINE = RuleEngine(SECURITY_RULES)
+
+_PROCEDURE_NAME_RE = re.compile(r'Процедура\s+([a-zA-Zа-яА-Я_][a-zA-Zа-яА-Я0-9_]*)\s*\(')
+_FUNCTION_NAME_RE = re.compile(r'Функция\s+([a-zA-Zа-яА-Я_][a-zA-Zа-яА-Я0-9_]*)\s*\(')
+_VARIABLE_NAME_RE = re.compile(r'Перем\s+([a-zA-Zа-яА-Я_][a-zA-Zа-яА-Я0-9_]*)')
+_LARGE_PROCEDURE_NAME_RE = re.compile(r'(?:Процедура Функция)\s+(\w+)')
+
+_BRACKET_RE = re.compile(r'[()\[\]{}]')
+
+_METHOD_HEADER_RE = re.compile(r'^(?:Процедура|Функция)\s+(\w+)')
+
+# Версия правил - входит в отпечаток конфигурации, чтобы сохраненные на
+# диск результаты не переживали изменения проверок
+RULES_VERSION = 2
+
+# Параметры кэша не влияют на результат и не входят в отпечаток
+_CACHE_CONFIG_KEYS = ('cache_enabled', 'cache_ttl', 'cache_max_entries', 'cache_path', 'cache_persist_every')
+
+# Каждое слово совпадает не более чем с одним ключевым словом, поэтому
+# число совпадений альтернативы равно сумме совпадений отдельных слов
+_COMPLEXITY_RE = re.compile(
+    r'\b(?:Если|ИначеЕсли|Иначе|Для|По|Пока|Попытка|Исключение|И|ИЛИ|НЕ)\b', re.IGNORECASE
+)
+
+_GLOBAL_OBJECTS = (
+    'Метаданные', 'ЭтотОбъект', 'Константы', 'Справочники',
+    'Документы', 'Регистры', 'Обработки', 'Отчеты'
+)
+_GLOBAL_OBJECTS_RE = re.compile(r'\b(' + '|'.join(_GLOBAL_OBJECTS) + r')\b')
+
+_PERFORMANCE_PATTERNS = (
+    (re.compile(r'Для\s+.*\s+Цикл\s*\n.*\n.*Запрос', re.MULTILINE | re.IGNORECASE), 'Запрос внутри цикла'),
+    (re.compile(r'Получить\s*\([^)]*\)\s*\.\s*\w+\s*.*\n.*\n.*Для', re.MULTILINE | re.IGNORECASE), 'Чтение в цикле'),
+    (re.compile(r'\w+\s*=\s*\w+\s*\.\s*Найти\([^)]*\)\s*\n.*\n.*\w+\s*=', re.MULTILINE | re.IGNORECASE),
+     'Повторный поиск в цикле'),
+)
+
 @dataclass
 class ValidationResult:
     """Результат валидации"""
@@ -56,6 +128,74 @@ class SecurityAnalysisResult:
     vulnerabilities: List[Dict[str, Any]]
     security_score: int
 
+@dataclass
+class CodeSegment:
+    """Фрагмент модуля для инкрементальной валидации"""
+    name: str
+    start_line: int
+    end_line: int
+    code: str
+
+
+def split_procedures(source: SourceLines) -> Optional[List[CodeSegment]]:
+    """
+    Разбиение модуля на процедуры/функции и остальной текст модуля
+    
+    К процедуре относятся непосредственно предшествующие ей комментарии и
+    аннотации (&НаСервере и т.п.). Остальные строки модуля (переменные,
+    области, код инициализации) собираются в один фрагмент "Модуль".
+    
+    Returns:
+        Фрагменты в порядке начала или None, если структура процедур
+        нарушена (вложенное или незакрытое объявление, лишний конец)
+    """
+    segments = []
+    module_lines = []  # (номер строки, строка)
+    current = None  # [имя, начальная строка, строки]
+    
+    for line_num, (line, line_stripped) in enumerate(zip(source.lines, source.stripped), 1):
+        is_header = line_stripped.startswith('Процедура ') or line_stripped.startswith('Функция ')
+        is_end = line_stripped == 'КонецПроцедуры' or line_stripped == 'КонецФункции'
+        
+        if current is None:
+            if is_end:
+                return None
+            if not is_header:
+                module_lines.append((line_num, line))
+                continue
+            
+            # Комментарии и аннотации перед заголовком относятся к процедуре
+            head = []
+            while module_lines and module_lines[-1][1].strip().startswith(('//', '&')):
+                head.insert(0, module_lines.pop()[1])
+            
+            match = _METHOD_HEADER_RE.match(line_stripped)
+            name = match.group(1) if match else line_stripped.split()[1]
+            current = [name, line_num - len(head), head + [line]]
+        else:
+            if is_header:
+                return None
+            current[2].append(line)
+            if is_end:
+                name, start_line, lines = current
+                segments.append(CodeSegment(name, start_line, line_num, '\n'.join(lines)))
+                current = None
+    
+    if current is not None:
+        return None
+    
+    if any(line.strip() for _, line in module_lines):
+        segments.append(CodeSegment(
+            name='Модуль',
+            start_line=module_lines[0][0],
+            end_line=module_lines[-1][0],
+            code='\n'.join(line for _, line in module_lines)
+        ))
+        segments.sort(key=lambda segment: segment.start_line)
+    
+    return segments
+
+
 class CodeValidator:
     """Валидатор кода 1С"""
     
@@ -74,12 +214,23 @@ class CodeValidator:
         self.auto_fix = config.get('auto_fix', False)
         self.timeout = config.get('timeout', 10)
         
+        # Кэш результатов: ключ - хэш кода и отпечаток конфигурации
+        self.cache_enabled = config.get('cache_enabled', True)
+        self.result_cache = ValidationCache(
+            max_entries=config.get('cache_max_entries', 1024),
+            ttl=config.get('cache_ttl', 3600),
+            persist_path=config.get('cache_path'),
+            persist_every=config.get('cache_persist_every', 50)
+        )
+        self.config_fingerprint = self._calculate_config_fingerprint()
+        
         # Статистика
         self.validation_stats = {
             'total_validations': 0,
             'validation_errors': 0,
             'validation_warnings': 0,
-            'average_score': 0.0
+            'average_score': 0.0,
+            'cache_hits': 0
         }
         
         # Правила валидации
@@ -94,6 +245,9 @@ class CodeValidator:
         """
         Основная функция валидации кода
         
+        Повторная валидация того же кода с той же конфигурацией возвращает
+        результат из кэша (metadata.cache_hit = True).
+        
         Args:
             code: Код для валидации
             context: Контекст валидации
@@ -101,8 +255,129 @@ class CodeValidator:
         Returns:
             Результат валидации
         """
+        return await self._validate_cached(code, context, module_level=True)
+    
+    async def validate_procedures(self, code: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Инкрементальная валидация модуля по процедурам
+        
+        Каждая процедура/функция и остальной текст модуля валидируются как
+        отдельные фрагменты через кэш результатов, поэтому после изменения
+        одной процедуры повторно проверяется только она. Сообщения фрагмента
+        начинаются с его имени, номера строк в них отсчитываются от начала
+        фрагмента (start_line фрагмента - в 'procedures').
+        
+        Args:
+            code: Код модуля
+            context: Контекст валидации
+            
+        Returns:
+            Сводный результат валидации с результатами по фрагментам
+        """
+        start_time = datetime.now()
+        source = split_source(code)
+        segments = split_procedures(source)
+        
+        if segments is None:
+            # Структура процедур нарушена - проверяется модуль целиком
+            return await self.validate_code(code, context)
+        
+        segment_results = await asyncio.gather(*(
+            self._validate_cached(segment.code, context, module_level=False)
+            for segment in segments
+        ))
+        
+        result = {
+            'valid': True,
+            'score': 100,
+            'errors': [],
+            'warnings': [],
+            'recommendations': [],
+            'procedures': [],
+            'metadata': {
+                'validation_time': 0,
+                'checks_performed': [],
+                'code_hash': hashlib.md5(code.encode('utf-8')).hexdigest(),
+                'code_size': len(code),
+                'lines_count': len(source.lines),
+                'incremental': True,
+                'segments': len(segments),
+                'revalidated_segments': 0
+            }
+        }
+        
+        standards_compliance = []
+        for segment, segment_result in zip(segments, segment_results):
+            prefix = f"{segment.name}: "
+            result['errors'].extend(prefix + error for error in segment_result['errors'])
+            result['warnings'].extend(prefix + warning for warning in segment_result['warnings'])
+            for recommendation in segment_result['recommendations']:
+                if recommendation not in result['recommendations']:
+                    result['recommendations'].append(recommendation)
+            
+            metadata = segment_result['metadata']
+            if 'standards_compliance' in metadata:
+                standards_compliance.append(metadata['standards_compliance'])
+            if not metadata.get('cache_hit'):
+                result['metadata']['revalidated_segments'] += 1
+            result['metadata']['checks_performed'] = metadata['checks_performed']
+            
+            result['procedures'].append({
+                'name': segment.name,
+                'start_line': segment.start_line,
+                'end_line': segment.end_line,
+                'valid': segment_result['valid'],
+                'score': segment_result['score'],
+                'cache_hit': metadata.get('cache_hit', False)
+            })
+        
+        # Структура модуля (области, пустые строки) проверяется по всему коду
+        if 'standards' in self.enabled_checks:
+            structure_result = self._check_code_structure(code)
+            self._update_result_with_standards(result, [structure_result])
+            standards_compliance.append(structure_result.compliance_level)
+            result['metadata']['standards_compliance'] = sum(standards_compliance) / len(standards_compliance)
+        
+        result['score'] = self._calculate_total_score(result)
+        result['valid'] = len(result['errors']) == 0
+        result['metadata']['validation_time'] = (datetime.now() - start_time).total_seconds()
+        
+        return result
+    
+    async def _validate_cached(self, code: str, context: Dict[str, Any], module_level: bool) -> Dict[str, Any]:
+        """Валидация с использованием кэша результатов"""
+        
+        code_hash = hashlib.md5(code.encode('utf-8')).hexdigest()
+        cache_key = f"{self.config_fingerprint}:{'module' if module_level else 'segment'}:{code_hash}"
+        
+        if self.cache_enabled:
+            cached_result = self.result_cache.get(cache_key)
+            if cached_result is not None:
+                self.validation_stats['total_validations'] += 1
+                self.validation_stats['cache_hits'] += 1
+                self._update_validation_stats(cached_result)
+                cached_result['metadata']['cache_hit'] = True
+                return cached_result
+        
+        result, cacheable = await self._run_validation(code, code_hash, context, module_level)
+        
+        # Результаты с ошибкой самой валидации не кэшируются
+        if self.cache_enabled and cacheable:
+            self.result_cache.set(cache_key, result)
+        
+        return result
+    
+    async def _run_validation(self, code: str, code_hash: str, context: Dict[str, Any],
+                              module_level: bool) -> Tuple[Dict[str, Any], bool]:
+        """
+        Выполнение проверок кода
+        
+        Returns:
+            Результат валидации и признак возможности его кэширования
+        """
         start_time = datetime.now()
         self.validation_stats['total_validations'] += 1
+        cacheable = True
         
         # Результат по умолчанию
         result = {
@@ -114,35 +389,40 @@ class CodeValidator:
             'metadata': {
                 'validation_time': 0,
                 'checks_performed': [],
-                'code_hash': hashlib.md5(code.encode('utf-8')).hexdigest(),
+                'code_hash': code_hash,
                 'code_size': len(code),
-                'lines_count': len(code.split('\n'))
+                'lines_count': 0,
+                'cache_hit': False
             }
         }
         
         try:
-            # Выполнение проверок
-            check_results = {}
+            # Код разбивается на строки один раз; независимые группы проверок
+            # выполняются конкурентно и используют общий результат разбиения
+            source = split_source(code)
+            result['metadata']['lines_count'] = len(source.lines)
             
+            checks = {}
             if 'syntax' in self.enabled_checks:
-                syntax_result = await self._validate_syntax(code)
-                check_results['syntax'] = syntax_result
-                self._update_result_with_syntax(result, syntax_result)
-            
+                checks['syntax'] = self._validate_syntax(code)
             if 'standards' in self.enabled_checks:
-                standards_result = await self._validate_standards(code, context)
-                check_results['standards'] = standards_result
-                self._update_result_with_standards(result, standards_result)
-            
+                checks['standards'] = self._validate_standards(code, context, module_level)
             if 'security' in self.enabled_checks:
-                security_result = await self._validate_security(code)
-                check_results['security'] = security_result
-                self._update_result_with_security(result, security_result)
-            
+                checks['security'] = self._validate_security(code)
             if 'performance' in self.enabled_checks:
-                performance_result = await self._validate_performance(code, context)
-                check_results['performance'] = performance_result
-                self._update_result_with_performance(result, performance_result)
+                checks['performance'] = self._validate_performance(code, context)
+            
+            check_results = dict(zip(checks, await asyncio.gather(*checks.values())))
+            
+            # Результаты применяются в фиксированном порядке
+            if 'syntax' in check_results:
+                self._update_result_with_syntax(result, check_results['syntax'])
+            if 'standards' in check_results:
+                self._update_result_with_standards(result, check_results['standards'])
+            if 'security' in check_results:
+                self._update_result_with_security(result, check_results['security'])
+            if 'performance' in check_results:
+                self._update_result_with_performance(result, check_results['performance'])
             
             # Обновление метаданных
             execution_time = (datetime.now() - start_time).total_seconds()
@@ -167,9 +447,10 @@ class CodeValidator:
             result['errors'].append(f"Ошибка валидации: {str(e)}")
             result['score'] = 0
             self.validation_stats['validation_errors'] += 1
+            cacheable = False
             logger.error(f"Ошибка валидации кода: {e}")
         
-        return result
+        return result, cacheable
     
     async def _validate_syntax(self, code: str) -> List[SyntaxValidationResult]:
         """Синтаксическая валидация"""
@@ -177,25 +458,9 @@ class CodeValidator:
         errors = []
         
         try:
-            # Проверка баланса скобок
-            bracket_errors = self._check_bracket_balance(code)
-            errors.extend(bracket_errors)
-            
-            # Проверка корректности процедур и функций
-            procedure_errors = self._check_procedures_functions(code)
-            errors.extend(procedure_errors)
-            
-            # Проверка синтаксиса областей
-            region_errors = self._check_regions(code)
-            errors.extend(region_errors)
-            
-            # Проверка корректности строк
-            string_errors = self._check_string_syntax(code)
-            errors.extend(string_errors)
-            
-            # Проверка комментариев
-            comment_errors = self._check_comment_syntax(code)
-            errors.extend(comment_errors)
+            # Скобки, процедуры/функции, области, строки и комментарии -
+            # за один проход по строкам
+            errors.extend(self._check_syntax(split_source(code)))
             
         except Exception as e:
             logger.error(f"Ошибка синтаксической валидации: {e}")
@@ -206,7 +471,8 @@ class CodeValidator:
         
         return errors
     
-    async def _validate_standards(self, code: str, context: Dict[str, Any]) -> List[StandardComplianceResult]:
+    async def _validate_standards(self, code: str, context: Dict[str, Any],
+                                  module_level: bool = True) -> List[StandardComplianceResult]:
         """Проверка соответствия стандартам"""
         
         results = []
@@ -215,9 +481,10 @@ class CodeValidator:
         naming_result = self._check_naming_standards(code)
         results.append(naming_result)
         
-        # Проверка структуры кода
-        structure_result = self._check_code_structure(code)
-        results.append(structure_result)
+        # Проверка структуры кода (только для модуля целиком)
+        if module_level:
+            structure_result = self._check_code_structure(code)
+            results.append(structure_result)
         
         # Проверка документирования
         documentation_result = self._check_documentation_standards(code)
@@ -235,21 +502,22 @@ class CodeValidator:
         vulnerabilities = []
         risk_factors = []
         
-        # Проверка SQL-инъекций
-        sql_vulnerabilities = self._check_sql_injections(code)
-        vulnerabilities.extend(sql_vulnerabilities)
-        
-        # Проверка XSS уязвимостей
-        xss_vulnerabilities = self._check_xss_vulnerabilities(code)
-        vulnerabilities.extend(xss_vulnerabilities)
-        
-        # Проверка опасных функций
-        dangerous_functions = self._check_dangerous_functions(code)
-        vulnerabilities.extend(dangerous_functions)
-        
-        # Проверка утечек информации
-        information_leaks = self._check_information_leaks(code)
-        vulnerabilities.extend(information_leaks)
+        # SQL-инъекции, XSS, опасные функции и утечки информации -
+        # все правила за один проход по коду
+        scan = _SECURITY_ENGINE.scan(code)
+        
+        for group in ('sql_injection', 'xss', 'dangerous_function', 'information_leak'):
+            for finding in scan.group(group):
+                vulnerability = {
+                    'type': group,
+                    'line': finding.line_number,
+                    'description': finding.rule.description,
+                    'severity': finding.rule.severity,
+                    'line_content': finding.line_content
+                }
+                if finding.rule.tag:
+                    vulnerability['function'] = finding.rule.tag
+                vulnerabilities.append(vulnerability)
         
         # Вычисление уровня риска
         risk_level = self._calculate_security_risk_level(vulnerabilities)
@@ -299,21 +567,35 @@ class CodeValidator:
             'performance_score': self._calculate_performance_score(issues, metrics)
         }
     
-    def _check_bracket_balance(self, code: str) -> List[SyntaxValidationResult]:
-        """Проверка баланса скобок"""
+    def _check_syntax(self, source: SourceLines) -> List[SyntaxValidationResult]:
+        """
+        Проверка скобок, процедур/функций, областей, строк и комментариев
         
-        errors = []
-        lines = code.split('\n')
+        Один проход по строкам; ошибки возвращаются сгруппированными по
+        виду проверки (скобки, процедуры, области, строки, комментарии).
+        """
+        
+        bracket_errors = []
+        procedure_errors = []
+        region_errors = []
+        string_errors = []
+        comment_errors = []
         
-        for line_num, line in enumerate(lines, 1):
+        bracket_stack = []
+        procedure_stack = []
+        region_stack = []
+        
+        for line_num, (line, line_stripped) in enumerate(zip(source.lines, source.stripped), 1):
+            # Баланс скобок (в пределах строки)
             bracket_stack = []
-            
-            for col, char in enumerate(line):
+            for bracket in _BRACKET_RE.finditer(line):
+                char = bracket.group()
+                col = bracket.start()
                 if char in '([{':
                     bracket_stack.append((char, col))
-                elif char in ')]}':
+                else:
                     if not bracket_stack:
-                        errors.append(SyntaxValidationResult(
+                        bracket_errors.append(SyntaxValidationResult(
                             line_number=line_num,
                             column=col,
                             error_type="unmatched_bracket",
@@ -323,45 +605,20 @@ class CodeValidator:
                     else:
                         opening_bracket, opening_col = bracket_stack.pop()
                         if not self._brackets_match(opening_bracket, char):
-                            errors.append(SyntaxValidationResult(
+                            bracket_errors.append(SyntaxValidationResult(
                                 line_number=line_num,
                                 column=col,
                                 error_type="mismatched_brackets",
                                 message=f"Несоответствующие скобки: {opening_bracket} и {char}",
                                 severity="error"
                             ))
-        
-        # Проверка незакрытых скобок
-        for bracket, col in bracket_stack:
-            errors.append(SyntaxValidationResult(
-                line_number=len(lines),
-                column=col,
-                error_type="unclosed_bracket",
-                message=f"Незакрытая скобка: {bracket}",
-                severity="error"
-            ))
-        
-        return errors
-    
-    def _check_procedures_functions(self, code: str) -> List[SyntaxValidationResult]:
-        """Проверка процедур и функций"""
-        
-        errors = []
-        lines = code.split('\n')
-        
-        procedure_stack = []
-        
-        for line_num, line in enumerate(lines, 1):
-            line_stripped = line.strip()
             
-            # Поиск начал процедур/функций
+            # Начала и окончания процедур/функций
             if line_stripped.startswith('Процедура ') or line_stripped.startswith('Функция '):
                 procedure_stack.append((line_num, line_stripped.split()[1]))
-            
-            # Поиск окончаний
             elif line_stripped == 'КонецПроцедуры' or line_stripped == 'КонецФункции':
                 if not procedure_stack:
-                    errors.append(SyntaxValidationResult(
+                    procedure_errors.append(SyntaxValidationResult(
                         line_number=line_num,
                         column=0,
                         error_type="unexpected_end",
@@ -370,37 +627,13 @@ class CodeValidator:
                     ))
                 else:
                     procedure_stack.pop()
-        
-        # Проверка незакрытых процедур
-        for line_num, proc_name in procedure_stack:
-            errors.append(SyntaxValidationResult(
-                line_number=line_num,
-                column=0,
-                error_type="unclosed_procedure",
-                message=f"Незакрытая процедура: {proc_name}",
-                severity="error"
-            ))
-        
-        return errors
-    
-    def _check_regions(self, code: str) -> List[SyntaxValidationResult]:
-        """Проверка областей"""
-        
-        errors = []
-        lines = code.split('\n')
-        
-        region_stack = []
-        
-        for line_num, line in enumerate(lines, 1):
-            line_stripped = line.strip()
             
+            # Области
             if line_stripped.startswith('#Область '):
-                region_name = line_stripped[9:].strip()
-                region_stack.append((line_num, region_name))
-            
+                region_stack.append((line_num, line_stripped[9:].strip()))
             elif line_stripped == '#КонецОбласти':
                 if not region_stack:
-                    errors.append(SyntaxValidationResult(
+                    region_errors.append(SyntaxValidationResult(
                         line_number=line_num,
                         column=0,
                         error_type="unexpected_region_end",
@@ -409,31 +642,10 @@ class CodeValidator:
                     ))
                 else:
                     region_stack.pop()
-        
-        # Проверка незакрытых областей
-        for line_num, region_name in region_stack:
-            errors.append(SyntaxValidationResult(
-                line_number=line_num,
-                column=0,
-                error_type="unclosed_region",
-                message=f"Незакрытая область: {region_name}",
-                severity="error"
-            ))
-        
-        return errors
-    
-    def _check_string_syntax(self, code: str) -> List[SyntaxValidationResult]:
-        """Проверка синтаксиса строк"""
-        
-        errors = []
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            quote_count = line.count('"')
             
-            # Проверка нечетного количества кавычек
-            if quote_count % 2 != 0:
-                errors.append(SyntaxValidationResult(
+            # Строки: нечетное количество кавычек
+            if line.count('"') % 2 != 0:
+                string_errors.append(SyntaxValidationResult(
                     line_number=line_num,
                     column=0,
                     error_type="unbalanced_quotes",
@@ -441,42 +653,32 @@ class CodeValidator:
                     severity="error"
                 ))
             
-            # Проверка экранирования
-            i = 0
-            while i < len(line) - 1:
-                if line[i] == '"' and line[i + 1] == '"':
-                    # Правильное экранирование кавычки
-                    i += 2
-                elif line[i] == '\\' and line[i + 1] == '"':
-                    # Неправильное экранирование
-                    errors.append(SyntaxValidationResult(
-                        line_number=line_num,
-                        column=i,
-                        error_type="invalid_escape",
-                        message="Неправильное экранирование кавычки",
-                        severity="warning"
-                    ))
-                    i += 1
-                else:
-                    i += 1
-        
-        return errors
-    
-    def _check_comment_syntax(self, code: str) -> List[SyntaxValidationResult]:
-        """Проверка синтаксиса комментариев"""
-        
-        errors = []
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            # Проверка корректности комментариев
-            comment_pos = line.find('//')
+            # Строки: экранирование (\" вместо "")
+            if '\\"' in line:
+                i = 0
+                while i < len(line) - 1:
+                    if line[i] == '"' and line[i + 1] == '"':
+                        # Правильное экранирование кавычки
+                        i += 2
+                    elif line[i] == '\\' and line[i + 1] == '"':
+                        # Неправильное экранирование
+                        string_errors.append(SyntaxValidationResult(
+                            line_number=line_num,
+                            column=i,
+                            error_type="invalid_escape",
+                            message="Неправильное экранирование кавычки",
+                            severity="warning"
+                        ))
+                        i += 1
+                    else:
+                        i += 1
             
+            # Комментарии: перед // должен быть завершенный оператор
+            comment_pos = line.find('//')
             if comment_pos > 0:
-                # Проверка что перед // нет кода (за исключением пробелов)
                 before_comment = line[:comment_pos].strip()
                 if before_comment and not before_comment.endswith(';') and not before_comment.endswith(','):
-                    errors.append(SyntaxValidationResult(
+                    comment_errors.append(SyntaxValidationResult(
                         line_number=line_num,
                         column=comment_pos,
                         error_type="comment_placement",
@@ -484,7 +686,37 @@ class CodeValidator:
                         severity="warning"
                     ))
         
-        return errors
+        # Незакрытые скобки (последней строки)
+        for bracket, col in bracket_stack:
+            bracket_errors.append(SyntaxValidationResult(
+                line_number=len(source.lines),
+                column=col,
+                error_type="unclosed_bracket",
+                message=f"Незакрытая скобка: {bracket}",
+                severity="error"
+            ))
+        
+        # Незакрытые процедуры
+        for line_num, proc_name in procedure_stack:
+            procedure_errors.append(SyntaxValidationResult(
+                line_number=line_num,
+                column=0,
+                error_type="unclosed_procedure",
+                message=f"Незакрытая процедура: {proc_name}",
+                severity="error"
+            ))
+        
+        # Незакрытые области
+        for line_num, region_name in region_stack:
+            region_errors.append(SyntaxValidationResult(
+                line_number=line_num,
+                column=0,
+                error_type="unclosed_region",
+                message=f"Незакрытая область: {region_name}",
+                severity="error"
+            ))
+        
+        return bracket_errors + procedure_errors + region_errors + string_errors + comment_errors
     
     def _check_naming_standards(self, code: str) -> StandardComplianceResult:
         """Проверка стандартов именования"""
@@ -492,30 +724,21 @@ class CodeValidator:
         violations = []
         recommendations = []
         
-        # Паттерны для проверки именования
-        procedure_pattern = r'Процедура\s+([a-zA-Zа-яА-Я_][a-zA-Zа-яА-Я0-9_]*)\s*\('
-        function_pattern = r'Функция\s+([a-zA-Zа-яА-Я_][a-zA-Zа-яА-Я0-9_]*)\s*\('
-        variable_pattern = r'Перем\s+([a-zA-Zа-яА-Я_][a-zA-Zа-яА-Я0-9_]*)'
-        
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            line_stripped = line.strip()
-            
+        for line_num, line_stripped in enumerate(split_source(code).stripped, 1):
             # Проверка процедур
-            for match in re.finditer(procedure_pattern, line_stripped):
+            for match in _PROCEDURE_NAME_RE.finditer(line_stripped):
                 proc_name = match.group(1)
                 if not self._is_valid_procedure_name(proc_name):
                     violations.append(f"Строка {line_num}: Некорректное имя процедуры '{proc_name}'")
             
             # Проверка функций
-            for match in re.finditer(function_pattern, line_stripped):
+            for match in _FUNCTION_NAME_RE.finditer(line_stripped):
                 func_name = match.group(1)
                 if not self._is_valid_function_name(func_name):
                     violations.append(f"Строка {line_num}: Некорректное имя функции '{func_name}'")
             
             # Проверка переменных
-            for match in re.finditer(variable_pattern, line_stripped):
+            for match in _VARIABLE_NAME_RE.finditer(line_stripped):
                 var_name = match.group(1)
                 if not self._is_valid_variable_name(var_name):
                     violations.append(f"Строка {line_num}: Некорректное имя переменной '{var_name}'")
@@ -541,14 +764,14 @@ class CodeValidator:
         violations = []
         recommendations = []
         
-        lines = code.split('\n')
+        stripped_lines = split_source(code).stripped
         has_regions = False
         has_program_interface = False
         
-        for line in lines:
-            if line.strip().startswith('#Область'):
+        for line_stripped in stripped_lines:
+            if line_stripped.startswith('#Область'):
                 has_regions = True
-            if line.strip().startswith('#Область ПрограммныйИнтерфейс'):
+            if line_stripped.startswith('#Область ПрограммныйИнтерфейс'):
                 has_program_interface = True
         
         # Проверка использования областей
@@ -563,8 +786,8 @@ class CodeValidator:
         
         # Проверка пустых строк
         consecutive_empty_lines = 0
-        for line in lines:
-            if not line.strip():
+        for line_stripped in stripped_lines:
+            if not line_stripped:
                 consecutive_empty_lines += 1
                 if consecutive_empty_lines > 2:
                     violations.append(f"Слишком много пустых строк подряд: {consecutive_empty_lines}")
@@ -588,23 +811,20 @@ class CodeValidator:
         violations = []
         recommendations = []
         
-        lines = code.split('\n')
+        stripped_lines = split_source(code).stripped
         procedure_count = 0
         documented_procedures = 0
         
-        for line in lines:
-            line_stripped = line.strip()
-            
+        for line_index, line_stripped in enumerate(stripped_lines):
             if line_stripped.startswith('Процедура ') or line_stripped.startswith('Функция '):
                 procedure_count += 1
                 
                 # Проверка наличия комментария перед процедурой
-                line_index = lines.index(line)
                 has_comment = False
                 
                 # Поиск комментария в предыдущих строках
                 for i in range(max(0, line_index - 3), line_index):
-                    if lines[i].strip().startswith('//'):
+                    if stripped_lines[i].startswith('//'):
                         has_comment = True
                         break
                 
@@ -657,132 +877,14 @@ class CodeValidator:
             recommendations=recommendations
         )
     
-    def _check_sql_injections(self, code: str) -> List[Dict[str, Any]]:
-        """Проверка SQL-инъекций"""
-        
-        vulnerabilities = []
-        
-        # Паттерны потенциальных SQL-инъекций
-        dangerous_patterns = [
-            r'Выполнить\s*\(\s*["\'].*\+.*["\']',  # Выполнить с конкатенацией
-            r'Запрос\s*\.\s*Текст\s*=.*\+',        # Конкатенация в тексте запроса
-            r'СтрЗаменить.*["\']\s*\+',            # СтрЗаменить с конкатенацией
-        ]
-        
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            for pattern in dangerous_patterns:
-                if re.search(pattern, line, re.IGNORECASE):
-                    vulnerabilities.append({
-                        'type': 'sql_injection',
-                        'line': line_num,
-                        'description': 'Потенциальная SQL-инъекция через конкатенацию строк',
-                        'severity': 'high',
-                        'line_content': line.strip()
-                    })
-        
-        return vulnerabilities
-    
-    def _check_xss_vulnerabilities(self, code: str) -> List[Dict[str, Any]]:
-        """Проверка XSS уязвимостей"""
-        
-        vulnerabilities = []
-        
-        # Паттерны XSS уязвимостей
-        xss_patterns = [
-            r'ЭлементыФормы\.[^.]+\.Значение\s*=.*\+',  # Присваивание с конкатенацией
-            r'ТекстHTML\s*=.*\+',                        # Установка HTML с конкатенацией
-            r'НавигационнаяСсылка\s*=.*\+',            # Установка ссылки с конкатенацией
-        ]
-        
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            for pattern in xss_patterns:
-                if re.search(pattern, line, re.IGNORECASE):
-                    vulnerabilities.append({
-                        'type': 'xss',
-                        'line': line_num,
-                        'description': 'Потенциальная XSS уязвимость через конкатенацию',
-                        'severity': 'medium',
-                        'line_content': line.strip()
-                    })
-        
-        return vulnerabilities
-    
-    def _check_dangerous_functions(self, code: str) -> List[Dict[str, Any]]:
-        """Проверка опасных функций"""
-        
-        vulnerabilities = []
-        
-        # Опасные функции
-        dangerous_functions = {
-            'Выполнить': {'severity': 'high', 'description': 'Выполнение произвольного кода'},
-            'ЗагрузитьИзФайла': {'severity': 'medium', 'description': 'Загрузка произвольного файла'},
-            'ПолучитьФайл': {'severity': 'medium', 'description': 'Получение файла из внешнего источника'},
-            'ПодключитьВнешнююОбработку': {'severity': 'high', 'description': 'Подключение внешней обработки'},
-        }
-        
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            for func_name, func_info in dangerous_functions.items():
-                if re.search(r'\b' + func_name + r'\s*\(', line, re.IGNORECASE):
-                    vulnerabilities.append({
-                        'type': 'dangerous_function',
-                        'function': func_name,
-                        'line': line_num,
-                        'description': f"Использование опасной функции: {func_info['description']}",
-                        'severity': func_info['severity'],
-                        'line_content': line.strip()
-                    })
-        
-        return vulnerabilities
-    
-    def _check_information_leaks(self, code: str) -> List[Dict[str, Any]]:
-        """Проверка утечек информации"""
-        
-        vulnerabilities = []
-        
-        # Паттерны утечек информации
-        leak_patterns = [
-            r'Сообщить\s*\(\s*.*[Пп]ароль.*\)',       # Вывод паролей
-            r'Сообщить\s*\(\s*.*[Кк]люч.*\)',        # Вывод ключей
-            r'ЗаписьЛога.*пароль',                    # Запись паролей в лог
-            r'ЗаписьЛога.*ключ',                      # Запись ключей в лог
-        ]
-        
-        lines = code.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            for pattern in leak_patterns:
-                if re.search(pattern, line, re.IGNORECASE):
-                    vulnerabilities.append({
-                        'type': 'information_leak',
-                        'line': line_num,
-                        'description': 'Потенциальная утечка конфиденциальной информации',
-                        'severity': 'high',
-                        'line_content': line.strip()
-                    })
-        
-        return vulnerabilities
-    
     def _calculate_cyclomatic_complexity(self, code: str) -> int:
         """Вычисление цикломатической сложности"""
         
         complexity = 1  # Базовое значение
         
-        # Ключевые слова, увеличивающие сложность
-        complexity_keywords = [
-            r'\bЕсли\b', r'\bИначеЕсли\b', r'\bИначе\b',
-            r'\bДля\b', r'\bПо\b', r'\bПока\b',
-            r'\bПопытка\b', r'\bИсключение\b',
-            r'\bИ\b', r'\bИЛИ\b', r'\bНЕ\b'
-        ]
-        
-        for keyword in complexity_keywords:
-            complexity += len(re.findall(keyword, code, re.IGNORECASE))
+        # Ключевые слова, увеличивающие сложность - одним проходом
+        for _ in _COMPLEXITY_RE.finditer(code):
+            complexity += 1
         
         return complexity
     
@@ -792,11 +894,7 @@ class CodeValidator:
         max_depth = 0
         current_depth = 0
         
-        lines = code.split('\n')
-        
-        for line in lines:
-            line_stripped = line.strip()
-            
+        for line_stripped in split_source(code).stripped:
             # Увеличение глубины
             if any(keyword in line_stripped for keyword in ['Если', 'Для', 'Пока', 'Попытка']):
                 current_depth += 1
@@ -813,15 +911,8 @@ class CodeValidator:
         
         issues = []
         
-        # Паттерны проблем производительности
-        performance_patterns = [
-            (r'Для\s+.*\s+Цикл\s*\n.*\n.*Запрос', 'Запрос внутри цикла'),
-            (r'Получить\s*\([^)]*\)\s*\.\s*\w+\s*.*\n.*\n.*Для', 'Чтение в цикле'),
-            (r'\w+\s*=\s*\w+\s*\.\s*Найти\([^)]*\)\s*\n.*\n.*\w+\s*=', 'Повторный поиск в цикле'),
-        ]
-        
-        for pattern, issue_description in performance_patterns:
-            if re.search(pattern, code, re.MULTILINE | re.IGNORECASE):
+        for pattern, issue_description in _PERFORMANCE_PATTERNS:
+            if pattern.search(code):
                 issues.append(issue_description)
         
         return issues
@@ -830,19 +921,19 @@ class CodeValidator:
         """Анализ размеров функций"""
         
         function_sizes = []
-        lines = code.split('\n')
+        lines = split_source(code).stripped
         current_function_lines = 0
         
         i = 0
         while i < len(lines):
-            line = lines[i].strip()
+            line = lines[i]
             
             if line.startswith('Процедура ') or line.startswith('Функция '):
                 current_function_lines = 0
                 # Считаем строки до конца процедуры/функции
                 j = i + 1
                 while j < len(lines):
-                    inner_line = lines[j].strip()
+                    inner_line = lines[j]
                     if inner_line in ['КонецПроцедуры', 'КонецФункции']:
                         function_sizes.append(current_function_lines)
                         break
@@ -858,14 +949,14 @@ class CodeValidator:
         """Поиск слишком больших процедур"""
         
         large_procedures = []
-        lines = code.split('\n')
+        lines = split_source(code).stripped
         
         i = 0
         while i < len(lines):
-            line = lines[i].strip()
+            line = lines[i]
             
             if line.startswith('Процедура ') or line.startswith('Функция '):
-                proc_name = re.search(r'(?:Процедура Функция)\s+(\w+)', line)
+                proc_name = _LARGE_PROCEDURE_NAME_RE.search(line)
                 if proc_name:
                     name = proc_name.group(1)
                     
@@ -874,7 +965,7 @@ class CodeValidator:
                     j = i + 1
                     
                     while j < len(lines):
-                        inner_line = lines[j].strip()
+                        inner_line = lines[j]
                         if inner_line in ['КонецПроцедуры', 'КонецФункции']:
                             break
                         current_lines += 1
@@ -890,21 +981,12 @@ class CodeValidator:
     def _analyze_global_usage(self, code: str) -> Dict[str, Any]:
         """Анализ использования глобальных объектов"""
         
-        global_objects = [
-            'Метаданные', 'ЭтотОбъект', 'Константы', 'Справочники', 
-            'Документы', 'Регистры', 'Обработки', 'Отчеты'
-        ]
-        
-        usage_count = 0
-        found_objects = []
-        
-        for obj in global_objects:
-            if re.search(r'\b' + obj + r'\b', code):
-                usage_count += 1
-                found_objects.append(obj)
+        # Все глобальные объекты - одним проходом
+        used = {match.group(1) for match in _GLOBAL_OBJECTS_RE.finditer(code)}
+        found_objects = [obj for obj in _GLOBAL_OBJECTS if obj in used]
         
         return {
-            'count': usage_count,
+            'count': len(found_objects),
             'objects': found_objects
         }
     
@@ -1124,6 +1206,24 @@ class CodeValidator:
             'performance_patterns': True
         }
     
+    def _calculate_config_fingerprint(self) -> str:
+        """Отпечаток конфигурации валидатора для ключа кэша"""
+        
+        fingerprint_data = {
+            'rules_version': RULES_VERSION,
+            'config': {key: value for key, value in self.config.items() if key not in _CACHE_CONFIG_KEYS}
+        }
+        fingerprint_string = json.dumps(fingerprint_data, sort_keys=True, default=str)
+        return hashlib.md5(fingerprint_string.encode('utf-8')).hexdigest()[:16]
+    
+    def clear_cache(self):
+        """Очистка кэша результатов валидации"""
+        self.result_cache.clear()
+    
+    def save_cache(self) -> bool:
+        """Сохранение кэша результатов на диск (если задан cache_path)"""
+        return self.result_cache.save()
+    
     def get_status(self) -> Dict[str, Any]:
         """Получение статуса валидатора"""
         return {
@@ -1132,5 +1232,6 @@ class CodeValidator:
             'strict_mode': self.strict_mode,
             'auto_fix': self.auto_fix,
             'validation_stats': self.validation_stats.copy(),
+            'cache': self.result_cache.get_stats() if self.cache_enabled else {'enabled': False},
             'version': '1.0'
         }
\ No newline at end of file
@@ -0,0 +1,84 @@
+# [NEXUS IDENTITY] ID: 3318027465190452871 | DATE: 2026-10-17
+
+"""
+Тесты для движка построчных правил.
+"""
+
+import re
+
+from src.py_server.code_generation.utils.rule_engine import (RuleEngine,
+                                                             ScanRule,
+                                                             split_source)
+
+RULES = (
+    ScanRule('sql_1', 'sql_injection', r'Запрос\.Текст\s*=\s*.*\+', 'high', 'Конкатенация в запросе'),
+    ScanRule('sql_2', 'sql_injection', r'ВЫПОЛНИТЬ\s*\(', 'critical', 'Динамическое выполнение'),
+    ScanRule('eval', 'dangerous_function', r'\bВычислить\s*\(', 'high', 'Вычислить', tag='Вычислить'),
+    ScanRule('literal', 'blocked', re.escape('eval('), 'critical', 'Блокированный паттерн', flags=0),
+)
+
+CODE = '''Процедура Тест()
+    Запрос.Текст = "ВЫБРАТЬ * ИЗ Т ГДЕ Имя = " + Имя;
+    Результат = Вычислить(Выражение);
+    Выполнить(Код); eval(x)
+КонецПроцедуры'''
+
+
+class TestRuleEngine:
+    """Тесты для класса RuleEngine."""
+
+    def test_scan_matches_per_line_search(self):
+        """Тест эквивалентности построчному re.search по каждому правилу."""
+        engine = RuleEngine(RULES)
+        result = engine.scan(CODE)
+
+        expected = []
+        for line_number, line in enumerate(CODE.split('\n'), 1):
+            for rule in RULES:
+                match = re.search(rule.pattern, line, rule.flags)
+                if match:
+                    expected.append((rule.rule_id, line_number, match.start()))
+
+        assert [(f.rule.rule_id, f.line_number, f.column) for f in result.findings] == expected
+
+    def test_rule_flags_are_local(self):
+        """Тест того, что флаги правила не влияют на другие правила."""
+        engine = RuleEngine(RULES)
+
+        assert engine.scan('EVAL(x)').group('blocked') == []
+        assert len(engine.scan('eval(x)').group('blocked')) == 1
+        assert len(engine.scan('выполнить (x)').group('sql_injection')) == 1
+
+    def test_group_filter_and_line_content(self):
+        """Тест фильтрации срабатываний по группам."""
+        result = RuleEngine(RULES).scan(CODE)
+
+        dangerous = result.group('dangerous_function')
+        assert len(dangerous) == 1
+        assert dangerous[0].rule.tag == 'Вычислить'
+        assert dangerous[0].line_content == 'Результат = Вычислить(Выражение);'
+        assert {f.rule.group for f in result.group('sql_injection', 'blocked')} == {'sql_injection', 'blocked'}
+
+    def test_scan_result_is_cached(self):
+        """Тест кэширования результата по тексту кода."""
+        engine = RuleEngine(RULES, cache_size=1)
+
+        first = engine.scan(CODE)
+        assert engine.scan(CODE) is first
+        engine.scan('Сообщить(1);')
+        assert engine.scan(CODE) is not first
+
+    def test_empty_rules(self):
+        """Тест движка без правил."""
+        assert RuleEngine(()).scan(CODE).findings == ()
+
+
+def test_split_source():
+    """Тест разбиения кода на строки."""
+    source = split_source('А = 1;\n  Б = 2;\n')
+
+    assert source.lines == ('А = 1;', '  Б = 2;', '')
+    assert source.stripped == ('А = 1;', 'Б = 2;', '')
+    assert source.line_starts == (0, 7, 16)
+    assert source.line_index(9) == 1
+    assert split_source('А = 1;\n  Б = 2;\n') is source
@@ -0,0 +1,129 @@
+# [NEXUS IDENTITY] ID: -2817465093371628455 | DATE: 2026-10-17
+
+"""
+Тесты для кэша результатов валидации.
+"""
+
+import time
+
+import pytest
+
+from src.py_server.code_generation.utils.rule_engine import split_source
+from src.py_server.code_generation.validation.cache import ValidationCache
+from src.py_server.code_generation.validation.validator import (
+    CodeValidator, split_procedures)
+
+PROCEDURE = '''// Обработка {n}
+&НаСервере
+Процедура Обработка{n}(Параметр) Экспорт
+    Если Параметр > {n} Тогда
+        Сообщить("Значение: " + Параметр);
+    КонецЕсли;
+КонецПроцедуры
+'''
+
+MODULE = (
+    "#Область ПрограммныйИнтерфейс\n\n"
+    + "\n".join(PROCEDURE.format(n=n) for n in range(5))
+    + "#КонецОбласти\n"
+)
+
+
+class TestValidationCache:
+    """Тесты для класса ValidationCache."""
+
+    def test_get_returns_independent_copy(self):
+        """Тест того, что изменение результата не портит кэш."""
+        cache = ValidationCache()
+        cache.set('key', {'errors': []})
+
+        cache.get('key')['errors'].append('x')
+        assert cache.get('key') == {'errors': []}
+        assert cache.get('missing') is None
+        assert cache.get_stats()['hits'] == 2
+
+    def test_lru_eviction_and_ttl(self):
+        """Тест ограничения размера и времени жизни записей."""
+        cache = ValidationCache(max_entries=2, ttl=0.05)
+        cache.set('a', {})
+        cache.set('b', {})
+        cache.get('a')
+        cache.set('c', {})
+
+        assert cache.get('b') is None
+        assert cache.get('a') == {}
+
+        time.sleep(0.06)
+        assert cache.get('a') is None
+        assert cache.get_stats()['expirations'] == 1
+
+    def test_persistence(self, tmp_path):
+        """Тест сохранения кэша на диск."""
+        path = str(tmp_path / 'cache' / 'validation.json')
+        cache = ValidationCache(persist_path=path)
+        cache.set('key', {'score': 90})
+        assert cache.save()
+
+        assert ValidationCache(persist_path=path).get('key') == {'score': 90}
+        assert ValidationCache(persist_path=path, ttl=1e-9).get('key') is None
+
+
+class TestCodeValidatorCache:
+    """Тесты кэширования в CodeValidator."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_validation_is_cached(self):
+        """Тест повторной валидации того же кода."""
+        validator = CodeValidator({})
+
+        first = await validator.validate_code(MODULE)
+        second = await validator.validate_code(MODULE)
+
+        assert first['metadata']['cache_hit'] is False
+        assert second['metadata']['cache_hit'] is True
+        assert second['errors'] == first['errors']
+        assert second['score'] == first['score']
+        assert validator.validation_stats['total_validations'] == 2
+        assert validator.validation_stats['cache_hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_config_is_part_of_cache_key(self, tmp_path):
+        """Тест того, что результат другой конфигурации не используется."""
+        path = str(tmp_path / 'validation.json')
+        validator = CodeValidator({'cache_path': path})
+        await validator.validate_code(MODULE)
+        validator.save_cache()
+
+        same_config = CodeValidator({'cache_path': path, 'cache_ttl': 60})
+        assert (await same_config.validate_code(MODULE))['metadata']['cache_hit'] is True
+
+        other_config = CodeValidator({'cache_path': path, 'enabled_checks': ['syntax']})
+        assert (await other_config.validate_code(MODULE))['metadata']['cache_hit'] is False
+
+    @pytest.mark.asyncio
+    async def test_incremental_validation_revalidates_changed_procedure(self):
+        """Тест инкрементальной валидации по процедурам."""
+        validator = CodeValidator({})
+
+        first = await validator.validate_procedures(MODULE)
+        assert first['metadata']['segments'] == 6
+        assert first['metadata']['revalidated_segments'] == 6
+
+        edited = MODULE.replace('Параметр > 3 Тогда', 'Параметр > 4 Тогда')
+        second = await validator.validate_procedures(edited)
+        assert second['metadata']['revalidated_segments'] == 1
+        changed = [p['name'] for p in second['procedures'] if not p['cache_hit']]
+        assert changed == ['Обработка3']
+
+
+def test_split_procedures():
+    """Тест разбиения модуля на процедуры."""
+    segments = split_procedures(split_source(MODULE))
+
+    assert [s.name for s in segments] == ['Модуль'] + [f'Обработка{n}' for n in range(5)]
+    first = segments[1]
+    assert first.start_line == 3
+    assert first.code.startswith('// Обработка 0\n&НаСервере\nПроцедура')
+    assert first.code.endswith('КонецПроцедуры')
+
+    assert split_procedures(split_source('Процедура А()\nПроцедура Б()\nКонецПроцедуры')) is None
@@ -17,6 +17,7 @@ Cache package для 1C MCP сервера
   * ConditionalGET - обработка If-None-Match запросов
   * HTTP 304 Not Modified ответы
   * Метрики производительности кэша
+  * InMemoryResponseStore / RedisResponseBackend - хранилища ответов
 
 Примеры использования:
 
@@ -56,6 +57,8 @@ from .http_cache import CacheMetrics as HTTPCacheMetrics
 from .http_cache import (CacheMetricsCollector, ConditionalGET, ETagManager,
                          HTTPCacheMiddleware, metrics_collector,
                          setup_cache_middleware)
+from .response_store import (InMemoryResponseStore, RedisResponseBackend,
+                             ResponseCacheBackend)
 from .mcp_cache import CacheEntry as MCPCacheEntry
 from .mcp_cache import CacheInvalidation
 from .mcp_cache import CacheMetrics as MCPCacheMetrics
@@ -102,5 +105,8 @@ __all__ = [
     'HTTPCacheEntry',
     'CacheMetricsCollector',
     'setup_cache_middleware',
-    'metrics_collector'
+    'metrics_collector',
+    'InMemoryResponseStore',
+    'ResponseCacheBackend',
+    'RedisResponseBackend'
 ]
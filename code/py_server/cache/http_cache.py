@@ -10,6 +10,8 @@
 - ConditionalGET - обработка If-None-Match запросов
 - HTTP 304 Not Modified ответы
 - Метрики производительности кэша
+- Хранилище ответов с O(1) LRU, инкрементальной TTL очисткой и
+  опциональным разделяемым бэкендом (см. response_store.py)
 
 Основан на стандартах из docs/1c_caching_standards.md и архитектуре из 
 docs/1c_mcp_structure/1c_mcp_code_structure_analysis.md
@@ -21,22 +23,27 @@ import json
 import logging
 import time
 import weakref
-from collections import defaultdict, deque
+from collections import defaultdict
 from contextvars import ContextVar
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
-from fastapi import Request, Response
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from .response_store import InMemoryResponseStore, ResponseCacheBackend
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
 # Context variable для передачи информации о кэше между middleware
-cache_context: ContextVar[Dict[str, Any]] = field(default_factory=dict)
+cache_context: ContextVar[Dict[str, Any]] = ContextVar("http_cache_context")
+
+# Заголовки, которые пересоздаются при отдаче ответа из кэша
+_REBUILT_HEADERS = {"etag", "cache-control", "last-modified", "x-cache", "age", "content-length"}
 
 
 @dataclass
@@ -508,7 +515,8 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
     Особенности:
     - Автоматическое добавление ETag и Cache-Control
     - Поддержка условных запросов
-    - Словарь в памяти для кэширования ответов
+    - Локальное LRU хранилище с TTL и лимитом по байтам
+    - Опциональный разделяемый бэкенд для нескольких воркеров
     - Метрики производительности
     """
     
@@ -519,7 +527,9 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
         cache_ttl: int = 3600,  # 1 час по умолчанию
         max_cache_size: int = 1000,
         cache_key_func: Optional[Callable[[Request], str]] = None,
-        excluded_paths: Set[str] = None
+        excluded_paths: Set[str] = None,
+        max_cache_bytes: Optional[int] = None,
+        shared_backend: Optional[ResponseCacheBackend] = None
     ):
         super().__init__(app)
         
@@ -529,9 +539,12 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
         self.cache_key_func = cache_key_func or self._default_cache_key
         self.excluded_paths = excluded_paths or set()
         
-        # Кэш в памяти
-        self._cache: Dict[str, CacheEntry] = {}
-        self._cache_order = deque()  # Для LRU очистки
+        # Кэш в памяти (L1) и разделяемый бэкенд (L2)
+        self._store = InMemoryResponseStore(
+            max_entries=max_cache_size,
+            max_bytes=max_cache_bytes
+        )
+        self.shared_backend = shared_backend
         
         # Метрики
         self.metrics = CacheMetrics()
@@ -540,7 +553,8 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
         self._request_count = 0
         
         logger.info(f"Initialized HTTPCacheMiddleware with TTL={cache_ttl}s, "
-                   f"max_size={max_cache_size}")
+                   f"max_size={max_cache_size}, max_bytes={max_cache_bytes}, "
+                   f"shared_backend={type(shared_backend).__name__ if shared_backend else None}")
     
     def _default_cache_key(self, request: Request) -> str:
         """
@@ -597,51 +611,60 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
         
         return True
     
-    def _cleanup_cache(self) -> None:
-        """Очищает кэш при превышении лимита (LRU)."""
-        while len(self._cache) > self.max_cache_size:
-            if not self._cache_order:
-                break
-            
-            # Удаляем самый старый элемент
-            oldest_key = self._cache_order.popleft()
-            if oldest_key in self._cache:
-                del self._cache[oldest_key]
-                self.metrics.cache_deletes += 1
-        
-        # Удаляем истекшие записи
-        now = time.time()
-        expired_keys = []
-        for key, entry in self._cache.items():
-            if entry.is_expired(now):
-                expired_keys.append(key)
+    @staticmethod
+    def _is_streaming(response: Response) -> bool:
+        """
+        Потоковый ответ, который нельзя прочитать целиком для кэша.
         
-        for key in expired_keys:
-            del self._cache[key]
-            self.cache_order.remove(key) if key in self.cache_order else None
-            self.metrics.cache_deletes += 1
+        text/event-stream и ответы без тела и без Content-Length
+        (StreamingResponse) передаются клиенту как есть.
+        """
+        media_type = response.headers.get("content-type", "")
+        if media_type.startswith("text/event-stream"):
+            return True
+        return not hasattr(response, "body") and "content-length" not in response.headers
     
     def _get_cache_entry(self, key: str) -> Optional[CacheEntry]:
-        """Получает запись из кэша."""
-        if key in self._cache:
-            entry = self._cache[key]
-            
-            # Перемещаем ключ в конец очереди (LRU)
-            if key in self._cache_order:
-                self._cache_order.remove(key)
-            self._cache_order.append(key)
-            
-            return entry
-        
-        return None
+        """Получает запись из локального кэша (O(1), продвигает в LRU)."""
+        return self._store.get(key)
     
     def _put_cache_entry(self, key: str, entry: CacheEntry) -> None:
-        """Сохраняет запись в кэш."""
-        self._cache[key] = entry
-        self._cache_order.append(key)
+        """Сохраняет запись в локальный кэш."""
+        self.metrics.cache_deletes += self._store.put(key, entry, self.cache_ttl, size=entry.size)
         self.metrics.cache_puts += 1
+    
+    async def _get_shared_entry(self, key: str) -> Optional[CacheEntry]:
+        """Получает запись из разделяемого бэкенда и прогревает локальный кэш."""
+        if self.shared_backend is None:
+            return None
         
-        self._cleanup_cache()
+        try:
+            found = await self.shared_backend.get(key)
+        except Exception as e:
+            logger.warning(f"Shared cache backend get failed: {e}")
+            return None
+        
+        if found is None:
+            return None
+        
+        entry, ttl = found
+        if ttl > 0:
+            self.metrics.cache_deletes += self._store.put(key, entry, ttl, size=entry.size)
+        return entry
+    
+    async def _put_shared_entry(self, key: str, entry: CacheEntry) -> None:
+        """Сохраняет запись в разделяемый бэкенд."""
+        if self.shared_backend is None:
+            return
+        
+        try:
+            await self.shared_backend.set(key, entry, self.cache_ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache backend set failed: {e}")
+    
+    def get_store_stats(self) -> Dict[str, Any]:
+        """Возвращает статистику локального хранилища."""
+        return self._store.get_stats()
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """
@@ -688,6 +711,8 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
                 
                 # Ищем в кэше
                 cached_entry = self._get_cache_entry(cache_key)
+                if cached_entry is None:
+                    cached_entry = await self._get_shared_entry(cache_key)
                 
                 if cached_entry and cached_entry.is_fresh(self.cache_ttl):
                     logger.debug(f"Cache HIT for {cache_key}")
@@ -716,7 +741,10 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
                             return response_304
                     
                     # Возвращаем кэшированный ответ
-                    response_headers = cached_entry.headers.copy()
+                    response_headers = {
+                        name: value for name, value in cached_entry.headers.items()
+                        if name.lower() not in _REBUILT_HEADERS
+                    }
                     response_headers.update({
                         "ETag": cached_entry.etag,
                         "Cache-Control": cached_entry.cache_control,
@@ -731,7 +759,7 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
                     # Восстанавливаем тип контента из заголовков
                     media_type = response_headers.get("content-type", "application/json")
                     
-                    if isinstance(cached_entry.content, dict):
+                    if media_type.startswith("application/json"):
                         return JSONResponse(
                             content=cached_entry.content,
                             headers=response_headers,
@@ -739,7 +767,7 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
                         )
                     else:
                         return PlainTextResponse(
-                            content=str(cached_entry.content),
+                            content=cached_entry.content,
                             headers=response_headers,
                             media_type=media_type
                         )
@@ -761,9 +789,23 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
             
             # Кэшируем ответ если нужно
             if should_cache and cache_key and response.status_code == 200:
+                if self._is_streaming(response):
+                    # SSE и потоки без Content-Length не буферизуем
+                    return response
                 try:
+                    # call_next возвращает потоковый ответ - читаем тело один раз
+                    if not hasattr(response, "body"):
+                        body = b"".join([chunk async for chunk in response.body_iterator])
+                        response = Response(
+                            content=body,
+                            status_code=response.status_code,
+                            headers=dict(response.headers),
+                            media_type=response.media_type
+                        )
+                    
                     # Извлекаем контент
-                    if isinstance(response, JSONResponse):
+                    response_type = response.headers.get("content-type", "")
+                    if isinstance(response, JSONResponse) or response_type.startswith("application/json"):
                         content = response.body.decode('utf-8')
                         content_data = json.loads(content)
                         content_type = response.media_type or "application/json"
@@ -809,6 +851,7 @@ class HTTPCacheMiddleware(BaseHTTPMiddleware):
                     )
                     
                     self._put_cache_entry(cache_key, cache_entry)
+                    await self._put_shared_entry(cache_key, cache_entry)
                     
                 except Exception as e:
                     logger.warning(f"Failed to cache response: {e}")
@@ -957,7 +1000,9 @@ def setup_cache_middleware(
     secret_key: Optional[str] = None,
     cache_ttl: int = 3600,
     max_cache_size: int = 1000,
-    excluded_paths: Set[str] = None
+    excluded_paths: Set[str] = None,
+    max_cache_bytes: Optional[int] = None,
+    shared_backend: Optional[ResponseCacheBackend] = None
 ) -> HTTPCacheMiddleware:
     """
     Удобная функция для настройки кэширования на FastAPI приложении.
@@ -968,19 +1013,21 @@ def setup_cache_middleware(
         cache_ttl: TTL кэша в секундах
         max_cache_size: Максимальный размер кэша
         excluded_paths: Пути для исключения из кэширования
+        max_cache_bytes: Лимит локального кэша в байтах
+        shared_backend: Разделяемый бэкенд (например, RedisResponseBackend)
         
     Returns:
         Настроенный middleware
     """
-    from fastapi import FastAPI
-
     # Создаем middleware
     middleware = HTTPCacheMiddleware(
         app=app,
         etag_manager=ETagManager(secret_key),
         cache_ttl=cache_ttl,
         max_cache_size=max_cache_size,
-        excluded_paths=excluded_paths
+        excluded_paths=excluded_paths,
+        max_cache_bytes=max_cache_bytes,
+        shared_backend=shared_backend
     )
     
     # Регистрируем для сбора метрик
@@ -0,0 +1,263 @@
+# [NEXUS IDENTITY] ID: 4417093380925512736 | DATE: 2026-10-17
+
+"""
+Хранилища ответов для HTTPCacheMiddleware.
+
+Компоненты:
+- InMemoryResponseStore - локальный LRU кэш на OrderedDict с O(1) продвижением,
+  инкрементальной TTL очисткой через min-heap и учетом размера в байтах
+- ResponseCacheBackend - интерфейс разделяемого бэкенда (несколько uvicorn воркеров)
+- RedisResponseBackend - разделяемый бэкенд на redis.asyncio (или совместимом клиенте)
+
+Версия: 1.0.0
+"""
+
+import heapq
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from threading import RLock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResponseStoreStats:
+    """Статистика локального хранилища."""
+    entries: int = 0
+    total_bytes: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class InMemoryResponseStore:
+    """
+    LRU хранилище ответов с TTL и ограничением по размеру.
+
+    Особенности:
+    - get/put/delete за O(1) (+ O(log n) на запись в heap истечения)
+    - Истекшие записи удаляются инкрементально с вершины heap, без полного обхода
+    - Вытеснение по количеству записей и по суммарному размеру в байтах
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._expires_at: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._total_bytes = 0
+        self._lock = RLock()
+
+        self.stats = ResponseStoreStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        """Суммарный размер записей в байтах."""
+        return self._total_bytes
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Any]:
+        """
+        Получает запись и продвигает ее в конец LRU очереди.
+
+        Args:
+            key: Ключ кэша
+            now: Текущее время (для тестов)
+
+        Returns:
+            Запись или None, если ее нет или она истекла
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if self._expires_at[key] <= now:
+                self._remove(key)
+                self.stats.expirations += 1
+                return None
+
+            self._entries.move_to_end(key)
+            return entry
+
+    def remaining_ttl(self, key: str, now: Optional[float] = None) -> float:
+        """Возвращает оставшееся время жизни записи в секундах."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expires_at = self._expires_at.get(key)
+            return max(0.0, expires_at - now) if expires_at is not None else 0.0
+
+    def put(self, key: str, entry: Any, ttl: float, size: int = 0, now: Optional[float] = None) -> int:
+        """
+        Сохраняет запись.
+
+        Args:
+            key: Ключ кэша
+            entry: Запись
+            ttl: Время жизни в секундах
+            size: Размер записи в байтах
+            now: Текущее время (для тестов)
+
+        Returns:
+            Количество удаленных (вытесненных или истекших) записей
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            expires_at = now + ttl
+            self._entries[key] = entry
+            self._expires_at[key] = expires_at
+            self._sizes[key] = size
+            self._total_bytes += size
+            heapq.heappush(self._heap, (expires_at, key))
+
+            removed = self._expire(now)
+            removed += self._evict_overflow()
+            self._compact_heap()
+            return removed
+
+    def delete(self, key: str) -> bool:
+        """Удаляет запись."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self) -> None:
+        """Полностью очищает хранилище."""
+        with self._lock:
+            self._entries.clear()
+            self._expires_at.clear()
+            self._sizes.clear()
+            self._heap.clear()
+            self._total_bytes = 0
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Удаляет все истекшие записи, возвращает их количество."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._expire(now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Возвращает статистику хранилища."""
+        with self._lock:
+            self.stats.entries = len(self._entries)
+            self.stats.total_bytes = self._total_bytes
+            return asdict(self.stats)
+
+    def _remove(self, key: str) -> None:
+        del self._entries[key]
+        del self._expires_at[key]
+        self._total_bytes -= self._sizes.pop(key, 0)
+
+    def _expire(self, now: float) -> int:
+        """Снимает истекшие записи с вершины heap (устаревшие элементы heap пропускаются)."""
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expires_at.get(key) == expires_at:
+                self._remove(key)
+                removed += 1
+        self.stats.expirations += removed
+        return removed
+
+    def _evict_overflow(self) -> int:
+        removed = 0
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            removed += 1
+        self.stats.evictions += removed
+        return removed
+
+    def _compact_heap(self) -> None:
+        """Перестраивает heap, когда в нем накопилось много устаревших элементов."""
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(expires_at, key) for key, expires_at in self._expires_at.items()]
+            heapq.heapify(self._heap)
+
+
+class ResponseCacheBackend(ABC):
+    """Интерфейс разделяемого хранилища ответов."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Возвращает (запись, оставшийся TTL) или None."""
+
+    @abstractmethod
+    async def set(self, key: str, entry: Any, ttl: float) -> None:
+        """Сохраняет запись с TTL."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Удаляет запись."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Удаляет все записи бэкенда."""
+
+
+class RedisResponseBackend(ResponseCacheBackend):
+    """
+    Разделяемый бэкенд на Redis.
+
+    Записи сериализуются в JSON (dataclass -> dict), TTL выставляется через PX,
+    поэтому истечение выполняет сам Redis. Клиент должен быть асинхронным
+    (redis.asyncio.Redis или совместимый, например fakeredis.aioredis).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        entry_factory: Callable[..., Any],
+        key_prefix: str = "http_cache:",
+    ):
+        self.client = client
+        self.entry_factory = entry_factory
+        self.key_prefix = key_prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        redis_key = self._key(key)
+        pipe = self.client.pipeline()
+        pipe.get(redis_key)
+        pipe.pttl(redis_key)
+        raw, pttl = await pipe.execute()
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        ttl = pttl / 1000.0 if pttl and pttl > 0 else 0.0
+        return self.entry_factory(**data), ttl
+
+    async def set(self, key: str, entry: Any, ttl: float) -> None:
+        payload = json.dumps(asdict(entry), ensure_ascii=False, default=str)
+        await self.client.set(self._key(key), payload, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=f"{self.key_prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
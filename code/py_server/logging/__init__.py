@@ -12,7 +12,8 @@
 
 from .config import get_correlation_id, get_logger, setup_logging
 from .formatter import StructuredFormatter, create_log_structure
-from .handlers import APMHandler, MonitorHandler, StructuredLogger
+from .handlers import (APMHandler, AsyncFileHandler, MonitorHandler,
+                       StructuredLogger)
 from .middleware import LoggingMiddleware, correlation_context
 from .sanitizers import DataSanitizer, sanitize_sensitive_data
 
@@ -38,6 +39,7 @@ __all__ = [
     "StructuredLogger",
     "MonitorHandler", 
     "APMHandler",
+    "AsyncFileHandler",
     "DataSanitizer",
     "sanitize_sensitive_data",
     "StructuredFormatter",
@@ -11,10 +11,14 @@
 """
 
 import asyncio
+import atexit
 import json
 import logging
+import os
 import threading
 import time
+import weakref
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional, Union
@@ -26,6 +30,10 @@ from .config import logging_config
 from .formatter import LogLevel, create_log_structure
 from .sanitizers import sanitize_for_logging
 
+# Кодировщик создается один раз: json.dumps с параметрами создает новый
+# JSONEncoder на каждый вызов
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
 
 class StructuredLogger:
     """Основной структурированный логгер"""
@@ -51,10 +59,15 @@ class StructuredLogger:
                 )
             )
 
-        # Файловый обработчик
+        # Файловый обработчик (с фоновым писателем при ASYNC_PROCESSING)
         if kwargs.get("file_path"):
+            file_handler_class = (
+                AsyncFileHandler
+                if kwargs.get("async_processing", logging_config.ASYNC_PROCESSING)
+                else FileHandler
+            )
             self.handlers.append(
-                FileHandler(
+                file_handler_class(
                     file_path=kwargs["file_path"],
                     rotation=kwargs.get("rotation", "time"),
                     max_size=kwargs.get("max_size", 100 * 1024 * 1024),  # 100MB
@@ -127,6 +140,22 @@ class StructuredLogger:
         """DEBUG уровень логирования"""
         self.log(LogLevel.DEBUG, message, **kwargs)
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """Метрики обработчиков, которые их публикуют (очереди, отбросы, скорость)"""
+        return {
+            type(handler).__name__: handler.get_metrics()
+            for handler in self.handlers
+            if hasattr(handler, "get_metrics")
+        }
+
+    def shutdown(self):
+        """Закрытие всех обработчиков"""
+        for handler in self.handlers:
+            try:
+                handler.shutdown()
+            except Exception as e:
+                print(f"Handler shutdown error: {e}")
+
 
 class BaseHandler:
     """Базовый класс для обработчиков логов"""
@@ -244,58 +273,270 @@ class FileHandler(BaseHandler):
 
 
 class AsyncFileHandler(FileHandler):
-    """Асинхронный файловый обработчик"""
+    """
+    Асинхронный файловый обработчик
+
+    Потоки-производители только кладут запись в ограниченную очередь
+    (collections.deque: append/popleft атомарны, блокировок на горячем пути
+    нет). Один долгоживущий поток-писатель держит файл открытым, сериализует
+    записи и пишет их пачками.
+
+    При перегрузке:
+    - после заполнения очереди на sample_threshold записи ниже WARNING
+      проходят с частотой 1 из sample_rate;
+    - в заполненной очереди записи ниже WARNING отбрасываются
+      (overload_policy="drop_new") или вытесняют самые старые
+      ("drop_oldest"); ERROR и CRITICAL всегда вытесняют самые старые.
+
+    Счетчики метрик обновляются без блокировок и под конкуренцией потоков
+    могут немного занижать значения.
+
+    flush() ждет прохода писателя, начатого после запроса (счетчики
+    поколений), shutdown() вызывается и при завершении интерпретатора.
+    """
+
+    PRIORITY_LEVELS = frozenset({"ERROR", "CRITICAL"})
 
-    def __init__(self, file_path: str, **kwargs):
+    def __init__(
+        self,
+        file_path: str,
+        max_queue_size: int = 10 * logging_config.BUFFER_SIZE,
+        batch_size: int = logging_config.BUFFER_SIZE,
+        flush_interval: float = 1.0,
+        overload_policy: str = "drop_new",
+        sample_threshold: float = 0.8,
+        sample_rate: int = 10,
+        metrics_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        metrics_interval: float = 10.0,
+        **kwargs,
+    ):
         super().__init__(file_path, **kwargs)
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        self.buffer = []
-        self.buffer_size = 1000
-        self.flush_interval = 10  # секунд
-        self._last_flush = time.time()
-        self._flush_task = None
+
+        if overload_policy not in ("drop_new", "drop_oldest"):
+            raise ValueError(f"Unsupported overload policy: {overload_policy}")
+
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overload_policy = overload_policy
+        self.sample_rate = max(1, sample_rate)
+        self.metrics_callback = metrics_callback
+        self.metrics_interval = metrics_interval
+
+        self._queue: deque = deque()
+        self._sample_depth = int(max_queue_size * sample_threshold)
+        self._sample_counter = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        # Поколения flush: запрошенное и записанное писателем
+        self._flush_cond = threading.Condition()
+        self._flush_requested = 0
+        self._flush_completed = 0
+        self._writer_done = False
+        self._file = None
+
+        self._metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "batches": 0,
+            "bytes_written": 0,
+            "write_errors": 0,
+        }
+        self._bytes_per_sec = 0.0
+        self._rate_started = time.monotonic()
+        self._rate_bytes = 0
+        self._last_metrics_publish = time.monotonic()
+
+        if os.path.exists(file_path):
+            self._current_size = os.path.getsize(file_path)
+
+        self._writer = threading.Thread(
+            target=self._writer_loop, name=f"log-writer:{file_path}", daemon=True
+        )
+        self._writer.start()
+
+        # Поток-писатель - daemon: без этого хвост очереди теряется при выходе
+        atexit.register(_shutdown_at_exit, weakref.ref(self))
 
     def handle(self, log_data: Dict[str, Any]):
-        """Асинхронная запись в файл"""
-        self.buffer.append(log_data)
+        """Постановка записи в очередь (без блокировок и ввода-вывода)"""
+        if self._stopped.is_set():
+            self._metrics["dropped"] += 1
+            return
 
-        if len(self.buffer) >= self.buffer_size:
-            self._flush_buffer()
+        depth = len(self._queue)
+        if depth >= self._sample_depth:
+            if log_data.get("level") in self.PRIORITY_LEVELS:
+                if depth >= self.max_queue_size:
+                    self._evict_oldest()
+            elif depth >= self.max_queue_size:
+                if self.overload_policy == "drop_new":
+                    self._metrics["dropped"] += 1
+                    return
+                self._evict_oldest()
+            else:
+                self._sample_counter += 1
+                if self._sample_counter % self.sample_rate:
+                    self._metrics["sampled_out"] += 1
+                    return
 
-        if time.time() - self._last_flush > self.flush_interval:
-            self._flush_buffer()
+        self._queue.append(log_data)
+        self._metrics["enqueued"] += 1
 
-    def _flush_buffer(self):
-        """Сброс буфера в файл"""
-        if self.buffer:
-            buffer_copy = self.buffer.copy()
-            self.buffer.clear()
+        # Писатель будится при наборе пачки (иначе - по flush_interval)
+        if depth + 1 == self.batch_size:
+            self._wakeup.set()
 
-            self.executor.submit(self._write_to_file, buffer_copy)
-            self._last_flush = time.time()
+    def _evict_oldest(self):
+        """Вытеснение самой старой записи из очереди"""
+        try:
+            self._queue.popleft()
+            self._metrics["dropped"] += 1
+        except IndexError:
+            pass
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Ожидание записи всех поставленных в очередь записей
 
-    def _write_to_file(self, logs: List[Dict[str, Any]]):
-        """Запись в файл в отдельном потоке"""
+        Returns:
+            True, если очередь записана до истечения timeout
+        """
+        with self._flush_cond:
+            if self._writer_done:
+                return not self._queue
+            self._flush_requested += 1
+            generation = self._flush_requested
+            self._wakeup.set()
+            done = self._flush_cond.wait_for(
+                lambda: self._flush_completed >= generation or self._writer_done, timeout
+            )
+            return done and (self._flush_completed >= generation or not self._queue)
+
+    def _writer_loop(self):
+        """Цикл потока-писателя"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            # Запросы flush, сделанные до этой точки, покрываются проходом ниже
+            generation = self._flush_requested
+            self._drain()
+            self._complete_flush(generation)
+            self._publish_metrics()
+
+            if self._stopped.is_set():
+                # Записи, поставленные во время последнего прохода
+                generation = self._flush_requested
+                self._drain()
+                self._complete_flush(generation)
+                break
+
+        self._close_file()
+        with self._flush_cond:
+            self._writer_done = True
+            self._flush_cond.notify_all()
+
+    def _complete_flush(self, generation: int):
+        """Отметка записанного поколения и пробуждение ожидающих flush()"""
+        with self._flush_cond:
+            if generation > self._flush_completed:
+                self._flush_completed = generation
+            self._flush_cond.notify_all()
+
+    def _drain(self):
+        """Запись всего содержимого очереди пачками по batch_size"""
+        queue = self._queue
+        while queue:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(queue.popleft())
+            except IndexError:
+                pass
+            self._write_batch(batch)
+
+    def _write_batch(self, logs: List[Dict[str, Any]]):
+        """Сериализация и запись пачки одним вызовом write"""
+        lines = []
+        for log_data in logs:
+            try:
+                lines.append(_JSON_ENCODER.encode(log_data))
+            except Exception as e:
+                self._metrics["write_errors"] += 1
+                print(f"Async file handler error: {e}")
+        if not lines:
+            return
+
+        data = ("\n".join(lines) + "\n").encode("utf-8")
         try:
             with self._lock:
-                with open(self.file_path, "a", encoding="utf-8") as f:
-                    for log_data in logs:
-                        log_line = (
-                            json.dumps(log_data, ensure_ascii=False, default=str) + "\n"
-                        )
-                        f.write(log_line)
-                        self._current_size += len(log_line.encode("utf-8"))
+                if self._file is None:
+                    self._file = open(self.file_path, "ab")
+                self._file.write(data)
+                self._file.flush()
+                self._current_size += len(data)
 
                 if self.rotation == "size" and self._current_size > self.max_size:
+                    self._close_file()
                     self._rotate_file()
 
+            self._metrics["written"] += len(lines)
+            self._metrics["batches"] += 1
+            self._metrics["bytes_written"] += len(data)
+            self._rate_bytes += len(data)
+
         except Exception as e:
+            self._metrics["write_errors"] += 1
             print(f"Async file handler error: {e}")
 
-    def shutdown(self):
-        """Закрытие с сбросом буфера"""
-        self._flush_buffer()
-        self.executor.shutdown(wait=True)
+    def _close_file(self):
+        """Закрытие файла (файл переоткрывается при следующей записи)"""
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+
+    def _publish_metrics(self):
+        """Пересчет скорости записи и публикация метрик через callback"""
+        now = time.monotonic()
+        elapsed = now - self._rate_started
+        if elapsed >= 1.0:
+            self._bytes_per_sec = self._rate_bytes / elapsed
+            self._rate_started = now
+            self._rate_bytes = 0
+
+        if self.metrics_callback and now - self._last_metrics_publish >= self.metrics_interval:
+            self._last_metrics_publish = now
+            try:
+                self.metrics_callback(self.get_metrics())
+            except Exception as e:
+                print(f"Async file handler metrics error: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Метрики конвейера записи"""
+        return {
+            **self._metrics,
+            "queue_depth": len(self._queue),
+            "max_queue_size": self.max_queue_size,
+            "bytes_per_sec": round(self._bytes_per_sec, 1),
+            "file_path": self.file_path,
+        }
+
+    def shutdown(self, timeout: float = 5.0):
+        """Закрытие с записью оставшихся записей"""
+        self._stopped.set()
+        self._wakeup.set()
+        self._writer.join(timeout)
+
+
+def _shutdown_at_exit(ref: "weakref.ReferenceType[AsyncFileHandler]"):
+    handler = ref()
+    if handler is not None:
+        handler.shutdown()
 
 
 class MonitorHandler(BaseHandler):
@@ -12,7 +12,11 @@ import logging
 import re
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional, Pattern, Set, Union
+from typing import Any, Dict, List, Optional, Pattern, Set, Tuple, Union
+
+# Размер кэша решений по ключам (ключи логов повторяются от записи к записи)
+_KEY_CACHE_SIZE = 4096
+_NOT_CACHED = object()
 
 
 class MaskingRule(Enum):
@@ -45,6 +49,9 @@ class PatternMatcher:
     
     def __init__(self):
         self.patterns: Dict[MaskingRule, Pattern] = {}
+        # Символы, без которых правило не может сработать (класс символов regex):
+        # строки без них пропускаются без запуска общего паттерна
+        self.triggers: Dict[MaskingRule, str] = {}
         self._compile_patterns()
     
     def _compile_patterns(self):
@@ -56,6 +63,7 @@ class PatternMatcher:
             re.IGNORECASE
         )
         self.patterns[MaskingRule.EMAIL] = email_pattern
+        self.triggers[MaskingRule.EMAIL] = '@'
         
         # Телефонные номера (российские и международные)
         phone_pattern = re.compile(
@@ -63,6 +71,7 @@ class PatternMatcher:
             re.IGNORECASE
         )
         self.patterns[MaskingRule.PHONE] = phone_pattern
+        self.triggers[MaskingRule.PHONE] = r'\d'
         
         # Номера кредитных карт
         credit_card_pattern = re.compile(
@@ -70,6 +79,7 @@ class PatternMatcher:
             re.IGNORECASE
         )
         self.patterns[MaskingRule.CREDIT_CARD] = credit_card_pattern
+        self.triggers[MaskingRule.CREDIT_CARD] = r'\d'
         
         # SSN (российские и американские)
         ssn_pattern = re.compile(
@@ -77,12 +87,14 @@ class PatternMatcher:
             re.IGNORECASE
         )
         self.patterns[MaskingRule.SSN] = ssn_pattern
+        self.triggers[MaskingRule.SSN] = r'\d'
         
         # IP адреса
         ip_pattern = re.compile(
             r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\b'
         )
         self.patterns[MaskingRule.IP_ADDRESS] = ip_pattern
+        self.triggers[MaskingRule.IP_ADDRESS] = r'\d'
         
         # Банковские счета
         bank_account_pattern = re.compile(
@@ -90,6 +102,7 @@ class PatternMatcher:
             re.IGNORECASE
         )
         self.patterns[MaskingRule.BANK_ACCOUNT] = bank_account_pattern
+        self.triggers[MaskingRule.BANK_ACCOUNT] = r'\d'
     
     def find_matches(self, text: str, rule: MaskingRule) -> List[re.Match]:
         """Поиск всех совпадений для правила"""
@@ -106,38 +119,78 @@ class PatternMatcher:
             return text
         
         def replace_func(match):
-            matched_text = match.group(0)
-            
-            if preserve_pattern:
-                # Сохранение структуры (например, скрытие только части)
-                if rule == MaskingRule.EMAIL:
-                    username, domain = matched_text.split('@', 1)
-                    return f"{username[:2]}***@{domain}"
-                elif rule == MaskingRule.PHONE:
-                    return re.sub(r'\d', 'X', matched_text)
-                elif rule == MaskingRule.CREDIT_CARD:
-                    # Маскировка всех кроме последних 4 цифр
-                    digits = re.sub(r'\D', '', matched_text)
-                    if len(digits) >= 4:
-                        masked = 'X' * (len(digits) - 4) + digits[-4:]
-                        # Восстановление оригинального форматирования
-                        result = masked
-                        index = 0
-                        formatted_result = ''
-                        for char in matched_text:
-                            if char.isdigit() and index < len(masked):
-                                formatted_result += masked[index]
-                                index += 1
-                            else:
-                                formatted_result += char
-                        return formatted_result
-                elif rule == MaskingRule.IP_ADDRESS:
-                    parts = matched_text.split('.')
-                    return f"{parts[0]}.{parts[1]}.***.***"
-            
-            return replacement
+            return self.mask_match(rule, match.group(0), replacement, preserve_pattern)
         
         return pattern.sub(replace_func, text)
+    
+    def mask_match(self, rule: MaskingRule, matched_text: str,
+                   replacement: str, preserve_pattern: bool = True) -> str:
+        """Маскирование найденного фрагмента по правилу"""
+        if preserve_pattern:
+            # Сохранение структуры (например, скрытие только части)
+            if rule == MaskingRule.EMAIL:
+                username, domain = matched_text.split('@', 1)
+                return f"{username[:2]}***@{domain}"
+            elif rule == MaskingRule.PHONE:
+                return re.sub(r'\d', 'X', matched_text)
+            elif rule == MaskingRule.CREDIT_CARD:
+                # Маскировка всех кроме последних 4 цифр
+                digits = re.sub(r'\D', '', matched_text)
+                if len(digits) >= 4:
+                    masked = 'X' * (len(digits) - 4) + digits[-4:]
+                    # Восстановление оригинального форматирования
+                    index = 0
+                    formatted_result = ''
+                    for char in matched_text:
+                        if char.isdigit() and index < len(masked):
+                            formatted_result += masked[index]
+                            index += 1
+                        else:
+                            formatted_result += char
+                    return formatted_result
+            elif rule == MaskingRule.IP_ADDRESS:
+                parts = matched_text.split('.')
+                return f"{parts[0]}.{parts[1]}.***.***"
+        
+        return replacement
+    
+    def compile_combined(self, rules: List[MaskingRule]) -> Optional[Pattern]:
+        """
+        Компиляция правил в один паттерн (именованная группа на правило)
+        
+        Флаги правила действуют только внутри его альтернативы. При
+        совпадении нескольких правил в одной позиции выигрывает правило,
+        стоящее раньше в списке.
+        """
+        alternatives = []
+        for rule in rules:
+            pattern = self.patterns.get(rule)
+            if pattern is None:
+                continue
+            flags = 'i' if pattern.flags & re.IGNORECASE else ''
+            alternatives.append(f"(?P<{rule.name}>(?{flags}:{pattern.pattern}))" if flags
+                                else f"(?P<{rule.name}>{pattern.pattern})")
+        
+        if not alternatives:
+            return None
+        return re.compile('|'.join(alternatives))
+    
+    def compile_prefilter(self, rules: List[MaskingRule]) -> Optional[Pattern]:
+        """
+        Класс символов-триггеров правил (None - если у какого-то правила
+        с паттерном триггер не задан и строку нужно проверять всегда)
+        """
+        triggers = set()
+        for rule in rules:
+            if rule not in self.patterns:
+                continue
+            if rule not in self.triggers:
+                return None
+            triggers.add(self.triggers[rule])
+        
+        if not triggers:
+            return None
+        return re.compile('[' + ''.join(sorted(triggers)) + ']')
 
 
 class DataSanitizer:
@@ -148,6 +201,16 @@ class DataSanitizer:
         self.configs = self._load_default_configs()
         self.sensitive_keys = self._load_sensitive_keys()
         self.logger = logging.getLogger(__name__)
+        
+        # Общий паттерн активных правил пересобирается при изменении configs
+        self._masking_fingerprint: Optional[Tuple] = None
+        self._masking_pattern: Optional[Pattern] = None
+        self._masking_prefilter: Optional[Pattern] = None
+        self._masking_settings: Dict[str, Tuple[MaskingRule, str, bool]] = {}
+        
+        # Кэш ключ -> найденный стандартный чувствительный ключ (или None)
+        self._key_cache: Dict[str, Optional[str]] = {}
+        self._cached_sensitive_keys: Set[str] = set(self.sensitive_keys)
     
     def _load_default_configs(self) -> Dict[MaskingRule, MaskingConfig]:
         """Загрузка конфигураций по умолчанию"""
@@ -232,87 +295,155 @@ class DataSanitizer:
         if not isinstance(data, dict):
             return data
         
+        self._refresh_caches()
+        return self._sanitize_dict(data, custom_rules)
+    
+    def sanitize_list(self, data: List[Any], 
+                     custom_rules: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Санитизация списка данных"""
+        if not isinstance(data, list):
+            return data
+        
+        self._refresh_caches()
+        return self._sanitize_list(data, custom_rules)
+    
+    def sanitize_value(self, value: Any, key: Optional[str] = None,
+                      custom_rules: Optional[Dict[str, Any]] = None) -> Any:
+        """Санитизация отдельного значения"""
+        self._refresh_caches()
+        return self._sanitize_value(value, key, custom_rules)
+    
+    def mask_text(self, text: str) -> str:
+        """
+        Маскирование строки всеми активными правилами
+        
+        Активные правила скомпилированы в один паттерн, поэтому строка
+        просматривается один раз, а не по разу на каждое правило.
+        """
+        self._refresh_caches()
+        return self._mask_text(text)
+    
+    def sanitize_key(self, key: str, key_mappings: Optional[Dict[str, str]] = None) -> str:
+        """Санитизация ключа (если есть маппинг)"""
+        self._refresh_caches()
+        return self._sanitize_key(key, key_mappings)
+    
+    def is_sensitive_key(self, key: str, custom_rules: Optional[Dict[str, Any]] = None) -> bool:
+        """Проверка, является ли ключ чувствительным"""
+        self._refresh_caches()
+        return self._is_sensitive_key(key, custom_rules)
+    
+    def _refresh_caches(self):
+        """
+        Пересборка общего паттерна и сброс кэша ключей при изменении
+        configs или sensitive_keys (один раз на запись, а не на значение)
+        """
+        fingerprint = tuple(
+            (rule, config.enabled, config.replacement_pattern, config.preserve_pattern)
+            for rule, config in self.configs.items()
+        )
+        if fingerprint != self._masking_fingerprint:
+            active_rules = [rule for rule, config in self.configs.items() if config.enabled]
+            self._masking_pattern = self.matcher.compile_combined(active_rules)
+            self._masking_prefilter = self.matcher.compile_prefilter(active_rules)
+            self._masking_settings = {
+                rule.name: (rule, self.configs[rule].replacement_pattern, self.configs[rule].preserve_pattern)
+                for rule in active_rules
+            }
+            self._masking_fingerprint = fingerprint
+        
+        if self.sensitive_keys != self._cached_sensitive_keys:
+            self._key_cache.clear()
+            self._cached_sensitive_keys = set(self.sensitive_keys)
+    
+    def _sanitize_dict(self, data: Dict[str, Any], custom_rules: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        key_mappings = custom_rules.get('key_mappings') if custom_rules else None
         sanitized = {}
         
         for key, value in data.items():
-            sanitized_key = self.sanitize_key(key, custom_rules.get('key_mappings') if custom_rules else None)
+            sanitized_key = self._sanitize_key(key, key_mappings)
             
             if isinstance(value, dict):
-                sanitized[sanitized_key] = self.sanitize_dict(value, custom_rules)
+                sanitized[sanitized_key] = self._sanitize_dict(value, custom_rules)
             elif isinstance(value, list):
-                sanitized[sanitized_key] = self.sanitize_list(value, custom_rules)
+                sanitized[sanitized_key] = self._sanitize_list(value, custom_rules)
             else:
-                sanitized[sanitized_key] = self.sanitize_value(value, key, custom_rules)
+                sanitized[sanitized_key] = self._sanitize_value(value, key, custom_rules)
         
         return sanitized
     
-    def sanitize_list(self, data: List[Any], 
-                     custom_rules: Optional[Dict[str, Any]] = None) -> List[Any]:
-        """Санитизация списка данных"""
-        if not isinstance(data, list):
-            return data
-        
+    def _sanitize_list(self, data: List[Any], custom_rules: Optional[Dict[str, Any]]) -> List[Any]:
         sanitized = []
         for item in data:
             if isinstance(item, dict):
-                sanitized.append(self.sanitize_dict(item, custom_rules))
+                sanitized.append(self._sanitize_dict(item, custom_rules))
             elif isinstance(item, list):
-                sanitized.append(self.sanitize_list(item, custom_rules))
+                sanitized.append(self._sanitize_list(item, custom_rules))
             else:
-                sanitized.append(self.sanitize_value(item, custom_rules=custom_rules))
+                sanitized.append(self._sanitize_value(item, custom_rules=custom_rules))
         
         return sanitized
     
-    def sanitize_value(self, value: Any, key: Optional[str] = None,
-                      custom_rules: Optional[Dict[str, Any]] = None) -> Any:
-        """Санитизация отдельного значения"""
+    def _sanitize_value(self, value: Any, key: Optional[str] = None,
+                        custom_rules: Optional[Dict[str, Any]] = None) -> Any:
         if value is None:
             return value
         
         # Проверка на чувствительные ключи
-        if key and self.is_sensitive_key(key, custom_rules):
+        if key and self._is_sensitive_key(key, custom_rules):
             return self._get_replacement_value(key, custom_rules)
         
         # Если это строка, применяем все правила маскирования
         if isinstance(value, str):
-            sanitized = value
-            
-            # Применяем все активные правила маскирования
-            for rule, config in self.configs.items():
-                if config.enabled:
-                    sanitized = self.matcher.replace_with_pattern(
-                        sanitized, rule, config.replacement_pattern, config.preserve_pattern
-                    )
-            
-            return sanitized
+            return self._mask_text(value)
         
         return value
     
-    def sanitize_key(self, key: str, key_mappings: Optional[Dict[str, str]] = None) -> str:
-        """Санитизация ключа (если есть маппинг)"""
-        if key_mappings and key in key_mappings:
-            return key_mappings[key]
+    def _mask_text(self, text: str) -> str:
+        pattern = self._masking_pattern
+        if pattern is None:
+            return text
         
-        # Понижение регистра для проверки чувствительности
-        key_lower = key.lower()
-        if any(sensitive in key_lower for sensitive in self.sensitive_keys):
-            # Возвращаем нормализованный ключ
-            for sensitive in self.sensitive_keys:
-                if sensitive in key_lower:
-                    return sensitive
+        prefilter = self._masking_prefilter
+        if prefilter is not None and prefilter.search(text) is None:
+            return text
+        
+        settings = self._masking_settings
+        mask_match = self.matcher.mask_match
         
-        return key
+        def replace_func(match):
+            rule, replacement, preserve_pattern = settings[match.lastgroup]
+            return mask_match(rule, match.group(0), replacement, preserve_pattern)
+        
+        return pattern.sub(replace_func, text)
     
-    def is_sensitive_key(self, key: str, custom_rules: Optional[Dict[str, Any]] = None) -> bool:
-        """Проверка, является ли ключ чувствительным"""
-        key_lower = key.lower()
+    def _match_sensitive_key(self, key: str) -> Optional[str]:
+        """Стандартный чувствительный ключ, входящий в key (с кэшем)"""
+        matched = self._key_cache.get(key, _NOT_CACHED)
+        if matched is _NOT_CACHED:
+            # Понижение регистра для проверки чувствительности
+            key_lower = key.lower()
+            matched = next((sensitive for sensitive in self.sensitive_keys if sensitive in key_lower), None)
+            if len(self._key_cache) >= _KEY_CACHE_SIZE:
+                self._key_cache.clear()
+            self._key_cache[key] = matched
+        return matched
+    
+    def _sanitize_key(self, key: str, key_mappings: Optional[Dict[str, str]] = None) -> str:
+        if key_mappings and key in key_mappings:
+            return key_mappings[key]
         
+        # Возвращаем нормализованный ключ
+        return self._match_sensitive_key(key) or key
+    
+    def _is_sensitive_key(self, key: str, custom_rules: Optional[Dict[str, Any]] = None) -> bool:
         # Проверка стандартных чувствительных ключей
-        if any(sensitive in key_lower for sensitive in self.sensitive_keys):
+        if self._match_sensitive_key(key) is not None:
             return True
         
         # Проверка кастомных правил
         if custom_rules and 'sensitive_keys' in custom_rules:
+            key_lower = key.lower()
             sensitive_keys = custom_rules['sensitive_keys']
             if any(sensitive in key_lower for sensitive in sensitive_keys):
                 return True
@@ -13,6 +13,7 @@
 
 import asyncio
 import json
+import threading
 import time
 from typing import Any, Dict
 from unittest.mock import Mock, patch
@@ -23,8 +24,8 @@ import pytest
 from .config import LoggingConfig, logging_config, setup_logging
 from .formatter import (HTTPRequestFormatter, LogLevel, PerformanceFormatter,
                         StructuredFormatter, create_log_structure)
-from .handlers import (APMHandler, ConsoleHandler, FileHandler, MonitorHandler,
-                       StructuredLogger)
+from .handlers import (APMHandler, AsyncFileHandler, ConsoleHandler,
+                       FileHandler, MonitorHandler, StructuredLogger)
 from .middleware import (LoggingMiddleware, correlation_context,
                          correlation_context_manager, log_execution_time,
                          with_correlation_id)
@@ -216,6 +217,34 @@ class TestDataSanitizer:
         # user_id должен быть захеширован
         assert len(sanitized["user_id"]) == 64  # SHA256 длина
         assert "***EMAIL***" in sanitized["email"]
+    
+    def test_combined_pattern_matches_rule_by_rule_masking(self):
+        """Тест: общий паттерн дает тот же результат, что и правила по очереди"""
+        values = [
+            "Заказ от user@example.com, телефон +7 (900) 123-45-67",
+            "Карта 4532 1234 5678 9012 с адреса 192.168.1.100",
+            "SSN 123-45-6789, счет 40817810099910004312",
+            "Обычное сообщение без персональных данных",
+        ]
+        
+        for value in values:
+            expected = value
+            for rule, config in self.sanitizer.configs.items():
+                if config.enabled:
+                    expected = self.sanitizer.matcher.replace_with_pattern(
+                        expected, rule, config.replacement_pattern, config.preserve_pattern
+                    )
+            assert self.sanitizer.mask_text(value) == expected
+    
+    def test_masking_config_changes_are_applied(self):
+        """Тест пересборки общего паттерна при изменении конфигурации"""
+        assert "***@example.com" in self.sanitizer.mask_text("user@example.com")
+        
+        self.sanitizer.configs[MaskingRule.EMAIL].enabled = False
+        assert self.sanitizer.mask_text("user@example.com") == "user@example.com"
+        
+        self.sanitizer.sensitive_keys.add("note")
+        assert self.sanitizer.sanitize_dict({"note": "text"})["note"] == "***REDACTED***"
 
 
 class TestCorrelationContext:
@@ -410,6 +439,72 @@ class TestHandlers:
         assert "Test file message" in content
         assert json.loads(content.split('\n')[0])["level"] == "INFO"
     
+    def test_async_file_handler_batches_from_threads(self, tmp_path):
+        """Тест записи из нескольких потоков через фоновый писатель"""
+        log_file = tmp_path / "async.log"
+        handler = AsyncFileHandler(str(log_file), batch_size=50, flush_interval=0.05)
+        
+        def produce(thread_id):
+            for i in range(500):
+                handler.handle({"level": "INFO", "message": f"{thread_id}-{i}"})
+        
+        threads = [threading.Thread(target=produce, args=(t,)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert handler.flush()
+        handler.shutdown()
+        
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2000
+        assert {json.loads(line)["message"] for line in lines} == {
+            f"{t}-{i}" for t in range(4) for i in range(500)
+        }
+        
+        metrics = handler.get_metrics()
+        assert metrics["written"] == 2000
+        assert metrics["dropped"] == 0
+        assert metrics["queue_depth"] == 0
+        assert metrics["batches"] < 2000
+    
+    def test_async_file_handler_overload_policy(self, tmp_path):
+        """Тест сэмплирования и отбрасывания записей при перегрузке"""
+        log_file = tmp_path / "overload.log"
+        handler = AsyncFileHandler(
+            str(log_file), max_queue_size=100, batch_size=1000,
+            flush_interval=60, sample_threshold=0.5, sample_rate=10
+        )
+        
+        for i in range(1000):
+            handler.handle({"level": "INFO", "message": f"info-{i}"})
+        for i in range(10):
+            handler.handle({"level": "ERROR", "message": f"error-{i}"})
+        
+        metrics = handler.get_metrics()
+        assert metrics["queue_depth"] == 100
+        assert metrics["sampled_out"] > 0
+        assert metrics["dropped"] > 0
+        
+        handler.shutdown()
+        messages = [json.loads(line)["message"] for line in log_file.read_text(encoding="utf-8").splitlines()]
+        # Ошибки вытесняют старые записи и не теряются
+        assert messages[-10:] == [f"error-{i}" for i in range(10)]
+    
+    def test_async_file_handler_flush_waits_for_each_record(self, tmp_path):
+        """Тест: flush() возвращает True только после записи всех поставленных записей"""
+        log_file = tmp_path / "flush.log"
+        handler = AsyncFileHandler(str(log_file), batch_size=1000, flush_interval=0.001)
+        
+        for i in range(200):
+            handler.handle({"level": "INFO", "message": f"m-{i}"})
+            assert handler.flush()
+            assert len(log_file.read_text(encoding="utf-8").splitlines()) == i + 1
+        
+        handler.shutdown()
+        assert handler.flush()
+    
     def test_structured_logger(self):
         """Тест структурированного логгера"""
         logger = StructuredLogger("test_logger", console=False)
@@ -13,6 +13,8 @@ from .metrics import (  # Основные классы мониторинга;
     ActiveAlert, AlertManager, AlertRule, AlertSeverity, MetricType,
     PrometheusExporter, RateLimitDashboard, RateLimitMetric, RateLimitMetrics,
     RateLimitMonitoringSystem, RealTimeMonitor, rate_limit_monitoring)
+from .redis_limiter import (AtomicRedisRateLimiter, LimitDecision,
+                            LimitRule)
 from .request_tracker import (DistributedTracker, IPTracker, RateLimitStats,
                               RequestMetrics, RequestTracker, ToolTracker,
                               UserTracker, create_rate_limit_middleware,
@@ -54,7 +56,12 @@ __all__ = [
     'get_request_tracker',
     'init_request_tracker',
     'request_tracking_context',
-    'create_rate_limit_middleware'
+    'create_rate_limit_middleware',
+    
+    # Атомарный distributed rate limiting
+    'AtomicRedisRateLimiter',
+    'LimitRule',
+    'LimitDecision'
 ]
 
 __version__ = '1.0.0'
@@ -10,6 +10,7 @@
 - Точность лимитов
 - Производительность при высокой нагрузке
 - Поведение под нагрузкой (stress testing)
+- Масштабирование по числу различных ключей (100k ключей)
 """
 
 import concurrent.futures
@@ -25,7 +26,8 @@ import pandas as pd
 import psutil
 from sliding_window import (FixedWindowCounter, LeakyBucket,
                             MultiWindowTracker, RateLimitManager,
-                            SlidingWindowAlgorithm, TokenBucket)
+                            ShardedSlidingWindow, SlidingWindowAlgorithm,
+                            TokenBucket)
 
 
 class BenchmarkSuite:
@@ -293,6 +295,64 @@ class BenchmarkSuite:
             'num_keys_tested': num_unique_keys
         }
     
+    def run_key_scaling_test(self, algorithm, num_keys: int = 100_000,
+                             sample_size: int = 2000,
+                             checkpoints: Tuple[int, ...] = (1_000, 10_000, 100_000)) -> Dict[str, Any]:
+        """
+        Тест масштабирования по числу различных ключей.
+        
+        Заполняет алгоритм num_keys уникальными ключами и на каждой контрольной
+        точке замеряет среднее время проверки на выборке из sample_size новых ключей.
+        Для O(1) алгоритмов время на контрольных точках должно быть примерно одинаковым.
+        
+        Args:
+            algorithm: Алгоритм для тестирования
+            num_keys: Общее количество уникальных ключей
+            sample_size: Размер выборки для замера на контрольной точке
+            checkpoints: Количество ключей, при которых выполняются замеры
+            
+        Returns:
+            Время проверки (мкс) по контрольным точкам и коэффициент деградации
+        """
+        print(f"Запуск теста масштабирования по ключам: {num_keys} уникальных ключей")
+        
+        algorithm.reset()
+        per_check_us: Dict[int, float] = {}
+        filled = 0
+        
+        for checkpoint in sorted(c for c in checkpoints if c <= num_keys):
+            while filled < checkpoint:
+                algorithm.check_rate_limit(f"key_{filled}")
+                filled += 1
+            
+            start_time = time.perf_counter()
+            for i in range(sample_size):
+                algorithm.check_rate_limit(f"sample_{checkpoint}_{i}")
+            elapsed = time.perf_counter() - start_time
+            
+            per_check_us[checkpoint] = elapsed / sample_size * 1_000_000
+            print(f"  Ключей: {checkpoint}, время проверки: {per_check_us[checkpoint]:.2f} мкс")
+        
+        result: Dict[str, Any] = {
+            'num_keys': num_keys,
+            'per_check_us': per_check_us,
+        }
+        
+        if len(per_check_us) > 1:
+            values = list(per_check_us.values())
+            result['degradation_ratio'] = values[-1] / values[0] if values[0] > 0 else 0.0
+        
+        # Пакетная проверка (если поддерживается алгоритмом)
+        if hasattr(algorithm, 'check_many'):
+            batch = [f"key_{i}" for i in range(min(num_keys, 10_000))]
+            start_time = time.perf_counter()
+            algorithm.check_many(batch)
+            elapsed = time.perf_counter() - start_time
+            result['check_many_keys_per_second'] = len(batch) / elapsed if elapsed > 0 else 0.0
+            print(f"  check_many: {result['check_many_keys_per_second']:.0f} ключей/с")
+        
+        return result
+    
     def run_stress_test(self, algorithm, max_concurrent: int = 100, 
                        duration: float = 30.0) -> Dict[str, Any]:
         """
@@ -622,6 +682,29 @@ def create_benchmark_scenarios() -> Dict[str, Dict]:
     return scenarios
 
 
+def run_key_scaling_benchmark(num_keys: int = 100_000) -> Dict[str, Dict[str, Any]]:
+    """
+    Сравнение масштабирования sliding window реализаций на num_keys уникальных ключах.
+    
+    Returns:
+        Результаты run_key_scaling_test по алгоритмам
+    """
+    algorithms = {
+        'sliding_window': SlidingWindowAlgorithm(limit=100, window_seconds=60),
+        'sliding_window_log': ShardedSlidingWindow(limit=100, window_seconds=60, mode="log"),
+        'sliding_window_counter': ShardedSlidingWindow(limit=100, window_seconds=60, mode="counter"),
+    }
+    
+    suite = BenchmarkSuite()
+    results = {}
+    
+    for name, algorithm in algorithms.items():
+        print(f"\nМасштабирование алгоритма: {name}")
+        results[name] = suite.run_key_scaling_test(algorithm, num_keys=num_keys)
+    
+    return results
+
+
 def run_complete_benchmark():
     """Запуск полного бенчмарка всех алгоритмов"""
     print("Запуск полного бенчмарка алгоритмов rate limiting")
@@ -631,6 +714,8 @@ def run_complete_benchmark():
     # Создание алгоритмов для тестирования
     algorithms = {
         'sliding_window': SlidingWindowAlgorithm(limit=100, window_seconds=60),
+        'sliding_window_log': ShardedSlidingWindow(limit=100, window_seconds=60, mode="log"),
+        'sliding_window_counter': ShardedSlidingWindow(limit=100, window_seconds=60, mode="counter"),
         'token_bucket': TokenBucket(capacity=50, refill_rate=1.0),
         'fixed_window': FixedWindowCounter(limit=100, window_seconds=60),
         'leaky_bucket': LeakyBucket(capacity=10, leak_rate=0.5)
@@ -27,10 +27,19 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+from .sketches import (BucketHistogram, QuantileSketch, WindowedCounter,
+                       WindowedSketch)
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Границы бакетов времени отклика (секунды) для экспорта в Prometheus
+RESPONSE_TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Квантили времени отклика в сводках
+RESPONSE_TIME_QUANTILES = (0.5, 0.95, 0.99)
+
 
 class AlertSeverity(Enum):
     """Уровни критичности алертов"""
@@ -140,7 +149,15 @@ class RateLimitMetrics:
         self._metrics: deque = deque(maxlen=max_history_size)
         self._counters: Dict[str, float] = defaultdict(float)
         self._gauges: Dict[str, float] = {}
-        self._histograms: Dict[str, List[float]] = defaultdict(list)
+        # Гистограммы - потоковые скетчи: запись O(1), значения не хранятся
+        self._histograms: Dict[str, QuantileSketch] = {}
+        self._histogram_buckets: Dict[str, BucketHistogram] = {}
+        self._response_time_total = QuantileSketch()
+        
+        # Скользящее окно последней минуты для real-time мониторинга и алертов
+        self._window_requests = WindowedCounter(window_seconds=60, slots=60)
+        self._window_blocked = WindowedCounter(window_seconds=60, slots=60)
+        self._window_response_time = WindowedSketch(window_seconds=60, slots=6)
         
         # Детализация по IP, пользователю, MCP tool
         self._ip_metrics: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
@@ -178,16 +195,20 @@ class RateLimitMetrics:
             
             # Общие метрики
             self._record_counter('rate_limit_requests_total', base_labels, 1)
+            self._window_requests.add()
             
             if blocked or limit_exceeded:
                 self._record_counter('rate_limit_blocked_total', base_labels, 1)
                 self._record_gauge('rate_limit_blocked_current', base_labels, 1)
+                self._window_blocked.add()
             else:
                 self._record_gauge('rate_limit_blocked_current', base_labels, 0)
             
             # Время отклика
             if response_time is not None:
                 self._record_histogram('rate_limit_response_time_seconds', response_time, base_labels)
+                self._response_time_total.add(response_time)
+                self._window_response_time.add(response_time)
             
             # RPS метрики
             if ip:
@@ -240,11 +261,13 @@ class RateLimitMetrics:
         self._metrics.append(metric)
         
         hist_key = f"{name}:{json.dumps(labels, sort_keys=True)}"
-        self._histograms[hist_key].append(value)
+        sketch = self._histograms.get(hist_key)
+        if sketch is None:
+            sketch = self._histograms[hist_key] = QuantileSketch()
+            self._histogram_buckets[hist_key] = BucketHistogram(RESPONSE_TIME_BUCKETS)
         
-        # Ограничение размера гистограммы
-        if len(self._histograms[hist_key]) > 1000:
-            self._histograms[hist_key] = self._histograms[hist_key][-500:]
+        sketch.add(value)
+        self._histogram_buckets[hist_key].add(value)
     
     def _record_rps(self, entity_type: str, entity_id: str):
         """Запись RPS метрики"""
@@ -305,10 +328,102 @@ class RateLimitMetrics:
                 'unique_ips': len([k for k in self._rps_windows.keys() if k.startswith('ip:')]),
                 'unique_users': len([k for k in self._rps_windows.keys() if k.startswith('user:')]),
                 'unique_tools': len([k for k in self._rps_windows.keys() if k.startswith('tool:')]),
+                'response_time_quantiles': dict(zip(
+                    map(str, RESPONSE_TIME_QUANTILES),
+                    self._response_time_total.quantiles(RESPONSE_TIME_QUANTILES)
+                )),
                 'last_update': self._last_update.isoformat(),
                 'health_status': self._health_status
             }
     
+    def get_histogram_summary(self, name: str, labels: Dict[str, str] = None) -> Optional[Dict[str, Any]]:
+        """Сводка гистограммы (count/sum/avg/p50/p95/p99) по серии метрики"""
+        with self._lock:
+            sketch = self._histograms.get(f"{name}:{json.dumps(labels or {}, sort_keys=True)}")
+            if sketch is None:
+                return None
+            p50, p95, p99 = sketch.quantiles(RESPONSE_TIME_QUANTILES)
+            return {
+                'count': sketch.count,
+                'sum': sketch.sum,
+                'avg': sketch.mean,
+                'min': sketch.min,
+                'max': sketch.max,
+                'p50': p50,
+                'p95': p95,
+                'p99': p99
+            }
+    
+    def get_histogram_buckets(self) -> List[Tuple[str, Dict[str, str], BucketHistogram]]:
+        """Бакетные гистограммы всех серий (имя, метки, копия гистограммы)"""
+        with self._lock:
+            result = []
+            for key, histogram in self._histogram_buckets.items():
+                name, labels = key.split(':', 1)
+                result.append((name, json.loads(labels), BucketHistogram.from_dict(histogram.to_dict())))
+            return result
+    
+    def get_window_stats(self) -> Dict[str, Any]:
+        """Статистика за последнюю минуту (из скользящих окон, без обхода истории)"""
+        with self._lock:
+            sketch = self._window_response_time.snapshot()
+            p50, p95, p99 = sketch.quantiles(RESPONSE_TIME_QUANTILES)
+            return {
+                'requests': self._window_requests.total(),
+                'blocked': self._window_blocked.total(),
+                'response_time_count': sketch.count,
+                'avg_response_time': sketch.mean,
+                'p50_response_time': p50,
+                'p95_response_time': p95,
+                'p99_response_time': p99
+            }
+    
+    def export_state(self) -> Dict[str, Any]:
+        """Состояние счетчиков и скетчей для агрегации по воркерам (JSON-совместимое)"""
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'histograms': {
+                    key: {
+                        'sketch': sketch.to_dict(),
+                        'buckets': self._histogram_buckets[key].to_dict()
+                    }
+                    for key, sketch in self._histograms.items()
+                },
+                'window': {
+                    'requests': self._window_requests.total(),
+                    'blocked': self._window_blocked.total(),
+                    'response_time': self._window_response_time.snapshot().to_dict()
+                }
+            }
+    
+    def merge_state(self, state: Dict[str, Any]):
+        """Слияние состояния другого воркера (результат export_state)"""
+        with self._lock:
+            for key, value in state.get('counters', {}).items():
+                self._counters[key] += value
+            
+            for key, data in state.get('histograms', {}).items():
+                sketch = QuantileSketch.from_dict(data['sketch'])
+                buckets = BucketHistogram.from_dict(data['buckets'])
+                if key.startswith('rate_limit_response_time_seconds:'):
+                    self._response_time_total.merge(sketch)
+                if key in self._histograms:
+                    self._histograms[key].merge(sketch)
+                    self._histogram_buckets[key].merge(buckets)
+                else:
+                    self._histograms[key] = sketch
+                    self._histogram_buckets[key] = buckets
+            
+            window = state.get('window')
+            if window:
+                self._window_requests.add(window.get('requests', 0))
+                self._window_blocked.add(window.get('blocked', 0))
+                if window.get('response_time'):
+                    self._window_response_time.merge(QuantileSketch.from_dict(window['response_time']))
+            
+            self._last_update = datetime.now()
+    
     def get_recent_metrics(self, minutes: int = 5) -> List[RateLimitMetric]:
         """Получение недавних метрик"""
         with self._lock:
@@ -366,11 +481,32 @@ class PrometheusExporter:
                 except Exception as e:
                     logger.warning(f"Error exporting metric {metric.metric_name}: {e}")
             
+            # Бакеты гистограмм (для histogram_quantile в Grafana)
+            output.extend(self._generate_histogram_metrics())
+            
             # Добавляем summary метрики
             output.extend(self._generate_summary_metrics())
             
             return "\n".join(output)
     
+    def _generate_histogram_metrics(self) -> List[str]:
+        """Генерация _bucket/_sum/_count серий гистограмм"""
+        output = []
+        
+        for name, labels, histogram in self.metrics_collector.get_histogram_buckets():
+            label_parts = [f'{k}="{v}"' for k, v in labels.items()]
+            bounds = [str(bound) for bound in histogram.bounds] + ['+Inf']
+            
+            for bound, cumulative in zip(bounds, histogram.cumulative_counts()):
+                bucket_labels = ','.join(label_parts + [f'le="{bound}"'])
+                output.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+            
+            label_str = f"{{{','.join(label_parts)}}}" if label_parts else ""
+            output.append(f"{name}_sum{label_str} {histogram.sum}")
+            output.append(f"{name}_count{label_str} {histogram.count}")
+        
+        return output
+    
     def _generate_summary_metrics(self) -> List[str]:
         """Генерация summary метрик"""
         output = []
@@ -388,6 +524,9 @@ class PrometheusExporter:
             f"rate_limit_summary_unique_tools {summary['unique_tools']}"
         ]
         
+        for quantile, value in summary['response_time_quantiles'].items():
+            summary_metrics.append(f'rate_limit_summary_response_time_seconds{{quantile="{quantile}"}} {value}')
+        
         output.extend(summary_metrics)
         output.append("")  # Пустая строка в конце
         
@@ -586,14 +725,8 @@ class AlertManager:
             return max_rps
         
         elif metric_name == "rate_limit_response_time_seconds":
-            # Ищем среднее время отклика
-            response_times = []
-            metrics = self.metrics_collector.get_recent_metrics(minutes=1)
-            for metric in metrics:
-                if metric.metric_name == "rate_limit_response_time_seconds":
-                    response_times.append(metric.value)
-            
-            return sum(response_times) / len(response_times) if response_times else 0.0
+            # Среднее время отклика за последнюю минуту
+            return self.metrics_collector.get_window_stats()['avg_response_time']
         
         elif metric_name == "rate_limit_health_status":
             health = self.metrics_collector.get_health_status()
@@ -1010,35 +1143,25 @@ class RealTimeMonitor:
     
     def _collect_realtime_metrics(self):
         """Сбор метрик в реальном времени"""
-        # Получаем недавние метрики
-        recent_metrics = self.metrics_collector.get_recent_metrics(minutes=1)
+        # Счетчики и время отклика - из скользящих окон последней минуты
+        window_stats = self.metrics_collector.get_window_stats()
         
-        # Анализируем метрики
         current_stats = {
             'timestamp': datetime.now().isoformat(),
-            'requests_last_minute': 0,
-            'blocked_last_minute': 0,
-            'avg_response_time': 0.0,
+            'requests_last_minute': window_stats['requests'],
+            'blocked_last_minute': window_stats['blocked'],
+            'avg_response_time': window_stats['avg_response_time'],
+            'p95_response_time': window_stats['p95_response_time'],
+            'p99_response_time': window_stats['p99_response_time'],
             'peak_rps': 0.0,
             'active_alerts': len(self.alert_manager.active_alerts),
             'system_health': self.metrics_collector.get_health_status()['status']
         }
         
-        response_times = []
-        rps_values = []
-        
-        for metric in recent_metrics:
-            if metric.metric_name == 'rate_limit_requests_total':
-                current_stats['requests_last_minute'] += metric.value
-            elif metric.metric_name == 'rate_limit_blocked_total':
-                current_stats['blocked_last_minute'] += metric.value
-            elif metric.metric_name == 'rate_limit_response_time_seconds':
-                response_times.append(metric.value)
-            elif metric.metric_name == 'rate_limit_requests_per_second':
-                rps_values.append(metric.value)
-        
-        if response_times:
-            current_stats['avg_response_time'] = sum(response_times) / len(response_times)
+        rps_values = [
+            metric.value for metric in self.metrics_collector.get_recent_metrics(minutes=1)
+            if metric.metric_name == 'rate_limit_requests_per_second'
+        ]
         
         if rps_values:
             current_stats['peak_rps'] = max(rps_values)
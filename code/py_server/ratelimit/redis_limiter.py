@@ -0,0 +1,293 @@
+# [NEXUS IDENTITY] ID: 7306215528810379460 | DATE: 2026-10-17
+
+"""
+Атомарный distributed rate limiting на Redis
+
+Особенности:
+- Sliding window и token bucket выполняются одним Lua скриптом (атомарно на сервере)
+- Проверки нескольких измерений (IP / пользователь / инструмент) за один round trip (pipeline)
+- Fallback на локальные алгоритмы при недоступности Redis
+- Работает с redis.asyncio и совместимыми клиентами (fakeredis.aioredis для тестов)
+- Время берется на сервере (redis.call('TIME')): окна и пополнение не зависят
+  от расхождения часов реплик (effects replication, Redis 5+)
+"""
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    from .sliding_window import (BaseRateLimitAlgorithm, ShardedSlidingWindow,
+                                 TokenBucket)
+except ImportError:
+    # Для запуска как скрипта
+    from sliding_window import (BaseRateLimitAlgorithm, ShardedSlidingWindow,
+                                TokenBucket)
+
+logger = logging.getLogger(__name__)
+
+
+# Текущее время сервера Redis в миллисекундах
+_SERVER_NOW_MS = """
+local server_time = redis.call('TIME')
+local now = tonumber(server_time[1]) * 1000 + math.floor(tonumber(server_time[2]) / 1000)
+"""
+
+# KEYS[1] - ZSET временных меток
+# ARGV: window_ms, limit, member
+# Возвращает: {allowed, count, reset_after_ms}
+SLIDING_WINDOW_SCRIPT = _SERVER_NOW_MS + """
+local key = KEYS[1]
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[3])
+    redis.call('PEXPIRE', key, window)
+    return {1, count + 1, window}
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local reset_after = window
+if oldest[2] then
+    reset_after = tonumber(oldest[2]) + window - now
+end
+return {0, count, reset_after}
+"""
+
+# KEYS[1] - HASH {tokens, ts}
+# ARGV: capacity, refill_per_ms, requested
+# Возвращает: {allowed, tokens_milli, retry_after_ms}
+TOKEN_BUCKET_SCRIPT = _SERVER_NOW_MS + """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    retry_after = math.ceil((requested - tokens) / rate)
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity / rate) + 1000)
+return {allowed, math.floor(tokens * 1000), retry_after}
+"""
+
+
+@dataclass
+class LimitRule:
+    """Правило лимита для одного измерения"""
+    name: str
+    algorithm: str = "sliding_window"  # "sliding_window" | "token_bucket"
+    limit: int = 60
+    window_seconds: float = 60.0
+    capacity: int = 0
+    refill_rate: float = 0.0  # токенов в секунду
+
+    def __post_init__(self):
+        if self.algorithm not in ("sliding_window", "token_bucket"):
+            raise ValueError(f"Неизвестный алгоритм лимита: {self.algorithm}")
+        if self.algorithm == "token_bucket" and (self.capacity <= 0 or self.refill_rate <= 0):
+            raise ValueError("Для token_bucket нужны capacity > 0 и refill_rate > 0")
+
+
+@dataclass
+class LimitDecision:
+    """Результат проверки одного измерения"""
+    rule: str
+    key: str
+    allowed: bool
+    remaining: float
+    reset_after_seconds: float
+    distributed: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rule": self.rule,
+            "key": self.key,
+            "allowed": self.allowed,
+            "remaining": self.remaining,
+            "reset_after_seconds": self.reset_after_seconds,
+            "distributed": self.distributed,
+        }
+
+
+class AtomicRedisRateLimiter:
+    """
+    Distributed rate limiter на серверных Lua скриптах.
+
+    Каждая проверка - один EVALSHA, все проверки запроса отправляются
+    одним pipeline. При ошибке Redis проверки выполняются локально
+    (ShardedSlidingWindow / TokenBucket), пока Redis снова не станет доступен.
+    """
+
+    def __init__(self,
+                 redis_client: Any = None,
+                 key_prefix: str = "ratelimit:",
+                 retry_interval: float = 5.0):
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.retry_interval = retry_interval
+
+        self._sliding_script = None
+        self._bucket_script = None
+        if redis_client is not None:
+            self._sliding_script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+            self._bucket_script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+        # Локальные алгоритмы для fallback, по одному на правило
+        self._local: Dict[Tuple[str, str, float, int, float], BaseRateLimitAlgorithm] = {}
+        self._redis_down_until = 0.0
+
+        self.stats = {
+            "checks": 0,
+            "round_trips": 0,
+            "fallback_checks": 0,
+            "redis_errors": 0,
+        }
+
+    @property
+    def redis_available(self) -> bool:
+        """Доступен ли Redis (не в периоде ожидания после ошибки)"""
+        return self.redis_client is not None and time.time() >= self._redis_down_until
+
+    def redis_key(self, rule: LimitRule, key: str) -> str:
+        """Ключ Redis для пары (правило, ключ)"""
+        return f"{self.key_prefix}{rule.algorithm}:{rule.name}:{key}"
+
+    async def check(self, rule: LimitRule, key: str) -> LimitDecision:
+        """Проверить один ключ по правилу"""
+        return (await self.check_many([(rule, key)]))[0]
+
+    async def check_many(self, checks: Sequence[Tuple[LimitRule, str]]) -> List[LimitDecision]:
+        """
+        Проверить несколько (правило, ключ) за один round trip.
+
+        Returns:
+            Решения в порядке входных проверок
+        """
+        if not checks:
+            return []
+
+        self.stats["checks"] += len(checks)
+
+        if self.redis_available:
+            try:
+                return await self._check_redis(checks)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                self._redis_down_until = time.time() + self.retry_interval
+                logger.warning(f"Redis недоступен для rate limiting, используем локальный fallback: {e}")
+
+        self.stats["fallback_checks"] += len(checks)
+        return [self._check_local(rule, key) for rule, key in checks]
+
+    async def _check_redis(self, checks: Sequence[Tuple[LimitRule, str]]) -> List[LimitDecision]:
+        pipe = self.redis_client.pipeline(transaction=False)
+
+        for rule, key in checks:
+            redis_key = self.redis_key(rule, key)
+            if rule.algorithm == "sliding_window":
+                await self._sliding_script(
+                    keys=[redis_key],
+                    args=[int(rule.window_seconds * 1000), rule.limit, uuid.uuid4().hex],
+                    client=pipe,
+                )
+            else:
+                await self._bucket_script(
+                    keys=[redis_key],
+                    args=[rule.capacity, rule.refill_rate / 1000.0, 1],
+                    client=pipe,
+                )
+
+        replies = await pipe.execute()
+        self.stats["round_trips"] += 1
+
+        decisions = []
+        for (rule, key), reply in zip(checks, replies):
+            allowed, value, timing = (int(part) for part in reply)
+            if rule.algorithm == "sliding_window":
+                decisions.append(LimitDecision(
+                    rule=rule.name,
+                    key=key,
+                    allowed=bool(allowed),
+                    remaining=max(0, rule.limit - value),
+                    reset_after_seconds=max(0.0, timing / 1000.0),
+                    distributed=True,
+                ))
+            else:
+                decisions.append(LimitDecision(
+                    rule=rule.name,
+                    key=key,
+                    allowed=bool(allowed),
+                    remaining=value / 1000.0,
+                    reset_after_seconds=timing / 1000.0,
+                    distributed=True,
+                ))
+        return decisions
+
+    def _local_algorithm(self, rule: LimitRule) -> BaseRateLimitAlgorithm:
+        signature = (rule.name, rule.algorithm, rule.window_seconds, rule.limit or rule.capacity, rule.refill_rate)
+        algorithm = self._local.get(signature)
+        if algorithm is None:
+            if rule.algorithm == "sliding_window":
+                algorithm = ShardedSlidingWindow(rule.limit, rule.window_seconds, mode="log")
+            else:
+                algorithm = TokenBucket(rule.capacity, rule.refill_rate)
+            self._local[signature] = algorithm
+        return algorithm
+
+    def _check_local(self, rule: LimitRule, key: str) -> LimitDecision:
+        allowed, info = self._local_algorithm(rule).check_rate_limit(key)
+
+        if rule.algorithm == "sliding_window":
+            remaining = max(0, rule.limit - info.get("current_count", 0))
+            reset_after = max(0.0, info.get("reset_time", 0) - time.time()) if not allowed else rule.window_seconds
+        else:
+            remaining = info.get("available_tokens", 0)
+            reset_after = 0.0 if allowed else info.get("next_token_in", 0.0)
+
+        return LimitDecision(
+            rule=rule.name,
+            key=key,
+            allowed=allowed,
+            remaining=remaining,
+            reset_after_seconds=reset_after,
+            distributed=False,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика limiter'а"""
+        return {
+            **self.stats,
+            "redis_available": self.redis_available,
+            "local_rules": len(self._local),
+        }
+
+
+# Правила по умолчанию для измерений RequestTracker
+DEFAULT_DIMENSION_RULES: Dict[str, LimitRule] = {
+    "ip": LimitRule(name="ip", algorithm="sliding_window", limit=1000, window_seconds=60),
+    "user": LimitRule(name="user", algorithm="sliding_window", limit=60, window_seconds=60),
+    "tool": LimitRule(name="tool", algorithm="token_bucket", capacity=60, refill_rate=1.0),
+}
@@ -7,7 +7,7 @@
 Особенности:
 - Потокобезопасность (thread-safe)
 - Оптимизация производительности (< 1ms на запрос)
-- Поддержка Redis для distributed режима
+- Поддержка Redis для distributed режима (атомарные Lua скрипты, один round trip)
 - Автоматическая очистка устаревших данных
 - Интеграция с FastAPI и OAuth2
 """
@@ -27,20 +27,31 @@ from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 try:
     import redis.asyncio as redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+    redis = None
+
+try:
     from geoip2.database import Reader
     from geoip2.errors import AddressNotFoundError
-    HAS_REDIS = True
     HAS_GEOIP = True
 except ImportError:
-    HAS_REDIS = False
     HAS_GEOIP = False
-    redis = None
     Reader = None
     AddressNotFoundError = Exception
 
 import psutil
 from fastapi import Request
 
+try:
+    from .redis_limiter import (DEFAULT_DIMENSION_RULES, AtomicRedisRateLimiter,
+                                LimitDecision, LimitRule)
+except ImportError:
+    # Для запуска как скрипта
+    from redis_limiter import (DEFAULT_DIMENSION_RULES, AtomicRedisRateLimiter,
+                               LimitDecision, LimitRule)
+
 logger = logging.getLogger(__name__)
 
 
@@ -364,11 +375,17 @@ class UserTracker(BaseTracker):
             # Проверяем лимиты
             return self._check_rate_limits(user_id, current_time)
     
+    def get_rate_limits(self, user_id: str) -> Dict[str, int]:
+        """Лимиты пользователя по его уровню (free для неизвестных)"""
+        with self.lock:
+            user_data = self.data.get(user_id)
+            user_tier = user_data["user_tier"] if user_data else "free"
+            return self.rate_limits.get(user_tier, self.rate_limits["free"])
+    
     def _check_rate_limits(self, user_id: str, current_time: float) -> bool:
         """Проверка лимитов для пользователя"""
         user_data = self.data[user_id]
-        user_tier = user_data["user_tier"]
-        limits = self.rate_limits.get(user_tier, self.rate_limits["free"])
+        limits = self.get_rate_limits(user_id)
         
         # Проверяем запросы за последнюю минуту
         requests_last_minute = len([
@@ -505,10 +522,18 @@ class ToolTracker(BaseTracker):
             # Проверяем лимиты
             return self._check_tool_limits(tool_name, current_time)
     
+    def get_tool_limits(self, tool_name: str) -> Dict[str, int]:
+        """Действующие лимиты инструмента (заданные, стандартные или общие)"""
+        with self.lock:
+            return self.tool_limits.get(
+                tool_name,
+                self.default_tool_limits.get(tool_name, {"per_minute": 60, "per_hour": 1000})
+            )
+    
     def _check_tool_limits(self, tool_name: str, current_time: float) -> bool:
         """Проверка лимитов для инструмента"""
         tool_data = self.data[tool_name]
-        limits = self.tool_limits.get(tool_name, self.default_tool_limits.get(tool_name, {"per_minute": 60, "per_hour": 1000}))
+        limits = self.get_tool_limits(tool_name)
         
         # Проверяем запросы за последнюю минуту
         calls_last_minute = len([
@@ -581,16 +606,35 @@ class ToolTracker(BaseTracker):
 
 
 class DistributedTracker(BaseTracker):
-    """Трекер для горизонтального масштабирования с Redis"""
+    """
+    Трекер для горизонтального масштабирования с Redis
+    
+    Проверки выполняются атомарными Lua скриптами (AtomicRedisRateLimiter),
+    проверки IP/пользователя/инструмента отправляются одним pipeline.
+    При недоступности Redis используется локальный учет.
+    """
+    
+    # Лимит по комбинированному ключу запроса (IP + пользователь + инструмент)
+    DEFAULT_REQUEST_LIMIT = 1000
     
-    def __init__(self, redis_url: Optional[str] = None, **kwargs):
+    def __init__(self,
+                 redis_url: Optional[str] = None,
+                 redis_client: Any = None,
+                 dimension_rules: Optional[Dict[str, LimitRule]] = None,
+                 **kwargs):
         super().__init__(**kwargs)
         self.redis_url = redis_url
-        self.redis_client = None
-        self.use_redis = HAS_REDIS and redis_url is not None
+        self.redis_client = redis_client
+        self.use_redis = redis_client is not None or (HAS_REDIS and redis_url is not None)
+        self.dimension_rules = dict(dimension_rules or DEFAULT_DIMENSION_RULES)
         
-        if self.use_redis:
+        if self.use_redis and self.redis_client is None:
             self._init_redis()
+        
+        self.limiter = AtomicRedisRateLimiter(
+            self.redis_client if self.use_redis else None,
+            key_prefix="request_tracker:"
+        )
     
     def _init_redis(self):
         """Инициализация Redis клиента"""
@@ -633,13 +677,24 @@ class DistributedTracker(BaseTracker):
         except Exception:
             pass
     
+    def add_request(self, metrics: RequestMetrics) -> bool:
+        """Синхронный учет запроса (локально, без Redis)"""
+        return self._add_request_local(metrics.ip, asdict(metrics))
+    
+    def _request_rule(self, expire_seconds: int) -> LimitRule:
+        """Правило sliding window для комбинированного ключа запроса"""
+        return LimitRule(
+            name="requests",
+            algorithm="sliding_window",
+            limit=self.DEFAULT_REQUEST_LIMIT,
+            window_seconds=expire_seconds
+        )
+    
     async def add_request_distributed(self, 
                                     key: str, 
                                     request_data: Dict[str, Any], 
                                     expire_seconds: int = 3600) -> bool:
         """Добавить запрос в distributed режиме"""
-        current_time = time.time()
-        
         if self.use_redis:
             return await self._add_request_redis(key, request_data, expire_seconds)
         else:
@@ -649,34 +704,52 @@ class DistributedTracker(BaseTracker):
                                 key: str, 
                                 request_data: Dict[str, Any], 
                                 expire_seconds: int) -> bool:
-        """Добавить запрос в Redis"""
-        try:
-            # Используем Redis sorted set для хранения временных меток
-            redis_key = f"request_tracker:{key}"
-            current_timestamp = current_time
-            
-            # Добавляем текущий запрос
-            await self.redis_client.zadd(redis_key, {str(current_timestamp): current_timestamp})
-            
-            # Удаляем старые записи (старше expire_seconds)
-            cutoff_time = current_time - expire_seconds
-            await self.redis_client.zremrangebyscore(redis_key, 0, cutoff_time)
-            
-            # Устанавливаем TTL для ключа
-            await self.redis_client.expire(redis_key, expire_seconds)
-            
-            # Получаем количество запросов за период
-            request_count = await self.redis_client.zcard(redis_key)
-            
-            # Проверяем лимиты (пример: не более 1000 запросов в час)
-            if request_count > 1000:
-                return False
-            
-            return True
+        """Добавить запрос в Redis одним атомарным скриптом"""
+        decision = await self.limiter.check(self._request_rule(expire_seconds), key)
+        
+        if not decision.distributed:
+            # Redis недоступен - сохраняем локальную статистику
+            self._add_request_local(key, request_data)
+        
+        return decision.allowed
+    
+    async def check_dimensions(self,
+                               ip: Optional[str] = None,
+                               user_id: Optional[str] = None,
+                               tool_name: Optional[str] = None,
+                               request_key: Optional[str] = None,
+                               expire_seconds: int = 3600,
+                               rules: Optional[Dict[str, LimitRule]] = None) -> Tuple[bool, List[LimitDecision]]:
+        """
+        Проверить лимиты по IP, пользователю и инструменту за один round trip
+        
+        Args:
+            ip: IP адрес клиента
+            user_id: ID пользователя
+            tool_name: Имя MCP инструмента
+            request_key: Комбинированный ключ запроса (учитывается правилом "requests")
+            expire_seconds: Окно для комбинированного ключа
+            rules: Правила для этого запроса поверх dimension_rules
+                   (например, лимит по уровню пользователя)
             
-        except Exception as e:
-            logger.error(f"Ошибка работы с Redis: {e}")
-            return False
+        Returns:
+            (разрешено ли по всем измерениям, решения по каждому измерению)
+        """
+        dimension_rules = {**self.dimension_rules, **rules} if rules else self.dimension_rules
+        checks: List[Tuple[LimitRule, str]] = []
+        for dimension, value in (("ip", ip), ("user", user_id), ("tool", tool_name)):
+            rule = dimension_rules.get(dimension)
+            if value and rule is not None:
+                checks.append((rule, value))
+        if request_key:
+            checks.append((self._request_rule(expire_seconds), request_key))
+        
+        decisions = await self.limiter.check_many(checks)
+        
+        if request_key and decisions and not decisions[-1].distributed:
+            self._add_request_local(request_key, {})
+        
+        return all(decision.allowed for decision in decisions), decisions
     
     def _add_request_local(self, key: str, request_data: Dict[str, Any]) -> bool:
         """Локальное добавление запроса (fallback)"""
@@ -712,16 +785,16 @@ class DistributedTracker(BaseTracker):
     async def _get_redis_stats(self, key: str) -> Optional[Dict[str, Any]]:
         """Получить статистику из Redis"""
         try:
-            redis_key = f"request_tracker:{key}"
+            redis_key = self.limiter.redis_key(self._request_rule(3600), key)
             
-            # Получаем все временные метки
+            # Получаем все временные метки (score в миллисекундах)
             timestamps = await self.redis_client.zrange(redis_key, 0, -1, withscores=True)
             
             if not timestamps:
                 return None
             
             current_time = time.time()
-            request_times = [float(ts[1]) for ts in timestamps]
+            request_times = [float(ts[1]) / 1000.0 for ts in timestamps]
             
             # Статистика за различные периоды
             last_minute = len([t for t in request_times if current_time - t < 60])
@@ -785,7 +858,8 @@ class RequestTracker:
     def __init__(self, 
                  use_redis: bool = False,
                  redis_url: Optional[str] = None,
-                 geoip_db_path: Optional[str] = None):
+                 geoip_db_path: Optional[str] = None,
+                 redis_client: Any = None):
         self.use_redis = use_redis
         self.redis_url = redis_url
         self.geoip_db_path = geoip_db_path
@@ -813,6 +887,7 @@ class RequestTracker:
         self.distributed_tracker = DistributedTracker(
             name="distributed_tracker",
             redis_url=redis_url,
+            redis_client=redis_client,
             max_size=100000,
             ttl=3600
         )
@@ -859,10 +934,14 @@ class RequestTracker:
             # Проверяем distributed режим если используется
             distributed_allowed = True
             if self.use_redis:
-                # Создаем ключ для distributed tracking
+                # Все измерения + комбинированный ключ проверяются одним pipeline
                 dist_key = self._create_distributed_key(metrics)
-                distributed_allowed = await self.distributed_tracker.add_request_distributed(
-                    dist_key, metrics.__dict__
+                distributed_allowed, _ = await self.distributed_tracker.check_dimensions(
+                    ip=metrics.ip,
+                    user_id=metrics.user_id,
+                    tool_name=metrics.tool_name,
+                    request_key=dist_key,
+                    rules=self._dimension_rules(metrics)
                 )
             
             # Общая проверка - все трекеры должны разрешить запрос
@@ -928,6 +1007,32 @@ class RequestTracker:
             content_length=0  # Можно извлечь из response если нужно
         )
     
+    def _dimension_rules(self, metrics: RequestMetrics) -> Dict[str, LimitRule]:
+        """
+        Distributed правила пользователя и инструмента из настроек трекеров
+        
+        Имена правил не зависят от уровня, поэтому при смене уровня
+        счетчики в Redis сохраняются, меняется только лимит.
+        """
+        rules = {}
+        if metrics.user_id:
+            user_limits = self.user_tracker.get_rate_limits(metrics.user_id)
+            rules["user"] = LimitRule(
+                name="user",
+                algorithm="sliding_window",
+                limit=user_limits["requests_per_minute"],
+                window_seconds=60
+            )
+        if metrics.tool_name:
+            per_minute = self.tool_tracker.get_tool_limits(metrics.tool_name)["per_minute"]
+            rules["tool"] = LimitRule(
+                name="tool",
+                algorithm="token_bucket",
+                capacity=per_minute,
+                refill_rate=per_minute / 60.0
+            )
+        return rules
+    
     def _create_distributed_key(self, metrics: RequestMetrics) -> str:
         """Создать ключ для distributed tracking"""
         # Создаем ключ на основе IP, пользователя и инструмента
@@ -10,6 +10,7 @@
 - Thread-safe операции
 - Метрики производительности
 - Сравнительный анализ эффективности
+- Шардированный sliding window (log / counter) для сотен тысяч ключей
 """
 
 import heapq
@@ -19,7 +20,7 @@ import threading
 import time
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 
 @dataclass
@@ -149,9 +150,8 @@ class SlidingWindowAlgorithm(BaseRateLimitAlgorithm):
         
         if current_count < self.limit:
             # Разрешаем запрос
-            self.requests_heap.append((current_time, key))
+            heapq.heappush(self.requests_heap, (current_time, key))
             self.key_counts[key] += 1
-            heapq.heapify(self.requests_heap)  # Поддерживаем кучу
             
             return True, {
                 "limit": self.limit,
@@ -197,6 +197,191 @@ class SlidingWindowAlgorithm(BaseRateLimitAlgorithm):
         self.last_cleanup = time.time()
 
 
+class ShardedSlidingWindow(BaseRateLimitAlgorithm):
+    """
+    Sliding window с независимым состоянием для каждого ключа.
+    
+    Режимы:
+    - "log": кольцевой буфер временных меток на ключ (deque с maxlen=limit),
+      точный подсчет, память на ключ ограничена limit
+    - "counter": два счетчика (текущее и предыдущее окно) с весовой
+      интерполяцией, O(1) по памяти и времени
+    
+    Особенности:
+    - O(1) амортизированно на проверку, не зависит от числа ключей
+    - Ключи распределены по шардам, у каждого шарда своя блокировка
+    - Пакетная проверка check_many() берет блокировку шарда один раз
+    - Неактивные ключи удаляются ленивой очисткой шарда
+    """
+    
+    MODES = ("log", "counter")
+    
+    def __init__(self, limit: int, window_seconds: float, mode: str = "log",
+                 num_shards: int = 64, clock: Callable[[], float] = time.time):
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим sliding window: {mode}")
+        
+        super().__init__(f"sliding_window_{mode}")
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.mode = mode
+        self.num_shards = num_shards
+        self._clock = clock
+        
+        # Состояние по шардам: key -> deque меток (log) или [окно, текущий, предыдущий] (counter)
+        self._shards: List[Dict[str, Any]] = [{} for _ in range(num_shards)]
+        self._shard_locks = [threading.Lock() for _ in range(num_shards)]
+        # Размер шарда, после которого запускается очистка неактивных ключей
+        self._sweep_thresholds = [1024] * num_shards
+    
+    def _shard_index(self, key: str) -> int:
+        return hash(key) % self.num_shards
+    
+    def check_rate_limit(self, key: str = "default") -> Tuple[bool, Dict[str, Any]]:
+        """Проверить лимит запроса (без глобальной блокировки)"""
+        start_time = time.perf_counter()
+        
+        try:
+            allowed, info = self._check_rate_limit_impl(key)
+        except Exception as e:
+            self.logger.error(f"Ошибка в алгоритме {self.metrics.algorithm_name}: {e}")
+            return True, {"error": str(e)}
+        
+        response_time_ms = (time.perf_counter() - start_time) * 1000
+        self.metrics.record_request(response_time_ms, allowed)
+        return allowed, info
+    
+    def check_many(self, keys: Iterable[str]) -> List[Tuple[bool, Dict[str, Any]]]:
+        """
+        Проверить лимиты для набора ключей.
+        
+        Ключи группируются по шардам, блокировка каждого шарда берется один раз.
+        Результаты возвращаются в исходном порядке ключей.
+        """
+        keys = list(keys)
+        start_time = time.perf_counter()
+        now = self._clock()
+        
+        by_shard: Dict[int, List[int]] = defaultdict(list)
+        for position, key in enumerate(keys):
+            by_shard[self._shard_index(key)].append(position)
+        
+        results: List[Optional[Tuple[bool, Dict[str, Any]]]] = [None] * len(keys)
+        for shard_index, positions in by_shard.items():
+            with self._shard_locks[shard_index]:
+                shard = self._shards[shard_index]
+                for position in positions:
+                    results[position] = self._check_in_shard(shard, keys[position], now)
+                self._maybe_sweep(shard_index, now)
+        
+        if keys:
+            per_key_ms = (time.perf_counter() - start_time) * 1000 / len(keys)
+            for allowed, _ in results:
+                self.metrics.record_request(per_key_ms, allowed)
+        
+        return results
+    
+    def _check_rate_limit_impl(self, key: str) -> Tuple[bool, Dict[str, Any]]:
+        now = self._clock()
+        shard_index = self._shard_index(key)
+        
+        with self._shard_locks[shard_index]:
+            result = self._check_in_shard(self._shards[shard_index], key, now)
+            self._maybe_sweep(shard_index, now)
+        return result
+    
+    def _check_in_shard(self, shard: Dict[str, Any], key: str, now: float) -> Tuple[bool, Dict[str, Any]]:
+        if self.mode == "log":
+            return self._check_log(shard, key, now)
+        return self._check_counter(shard, key, now)
+    
+    def _check_log(self, shard: Dict[str, Any], key: str, now: float) -> Tuple[bool, Dict[str, Any]]:
+        window_start = now - self.window_seconds
+        timestamps = shard.get(key)
+        if timestamps is None:
+            timestamps = deque(maxlen=self.limit)
+            shard[key] = timestamps
+        
+        while timestamps and timestamps[0] <= window_start:
+            timestamps.popleft()
+        
+        current_count = len(timestamps)
+        info = {
+            "limit": self.limit,
+            "window_seconds": self.window_seconds,
+            "window_start": window_start,
+            "algorithm": self.metrics.algorithm_name
+        }
+        
+        if current_count < self.limit:
+            timestamps.append(now)
+            info["current_count"] = current_count + 1
+            return True, info
+        
+        info["current_count"] = current_count
+        info["reset_time"] = timestamps[0] + self.window_seconds
+        return False, info
+    
+    def _check_counter(self, shard: Dict[str, Any], key: str, now: float) -> Tuple[bool, Dict[str, Any]]:
+        window_index = int(now // self.window_seconds)
+        state = shard.get(key)
+        if state is None:
+            state = [window_index, 0, 0]
+            shard[key] = state
+        elif state[0] != window_index:
+            # Сдвигаем окна: текущее становится предыдущим (или обнуляется при пропуске)
+            state[2] = state[1] if state[0] == window_index - 1 else 0
+            state[1] = 0
+            state[0] = window_index
+        
+        elapsed_fraction = (now - window_index * self.window_seconds) / self.window_seconds
+        estimated = state[2] * (1.0 - elapsed_fraction) + state[1]
+        window_end = (window_index + 1) * self.window_seconds
+        
+        info = {
+            "limit": self.limit,
+            "window_seconds": self.window_seconds,
+            "window_start": now - self.window_seconds,
+            "algorithm": self.metrics.algorithm_name
+        }
+        
+        if estimated < self.limit:
+            state[1] += 1
+            info["current_count"] = estimated + 1
+            return True, info
+        
+        info["current_count"] = estimated
+        info["reset_time"] = window_end
+        return False, info
+    
+    def _is_idle(self, state: Any, now: float) -> bool:
+        if self.mode == "log":
+            return not state or state[-1] <= now - self.window_seconds
+        return state[0] < int(now // self.window_seconds) - 1
+    
+    def _maybe_sweep(self, shard_index: int, now: float):
+        """Удалить неактивные ключи, когда шард вырос вдвое с прошлой очистки"""
+        shard = self._shards[shard_index]
+        if len(shard) < self._sweep_thresholds[shard_index]:
+            return
+        
+        idle_keys = [key for key, state in shard.items() if self._is_idle(state, now)]
+        for key in idle_keys:
+            del shard[key]
+        self._sweep_thresholds[shard_index] = max(1024, 2 * len(shard))
+    
+    def active_keys(self) -> int:
+        """Количество ключей с сохраненным состоянием"""
+        return sum(len(shard) for shard in self._shards)
+    
+    def _reset_impl(self):
+        """Сброс состояния алгоритма"""
+        for index, lock in enumerate(self._shard_locks):
+            with lock:
+                self._shards[index].clear()
+                self._sweep_thresholds[index] = 1024
+
+
 class TokenBucket(BaseRateLimitAlgorithm):
     """
     Алгоритм Token Bucket для поддержки burst трафика.
@@ -440,6 +625,12 @@ class MultiWindowTracker(BaseRateLimitAlgorithm):
                     config["limit"], 
                     config["window_seconds"]
                 )
+            elif algo_type in ("sliding_window_log", "sliding_window_counter"):
+                algo = ShardedSlidingWindow(
+                    config["limit"],
+                    config["window_seconds"],
+                    mode=algo_type.rsplit("_", 1)[1]
+                )
             elif algo_type == "fixed_window":
                 algo = FixedWindowCounter(
                     config["limit"], 
@@ -603,6 +794,16 @@ def create_sliding_window_config(limit: int, window_seconds: int) -> Dict[str, A
     }
 
 
+def create_sharded_sliding_window_config(limit: int, window_seconds: int,
+                                         mode: str = "log") -> Dict[str, Any]:
+    """Создать конфигурацию шардированного sliding window (log или counter)"""
+    return {
+        "type": f"sliding_window_{mode}",
+        "limit": limit,
+        "window_seconds": window_seconds
+    }
+
+
 def create_token_bucket_config(capacity: int, refill_rate: float) -> Dict[str, Any]:
     """Создать конфигурацию token bucket"""
     return {
@@ -6,6 +6,7 @@
 Проверка основной функциональности системы мониторинга
 """
 
+import json
 import os
 import tempfile
 import threading
@@ -82,6 +83,39 @@ class TestRateLimitMetrics(unittest.TestCase):
         self.metrics.set_health_status("error")
         health = self.metrics.get_health_status()
         self.assertEqual(health['status'], "error")
+    
+    def test_response_time_percentiles(self):
+        """Тест квантилей времени отклика из скетчей"""
+        for i in range(1, 1001):
+            self.metrics.record_request(tool="test", response_time=i / 1000, blocked=i % 4 == 0)
+        
+        # История ограничена 100 записями, квантили считаются по всем запросам
+        summary = self.metrics.get_histogram_summary('rate_limit_response_time_seconds', {'tool': 'test'})
+        self.assertEqual(summary['count'], 1000)
+        self.assertAlmostEqual(summary['p50'], 0.5, delta=0.01)
+        self.assertAlmostEqual(summary['p99'], 0.99, delta=0.02)
+        
+        window = self.metrics.get_window_stats()
+        self.assertEqual(window['requests'], 1000)
+        self.assertEqual(window['blocked'], 250)
+        self.assertAlmostEqual(window['avg_response_time'], 0.5005, places=6)
+    
+    def test_merge_worker_state(self):
+        """Тест слияния метрик нескольких воркеров"""
+        other = RateLimitMetrics()
+        for i in range(100):
+            self.metrics.record_request(tool="test", response_time=0.01)
+            other.record_request(tool="test", response_time=1.0)
+        
+        self.metrics.merge_state(json.loads(json.dumps(other.export_state())))
+        
+        summary = self.metrics.get_metrics_summary()
+        self.assertEqual(summary['total_requests'], 200)
+        self.assertAlmostEqual(summary['response_time_quantiles']['0.95'], 1.0, delta=0.02)
+        
+        histogram = self.metrics.get_histogram_summary('rate_limit_response_time_seconds', {'tool': 'test'})
+        self.assertEqual(histogram['count'], 200)
+        self.assertEqual(self.metrics.get_window_stats()['requests'], 200)
 
 
 class TestPrometheusExporter(unittest.TestCase):
@@ -101,6 +135,10 @@ class TestPrometheusExporter(unittest.TestCase):
         self.assertIn('rate_limit_requests_total', prometheus_text)
         self.assertIn('192.168.1.100', prometheus_text)
         self.assertIn('test', prometheus_text)
+        self.assertIn('rate_limit_response_time_seconds_bucket{ip="192.168.1.100",tool="test",le="0.25"} 1',
+                      prometheus_text)
+        self.assertIn('rate_limit_response_time_seconds_count{ip="192.168.1.100",tool="test"} 1', prometheus_text)
+        self.assertIn('rate_limit_summary_response_time_seconds{quantile="0.99"}', prometheus_text)
     
     def test_export_to_file(self):
         """Тест экспорта в файл"""
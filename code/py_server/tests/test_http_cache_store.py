@@ -0,0 +1,207 @@
+# [NEXUS IDENTITY] ID: -6620514470393811802 | DATE: 2026-10-17
+
+"""
+Тесты для хранилища ответов HTTPCacheMiddleware
+
+Проверяют O(1) LRU, инкрементальное истечение TTL, учет размера в байтах
+и разделяемый бэкенд на Redis (fakeredis).
+
+Запуск тестов:
+    python -m pytest tests/test_http_cache_store.py -v
+
+Версия: 1.0.0
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache.http_cache import CacheEntry, HTTPCacheMiddleware
+from cache.response_store import InMemoryResponseStore, RedisResponseBackend
+
+
+def make_entry(content="data", size=10):
+    return CacheEntry(
+        content=content,
+        etag='"abc"',
+        last_modified="Mon, 01 Jan 2024 00:00:00 GMT",
+        cache_control="public, max-age=60",
+        size=size,
+    )
+
+
+class TestInMemoryResponseStore(unittest.TestCase):
+    """Тесты для InMemoryResponseStore"""
+
+    def test_put_and_get(self):
+        store = InMemoryResponseStore(max_entries=10)
+        store.put("a", make_entry(), ttl=60, now=0)
+
+        self.assertIsNotNone(store.get("a", now=1))
+        self.assertIsNone(store.get("missing", now=1))
+
+    def test_lru_eviction_respects_access_order(self):
+        store = InMemoryResponseStore(max_entries=2)
+        store.put("a", make_entry(), ttl=60, now=0)
+        store.put("b", make_entry(), ttl=60, now=0)
+        store.get("a", now=1)
+
+        removed = store.put("c", make_entry(), ttl=60, now=2)
+
+        self.assertEqual(removed, 1)
+        self.assertIn("a", store)
+        self.assertNotIn("b", store)
+        self.assertIn("c", store)
+
+    def test_expired_entry_not_returned(self):
+        store = InMemoryResponseStore()
+        store.put("a", make_entry(), ttl=10, now=0)
+
+        self.assertIsNone(store.get("a", now=11))
+        self.assertEqual(len(store), 0)
+
+    def test_put_expires_old_entries_incrementally(self):
+        store = InMemoryResponseStore()
+        store.put("old", make_entry(), ttl=5, now=0)
+        store.put("fresh", make_entry(), ttl=100, now=0)
+
+        removed = store.put("new", make_entry(), ttl=100, now=10)
+
+        self.assertEqual(removed, 1)
+        self.assertNotIn("old", store)
+        self.assertEqual(store.get_stats()["expirations"], 1)
+
+    def test_byte_limit(self):
+        store = InMemoryResponseStore(max_entries=100, max_bytes=25)
+        for key in ("a", "b", "c"):
+            store.put(key, make_entry(size=10), ttl=60, size=10, now=0)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.total_bytes, 20)
+        self.assertNotIn("a", store)
+
+    def test_overwrite_updates_size_and_ttl(self):
+        store = InMemoryResponseStore()
+        store.put("a", make_entry(), ttl=5, size=10, now=0)
+        store.put("a", make_entry(), ttl=50, size=30, now=0)
+
+        self.assertEqual(store.total_bytes, 30)
+        self.assertIsNotNone(store.get("a", now=20))
+
+    def test_heap_compaction(self):
+        store = InMemoryResponseStore(max_entries=10)
+        for i in range(1000):
+            store.put("same", make_entry(), ttl=60, now=i * 0.001)
+
+        self.assertLessEqual(len(store._heap), 2 * len(store) + 65)
+
+
+class TestRedisResponseBackend(unittest.TestCase):
+    """Тесты для RedisResponseBackend"""
+
+    def setUp(self):
+        try:
+            from fakeredis import aioredis
+        except ImportError:
+            self.skipTest("fakeredis not installed")
+        self.backend = RedisResponseBackend(aioredis.FakeRedis(), entry_factory=CacheEntry)
+
+    def test_roundtrip(self):
+        async def scenario():
+            await self.backend.set("k", make_entry(content={"x": 1}), ttl=30)
+            return await self.backend.get("k")
+
+        entry, ttl = asyncio.run(scenario())
+
+        self.assertEqual(entry.content, {"x": 1})
+        self.assertEqual(entry.etag, '"abc"')
+        self.assertGreater(ttl, 0)
+
+    def test_delete_and_clear(self):
+        async def scenario():
+            await self.backend.set("k1", make_entry(), ttl=30)
+            await self.backend.set("k2", make_entry(), ttl=30)
+            await self.backend.delete("k1")
+            first = await self.backend.get("k1")
+            await self.backend.clear()
+            second = await self.backend.get("k2")
+            return first, second
+
+        self.assertEqual(asyncio.run(scenario()), (None, None))
+
+
+class TestHTTPCacheMiddlewareHit(unittest.TestCase):
+    """Ответ из кэша совпадает с исходным ответом"""
+
+    def setUp(self):
+        try:
+            from fastapi import FastAPI
+            from fastapi.responses import PlainTextResponse, StreamingResponse
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi not installed")
+
+        app = FastAPI()
+        app.add_middleware(HTTPCacheMiddleware, cache_ttl=60)
+
+        @app.get("/items")
+        async def items():
+            return [{"a": 1}, {"b": "тест"}]
+
+        @app.get("/count")
+        async def count():
+            return 42
+
+        @app.get("/text", response_class=PlainTextResponse)
+        async def text():
+            return "plain"
+
+        @app.get("/events")
+        async def events():
+            async def stream():
+                for i in range(3):
+                    yield f"data: {i}\n\n"
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        @app.get("/chunks")
+        async def chunks():
+            async def stream():
+                yield b"a"
+                yield b"b"
+            return StreamingResponse(stream(), media_type="application/octet-stream")
+
+        self.client = TestClient(app)
+
+    def test_json_list_and_scalar_served_as_json(self):
+        for path, expected in (("/items", [{"a": 1}, {"b": "тест"}]), ("/count", 42)):
+            first = self.client.get(path)
+            second = self.client.get(path)
+
+            self.assertEqual(first.headers["x-cache"], "MISS")
+            self.assertEqual(second.headers["x-cache"], "HIT")
+            self.assertEqual(second.json(), expected)
+            self.assertTrue(second.headers["content-type"].startswith("application/json"))
+
+    def test_text_served_as_text(self):
+        self.client.get("/text")
+        second = self.client.get("/text")
+
+        self.assertEqual(second.headers["x-cache"], "HIT")
+        self.assertEqual(second.text, "plain")
+
+    def test_streaming_responses_are_not_buffered(self):
+        for path, body in (("/events", "data: 0\n\ndata: 1\n\ndata: 2\n\n"), ("/chunks", "ab")):
+            first = self.client.get(path)
+            second = self.client.get(path)
+
+            self.assertEqual(first.text, body)
+            self.assertEqual(second.text, body)
+            self.assertNotIn("x-cache", second.headers)
+            self.assertNotIn("etag", first.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+# [NEXUS IDENTITY] ID: -3170594228834145719 | DATE: 2026-10-17
+
+"""
+Тесты для AtomicRedisRateLimiter и distributed режима DistributedTracker
+
+Используют fakeredis (с поддержкой Lua через lupa) вместо реального Redis.
+
+Запуск тестов:
+    python -m pytest tests/test_redis_limiter.py -v
+
+Версия: 1.0.0
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ratelimit"))
+
+from redis_limiter import AtomicRedisRateLimiter, LimitRule
+from request_tracker import DistributedTracker, RequestMetrics, RequestTracker
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+class CountingPipeline:
+    """Обертка над pipeline для подсчета execute() (round trips)"""
+
+    def __init__(self, pipe, counter):
+        self._pipe = pipe
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    async def execute(self, *args, **kwargs):
+        self._counter.append(1)
+        return await self._pipe.execute(*args, **kwargs)
+
+
+class BrokenRedis:
+    """Клиент, который всегда падает при выполнении pipeline"""
+
+    def register_script(self, script):
+        async def call(keys=None, args=None, client=None):
+            raise ConnectionError("redis is down")
+        return call
+
+    def pipeline(self, transaction=False):
+        return self
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_sliding_window_is_enforced(redis_client):
+    limiter = AtomicRedisRateLimiter(redis_client)
+    rule = LimitRule(name="user", limit=3, window_seconds=60)
+
+    async def scenario():
+        return [(await limiter.check(rule, "u1")).allowed for _ in range(4)]
+
+    assert run(scenario()) == [True, True, True, False]
+
+
+def test_token_bucket_is_enforced(redis_client):
+    limiter = AtomicRedisRateLimiter(redis_client)
+    rule = LimitRule(name="tool", algorithm="token_bucket", capacity=2, refill_rate=0.001)
+
+    async def scenario():
+        return [await limiter.check(rule, "t1") for _ in range(3)]
+
+    decisions = run(scenario())
+    assert [d.allowed for d in decisions] == [True, True, False]
+    assert decisions[-1].reset_after_seconds > 0
+    assert all(d.distributed for d in decisions)
+
+
+def test_instances_share_state(redis_client):
+    rule = LimitRule(name="ip", limit=2, window_seconds=60)
+    replica_a = AtomicRedisRateLimiter(redis_client)
+    replica_b = AtomicRedisRateLimiter(redis_client)
+
+    async def scenario():
+        first = await replica_a.check(rule, "10.0.0.1")
+        second = await replica_b.check(rule, "10.0.0.1")
+        third = await replica_a.check(rule, "10.0.0.1")
+        return first.allowed, second.allowed, third.allowed
+
+    assert run(scenario()) == (True, True, False)
+
+
+def test_replica_clock_skew_does_not_shift_windows(redis_client, monkeypatch):
+    import types
+
+    import redis_limiter
+
+    rule = LimitRule(name="ip", limit=2, window_seconds=60)
+    replica_a = AtomicRedisRateLimiter(redis_client)
+    replica_b = AtomicRedisRateLimiter(redis_client)
+
+    async def scenario():
+        first = await replica_a.check(rule, "10.0.0.2")
+        # Часы реплики B ушли на два окна вперед: окно все равно общее
+        monkeypatch.setattr(redis_limiter, "time", types.SimpleNamespace(time=lambda: 1e10))
+        second = await replica_b.check(rule, "10.0.0.2")
+        third = await replica_b.check(rule, "10.0.0.2")
+        return first.allowed, second.allowed, third.allowed, third.reset_after_seconds
+
+    *allowed, reset_after = run(scenario())
+    assert allowed == [True, True, False]
+    assert 0 < reset_after <= 60
+
+
+def test_check_many_uses_single_round_trip(redis_client):
+    round_trips = []
+    original_pipeline = redis_client.pipeline
+    redis_client.pipeline = lambda *a, **kw: CountingPipeline(original_pipeline(*a, **kw), round_trips)
+    limiter = AtomicRedisRateLimiter(redis_client)
+
+    checks = [
+        (LimitRule(name="ip", limit=10, window_seconds=60), "10.0.0.1"),
+        (LimitRule(name="user", limit=10, window_seconds=60), "alice"),
+        (LimitRule(name="tool", algorithm="token_bucket", capacity=5, refill_rate=1.0), "search"),
+    ]
+    decisions = run(limiter.check_many(checks))
+
+    assert [d.rule for d in decisions] == ["ip", "user", "tool"]
+    assert all(d.allowed for d in decisions)
+    assert len(round_trips) == 1
+
+
+def test_falls_back_to_local_when_redis_unavailable():
+    limiter = AtomicRedisRateLimiter(BrokenRedis(), retry_interval=60)
+    rule = LimitRule(name="user", limit=2, window_seconds=60)
+
+    async def scenario():
+        return [await limiter.check(rule, "u1") for _ in range(3)]
+
+    decisions = run(scenario())
+    assert [d.allowed for d in decisions] == [True, True, False]
+    assert not any(d.distributed for d in decisions)
+    assert limiter.get_stats()["redis_errors"] == 1
+    assert limiter.redis_available is False
+
+
+def test_distributed_tracker_check_dimensions(redis_client):
+    tracker = DistributedTracker(
+        name="distributed_tracker",
+        redis_client=redis_client,
+        dimension_rules={"user": LimitRule(name="user", limit=1, window_seconds=60)},
+    )
+
+    async def scenario():
+        first = await tracker.check_dimensions(ip="10.0.0.1", user_id="alice", request_key="k")
+        second = await tracker.check_dimensions(ip="10.0.0.1", user_id="alice", request_key="k")
+        stats = await tracker.get_distributed_stats("k")
+        return first, second, stats
+
+    (allowed_1, decisions_1), (allowed_2, _), stats = run(scenario())
+
+    assert allowed_1 is True
+    assert [d.rule for d in decisions_1] == ["user", "requests"]
+    assert allowed_2 is False
+    assert stats["total_requests"] == 2
+    assert stats["is_distributed"] is True
+
+
+def test_request_tracker_uses_configured_tier_and_tool_limits(redis_client):
+    tracker = RequestTracker(use_redis=True, redis_client=redis_client)
+    metrics = RequestMetrics(
+        timestamp=0.0, ip="10.0.0.1", user_id="bob", tool_name="search",
+        endpoint="/mcp", method="POST", status_code=200, response_time_ms=1.0,
+        user_agent="", referer=None, content_length=0,
+    )
+    tracker.user_tracker.add_request(metrics)
+    tracker.set_user_tier("bob", "premium")
+    tracker.set_tool_limits("search", {"per_minute": 120, "per_hour": 5000})
+
+    rules = tracker._dimension_rules(metrics)
+    assert rules["user"].limit == 300
+    assert rules["tool"].capacity == 120
+    assert rules["tool"].refill_rate == pytest.approx(2.0)
+
+    async def scenario():
+        results = []
+        for _ in range(100):
+            allowed, _ = await tracker.distributed_tracker.check_dimensions(
+                user_id="bob", tool_name="search", rules=rules
+            )
+            results.append(allowed)
+        return results
+
+    # Стандартные правила (60 в минуту) заблокировали бы premium пользователя
+    assert all(run(scenario()))
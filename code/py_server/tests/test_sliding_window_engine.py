@@ -0,0 +1,122 @@
+# [NEXUS IDENTITY] ID: 2894407143175362259 | DATE: 2026-10-17
+
+"""
+Тесты для ShardedSlidingWindow (sliding window log / counter)
+
+Запуск тестов:
+    python -m pytest tests/test_sliding_window_engine.py -v
+
+Версия: 1.0.0
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ratelimit"))
+
+from sliding_window import (MultiWindowTracker, ShardedSlidingWindow,
+                            SlidingWindowAlgorithm,
+                            create_sharded_sliding_window_config)
+
+
+class FakeClock:
+    """Управляемые часы для детерминированных тестов"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize("mode", ["log", "counter"])
+def test_limit_enforced_per_key(mode):
+    clock = FakeClock()
+    limiter = ShardedSlidingWindow(limit=3, window_seconds=10, mode=mode, clock=clock)
+
+    results = [limiter.check_rate_limit("user_a")[0] for _ in range(4)]
+
+    assert results == [True, True, True, False]
+    assert limiter.check_rate_limit("user_b")[0] is True
+
+
+def test_log_mode_slides_window():
+    clock = FakeClock(1000.0)
+    limiter = ShardedSlidingWindow(limit=2, window_seconds=10, mode="log", clock=clock)
+    limiter.check_rate_limit("k")
+    clock.now = 1005.0
+    limiter.check_rate_limit("k")
+
+    clock.now = 1009.0
+    allowed, info = limiter.check_rate_limit("k")
+    assert allowed is False
+    assert info["reset_time"] == pytest.approx(1010.0)
+
+    clock.now = 1010.5
+    assert limiter.check_rate_limit("k")[0] is True
+
+
+def test_log_mode_memory_bounded_by_limit():
+    clock = FakeClock()
+    limiter = ShardedSlidingWindow(limit=5, window_seconds=60, mode="log", clock=clock)
+    for _ in range(100):
+        limiter.check_rate_limit("k")
+
+    shard = limiter._shards[limiter._shard_index("k")]
+    assert len(shard["k"]) == 5
+
+
+def test_counter_mode_weights_previous_window():
+    clock = FakeClock(100.0)
+    limiter = ShardedSlidingWindow(limit=10, window_seconds=10, mode="counter", clock=clock)
+    for _ in range(10):
+        limiter.check_rate_limit("k")
+
+    # Половина следующего окна: предыдущее окно весит 0.5 -> 5 "занятых" запросов
+    clock.now = 115.0
+    allowed = [limiter.check_rate_limit("k")[0] for _ in range(6)]
+
+    assert allowed == [True, True, True, True, True, False]
+
+
+def test_check_many_preserves_order():
+    clock = FakeClock()
+    limiter = ShardedSlidingWindow(limit=1, window_seconds=10, clock=clock)
+
+    results = limiter.check_many(["a", "b", "a", "c", "b"])
+
+    assert [allowed for allowed, _ in results] == [True, True, False, True, False]
+    assert limiter.get_metrics()["total_requests"] == 5
+
+
+def test_idle_keys_are_swept():
+    clock = FakeClock(0.0)
+    limiter = ShardedSlidingWindow(limit=10, window_seconds=1, num_shards=1, clock=clock)
+    limiter.check_many(f"old_{i}" for i in range(1023))
+
+    clock.now = 5.0
+    limiter.check_rate_limit("new")
+
+    assert limiter.active_keys() == 1
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        ShardedSlidingWindow(limit=1, window_seconds=1, mode="heap")
+
+
+def test_multi_window_tracker_accepts_sharded_configs():
+    tracker = MultiWindowTracker([
+        {**create_sharded_sliding_window_config(2, 60, mode="counter"), "name": "minute"},
+        create_sharded_sliding_window_config(10, 3600, mode="log"),
+    ])
+
+    assert [tracker.check_rate_limit("k")[0] for _ in range(3)] == [True, True, False]
+
+
+def test_legacy_sliding_window_still_limits():
+    limiter = SlidingWindowAlgorithm(limit=2, window_seconds=60)
+
+    assert [limiter.check_rate_limit("k")[0] for _ in range(3)] == [True, True, False]
@@ -0,0 +1,125 @@
+# [NEXUS IDENTITY] ID: 5281740936617240913 | DATE: 2026-10-17
+
+"""
+Тесты инкрементальной индексации ToolIndexer
+
+Проверяют diff по content hash (эмбеддятся только новые/изменённые tools),
+батчевые embeddings, upsert порциями и удаление исчезнувших tools.
+
+Запуск тестов:
+    python -m pytest tests/test_tool_indexer.py -v
+
+Версия: 1.0.0
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import qdrant_client
+except ImportError:  # pragma: no cover
+    qdrant_client = None
+
+from tool_indexer import ToolIndexer
+
+
+class FakeQdrantClient:
+    """In-memory заглушка QdrantClient (scroll/upsert/delete)"""
+
+    def __init__(self):
+        self.points = {}
+        self.upsert_calls = []
+        self.delete_calls = []
+
+    def get_collection(self, collection_name):
+        return SimpleNamespace(name=collection_name)
+
+    def scroll(self, collection_name, limit, offset=None, with_payload=None, with_vectors=True):
+        ids = sorted(self.points)
+        start = offset or 0
+        page = [SimpleNamespace(id=i, payload=self.points[i].payload) for i in ids[start:start + limit]]
+        next_offset = start + limit if start + limit < len(ids) else None
+        return page, next_offset
+
+    def upsert(self, collection_name, points):
+        self.upsert_calls.append(len(points))
+        for point in points:
+            self.points[point.id] = point
+
+    def delete(self, collection_name, points_selector):
+        self.delete_calls.append(list(points_selector.points))
+        for point_id in points_selector.points:
+            self.points.pop(point_id, None)
+
+
+def make_tools(count, description="tool"):
+    return [
+        {"name": f"tool_{i}", "server": "1c", "description": f"{description} {i}"}
+        for i in range(count)
+    ]
+
+
+@unittest.skipIf(qdrant_client is None, "qdrant-client not installed")
+class TestToolIndexerIncremental(unittest.TestCase):
+    """Тесты для ToolIndexer.index_tools"""
+
+    def setUp(self):
+        self.indexer = ToolIndexer(qdrant_url="http://localhost:6333")
+        self.indexer._client = FakeQdrantClient()
+        self.embedded_batches = []
+
+        async def fake_embeddings(texts):
+            self.embedded_batches.append(len(texts))
+            return [[float(len(text)), 1.0] for text in texts]
+
+        self.indexer._get_embeddings = fake_embeddings
+
+    def index(self, tools, **kwargs):
+        return asyncio.run(self.indexer.index_tools(tools, **kwargs))
+
+    def test_first_run_embeds_in_batches(self):
+        progress = []
+        stats = self.index(make_tools(10), embed_batch_size=4, upsert_batch_size=3, progress_callback=progress.append)
+
+        self.assertEqual(sorted(self.embedded_batches), [2, 4, 4])
+        self.assertEqual(stats["embedded"], 10)
+        self.assertEqual(stats["upserted"], 10)
+        self.assertTrue(all(size <= 3 for size in self.indexer._client.upsert_calls))
+        self.assertEqual(len(self.indexer._client.points), 10)
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(progress[-1]["embedded"], 10)
+
+    def test_unchanged_tools_are_skipped(self):
+        tools = make_tools(5)
+        self.index(tools)
+        self.embedded_batches.clear()
+
+        stats = self.index(tools)
+
+        self.assertEqual(self.embedded_batches, [])
+        self.assertEqual(stats["unchanged"], 5)
+        self.assertEqual(stats["upserted"], 0)
+
+    def test_changed_and_removed_tools(self):
+        self.index(make_tools(5))
+        tools = make_tools(4)
+        tools[1]["description"] = "updated"
+
+        stats = self.index(tools)
+
+        self.assertEqual(stats["embedded"], 1)
+        self.assertEqual(stats["unchanged"], 3)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(len(self.indexer._client.points), 4)
+        point = self.indexer._client.points[self.indexer._generate_id("tool_1")]
+        self.assertEqual(point.payload["description"], "updated")
+        self.assertEqual(self.indexer.get_index_stats()["deleted"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,10 +7,12 @@ Tool Indexer
 Позволяет агентам находить нужные tools по смыслу запроса
 """
 
+import asyncio
 import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +60,9 @@ class ToolIndexer:
         # Lazy init (только когда нужно)
         self._client = None
         self._embedding_service = None
+        
+        # Статистика последней индексации
+        self.last_index_stats: Dict[str, Any] = {}
     
     @property
     def client(self):
@@ -96,55 +101,171 @@ class ToolIndexer:
             
             logger.info(f"✅ Collection '{self.collection_name}' created")
     
-    async def index_tools(self, tools: List[Dict[str, Any]]):
+    async def index_tools(
+        self,
+        tools: List[Dict[str, Any]],
+        embed_batch_size: int = 64,
+        upsert_batch_size: int = 256,
+        concurrency: int = 4,
+        delete_removed: bool = True,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
         """
-        Проиндексировать все tools в Qdrant
+        Проиндексировать tools в Qdrant (инкрементально)
+        
+        Pipeline:
+        1. Считать content_hash уже проиндексированных tools (scroll без векторов)
+        2. Эмбеддить только новые/изменённые tools, батчами, до `concurrency`
+           батчей одновременно
+        3. Upsert каждого батча сразу после эмбеддинга, порциями по
+           `upsert_batch_size`
+        4. Удалить tools, которых больше нет в списке
         
         Args:
             tools: Список tool definitions
+            embed_batch_size: Размер батча для embedding API/модели
+            upsert_batch_size: Максимум points в одном upsert
+            concurrency: Сколько батчей обрабатывается одновременно
+            delete_removed: Удалять отсутствующие в `tools` записи
+            progress_callback: Вызывается после каждого батча со статистикой
+        
+        Returns:
+            Статистика индексации
         """
-        from qdrant_client.models import PointStruct
-
-        # Ensure collection exists
-        self._ensure_collection()
+        started = time.perf_counter()
         
-        logger.info(f"Indexing {len(tools)} tools...")
+        # Ensure collection exists
+        await asyncio.to_thread(self._ensure_collection)
         
-        points = []
+        indexed_hashes = await asyncio.to_thread(self._fetch_indexed_hashes)
         
+        # Diff по content hash
+        current_ids = set()
+        to_embed: List[Tuple[int, Dict[str, Any], str]] = []
         for tool in tools:
-            # Создать текстовое описание для embedding
-            text = self._tool_to_text(tool)
-            
-            # Получить embedding
-            embedding = await self._get_embedding(text)
-            
-            # Создать point
             point_id = self._generate_id(tool['name'])
+            content_hash = self._tool_hash(tool)
+            current_ids.add(point_id)
+            if indexed_hashes.get(point_id) != content_hash:
+                to_embed.append((point_id, tool, content_hash))
+        removed_ids = [point_id for point_id in indexed_hashes if point_id not in current_ids]
+        
+        stats: Dict[str, Any] = {
+            'total': len(tools),
+            'unchanged': len(tools) - len(to_embed),
+            'to_embed': len(to_embed),
+            'embedded': 0,
+            'upserted': 0,
+            'deleted': 0,
+            'batches': 0,
+            'embed_seconds': 0.0,
+        }
+        self.last_index_stats = stats
+        
+        logger.info(
+            f"Indexing {len(tools)} tools: {len(to_embed)} new/changed, "
+            f"{stats['unchanged']} unchanged, {len(removed_ids)} removed"
+        )
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def process_batch(batch: List[Tuple[int, Dict[str, Any], str]]):
+            async with semaphore:
+                embed_started = time.perf_counter()
+                embeddings = await self._get_embeddings([self._tool_to_text(tool) for _, tool, _ in batch])
+                stats['embed_seconds'] += time.perf_counter() - embed_started
+                stats['embedded'] += len(batch)
+                
+                points = [
+                    self._build_point(point_id, tool, content_hash, embedding)
+                    for (point_id, tool, content_hash), embedding in zip(batch, embeddings)
+                ]
+                for i in range(0, len(points), upsert_batch_size):
+                    chunk = points[i:i + upsert_batch_size]
+                    await asyncio.to_thread(
+                        self.client.upsert,
+                        collection_name=self.collection_name,
+                        points=chunk,
+                    )
+                    stats['upserted'] += len(chunk)
+                
+                stats['batches'] += 1
+                if progress_callback:
+                    progress_callback(dict(stats))
+        
+        batches = [to_embed[i:i + embed_batch_size] for i in range(0, len(to_embed), embed_batch_size)]
+        await asyncio.gather(*(process_batch(batch) for batch in batches))
+        
+        if delete_removed and removed_ids:
+            from qdrant_client.models import PointIdsList
             
-            point = PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={
-                    'name': tool['name'],
-                    'server': tool.get('server', 'unknown'),
-                    'description': tool.get('description', ''),
-                    'input_schema': tool.get('inputSchema', {}),
-                    'output_schema': tool.get('outputSchema', {}),
-                    'full_definition': tool,
-                    'indexed_at': self._get_timestamp(),
-                }
-            )
-            
-            points.append(point)
+            for i in range(0, len(removed_ids), upsert_batch_size):
+                chunk = removed_ids[i:i + upsert_batch_size]
+                await asyncio.to_thread(
+                    self.client.delete,
+                    collection_name=self.collection_name,
+                    points_selector=PointIdsList(points=chunk),
+                )
+                stats['deleted'] += len(chunk)
         
-        # Batch upload to Qdrant
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
+        stats['duration_sec'] = time.perf_counter() - started
+        stats['tools_per_sec'] = stats['embedded'] / stats['duration_sec'] if stats['duration_sec'] else 0.0
+        
+        logger.info(
+            f"✅ Indexed tools in Qdrant: {stats['upserted']} upserted, "
+            f"{stats['deleted']} deleted, {stats['unchanged']} unchanged "
+            f"({stats['duration_sec']:.2f}s)"
         )
         
-        logger.info(f"✅ Indexed {len(tools)} tools in Qdrant")
+        return stats
+    
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Статистика последней индексации (обновляется по ходу выполнения)"""
+        return dict(self.last_index_stats)
+    
+    def _fetch_indexed_hashes(self, page_size: int = 1000) -> Dict[int, Optional[str]]:
+        """Считать point_id -> content_hash из collection (без векторов)"""
+        hashes: Dict[int, Optional[str]] = {}
+        offset = None
+        
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=['content_hash'],
+                with_vectors=False,
+            )
+            for point in points:
+                hashes[point.id] = (point.payload or {}).get('content_hash')
+            if offset is None:
+                break
+        
+        return hashes
+    
+    def _tool_hash(self, tool: Dict[str, Any]) -> str:
+        """Content hash tool definition (+ модель embeddings)"""
+        canonical = json.dumps(tool, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(f"{self.embedding_model}\n{canonical}".encode()).hexdigest()
+    
+    def _build_point(self, point_id: int, tool: Dict[str, Any], content_hash: str, embedding: List[float]):
+        """Создать Qdrant point для tool"""
+        from qdrant_client.models import PointStruct
+        
+        return PointStruct(
+            id=point_id,
+            vector=embedding,
+            payload={
+                'name': tool['name'],
+                'server': tool.get('server', 'unknown'),
+                'description': tool.get('description', ''),
+                'input_schema': tool.get('inputSchema', {}),
+                'output_schema': tool.get('outputSchema', {}),
+                'full_definition': tool,
+                'content_hash': content_hash,
+                'indexed_at': self._get_timestamp(),
+            }
+        )
     
     async def search_tools(
         self,
@@ -268,48 +389,57 @@ class ToolIndexer:
         - OpenAI API (text-embedding-ada-002)
         - Local model (sentence-transformers)
         """
+        return (await self._get_embeddings([text]))[0]
+    
+    async def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Получить embeddings для батча текстов (один запрос к API/модели)"""
+        self._init_embedding_service()
         
-        if self._embedding_service is None:
-            # Попробовать OpenAI
-            try:
-                import openai
-                self._embedding_service = 'openai'
-                logger.info("Using OpenAI for embeddings")
-            except ImportError:
-                # Fallback на local model
-                try:
-                    from sentence_transformers import SentenceTransformer
-                    self._embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-                    self._embedding_service = 'local'
-                    logger.info("Using local model for embeddings")
-                except ImportError:
-                    logger.error(
-                        "No embedding service available. "
-                        "Install: pip install openai OR pip install sentence-transformers"
-                    )
-                    raise
-        
-        # Get embedding
         if self._embedding_service == 'openai':
-            return await self._get_openai_embedding(text)
+            return await self._get_openai_embeddings(texts)
         else:
-            return await self._get_local_embedding(text)
+            return await self._get_local_embeddings(texts)
+    
+    def _init_embedding_service(self):
+        """Выбрать embedding backend при первом обращении"""
+        if self._embedding_service is not None:
+            return
+        
+        # Попробовать OpenAI
+        try:
+            import openai
+            self._embedding_service = 'openai'
+            logger.info("Using OpenAI for embeddings")
+        except ImportError:
+            # Fallback на local model
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+                self._embedding_service = 'local'
+                logger.info("Using local model for embeddings")
+            except ImportError:
+                logger.error(
+                    "No embedding service available. "
+                    "Install: pip install openai OR pip install sentence-transformers"
+                )
+                raise
     
-    async def _get_openai_embedding(self, text: str) -> List[float]:
-        """Получить embedding через OpenAI API"""
+    async def _get_openai_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Получить embeddings через OpenAI API (input - список текстов)"""
         import openai
         
         response = await openai.Embedding.acreate(
             model=self.embedding_model,
-            input=text
+            input=texts
         )
         
-        return response['data'][0]['embedding']
+        data = sorted(response['data'], key=lambda item: item['index'])
+        return [item['embedding'] for item in data]
     
-    async def _get_local_embedding(self, text: str) -> List[float]:
-        """Получить embedding через local model"""
-        embedding = self._embedding_model.encode(text)
-        return embedding.tolist()
+    async def _get_local_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Получить embeddings через local model (в отдельном потоке)"""
+        embeddings = await asyncio.to_thread(self._embedding_model.encode, texts)
+        return [embedding.tolist() for embedding in embeddings]
     
     def _generate_id(self, tool_name: str) -> int:
         """Генерировать numeric ID из имени tool"""
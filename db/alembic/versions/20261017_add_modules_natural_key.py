@@ -0,0 +1,35 @@
+# [NEXUS IDENTITY] ID: 6094417283551920387 | DATE: 2026-10-17
+
+"""add modules natural key index (bulk upsert of EDT modules)"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c41e7d2a9b06"
+down_revision = "9c17d7f6f87b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ON CONFLICT в PostgreSQLBulkSaver; NULLS NOT DISTINCT - PostgreSQL 15+
+    # (object_id у общих модулей конфигурации - NULL). Таблица modules создается
+    # вне alembic, поэтому индекс создается только если она есть.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF to_regclass('modules') IS NOT NULL THEN
+                CREATE UNIQUE INDEX IF NOT EXISTS modules_natural_key ON modules
+                    (configuration_id, object_id, name, module_type) NULLS NOT DISTINCT;
+            END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS modules_natural_key")
@@ -212,7 +212,9 @@ class BSLASTParser:
         result['ast'] = None
         result['control_flow'] = None
         result['data_flow'] = None
-        result['complexity'] = {'cyclomatic': 0}
+        result['complexity'] = {
+            'cyclomatic': sum(m.get('complexity', 0) for m in result['functions'] + result['procedures'])
+        }
         return result
 
     def _ensure_fallback_parser(self) -> None:
@@ -17,7 +17,6 @@ EDT Configuration Parser
 
 import json
 import os
-import re
 import sys
 import time
 import xml.etree.ElementTree as ET
@@ -29,6 +28,7 @@ from typing import Any, Dict, List, Optional, Tuple
 parser_parent = Path(__file__).parent.parent
 sys.path.insert(0, str(parser_parent))
 sys.path.insert(0, str(parser_parent.parent))
+sys.path.insert(0, str(parser_parent.parent.parent))
 
 try:
     from parsers.improve_bsl_parser import ImprovedBSLParser
@@ -40,6 +40,8 @@ except ImportError:
         if __name__ == "__main__":
             print("[WARNING] ImprovedBSLParser не найден, используем базовый парсинг")
 
+from src.parsers.bsl_syntax import parse_module
+
 
 class EDTConfigurationParser:
     """
@@ -269,68 +271,23 @@ class EDTConfigurationParser:
         functions = []
         procedures = []
         
-        # Паттерн для функций
-        func_pattern = r'(?:Экспорт\s+)?Функция\s+(\w+)\s*\(([^)]*)\)'
-        for match in re.finditer(func_pattern, code, re.IGNORECASE):
-            func_name = match.group(1)
-            params_str = match.group(2) if match.group(2) else ""
-            
-            # Находим тело функции
-            start_pos = match.end()
-            end_match = re.search(r'КонецФункции', code[start_pos:], re.IGNORECASE)
-            if end_match:
-                body = code[start_pos:start_pos + end_match.start()]
-            else:
-                body = ""
-            
-            functions.append({
-                'name': func_name,
-                'parameters': self._parse_parameters(params_str),
-                'body': body[:1000],  # Первые 1KB
-                'body_length': len(body),
-                'is_export': 'Экспорт' in match.group(0)
-            })
-        
-        # Паттерн для процедур
-        proc_pattern = r'(?:Экспорт\s+)?Процедура\s+(\w+)\s*\(([^)]*)\)'
-        for match in re.finditer(proc_pattern, code, re.IGNORECASE):
-            proc_name = match.group(1)
-            params_str = match.group(2) if match.group(2) else ""
-            
-            # Находим тело процедуры
-            start_pos = match.end()
-            end_match = re.search(r'КонецПроцедуры', code[start_pos:], re.IGNORECASE)
-            if end_match:
-                body = code[start_pos:start_pos + end_match.start()]
-            else:
-                body = ""
-            
-            procedures.append({
-                'name': proc_name,
-                'parameters': self._parse_parameters(params_str),
+        module = parse_module(code)
+        for method in module.methods:
+            body = module.source(method.body_start, method.body_end)
+            item = {
+                'name': method.name,
+                'parameters': [
+                    {'name': param.name, 'has_default': param.default is not None}
+                    for param in method.params
+                ],
                 'body': body[:1000],  # Первые 1KB
                 'body_length': len(body),
-                'is_export': 'Экспорт' in match.group(0)
-            })
+                'is_export': method.export
+            }
+            (functions if method.is_function else procedures).append(item)
         
         return functions, procedures
     
-    def _parse_parameters(self, params_str: str) -> List[Dict]:
-        """Парсинг параметров функции/процедуры"""
-        if not params_str or not params_str.strip():
-            return []
-        
-        params = []
-        for param in params_str.split(','):
-            param = param.strip()
-            if param:
-                params.append({
-                    'name': param,
-                    'has_default': '=' in param
-                })
-        
-        return params
-    
     def _parse_module_xml(self, xml_file: Path) -> Optional[Dict[str, Any]]:
         """
         Парсинг XML метаданных модуля
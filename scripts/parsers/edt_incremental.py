@@ -0,0 +1,377 @@
+# [NEXUS IDENTITY] ID: 3390174652708125521 | DATE: 2026-10-17
+
+#!/usr/bin/env python3
+"""
+Инкрементальный параллельный парсинг EDT конфигураций 1С
+
+Идея (развитие _is_changed/_load_hashes из OptimizedXMLParser):
+- единица работы - объект метаданных (общий модуль, документ, справочник)
+  со всеми своими файлами (XML описание, Ext/*.bsl, формы);
+- манифест хранит для каждого файла mtime/размер/SHA-256, а для каждого
+  объекта - хеши его модулей; файл перечитывается только если изменились
+  mtime или размер, объект перепарсивается только если изменился хеш;
+- измененные объекты парсятся в пуле процессов;
+- результат - поток событий ModuleDelta (added/changed/removed) для
+  downstream сохранителей (PostgreSQLSaver, JSON и т.д.);
+- манифест хранится вне каталога выгрузки и сохраняется только через
+  IncrementalParseResult.commit(), после того как сохранитель записал
+  изменения: при ошибке записи следующий запуск повторит те же дельты.
+
+Версия: 1.0.0
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Манифесты лежат рядом с выгрузками (в корне парсера), а не внутри них
+MANIFEST_DIR_NAME = '.edt_manifests'
+MANIFEST_VERSION = 1
+
+# Каталог конфигурации -> тип единицы работы
+UNIT_KINDS = {
+    'CommonModules': 'common_module',
+    'Documents': 'document',
+    'Catalogs': 'catalog',
+}
+
+DELTA_ADDED = 'added'
+DELTA_CHANGED = 'changed'
+DELTA_REMOVED = 'removed'
+
+
+@dataclass
+class ModuleDelta:
+    """Изменение модуля между двумя запусками парсинга"""
+    kind: str  # added | changed | removed
+    module_name: str
+    unit: str
+    module: Optional[Dict[str, Any]] = None  # None для removed
+
+
+@dataclass
+class IncrementalParseResult:
+    """Результат инкрементального парсинга"""
+    deltas: List[ModuleDelta] = field(default_factory=list)
+    objects: List[Dict[str, Any]] = field(default_factory=list)
+    removed_objects: List[Dict[str, Any]] = field(default_factory=list)
+    stats: Dict[str, int] = field(default_factory=dict)
+    manifest: Optional['ParseManifest'] = None
+
+    def commit(self) -> None:
+        """Сохранить новый манифест (после успешной записи изменений)"""
+        if self.manifest is not None:
+            self.manifest.save()
+
+    @property
+    def changed_modules(self) -> List[Dict[str, Any]]:
+        """Добавленные и измененные модули"""
+        return [d.module for d in self.deltas if d.kind != DELTA_REMOVED]
+
+    @property
+    def removed_modules(self) -> List[str]:
+        return [d.module_name for d in self.deltas if d.kind == DELTA_REMOVED]
+
+
+class ParseManifest:
+    """
+    Персистентный манифест файлов и модулей конфигурации.
+
+    Формат (JSON):
+        {"version": 1,
+         "units": {"Documents/Заказ": {"hash": "...",
+                                       "files": {"Documents/Заказ/Ext/ObjectModule.bsl": [mtime_ns, size, sha256]},
+                                       "modules": {"Документ_Заказ_МодульОбъекта": "sha256"},
+                                       "object": {...} | null}}}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.units: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'ParseManifest':
+        manifest = cls(path)
+        if manifest.path.exists():
+            try:
+                with open(manifest.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION:
+                    manifest.units = data.get('units', {})
+                else:
+                    print(f"[WARN] Версия манифеста {data.get('version')} не поддерживается, полный парсинг")
+            except Exception as e:
+                print(f"[WARN] Не удалось загрузить манифест: {e}")
+        return manifest
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'units': self.units}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def file_fingerprints(self, unit_key: str) -> Dict[str, List[Any]]:
+        return self.units.get(unit_key, {}).get('files', {})
+
+
+def default_manifest_path(root_dir: Path, config_name: str, config_path: Path) -> Path:
+    """Путь манифеста по умолчанию: <root_dir>/.edt_manifests/<имя>-<хеш пути>.json"""
+    path_hash = hashlib.sha256(str(Path(config_path).resolve()).encode('utf-8')).hexdigest()[:12]
+    return Path(root_dir) / MANIFEST_DIR_NAME / f"{config_name}-{path_hash}.json"
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _module_hash(module: Dict[str, Any]) -> str:
+    return hashlib.sha256(module.get('code', '').encode('utf-8')).hexdigest()
+
+
+# Парсер воркера пула процессов (создается один раз на процесс)
+_worker_parser = None
+
+
+def _init_worker(config_dir: str) -> None:
+    global _worker_parser
+    from parse_edt_xml import EDTXMLParser
+
+    _worker_parser = EDTXMLParser(use_postgres=False)
+    _worker_parser.config_dir = Path(config_dir)
+
+
+def parse_unit(parser: Any, kind: str, unit_path: Path) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Распарсить одну единицу работы: (модули, объект)"""
+    if kind == 'common_module':
+        module = parser.parse_common_module_file(unit_path)
+        if not module:
+            return [], None
+        return [module], parser.common_module_object(module)
+    if kind == 'document':
+        return parser.parse_document_dir(unit_path)
+    if kind == 'catalog':
+        return parser.parse_catalog_dir(unit_path)
+    raise ValueError(f"Unknown unit kind: {kind}")
+
+
+def _parse_unit_in_worker(unit_key: str, kind: str, unit_path: str):
+    modules, obj = parse_unit(_worker_parser, kind, Path(unit_path))
+    return unit_key, modules, obj
+
+
+class IncrementalEDTParser:
+    """
+    Инкрементальный парсинг поверх EDTXMLParser.
+
+    Использование:
+        parser = EDTXMLParser(use_postgres=False)
+        result = IncrementalEDTParser(parser).run("DO", Path("./1c_configurations/DO"))
+        for delta in result.deltas:
+            ...
+        result.commit()
+
+    manifest_path по умолчанию - default_manifest_path(parser.config_dir, ...).
+    """
+
+    def __init__(
+        self,
+        parser: Any,
+        manifest_path: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+        min_parallel_units: int = 8,
+    ):
+        self.parser = parser
+        self.manifest_path = manifest_path
+        self.max_workers = max_workers
+        self.min_parallel_units = min_parallel_units
+
+    # ------------------------------------------
+    # Сканирование
+    # ------------------------------------------
+
+    def scan_units(self, config_path: Path) -> Dict[str, Tuple[str, Path, List[Path]]]:
+        """Единицы работы конфигурации: unit_key -> (kind, путь, файлы)"""
+        units: Dict[str, Tuple[str, Path, List[Path]]] = {}
+
+        for dir_name, kind in UNIT_KINDS.items():
+            root = config_path / dir_name
+            if not root.exists():
+                continue
+
+            if kind == 'common_module':
+                for xml_file in sorted(root.glob('*.xml')):
+                    files = [xml_file]
+                    module_dir = root / xml_file.stem
+                    if module_dir.is_dir():
+                        files.extend(p for p in sorted(module_dir.rglob('*')) if p.is_file())
+                    units[f"{dir_name}/{xml_file.name}"] = (kind, xml_file, files)
+            else:
+                for object_dir in sorted(root.iterdir()):
+                    if not object_dir.is_dir():
+                        continue
+                    files = [p for p in sorted(object_dir.rglob('*')) if p.is_file()]
+                    units[f"{dir_name}/{object_dir.name}"] = (kind, object_dir, files)
+
+        return units
+
+    def _fingerprint(
+        self,
+        config_path: Path,
+        files: Iterable[Path],
+        previous: Dict[str, List[Any]],
+        stats: Dict[str, int],
+    ) -> Dict[str, List[Any]]:
+        """Отпечатки файлов; SHA-256 пересчитывается только при смене mtime/размера"""
+        fingerprints = {}
+        for path in files:
+            rel = path.relative_to(config_path).as_posix()
+            stat = path.stat()
+            old = previous.get(rel)
+            if old and old[0] == stat.st_mtime_ns and old[1] == stat.st_size:
+                fingerprints[rel] = old
+                stats['files_reused'] += 1
+            else:
+                fingerprints[rel] = [stat.st_mtime_ns, stat.st_size, _file_sha256(path)]
+                stats['files_hashed'] += 1
+        return fingerprints
+
+    @staticmethod
+    def _unit_hash(fingerprints: Dict[str, List[Any]]) -> str:
+        digest = hashlib.sha256()
+        for rel in sorted(fingerprints):
+            digest.update(rel.encode('utf-8'))
+            digest.update(fingerprints[rel][2].encode('ascii'))
+        return digest.hexdigest()
+
+    # ------------------------------------------
+    # Парсинг
+    # ------------------------------------------
+
+    def run(
+        self,
+        config_name: str,
+        config_path: Path,
+        sinks: Iterable[Callable[[ModuleDelta], None]] = (),
+    ) -> IncrementalParseResult:
+        """
+        Распарсить только изменившиеся объекты конфигурации.
+
+        Args:
+            config_name: Название конфигурации
+            config_path: Директория EDT выгрузки
+            sinks: Получатели событий ModuleDelta (вызываются по мере готовности)
+
+        Returns:
+            IncrementalParseResult с дельтами и объектами измененных единиц;
+            новый манифест сохраняется вызовом result.commit()
+        """
+        config_path = Path(config_path)
+        manifest_path = self.manifest_path or default_manifest_path(self.parser.config_dir, config_name, config_path)
+        manifest = ParseManifest.load(manifest_path)
+        result = IncrementalParseResult(stats={
+            'units_total': 0,
+            'units_parsed': 0,
+            'units_skipped': 0,
+            'units_removed': 0,
+            'files_hashed': 0,
+            'files_reused': 0,
+        })
+        stats = result.stats
+        sinks = list(sinks)
+
+        def emit(delta: ModuleDelta) -> None:
+            result.deltas.append(delta)
+            stats[delta.kind] = stats.get(delta.kind, 0) + 1
+            for sink in sinks:
+                sink(delta)
+
+        units = self.scan_units(config_path)
+        stats['units_total'] = len(units)
+
+        new_units: Dict[str, Dict[str, Any]] = {}
+        to_parse: List[Tuple[str, str, Path]] = []
+        for unit_key, (kind, unit_path, files) in units.items():
+            fingerprints = self._fingerprint(config_path, files, manifest.file_fingerprints(unit_key), stats)
+            unit_hash = self._unit_hash(fingerprints)
+            previous = manifest.units.get(unit_key)
+
+            if previous and previous.get('hash') == unit_hash:
+                # Содержимое не изменилось (в т.ч. если поменялся только mtime)
+                new_units[unit_key] = {**previous, 'files': fingerprints}
+                stats['units_skipped'] += 1
+                continue
+
+            new_units[unit_key] = {'hash': unit_hash, 'files': fingerprints, 'modules': {}, 'object': None}
+            to_parse.append((unit_key, kind, unit_path))
+
+        for unit_key, modules, obj in self._parse_units(config_path, to_parse):
+            stats['units_parsed'] += 1
+            old_modules = manifest.units.get(unit_key, {}).get('modules', {})
+            new_modules = {}
+            for module in modules:
+                module_hash = _module_hash(module)
+                new_modules[module['name']] = module_hash
+                if module['name'] not in old_modules:
+                    emit(ModuleDelta(DELTA_ADDED, module['name'], unit_key, module))
+                elif old_modules[module['name']] != module_hash:
+                    emit(ModuleDelta(DELTA_CHANGED, module['name'], unit_key, module))
+            for module_name in old_modules.keys() - new_modules.keys():
+                emit(ModuleDelta(DELTA_REMOVED, module_name, unit_key))
+
+            new_units[unit_key]['modules'] = new_modules
+            new_units[unit_key]['object'] = obj
+            if obj:
+                # XML описание могло измениться без изменения кода модулей
+                result.objects.append(obj)
+            else:
+                old_object = manifest.units.get(unit_key, {}).get('object')
+                if old_object:
+                    result.removed_objects.append(old_object)
+
+        # Удаленные объекты
+        for unit_key in manifest.units.keys() - units.keys():
+            stats['units_removed'] += 1
+            for module_name in manifest.units[unit_key].get('modules', {}):
+                emit(ModuleDelta(DELTA_REMOVED, module_name, unit_key))
+            if manifest.units[unit_key].get('object'):
+                result.removed_objects.append(manifest.units[unit_key]['object'])
+
+        result.manifest = ParseManifest(manifest.path)
+        result.manifest.units = new_units
+        return result
+
+    def _parse_units(self, config_path: Path, to_parse: List[Tuple[str, str, Path]]):
+        """Парсинг единиц работы: в пуле процессов или в текущем процессе"""
+        if self.max_workers == 1 or len(to_parse) < self.min_parallel_units:
+            for unit_key, kind, unit_path in to_parse:
+                modules, obj = parse_unit(self.parser, kind, unit_path)
+                yield unit_key, modules, obj
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(str(self.parser.config_dir),),
+        ) as executor:
+            futures = [
+                executor.submit(_parse_unit_in_worker, unit_key, kind, str(unit_path))
+                for unit_key, kind, unit_path in to_parse
+            ]
+            for future in futures:
+                unit_key, modules, obj = future.result()
+                for module in modules:
+                    self.parser.stats['modules'] += 1
+                    self.parser.stats['functions'] += len(module.get('functions', []))
+                yield unit_key, modules, obj
@@ -7,16 +7,21 @@
 """
 
 import re
-from collections import defaultdict
+import sys
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.parsers.bsl_syntax import BSLModuleParser
+
 
 class ImprovedBSLParser:
     """
     Улучшенный парсер BSL кода
     Основан на понимании синтаксиса из Language 1C (BSL) расширения
     
-    ОПТИМИЗАЦИЯ: Предкомпилированные regex паттерны
+    ОПТИМИЗАЦИЯ: разбор делегирован общему парсеру src/parsers/bsl_syntax.py
     """
     
     # Зарезервированные слова BSL
@@ -45,38 +50,10 @@ class ImprovedBSLParser:
         self.regions = []
         self.api_usage = []
         
-        # ОПТИМИЗАЦИЯ: Предкомпилируем regex паттерны
-        # Вместо компиляции на каждой строке - один раз при инициализации
-        self._func_pattern = re.compile(
-            r'^\s*(?:Экспорт\s+)?(?:Функция|Процедура)\s+([\wА-Яа-я]+)\s*\(([^)]*)\)',
-            re.IGNORECASE
-        )
-        self._region_pattern = re.compile(
-            r'#Область\s+([^\n]+)',
-            re.IGNORECASE
-        )
-        self._region_end_pattern = re.compile(
-            r'#КонецОбласти',
-            re.IGNORECASE
-        )
-        self._control_flow_pattern = re.compile(
-            r'\b(?:Если|Пока|Для|Попытка)\b',
-            re.IGNORECASE
-        )
-        self._control_end_pattern = re.compile(
-            r'\b(?:КонецЕсли|КонецЦикла|Исключение)\b',
-            re.IGNORECASE
-        )
-        self._function_end_pattern = re.compile(
-            r'\s*Конец(?:Функции|Процедуры)\s*$',
-            re.IGNORECASE
-        )
-        
-        # API patterns
-        self._api_patterns = {
-            api_obj: re.compile(rf'\b{api_obj}\b', re.IGNORECASE)
-            for api_obj in self.API_OBJECTS
-        }
+        # ОПТИМИЗАЦИЯ: один проход токенизатора + recursive descent
+        # (src/parsers/bsl_syntax.py) вместо набора regex по строкам;
+        # обращения к API объектам собираются в том же проходе
+        self._module_parser = BSLModuleParser(watch_names=self.API_OBJECTS)
     
     def parse(self, code: str) -> Dict[str, Any]:
         """
@@ -97,20 +74,48 @@ class ImprovedBSLParser:
                 'statistics': {}
             }
         
-        # Очистка предыдущих результатов
+        module = self._module_parser.parse(code)
+        
         self.functions = []
         self.procedures = []
-        self.regions = []
-        self.api_usage = []
-        
-        # Извлечение областей
-        self._extract_regions(code)
+        for method in module.methods:
+            params = self._extract_parameters_detailed(module.source(*method.params_span))
+            item = {
+                'name': method.name,
+                'type': method.type_name,
+                'code': module.method_lines(method),
+                'params': params,
+                'params_count': len(params),
+                'exported': method.export,
+                'region': method.region,
+                'comments': '\n'.join(f'// {line}' for line in method.doc_comment),
+                'line_start': method.start_line,
+                'line_end': method.end_line if method.closed else None,
+                'calls': [call.name for call in method.calls],
+                'complexity': method.complexity
+            }
+            (self.functions if method.is_function else self.procedures).append(item)
         
-        # Извлечение функций и процедур
-        self._extract_functions_and_procedures(code)
+        self.regions = [
+            {
+                'name': region.name,
+                'content': module.source(region.body_start, region.body_end).strip(),
+                'full_content': module.source(region.start_pos, region.end_pos),
+                'start_pos': region.start_pos,
+                'end_pos': region.end_pos
+            }
+            for region in module.regions
+        ]
         
-        # Извлечение использования API
-        self._extract_api_usage(code)
+        self.api_usage = []
+        for ref in module.name_refs:
+            line = module.line_text(ref.line)
+            self.api_usage.append({
+                'api_object': ref.name,
+                'line_number': ref.line,
+                'line_content': line.strip(),
+                'usage_type': 'creation' if ref.is_new else self._detect_usage_type(line)
+            })
         
         # Статистика
         statistics = {
@@ -130,147 +135,6 @@ class ImprovedBSLParser:
             'statistics': statistics
         }
     
-    def _extract_regions(self, code: str):
-        """Извлечение областей кода (#Область ... #КонецОбласти)"""
-        # Паттерн для областей
-        region_pattern = r'#Область\s+([^\n]+)\n(.*?)(?=#КонецОбласти|$)'
-        
-        for match in re.finditer(region_pattern, code, re.DOTALL | re.IGNORECASE | re.MULTILINE):
-            region_name = match.group(1).strip()
-            region_content = match.group(2).strip()
-            
-            # Находим конец области
-            end_match = re.search(r'#КонецОбласти', code[match.end():], re.IGNORECASE)
-            if end_match:
-                end_pos = match.end() + end_match.end()
-                region_full = code[match.start():end_pos]
-            else:
-                region_full = code[match.start():match.end()]
-            
-            self.regions.append({
-                'name': region_name,
-                'content': region_content,
-                'full_content': region_full,
-                'start_pos': match.start(),
-                'end_pos': match.end()
-            })
-    
-    def _extract_functions_and_procedures(self, code: str):
-        """Извлечение функций и процедур из BSL кода"""
-        lines = code.split('\n')
-        current_func = None
-        in_function = False
-        function_lines = []
-        brace_level = 0
-        region_stack = []
-        
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            original_line = line
-            
-            # Пропускаем пустые строки (но сохраняем в функции)
-            if not stripped:
-                if in_function:
-                    function_lines.append(original_line)
-                continue
-            
-            # Обработка областей
-            if stripped.startswith('#Область'):
-                region_match = self._region_pattern.search(stripped)
-                if region_match:
-                    region_stack.append(region_match.group(1).strip())
-            
-            elif stripped.startswith('#КонецОбласти'):
-                if region_stack:
-                    region_stack.pop()
-            
-            # Комментарии перед функцией
-            comment_lines = []
-            if i > 0:
-                j = i - 1
-                while j >= 0 and lines[j].strip() and (lines[j].strip().startswith('//') or lines[j].strip().startswith('/*')):
-                    comment_lines.insert(0, lines[j].strip())
-                    j -= 1
-                if j >= 0 and not lines[j].strip():
-                    # Пропускаем пустые строки
-                    while j >= 0 and not lines[j].strip():
-                        j -= 1
-                    while j >= 0 and lines[j].strip() and (lines[j].strip().startswith('//') or lines[j].strip().startswith('/*')):
-                        comment_lines.insert(0, lines[j].strip())
-                        j -= 1
-            
-            # Проверка начала функции/процедуры
-            # ОПТИМИЗАЦИЯ: Используем предкомпилированный паттерн
-            func_match = self._func_pattern.search(stripped)
-            
-            if func_match:
-                # Сохраняем предыдущую функцию если есть
-                if current_func and function_lines:
-                    current_func['code'] = '\n'.join(function_lines)
-                    if current_func['type'] == 'Функция':
-                        self.functions.append(current_func)
-                    else:
-                        self.procedures.append(current_func)
-                
-                # Начинаем новую функцию/процедуру
-                func_type = 'Функция' if 'Функция' in stripped or 'функция' in stripped else 'Процедура'
-                func_name = func_match.group(1)
-                params_str = func_match.group(2)
-                is_exported = 'Экспорт' in stripped or 'экспорт' in stripped
-                
-                # Детальное извлечение параметров
-                params = self._extract_parameters_detailed(params_str)
-                
-                current_func = {
-                    'name': func_name,
-                    'type': func_type,
-                    'code': '',
-                    'params': params,
-                    'params_count': len(params),
-                    'exported': is_exported,
-                    'region': region_stack[-1] if region_stack else None,
-                    'comments': '\n'.join(comment_lines) if comment_lines else '',
-                    'line_start': i + 1,
-                    'line_end': None
-                }
-                function_lines = [original_line]
-                in_function = True
-                brace_level = 0
-                continue
-            
-            # Если мы внутри функции
-            if in_function and current_func:
-                function_lines.append(original_line)
-                
-                # Подсчет уровней вложенности (ОПТИМИЗАЦИЯ: предкомпилированные паттерны)
-                if self._control_flow_pattern.search(stripped):
-                    brace_level += 1
-                elif self._control_end_pattern.search(stripped):
-                    brace_level = max(0, brace_level - 1)
-                
-                # Конец функции/процедуры
-                if self._function_end_pattern.search(stripped) and brace_level == 0:
-                    current_func['code'] = '\n'.join(function_lines)
-                    current_func['line_end'] = i + 1
-                    
-                    if current_func['type'] == 'Функция':
-                        self.functions.append(current_func)
-                    else:
-                        self.procedures.append(current_func)
-                    
-                    current_func = None
-                    in_function = False
-                    function_lines = []
-                    brace_level = 0
-        
-        # Сохраняем последнюю функцию если файл обрывается
-        if current_func and function_lines:
-            current_func['code'] = '\n'.join(function_lines)
-            if current_func['type'] == 'Функция':
-                self.functions.append(current_func)
-            else:
-                self.procedures.append(current_func)
-    
     def _extract_parameters_detailed(self, params_str: str) -> List[Dict[str, Any]]:
         """
         Детальное извлечение параметров с типами и значениями по умолчанию
@@ -357,29 +221,6 @@ class ImprovedBSLParser:
             'required': True
         }
     
-    def _extract_api_usage(self, code: str):
-        """Извлечение использования API 1С"""
-        # ОПТИМИЗАЦИЯ: Используем предкомпилированные паттерны
-        for api_obj, pattern in self._api_patterns.items():
-            # Поиск использования API объекта
-            for match in pattern.finditer(code):
-                # Находим контекст использования (строка кода)
-                lines = code[:match.start()].split('\n')
-                line_num = len(lines)
-                line_content = lines[-1] if lines else ""
-                
-                # Ищем строку с использованием
-                code_lines = code.split('\n')
-                if line_num <= len(code_lines):
-                    full_line = code_lines[line_num - 1]
-                    
-                    self.api_usage.append({
-                        'api_object': api_obj,
-                        'line_number': line_num,
-                        'line_content': full_line.strip(),
-                        'usage_type': self._detect_usage_type(full_line)
-                    })
-    
     def _detect_usage_type(self, line: str) -> str:
         """Определение типа использования API"""
         line_lower = line.lower()
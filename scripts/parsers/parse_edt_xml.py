@@ -15,7 +15,7 @@ import xml.etree.ElementTree as ET
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -47,11 +47,16 @@ class EDTXMLParser:
     Версия 2.0: Сохранение в PostgreSQL вместо JSON
     """
     
-    def __init__(self, use_postgres=True):
+    def __init__(self, use_postgres=True, bulk=None):
         """
         Args:
             use_postgres: Использовать PostgreSQL (True) или JSON (False - legacy)
+            bulk: Массовая загрузка через PostgreSQLBulkSaver (COPY / execute_values).
+                По умолчанию - EDT_BULK_SAVE=true; требует индекса modules_natural_key
+                (миграция c41e7d2a9b06, PostgreSQL 15+)
         """
+        if bulk is None:
+            bulk = os.getenv("EDT_BULK_SAVE", "false").lower() in ("1", "true", "yes")
         self.use_postgres = use_postgres and POSTGRES_AVAILABLE
         self.config_dir = Path("./1c_configurations")
         self.stats = defaultdict(int)
@@ -65,8 +70,12 @@ class EDTXMLParser:
         # Database connection
         if self.use_postgres:
             try:
-                from src.db.postgres_saver import PostgreSQLSaver
-                self.db_saver = PostgreSQLSaver()
+                if bulk:
+                    from src.db.postgres_bulk_saver import PostgreSQLBulkSaver
+                    self.db_saver = PostgreSQLBulkSaver()
+                else:
+                    from src.db.postgres_saver import PostgreSQLSaver
+                    self.db_saver = PostgreSQLSaver()
                 if self.db_saver.connect():
                     print("[INFO] PostgreSQL connection established")
                 else:
@@ -81,16 +90,26 @@ class EDTXMLParser:
             self.db_saver = None
             print("[INFO] Using JSON storage (legacy mode)")
     
-    def parse_edt_configuration(self, config_name: str, config_path: Path) -> Dict[str, Any]:
+    def parse_edt_configuration(
+        self,
+        config_name: str,
+        config_path: Path,
+        incremental: bool = False,
+        max_workers: Optional[int] = None,
+        manifest_path: Optional[Path] = None,
+    ) -> Dict[str, Any]:
         """
         Парсинг конфигурации из EDT XML файлов
         
         Args:
             config_name: Название конфигурации
             config_path: Путь к директории с XML файлами
+            incremental: Парсить только изменившиеся объекты (по манифесту)
+            max_workers: Количество процессов для инкрементального парсинга
+            manifest_path: Файл манифеста (по умолчанию <config_dir>/.edt_manifests/)
             
         Returns:
-            Результаты парсинга
+            Результаты парсинга (в инкрементальном режиме - только изменения и 'deltas')
         """
         print(f"[INFO] Парсинг EDT конфигурации: {config_name}")
         print(f"[INFO] Директория: {config_path}")
@@ -113,17 +132,33 @@ class EDTXMLParser:
                 print("[ERROR] Failed to save configuration to PostgreSQL")
                 return {'status': 'error', 'error': 'Database error'}
         
+        deltas = []
+        removed_objects = []
+        inc_result = None
+        if incremental:
+            from edt_incremental import IncrementalEDTParser
+            
+            inc_result = IncrementalEDTParser(
+                self, manifest_path=manifest_path, max_workers=max_workers
+            ).run(config_name, config_path)
+            deltas = inc_result.deltas
+            removed_objects = inc_result.removed_objects
+            modules = inc_result.changed_modules
+            objects = inc_result.objects
+            print(f"[INFO] Инкрементальный режим: разобрано {inc_result.stats['units_parsed']}, "
+                  f"пропущено {inc_result.stats['units_skipped']} объектов, изменений модулей: {len(deltas)}")
+        
         # Обрабатываем общие модули
         common_modules_path = config_path / "CommonModules"
-        if common_modules_path.exists():
+        if not incremental and common_modules_path.exists():
             print(f"[INFO] Обработка общих модулей...")
             cm_modules = self.parse_common_modules(common_modules_path, config_name)
             modules.extend(cm_modules)
-            objects.extend([{'type': 'ОбщийМодуль', 'name': m['object_name'], 'modules_count': 1} for m in cm_modules])
+            objects.extend(self.common_module_object(m) for m in cm_modules)
         
         # Обрабатываем документы
         documents_path = config_path / "Documents"
-        if documents_path.exists():
+        if not incremental and documents_path.exists():
             print(f"[INFO] Обработка документов...")
             doc_result = self.parse_documents(documents_path, config_name)
             modules.extend(doc_result['modules'])
@@ -131,7 +166,7 @@ class EDTXMLParser:
         
         # Обрабатываем справочники
         catalogs_path = config_path / "Catalogs"
-        if catalogs_path.exists():
+        if not incremental and catalogs_path.exists():
             print(f"[INFO] Обработка справочников...")
             cat_result = self.parse_catalogs(catalogs_path, config_name)
             modules.extend(cat_result['modules'])
@@ -142,23 +177,18 @@ class EDTXMLParser:
         
         if self.use_postgres and config_id:
             # Сохраняем в PostgreSQL
-            for obj in objects:
-                obj_id = self.db_saver.save_object(config_id, obj)
-            
-            for module in modules:
-                # Find object_id if this module belongs to an object
-                obj_id = None
-                for obj in objects:
-                    if obj['name'] == module.get('object_name'):
-                        # Would need to query DB for object_id, skip for now
-                        pass
-                
-                self.db_saver.save_module(config_id, module, obj_id)
+            if not self._save_to_postgres(config_id, modules, objects, deltas, removed_objects):
+                # Манифест не сохраняется: следующий запуск повторит эти изменения
+                print("[ERROR] Failed to save parsed data to PostgreSQL")
+                return {'status': 'error', 'error': 'Database error', 'config_id': config_id}
         else:
             # Legacy JSON saving
             for module in modules:
                 self.save_module_to_kb_json(module, config_name)
         
+        if inc_result is not None:
+            inc_result.commit()
+        
         # Get statistics
         if self.use_postgres:
             stats = self.db_saver.get_statistics(config_name)
@@ -175,72 +205,108 @@ class EDTXMLParser:
             'modules': modules,
             'objects': objects,
             'stats': dict(self.stats),
-            'config_id': config_id
+            'config_id': config_id,
+            'deltas': deltas
         }
     
+    def _save_to_postgres(
+        self,
+        config_id: str,
+        modules: List[Dict[str, Any]],
+        objects: List[Dict[str, Any]],
+        deltas: List[Any],
+        removed_objects: List[Dict[str, Any]],
+    ) -> bool:
+        """Записать модули и объекты; True только если все записи успешны"""
+        for delta in deltas:
+            # Измененные модули перезаписываются, удаленные - удаляются
+            if delta.kind != 'added' and not self.db_saver.delete_module(config_id, delta.module_name):
+                return False
+        
+        for obj in removed_objects:
+            if not self.db_saver.delete_object(config_id, obj['type'], obj['name']):
+                return False
+        
+        object_ids = {}
+        for obj in objects:
+            object_ids[obj['name']] = self.db_saver.save_object(config_id, obj)
+            if object_ids[obj['name']] is None:
+                return False
+        
+        if hasattr(self.db_saver, 'bulk_save_modules'):
+            # Пакетная загрузка: модули пишутся группами по объектам в несколько потоков
+            try:
+                self.db_saver.bulk_save_modules(config_id, modules, object_ids)
+                self.db_saver.flush()
+            except Exception as e:
+                print(f"[ERROR] Bulk write failed: {e}")
+                return False
+            ingest = self.db_saver.get_ingest_stats()
+            print(f"[INFO] Записано строк: {ingest['total_rows']} ({ingest['rows_per_sec']} rows/sec)")
+            return True
+        
+        for module in modules:
+            if self.db_saver.save_module(config_id, module, object_ids.get(module.get('object_name'))) is None:
+                return False
+        return True
+    
+    @staticmethod
+    def common_module_object(module: Dict[str, Any]) -> Dict[str, Any]:
+        """Объект метаданных общего модуля (одинаковый в полном и инкрементальном режимах)"""
+        return {'type': 'ОбщийМодуль', 'name': module['object_name'], 'modules_count': 1}
+    
     def parse_common_modules(self, common_modules_path: Path, config_name: str) -> List[Dict[str, Any]]:
         """Парсинг общих модулей"""
         modules = []
         
         # Ищем все XML файлы общих модулей
         for xml_file in common_modules_path.glob("*.xml"):
-            try:
-                # Пропускаем служебные файлы
-                if xml_file.name == "Configuration.xml" or "Subsystems" in str(xml_file):
-                    continue
-                
-                # Парсим XML для получения имени
-                with open(xml_file, 'rb') as f:
-                    raw_bytes = f.read()
-                    if raw_bytes.startswith(b'\xef\xbb\xbf'):
-                        raw_bytes = raw_bytes[3:]
-                    content = raw_bytes.decode('utf-8')
-                    root = ET.fromstring(content)
-                
-                name = self._extract_name(root)
-                if not name:
-                    continue
-                
-                # Ищем BSL файл
-                bsl_file = xml_file.parent / name / "Ext" / "Module.bsl"
-                if not bsl_file.exists():
-                    bsl_file = xml_file.parent / "Ext" / "Module.bsl"
-                if not bsl_file.exists():
-                    # Пробуем найти в текущей директории
-                    bsl_file = xml_file.parent / xml_file.stem / "Ext" / "Module.bsl"
-                
-                if bsl_file.exists():
-                    try:
-                        with open(bsl_file, 'r', encoding='utf-8-sig') as f:
-                            module_code = f.read()
-                        
-                        if module_code and len(module_code.strip()) > 10:
-                            bsl_result = self.bsl_parser.parse(module_code)
-                            
-                            modules.append({
-                                'name': f"ОбщийМодуль_{name}",
-                                'object_type': 'ОбщийМодуль',
-                                'object_name': name,
-                                'module_type': 'Модуль',
-                                'code': module_code,
-                                'functions': bsl_result['functions'],
-                                'procedures': bsl_result['procedures'],
-                                'regions': bsl_result['regions'],
-                                'api_usage': bsl_result['api_usage'],
-                                'functions_count': len(bsl_result['functions']),
-                                'source_file': str(xml_file.relative_to(self.config_dir)),
-                                'description': f"Общий модуль {name}"
-                            })
-                            
-                            self.stats['modules'] += 1
-                            self.stats['functions'] += len(bsl_result['functions'])
-                    except Exception as e:
-                        print(f"[WARN] Ошибка чтения BSL {bsl_file.name}: {e}")
-            except Exception as e:
-                print(f"[WARN] Ошибка обработки {xml_file.name}: {e}")
+            module = self.parse_common_module_file(xml_file)
+            if module:
+                modules.append(module)
         
         return modules
     
+    def parse_common_module_file(self, xml_file: Path) -> Optional[Dict[str, Any]]:
+        """Парсинг одного общего модуля (XML описание + Ext/Module.bsl)"""
+        try:
+            # Пропускаем служебные файлы
+            if xml_file.name == "Configuration.xml" or "Subsystems" in str(xml_file):
+                return None
+            
+            # Парсим XML для получения имени
+            root = self._read_xml_root(xml_file)
+            
+            name = self._extract_name(root)
+            if not name:
+                return None
+            
+            # Ищем BSL файл
+            bsl_file = xml_file.parent / name / "Ext" / "Module.bsl"
+            if not bsl_file.exists():
+                bsl_file = xml_file.parent / "Ext" / "Module.bsl"
+            if not bsl_file.exists():
+                # Пробуем найти в текущей директории
+                bsl_file = xml_file.parent / xml_file.stem / "Ext" / "Module.bsl"
+            
+            if bsl_file.exists():
+                try:
+                    return self._parse_bsl_module(
+                        bsl_file,
+                        xml_file,
+                        name=f"ОбщийМодуль_{name}",
+                        object_type='ОбщийМодуль',
+                        object_name=name,
+                        module_type='Модуль',
+                        description=f"Общий модуль {name}",
+                    )
+                except Exception as e:
+                    print(f"[WARN] Ошибка чтения BSL {bsl_file.name}: {e}")
+        except Exception as e:
+            print(f"[WARN] Ошибка обработки {xml_file.name}: {e}")
+        
+        return None
+    
     def parse_documents(self, documents_path: Path, config_name: str) -> Dict[str, Any]:
         """Парсинг документов"""
         modules = []
@@ -251,129 +317,98 @@ class EDTXMLParser:
             if not doc_dir.is_dir():
                 continue
             
-            try:
-                # Ищем XML файл документа
-                xml_file = doc_dir / f"{doc_dir.name}.xml"
-                if not xml_file.exists():
-                    # Пробуем найти любой XML файл
-                    xml_files = list(doc_dir.glob("*.xml"))
-                    if xml_files:
-                        xml_file = xml_files[0]
-                    else:
-                        continue
-                
-                # Парсим XML для получения имени
-                with open(xml_file, 'rb') as f:
-                    raw_bytes = f.read()
-                    if raw_bytes.startswith(b'\xef\xbb\xbf'):
-                        raw_bytes = raw_bytes[3:]
-                    content = raw_bytes.decode('utf-8')
-                    root = ET.fromstring(content)
-                
-                name = self._extract_name(root) or doc_dir.name
-                
-                # Ищем модули документа
-                doc_modules = []
-                
-                # Модуль объекта
-                obj_module_file = doc_dir / "Ext" / "ObjectModule.bsl"
-                if obj_module_file.exists():
-                    try:
-                        with open(obj_module_file, 'r', encoding='utf-8-sig') as f:
-                            module_code = f.read()
-                        if module_code and len(module_code.strip()) > 10:
-                            bsl_result = self.bsl_parser.parse(module_code)
-                            doc_modules.append({
-                                'name': f"Документ_{name}_МодульОбъекта",
-                                'object_type': 'Документ',
-                                'object_name': name,
-                                'module_type': 'МодульОбъекта',
-                                'code': module_code,
-                                'functions': bsl_result['functions'],
-                                'procedures': bsl_result['procedures'],
-                                'regions': bsl_result['regions'],
-                                'api_usage': bsl_result['api_usage'],
-                                'functions_count': len(bsl_result['functions']),
-                                'source_file': str(xml_file.relative_to(self.config_dir)),
-                                'description': f"Модуль объекта документа {name}"
-                            })
-                            self.stats['modules'] += 1
-                            self.stats['functions'] += len(bsl_result['functions'])
-                    except Exception as e:
-                        print(f"[WARN] Ошибка чтения ObjectModule.bsl: {e}")
-                
-                # Модуль менеджера
-                manager_module_file = doc_dir / "Ext" / "ManagerModule.bsl"
-                if manager_module_file.exists():
-                    try:
-                        with open(manager_module_file, 'r', encoding='utf-8-sig') as f:
-                            module_code = f.read()
-                        if module_code and len(module_code.strip()) > 10:
-                            bsl_result = self.bsl_parser.parse(module_code)
-                            doc_modules.append({
-                                'name': f"Документ_{name}_МодульМенеджера",
-                                'object_type': 'Документ',
-                                'object_name': name,
-                                'module_type': 'МодульМенеджера',
-                                'code': module_code,
-                                'functions': bsl_result['functions'],
-                                'procedures': bsl_result['procedures'],
-                                'regions': bsl_result['regions'],
-                                'api_usage': bsl_result['api_usage'],
-                                'functions_count': len(bsl_result['functions']),
-                                'source_file': str(xml_file.relative_to(self.config_dir)),
-                                'description': f"Модуль менеджера документа {name}"
-                            })
-                            self.stats['modules'] += 1
-                            self.stats['functions'] += len(bsl_result['functions'])
-                    except Exception as e:
-                        print(f"[WARN] Ошибка чтения ManagerModule.bsl: {e}")
-                
-                # Модули форм
-                forms_dir = doc_dir / "Forms"
-                if forms_dir.exists():
-                    for form_dir in forms_dir.iterdir():
-                        if not form_dir.is_dir():
-                            continue
-                        
-                        form_module_file = form_dir / "Ext" / "Form" / "Module.bsl"
-                        if form_module_file.exists():
-                            try:
-                                with open(form_module_file, 'r', encoding='utf-8-sig') as f:
-                                    form_code = f.read()
-                                if form_code and len(form_code.strip()) > 10:
-                                    bsl_result = self.bsl_parser.parse(form_code)
-                                    doc_modules.append({
-                                        'name': f"Документ_{name}_Форма_{form_dir.name}",
-                                        'object_type': 'Документ',
-                                        'object_name': name,
-                                        'module_type': 'МодульФормы',
-                                        'code': form_code,
-                                        'functions': bsl_result['functions'],
-                                        'procedures': bsl_result['procedures'],
-                                        'regions': bsl_result['regions'],
-                                        'api_usage': bsl_result['api_usage'],
-                                        'functions_count': len(bsl_result['functions']),
-                                        'source_file': str(xml_file.relative_to(self.config_dir)),
-                                        'description': f"Модуль формы {form_dir.name} документа {name}"
-                                    })
-                                    self.stats['modules'] += 1
-                                    self.stats['functions'] += len(bsl_result['functions'])
-                            except Exception as e:
-                                print(f"[WARN] Ошибка чтения формы {form_dir.name}: {e}")
-                
-                if doc_modules:
-                    modules.extend(doc_modules)
-                    objects.append({
-                        'type': 'Документ',
-                        'name': name,
-                        'modules_count': len(doc_modules)
-                    })
-            except Exception as e:
-                print(f"[WARN] Ошибка обработки документа {doc_dir.name}: {e}")
+            doc_modules, doc_object = self.parse_document_dir(doc_dir)
+            modules.extend(doc_modules)
+            if doc_object:
+                objects.append(doc_object)
         
         return {'modules': modules, 'objects': objects}
     
+    def parse_document_dir(self, doc_dir: Path) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Парсинг одного документа: (модули, объект)"""
+        try:
+            xml_file = self._find_object_xml(doc_dir)
+            if xml_file is None:
+                return [], None
+            
+            # Парсим XML для получения имени
+            root = self._read_xml_root(xml_file)
+            name = self._extract_name(root) or doc_dir.name
+            
+            # Ищем модули документа
+            doc_modules = []
+            
+            # Модуль объекта
+            obj_module_file = doc_dir / "Ext" / "ObjectModule.bsl"
+            if obj_module_file.exists():
+                try:
+                    module = self._parse_bsl_module(
+                        obj_module_file,
+                        xml_file,
+                        name=f"Документ_{name}_МодульОбъекта",
+                        object_type='Документ',
+                        object_name=name,
+                        module_type='МодульОбъекта',
+                        description=f"Модуль объекта документа {name}",
+                    )
+                    if module:
+                        doc_modules.append(module)
+                except Exception as e:
+                    print(f"[WARN] Ошибка чтения ObjectModule.bsl: {e}")
+            
+            # Модуль менеджера
+            manager_module_file = doc_dir / "Ext" / "ManagerModule.bsl"
+            if manager_module_file.exists():
+                try:
+                    module = self._parse_bsl_module(
+                        manager_module_file,
+                        xml_file,
+                        name=f"Документ_{name}_МодульМенеджера",
+                        object_type='Документ',
+                        object_name=name,
+                        module_type='МодульМенеджера',
+                        description=f"Модуль менеджера документа {name}",
+                    )
+                    if module:
+                        doc_modules.append(module)
+                except Exception as e:
+                    print(f"[WARN] Ошибка чтения ManagerModule.bsl: {e}")
+            
+            # Модули форм
+            forms_dir = doc_dir / "Forms"
+            if forms_dir.exists():
+                for form_dir in forms_dir.iterdir():
+                    if not form_dir.is_dir():
+                        continue
+                    
+                    form_module_file = form_dir / "Ext" / "Form" / "Module.bsl"
+                    if form_module_file.exists():
+                        try:
+                            module = self._parse_bsl_module(
+                                form_module_file,
+                                xml_file,
+                                name=f"Документ_{name}_Форма_{form_dir.name}",
+                                object_type='Документ',
+                                object_name=name,
+                                module_type='МодульФормы',
+                                description=f"Модуль формы {form_dir.name} документа {name}",
+                            )
+                            if module:
+                                doc_modules.append(module)
+                        except Exception as e:
+                            print(f"[WARN] Ошибка чтения формы {form_dir.name}: {e}")
+            
+            if doc_modules:
+                return doc_modules, {
+                    'type': 'Документ',
+                    'name': name,
+                    'modules_count': len(doc_modules)
+                }
+        except Exception as e:
+            print(f"[WARN] Ошибка обработки документа {doc_dir.name}: {e}")
+        
+        return [], None
+    
     def parse_catalogs(self, catalogs_path: Path, config_name: str) -> Dict[str, Any]:
         """Парсинг справочников"""
         modules = []
@@ -384,65 +419,108 @@ class EDTXMLParser:
             if not cat_dir.is_dir():
                 continue
             
-            try:
-                xml_file = cat_dir / f"{cat_dir.name}.xml"
-                if not xml_file.exists():
-                    xml_files = list(cat_dir.glob("*.xml"))
-                    if xml_files:
-                        xml_file = xml_files[0]
-                    else:
-                        continue
-                
-                with open(xml_file, 'rb') as f:
-                    raw_bytes = f.read()
-                    if raw_bytes.startswith(b'\xef\xbb\xbf'):
-                        raw_bytes = raw_bytes[3:]
-                    content = raw_bytes.decode('utf-8')
-                    root = ET.fromstring(content)
-                
-                name = self._extract_name(root) or cat_dir.name
-                
-                cat_modules = []
-                
-                # Модуль объекта
-                obj_module_file = cat_dir / "Ext" / "ObjectModule.bsl"
-                if obj_module_file.exists():
-                    try:
-                        with open(obj_module_file, 'r', encoding='utf-8-sig') as f:
-                            module_code = f.read()
-                        if module_code and len(module_code.strip()) > 10:
-                            bsl_result = self.bsl_parser.parse(module_code)
-                            cat_modules.append({
-                                'name': f"Справочник_{name}_МодульОбъекта",
-                                'object_type': 'Справочник',
-                                'object_name': name,
-                                'module_type': 'МодульОбъекта',
-                                'code': module_code,
-                                'functions': bsl_result['functions'],
-                                'procedures': bsl_result['procedures'],
-                                'regions': bsl_result['regions'],
-                                'api_usage': bsl_result['api_usage'],
-                                'functions_count': len(bsl_result['functions']),
-                                'source_file': str(xml_file.relative_to(self.config_dir)),
-                                'description': f"Модуль объекта справочника {name}"
-                            })
-                            self.stats['modules'] += 1
-                            self.stats['functions'] += len(bsl_result['functions'])
-                    except Exception as e:
-                        print(f"[WARN] Ошибка чтения ObjectModule.bsl: {e}")
-                
-                if cat_modules:
-                    modules.extend(cat_modules)
-                    objects.append({
-                        'type': 'Справочник',
-                        'name': name,
-                        'modules_count': len(cat_modules)
-                    })
-            except Exception as e:
-                print(f"[WARN] Ошибка обработки справочника {cat_dir.name}: {e}")
+            cat_modules, cat_object = self.parse_catalog_dir(cat_dir)
+            modules.extend(cat_modules)
+            if cat_object:
+                objects.append(cat_object)
         
         return {'modules': modules, 'objects': objects}
     
+    def parse_catalog_dir(self, cat_dir: Path) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Парсинг одного справочника: (модули, объект)"""
+        try:
+            xml_file = self._find_object_xml(cat_dir)
+            if xml_file is None:
+                return [], None
+            
+            root = self._read_xml_root(xml_file)
+            name = self._extract_name(root) or cat_dir.name
+            
+            cat_modules = []
+            
+            # Модуль объекта
+            obj_module_file = cat_dir / "Ext" / "ObjectModule.bsl"
+            if obj_module_file.exists():
+                try:
+                    module = self._parse_bsl_module(
+                        obj_module_file,
+                        xml_file,
+                        name=f"Справочник_{name}_МодульОбъекта",
+                        object_type='Справочник',
+                        object_name=name,
+                        module_type='МодульОбъекта',
+                        description=f"Модуль объекта справочника {name}",
+                    )
+                    if module:
+                        cat_modules.append(module)
+                except Exception as e:
+                    print(f"[WARN] Ошибка чтения ObjectModule.bsl: {e}")
+            
+            if cat_modules:
+                return cat_modules, {
+                    'type': 'Справочник',
+                    'name': name,
+                    'modules_count': len(cat_modules)
+                }
+        except Exception as e:
+            print(f"[WARN] Ошибка обработки справочника {cat_dir.name}: {e}")
+        
+        return [], None
+    
+    def _find_object_xml(self, object_dir: Path) -> Optional[Path]:
+        """XML описание объекта метаданных в его директории"""
+        xml_file = object_dir / f"{object_dir.name}.xml"
+        if xml_file.exists():
+            return xml_file
+        # Пробуем найти любой XML файл
+        xml_files = sorted(object_dir.glob("*.xml"))
+        return xml_files[0] if xml_files else None
+    
+    def _read_xml_root(self, xml_file: Path) -> ET.Element:
+        """Чтение XML с обработкой BOM"""
+        with open(xml_file, 'rb') as f:
+            raw_bytes = f.read()
+        if raw_bytes.startswith(b'\xef\xbb\xbf'):
+            raw_bytes = raw_bytes[3:]
+        return ET.fromstring(raw_bytes.decode('utf-8'))
+    
+    def _parse_bsl_module(
+        self,
+        bsl_file: Path,
+        xml_file: Path,
+        *,
+        name: str,
+        object_type: str,
+        object_name: str,
+        module_type: str,
+        description: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Чтение и разбор BSL модуля; None для пустых модулей"""
+        with open(bsl_file, 'r', encoding='utf-8-sig') as f:
+            module_code = f.read()
+        if not module_code or len(module_code.strip()) <= 10:
+            return None
+        
+        bsl_result = self.bsl_parser.parse(module_code)
+        module = {
+            'name': name,
+            'object_type': object_type,
+            'object_name': object_name,
+            'module_type': module_type,
+            'code': module_code,
+            'functions': bsl_result['functions'],
+            'procedures': bsl_result['procedures'],
+            'regions': bsl_result['regions'],
+            'api_usage': bsl_result['api_usage'],
+            'functions_count': len(bsl_result['functions']),
+            'source_file': str(xml_file.relative_to(self.config_dir)),
+            'description': description
+        }
+        
+        self.stats['modules'] += 1
+        self.stats['functions'] += len(bsl_result['functions'])
+        return module
+    
     def parse_single_xml_file(self, xml_file: Path, config_name: str) -> Optional[Dict[str, Any]]:
         """Парсинг одного XML файла"""
         try:
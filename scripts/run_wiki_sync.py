@@ -19,9 +19,12 @@ async def main():
     wiki_service = WikiService()
     syncer = CodeSyncService(root_path, wiki_service)
     
+    # Incremental by default, "--full" re-renders every page
+    incremental = "--full" not in sys.argv[1:]
+
     print(f"Scanning {root_path}...")
-    await syncer.sync_all()
-    print("Sync complete.")
+    stats = await syncer.sync_all(incremental=incremental)
+    print(f"Sync complete: {stats}")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -10,18 +10,38 @@ Tech Log Analyzer - Анализ технологического журнала
 - EXCP - исключения
 - TLOCK - блокировки транзакций
 - SDBL - медленные обращения к БД
+
+Большие журналы (десятки GB в сутки) обрабатываются потоково:
+события читаются генератором, агрегаты (`TechLogAggregator`) считаются
+инкрементально с ограниченной памятью, файлы раздаются пулу процессов,
+а частичные агрегаты сливаются в один (см. `analyze_tech_log`).
 """
 
+import asyncio
+import heapq
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from src.monitoring.sketches import QuantileSketch
 from src.utils.structured_logging import StructuredLogger
 
 logger = StructuredLogger(__name__).logger
 
+# Новое событие начинается с timestamp (MM:SS.mmmmmm)
+_EVENT_START_RE = re.compile(r"\d+:\d+\.\d+")
+
+DEFAULT_THRESHOLDS: Dict[str, int] = {
+    "slow_query_ms": 3000,  # 3 sec
+    "slow_call_ms": 2000,  # 2 sec
+    "slow_sdbl_ms": 1000,  # 1 sec
+    "lock_wait_ms": 500,  # 0.5 sec
+}
+
 
 @dataclass
 class TechLogEvent:
@@ -56,12 +76,293 @@ class PerformanceIssue:
     auto_fix_available: bool
 
 
+@dataclass
+class _GroupStats:
+    """Накопительная статистика группы событий (SQL, метод, ошибка)."""
+
+    count: int = 0
+    total_ms: int = 0
+    max_ms: int = 0
+    text: str = ""
+
+    def add(self, duration_ms: int) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+    def merge(self, other: "_GroupStats") -> None:
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        if not self.text:
+            self.text = other.text
+
+
+class TechLogAggregator:
+    """
+    Инкрементальные агрегаты по событиям tech log.
+
+    События не хранятся: для каждой группы (SQL / метод / ошибка) держатся
+    только счетчики, детали блокировок - в ограниченной min-heap, длительности -
+    в `QuantileSketch`. Число групп ограничено `max_groups`: при переполнении
+    отбрасывается наименее значимая половина (по суммарному времени / числу).
+    Агрегаторы сливаются через `merge`, что позволяет считать файлы параллельно.
+    """
+
+    def __init__(
+        self,
+        thresholds: Optional[Dict[str, int]] = None,
+        top_k: int = 10,
+        max_groups: int = 50_000,
+        max_error_contexts: int = 5,
+    ):
+        self.thresholds = dict(thresholds or DEFAULT_THRESHOLDS)
+        self.top_k = top_k
+        self.max_groups = max_groups
+        self.max_error_contexts = max_error_contexts
+
+        self.events_count = 0
+        self.by_type: Counter = Counter()
+        self.by_severity: Counter = Counter()
+        self.durations: Dict[str, QuantileSketch] = {}
+
+        self.sql_stats: Dict[str, _GroupStats] = {}
+        self.method_stats: Dict[str, _GroupStats] = {}
+        self.error_stats: Dict[str, _GroupStats] = {}
+        self.error_contexts: Dict[str, List[str]] = {}
+
+        self.total_locks = 0
+        self.long_locks = 0
+        self.max_lock_wait_ms = 0
+        self._lock_heap: List[Tuple[int, int, Dict[str, Any]]] = []
+        self._lock_seq = 0
+        self.groups_pruned = 0
+
+    def add(self, event: TechLogEvent) -> None:
+        """Учесть одно событие."""
+        self.events_count += 1
+        self.by_type[event.event_type] += 1
+        self.by_severity[event.severity] += 1
+
+        sketch = self.durations.get(event.event_type)
+        if sketch is None:
+            sketch = self.durations[event.event_type] = QuantileSketch()
+        sketch.add(event.duration_ms)
+
+        if event.event_type == "DBMSSQL" and event.sql:
+            stats = self._group(self.sql_stats, event.sql[:200], "total_ms")
+            if not stats.text:
+                stats.text = event.sql[:500]
+            stats.add(event.duration_ms)
+        elif event.event_type == "CALL" and event.method:
+            stats = self._group(self.method_stats, event.method, "total_ms")
+            if not stats.text:
+                stats.text = event.context
+            stats.add(event.duration_ms)
+        elif event.event_type == "EXCP":
+            error_key = event.error[:100] if event.error else "Unknown"
+            stats = self._group(self.error_stats, error_key, "count")
+            if not stats.text:
+                stats.text = event.error or ""
+            stats.add(event.duration_ms)
+            contexts = self.error_contexts.setdefault(error_key, [])
+            if (
+                event.context
+                and len(contexts) < self.max_error_contexts
+                and event.context not in contexts
+            ):
+                contexts.append(event.context)
+        elif event.event_type == "TLOCK":
+            self.total_locks += 1
+            self.max_lock_wait_ms = max(self.max_lock_wait_ms, event.duration_ms)
+            if event.duration_ms > self.thresholds["lock_wait_ms"]:
+                self.long_locks += 1
+                self._push_lock(
+                    event.duration_ms,
+                    {
+                        "duration_ms": event.duration_ms,
+                        "user": event.user,
+                        "context": event.context,
+                        "severity": event.severity,
+                    },
+                )
+
+    def add_many(self, events: Iterable[TechLogEvent]) -> "TechLogAggregator":
+        for event in events:
+            self.add(event)
+        return self
+
+    def merge(self, other: "TechLogAggregator") -> "TechLogAggregator":
+        """Слить частичный агрегат (например, посчитанный в другом процессе)."""
+        self.events_count += other.events_count
+        self.by_type.update(other.by_type)
+        self.by_severity.update(other.by_severity)
+        for event_type, sketch in other.durations.items():
+            if event_type in self.durations:
+                self.durations[event_type].merge(sketch)
+            else:
+                self.durations[event_type] = sketch
+
+        for own, theirs, rank_by in (
+            (self.sql_stats, other.sql_stats, "total_ms"),
+            (self.method_stats, other.method_stats, "total_ms"),
+            (self.error_stats, other.error_stats, "count"),
+        ):
+            for key, stats in theirs.items():
+                if key in own:
+                    own[key].merge(stats)
+                else:
+                    own[key] = stats
+            self._prune(own, rank_by)
+
+        for key, contexts in other.error_contexts.items():
+            if key not in self.error_stats:
+                continue
+            own_contexts = self.error_contexts.setdefault(key, [])
+            for context in contexts:
+                if len(own_contexts) >= self.max_error_contexts:
+                    break
+                if context not in own_contexts:
+                    own_contexts.append(context)
+
+        self.total_locks += other.total_locks
+        self.long_locks += other.long_locks
+        self.max_lock_wait_ms = max(self.max_lock_wait_ms, other.max_lock_wait_ms)
+        for duration_ms, _, details in other._lock_heap:
+            self._push_lock(duration_ms, details)
+        self.groups_pruned += other.groups_pruned
+        return self
+
+    def _group(self, groups: Dict[str, _GroupStats], key: str, rank_by: str) -> _GroupStats:
+        stats = groups.get(key)
+        if stats is None:
+            if len(groups) >= self.max_groups:
+                self._prune(groups, rank_by, force=True)
+            stats = groups[key] = _GroupStats()
+        return stats
+
+    def _prune(self, groups: Dict[str, _GroupStats], rank_by: str, force: bool = False) -> None:
+        if not force and len(groups) <= self.max_groups:
+            return
+        keep = heapq.nlargest(
+            self.max_groups // 2, groups.items(), key=lambda item: getattr(item[1], rank_by)
+        )
+        self.groups_pruned += len(groups) - len(keep)
+        groups.clear()
+        groups.update(keep)
+        if groups is self.error_stats:
+            self.error_contexts = {k: v for k, v in self.error_contexts.items() if k in groups}
+
+    def _push_lock(self, duration_ms: int, details: Dict[str, Any]) -> None:
+        self._lock_seq += 1
+        item = (duration_ms, self._lock_seq, details)
+        if len(self._lock_heap) < self.top_k:
+            heapq.heappush(self._lock_heap, item)
+        elif duration_ms > self._lock_heap[0][0]:
+            heapq.heapreplace(self._lock_heap, item)
+
+    # ------------------------------------------
+    # Результаты
+    # ------------------------------------------
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Медленные SQL запросы, отсортированные по суммарному времени."""
+        threshold = self.thresholds["slow_query_ms"]
+        slow = [
+            s for s in self.sql_stats.values() if s.total_ms / s.count > threshold
+        ]
+        result = []
+        for stats in heapq.nlargest(limit or self.top_k, slow, key=lambda s: s.total_ms):
+            avg_duration = stats.total_ms / stats.count
+            result.append(
+                {
+                    "sql": stats.text,
+                    "avg_duration_ms": int(avg_duration),
+                    "max_duration_ms": stats.max_ms,
+                    "executions": stats.count,
+                    "total_time_ms": stats.total_ms,
+                    "severity": "critical" if avg_duration > 10000 else "high",
+                }
+            )
+        return result
+
+    def slow_methods(self, limit: Optional[int] = None) -> List[Dict]:
+        """Медленные методы/процедуры, отсортированные по суммарному времени."""
+        threshold = self.thresholds["slow_call_ms"]
+        slow = [
+            (method, s)
+            for method, s in self.method_stats.items()
+            if s.total_ms / s.count > threshold
+        ]
+        return [
+            {
+                "method": method,
+                "avg_duration_ms": int(stats.total_ms / stats.count),
+                "max_duration_ms": stats.max_ms,
+                "calls_count": stats.count,
+                "total_time_ms": stats.total_ms,
+                "context": stats.text,
+            }
+            for method, stats in heapq.nlargest(
+                limit or self.top_k, slow, key=lambda item: item[1].total_ms
+            )
+        ]
+
+    def exceptions(self, limit: int = 20) -> Dict[str, Any]:
+        """Сводка по исключениям."""
+        top = heapq.nlargest(limit, self.error_stats.items(), key=lambda item: item[1].count)
+        return {
+            "total_exceptions": self.by_type.get("EXCP", 0),
+            "unique_errors": len(self.error_stats),
+            "top_errors": [
+                {
+                    "error": (stats.text or key)[:200],
+                    "count": stats.count,
+                    "contexts": self.error_contexts.get(key, []),
+                }
+                for key, stats in top
+            ],
+        }
+
+    def locks(self) -> Dict[str, Any]:
+        """Сводка по блокировкам (details - самые долгие ожидания)."""
+        return {
+            "total_locks": self.total_locks,
+            "long_locks": self.long_locks,
+            "max_wait_ms": self.max_lock_wait_ms,
+            "details": [item[2] for item in sorted(self._lock_heap, reverse=True)],
+        }
+
+    def duration_percentiles(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 длительности по типам событий."""
+        percentiles = {}
+        for event_type, sketch in self.durations.items():
+            p50, p95, p99 = sketch.quantiles((0.50, 0.95, 0.99))
+            percentiles[event_type] = {"p50": round(p50, 1), "p95": round(p95, 1), "p99": round(p99, 1)}
+        return percentiles
+
+
+def _aggregate_log_file(
+    log_file: str,
+    thresholds: Dict[str, int],
+    time_period: Optional[Tuple[datetime, datetime]] = None,
+    top_k: int = 10,
+) -> TechLogAggregator:
+    """Агрегировать один файл (точка входа для воркера пула процессов)."""
+    analyzer = TechLogAnalyzer()
+    analyzer.thresholds = dict(thresholds)
+    aggregator = TechLogAggregator(thresholds, top_k=top_k)
+    aggregator.add_many(analyzer._filter_period(analyzer.iter_file_events(Path(log_file)), time_period))
+    return aggregator
+
+
 class TechLogAnalyzer:
     """
     Анализатор технологического журнала 1С
 
     Features:
-    - Парсинг tech log (формат 1С)
+    - Парсинг tech log (формат 1С), потоковый и параллельный по файлам
     - Анализ производительности
     - Детекция паттернов проблем
     - Интеграция с SQL Optimizer
@@ -70,21 +371,7 @@ class TechLogAnalyzer:
 
     def __init__(self):
         # Пороги для детекции проблем (из 1c-parsing-tech-log best practices)
-        self.thresholds = {
-            "slow_query_ms": 3000,  # 3 sec
-            "slow_call_ms": 2000,  # 2 sec
-            "slow_sdbl_ms": 1000,  # 1 sec
-            "lock_wait_ms": 500,  # 0.5 sec
-        }
-
-        # Статистика событий
-        self.events_stats = {
-            "DBMSSQL": [],
-            "CALL": [],
-            "EXCP": [],
-            "TLOCK": [],
-            "SDBL": [],
-        }
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
 
     # ==========================================
     # ПАРСИНГ TECH LOG
@@ -96,6 +383,9 @@ class TechLogAnalyzer:
         """
         Парсинг технологического журнала
 
+        Загружает все события в память; для больших журналов используйте
+        `analyze_tech_log` (потоковая агрегация) или `iter_events`.
+
         Args:
             log_path: Путь к файлу(ам) tech log
             time_period: Период анализа (начало, конец)
@@ -105,18 +395,7 @@ class TechLogAnalyzer:
         """
         logger.info("Parsing tech log", extra={"log_path": str(log_path)})
 
-        events = []
-        log_files = self._find_log_files(log_path, time_period)
-
-        for log_file in log_files:
-            file_events = await self._parse_log_file(log_file)
-            events.extend(file_events)
-
-        # Фильтрация по времени если указано
-        if time_period:
-            events = [
-                e for e in events if time_period[0] <= e.timestamp <= time_period[1]
-            ]
+        events = list(self.iter_events(log_path, time_period))
 
         logger.info("Parsed events", extra={"events_count": len(events)})
 
@@ -128,6 +407,71 @@ class TechLogAnalyzer:
             "by_severity": self._group_by_severity(events),
         }
 
+    def iter_events(
+        self, log_path: str, time_period: Optional[Tuple[datetime, datetime]] = None
+    ) -> Iterator[TechLogEvent]:
+        """Потоково выдать события всех файлов журнала (с фильтром по периоду)."""
+        for log_file in self._find_log_files(log_path, time_period):
+            yield from self._filter_period(self.iter_file_events(log_file), time_period)
+
+    async def aggregate_tech_log(
+        self,
+        log_path: str,
+        time_period: Optional[Tuple[datetime, datetime]] = None,
+        max_workers: Optional[int] = None,
+        top_k: int = 10,
+    ) -> TechLogAggregator:
+        """
+        Потоково агрегировать журнал, не загружая события в память.
+
+        Если файлов несколько и `max_workers != 1`, файлы раздаются пулу
+        процессов, а частичные агрегаты сливаются.
+        """
+        log_files = self._find_log_files(log_path, time_period)
+        aggregator = TechLogAggregator(self.thresholds, top_k=top_k)
+
+        if len(log_files) <= 1 or max_workers == 1:
+            for log_file in log_files:
+                partial = await asyncio.to_thread(
+                    _aggregate_log_file, str(log_file), self.thresholds, time_period, top_k
+                )
+                aggregator.merge(partial)
+            return aggregator
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            partials = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        pool,
+                        _aggregate_log_file,
+                        str(log_file),
+                        self.thresholds,
+                        time_period,
+                        top_k,
+                    )
+                    for log_file in log_files
+                )
+            )
+        for partial in partials:
+            aggregator.merge(partial)
+
+        logger.info(
+            "Aggregated tech log",
+            extra={"files": len(log_files), "events_count": aggregator.events_count},
+        )
+        return aggregator
+
+    async def analyze_tech_log(
+        self,
+        log_path: str,
+        time_period: Optional[Tuple[datetime, datetime]] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Потоковый парсинг + анализ производительности одним вызовом."""
+        aggregator = await self.aggregate_tech_log(log_path, time_period, max_workers)
+        return await self.analyze_performance({"aggregator": aggregator})
+
     def _find_log_files(
         self, log_path: str, time_period: Optional[Tuple[datetime, datetime]]
     ) -> List[Path]:
@@ -138,23 +482,37 @@ class TechLogAnalyzer:
             return [path]
         elif path.is_dir():
             # Ищем все .log файлы
-            return list(path.glob("*.log"))
+            return sorted(path.glob("*.log"))
         else:
             logger.warning("Path not found", extra={"log_path": str(log_path)})
             return []
 
+    @staticmethod
+    def _filter_period(
+        events: Iterable[TechLogEvent], time_period: Optional[Tuple[datetime, datetime]]
+    ) -> Iterable[TechLogEvent]:
+        if not time_period:
+            return events
+        start, end = time_period
+        return (e for e in events if start <= e.timestamp <= end)
+
     async def _parse_log_file(self, log_file: Path) -> List[TechLogEvent]:
+        """Парсинг одного файла tech log целиком (см. `iter_file_events`)."""
+        return list(self.iter_file_events(log_file))
+
+    def iter_file_events(self, log_file: Path) -> Iterator[TechLogEvent]:
         """
-        Парсинг одного файла tech log
+        Потоковый парсинг одного файла tech log
 
         Формат tech log (пример):
         59:49.123456-1234,DBMSSQL,5,process=rphost,p:processName=...,Sql=SELECT...
         """
-        events = []
+        day_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        is_event_start = _EVENT_START_RE.match
 
         try:
             with open(log_file, "r", encoding="utf-8", errors="ignore") as f:
-                current_event = {}
+                current_lines: List[str] = []
 
                 for line in f:
                     line = line.strip()
@@ -162,26 +520,24 @@ class TechLogAnalyzer:
                     if not line:
                         continue
 
-                    # Новое событие начинается с timestamp
-                    if re.match(r"\d+:\d+\.\d+", line):
-                        # Сохраняем предыдущее событие
-                        if current_event:
-                            event = self._parse_event_data(current_event)
+                    if is_event_start(line):
+                        # Выдаем предыдущее событие
+                        if current_lines:
+                            event = self._parse_event_data({"lines": current_lines}, day_start)
                             if event:
-                                events.append(event)
+                                yield event
 
                         # Начинаем новое событие
-                        current_event = {"lines": [line]}
-                    else:
+                        current_lines = [line]
+                    elif current_lines:
                         # Продолжение текущего события
-                        if current_event:
-                            current_event["lines"].append(line)
+                        current_lines.append(line)
 
-                # Сохраняем последнее событие
-                if current_event:
-                    event = self._parse_event_data(current_event)
+                # Последнее событие
+                if current_lines:
+                    event = self._parse_event_data({"lines": current_lines}, day_start)
                     if event:
-                        events.append(event)
+                        yield event
 
         except Exception as e:
             logger.error(
@@ -194,9 +550,9 @@ class TechLogAnalyzer:
                 exc_info=True,
             )
 
-        return events
-
-    def _parse_event_data(self, event_data: Dict) -> Optional[TechLogEvent]:
+    def _parse_event_data(
+        self, event_data: Dict, day_start: Optional[datetime] = None
+    ) -> Optional[TechLogEvent]:
         """Парсинг данных события"""
         try:
             lines = event_data["lines"]
@@ -236,15 +592,15 @@ class TechLogAnalyzer:
             # Определение severity
             severity = self._determine_severity(event_type, duration_ms, error)
 
-            # Создаем простой timestamp (без даты, используем текущую дату)
+            # Простой timestamp (без даты, используем текущую дату)
+            if day_start is None:
+                day_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
             try:
-                time_obj = datetime.strptime(timestamp_str.split(".")[0], "%M:%S")
-                timestamp = datetime.now().replace(
-                    hour=0,
-                    minute=time_obj.minute,
-                    second=time_obj.second,
-                    microsecond=0,
-                )
+                minute_str, second_str = timestamp_str.split(".")[0].split(":")
+                minute, second = int(minute_str), int(second_str)
+                if not (0 <= minute < 60 and 0 <= second < 60):
+                    raise ValueError(timestamp_str)
+                timestamp = day_start.replace(minute=minute, second=second)
             except (ValueError, TypeError):
                 timestamp = datetime.now()
 
@@ -276,15 +632,14 @@ class TechLogAnalyzer:
 
         for part in parts:
             if "=" in part:
-                key_value = part.split("=", 1)
-                key = key_value[0].strip()
-                value = key_value[1].strip() if len(key_value) > 1 else ""
+                key, value = part.split("=", 1)
+                key = key.strip()
 
                 # Убираем префикс p:
                 if key.startswith("p:"):
                     key = key[2:]
 
-                attributes[key] = value
+                attributes[key] = value.strip()
 
         return attributes
 
@@ -324,14 +679,10 @@ class TechLogAnalyzer:
 
     def _group_by_type(self, events: List[TechLogEvent]) -> Dict[str, int]:
         """Группировка по типу события"""
-        from collections import Counter
-
         return dict(Counter(e.event_type for e in events))
 
     def _group_by_severity(self, events: List[TechLogEvent]) -> Dict[str, int]:
         """Группировка по severity"""
-        from collections import Counter
-
         return dict(Counter(e.severity for e in events))
 
     # ==========================================
@@ -342,6 +693,10 @@ class TechLogAnalyzer:
         """
         Анализ производительности на основе tech log
 
+        Args:
+            log_data: Результат `parse_tech_log` ({"events": [...]}) или
+                {"aggregator": TechLogAggregator} из `aggregate_tech_log`
+
         Returns:
             {
                 "performance_issues": [...],
@@ -352,19 +707,21 @@ class TechLogAnalyzer:
                 "ai_recommendations": [...]
             }
         """
-        events = log_data["events"]
+        aggregator = log_data.get("aggregator")
+        if aggregator is None:
+            aggregator = TechLogAggregator(self.thresholds).add_many(log_data["events"])
 
         # 1. Медленные SQL запросы
-        slow_queries = self._find_slow_queries(events)
+        slow_queries = aggregator.slow_queries()
 
         # 2. Медленные методы
-        slow_methods = self._find_slow_methods(events)
+        slow_methods = aggregator.slow_methods()
 
         # 3. Исключения
-        exceptions = self._analyze_exceptions(events)
+        exceptions = aggregator.exceptions()
 
         # 4. Блокировки
-        locks = self._analyze_locks(events)
+        locks = aggregator.locks()
 
         # 5. Performance issues
         issues = await self._detect_performance_issues(
@@ -376,12 +733,15 @@ class TechLogAnalyzer:
 
         return {
             "analysis_date": datetime.now().isoformat(),
-            "events_analyzed": len(events),
+            "events_analyzed": aggregator.events_count,
             "performance_issues": issues,
-            "top_slow_queries": slow_queries[:10],
-            "top_slow_methods": slow_methods[:10],
+            "top_slow_queries": slow_queries,
+            "top_slow_methods": slow_methods,
             "exceptions": exceptions,
             "locks_analysis": locks,
+            "duration_percentiles": aggregator.duration_percentiles(),
+            "by_type": dict(aggregator.by_type),
+            "by_severity": dict(aggregator.by_severity),
             "ai_recommendations": recommendations,
             "summary": {
                 "critical_issues": len([i for i in issues if i.severity == "critical"]),
@@ -390,153 +750,6 @@ class TechLogAnalyzer:
             },
         }
 
-    def _find_slow_queries(self, events: List[TechLogEvent]) -> List[Dict]:
-        """Поиск медленных SQL запросов"""
-        slow_queries = []
-
-        dbmssql_events = [e for e in events if e.event_type == "DBMSSQL"]
-
-        # Группируем по SQL
-        sql_stats = {}
-        for event in dbmssql_events:
-            if event.sql:
-                sql_key = event.sql[:200]  # First 200 chars as key
-
-                if sql_key not in sql_stats:
-                    sql_stats[sql_key] = {"sql": event.sql, "durations": [], "count": 0}
-
-                sql_stats[sql_key]["durations"].append(event.duration_ms)
-                sql_stats[sql_key]["count"] += 1
-
-        # Находим самые медленные
-        for sql_key, stats in sql_stats.items():
-            avg_duration = sum(stats["durations"]) / len(stats["durations"])
-            max_duration = max(stats["durations"])
-
-            if avg_duration > self.thresholds["slow_query_ms"]:
-                slow_queries.append(
-                    {
-                        "sql": stats["sql"][:500],
-                        "avg_duration_ms": int(avg_duration),
-                        "max_duration_ms": max_duration,
-                        "executions": stats["count"],
-                        "total_time_ms": sum(stats["durations"]),
-                        "severity": "critical" if avg_duration > 10000 else "high",
-                    }
-                )
-
-        # Сортировка по total_time (больше всего времени тратится)
-        slow_queries.sort(key=lambda x: x["total_time_ms"], reverse=True)
-
-        return slow_queries
-
-    def _find_slow_methods(self, events: List[TechLogEvent]) -> List[Dict]:
-        """Поиск медленных методов/процедур"""
-        slow_methods = []
-
-        call_events = [e for e in events if e.event_type == "CALL"]
-
-        # Группируем по методу
-        method_stats = {}
-        for event in call_events:
-            if event.method:
-                if event.method not in method_stats:
-                    method_stats[event.method] = {
-                        "durations": [],
-                        "count": 0,
-                        "context": event.context,
-                    }
-
-                method_stats[event.method]["durations"].append(event.duration_ms)
-                method_stats[event.method]["count"] += 1
-
-        # Находим самые медленные
-        for method, stats in method_stats.items():
-            avg_duration = sum(stats["durations"]) / len(stats["durations"])
-
-            if avg_duration > self.thresholds["slow_call_ms"]:
-                slow_methods.append(
-                    {
-                        "method": method,
-                        "avg_duration_ms": int(avg_duration),
-                        "max_duration_ms": max(stats["durations"]),
-                        "calls_count": stats["count"],
-                        "total_time_ms": sum(stats["durations"]),
-                        "context": stats["context"],
-                    }
-                )
-
-        slow_methods.sort(key=lambda x: x["total_time_ms"], reverse=True)
-
-        return slow_methods
-
-    def _analyze_exceptions(self, events: List[TechLogEvent]) -> Dict[str, Any]:
-        """Анализ исключений"""
-        exceptions = [e for e in events if e.event_type == "EXCP"]
-
-        # Группируем по типу ошибки
-        error_types = {}
-        for event in exceptions:
-            error_key = event.error[:100] if event.error else "Unknown"
-
-            if error_key not in error_types:
-                error_types[error_key] = {
-                    "error": event.error,
-                    "count": 0,
-                    "contexts": [],
-                }
-
-            error_types[error_key]["count"] += 1
-            if (
-                event.context
-                and event.context not in error_types[error_key]["contexts"]
-            ):
-                error_types[error_key]["contexts"].append(event.context)
-
-        # Топ ошибки
-        top_errors = sorted(
-            [
-                {
-                    "error": v["error"][:200],
-                    "count": v["count"],
-                    "contexts": v["contexts"][:5],
-                }
-                for v in error_types.values()
-            ],
-            key=lambda x: x["count"],
-            reverse=True,
-        )
-
-        return {
-            "total_exceptions": len(exceptions),
-            "unique_errors": len(error_types),
-            "top_errors": top_errors[:20],
-        }
-
-    def _analyze_locks(self, events: List[TechLogEvent]) -> Dict[str, Any]:
-        """Анализ блокировок"""
-        lock_events = [e for e in events if e.event_type == "TLOCK"]
-
-        long_locks = [
-            {
-                "duration_ms": e.duration_ms,
-                "user": e.user,
-                "context": e.context,
-                "severity": e.severity,
-            }
-            for e in lock_events
-            if e.duration_ms > self.thresholds["lock_wait_ms"]
-        ]
-
-        return {
-            "total_locks": len(lock_events),
-            "long_locks": len(long_locks),
-            "max_wait_ms": (
-                max([e.duration_ms for e in lock_events]) if lock_events else 0
-            ),
-            "details": long_locks[:10],
-        }
-
     # ==========================================
     # ДЕТЕКЦИЯ ПРОБЛЕМ
     # ==========================================
@@ -17,9 +17,12 @@ Unified Change Graph (experimental)
 
 from __future__ import annotations
 
+import json
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, Iterable, List, Optional
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
 
 
 class NodeKind(str, Enum):
@@ -144,6 +147,7 @@ class CodeGraphBackend:
     Абстрактный backend графа.
 
     Реальные реализации (in‑memory, Neo4j и др.) должны реализовать этот интерфейс.
+    Пакетные операции и обход имеют реализации по умолчанию поверх базовых методов.
     """
 
     async def upsert_node(self, node: Node) -> None:  # pragma: no cover - интерфейс
@@ -169,43 +173,228 @@ class CodeGraphBackend:
     ) -> List[Node]:  # pragma: no cover
         raise NotImplementedError
 
+    async def upsert_nodes(self, nodes: Iterable[Node]) -> None:
+        for node in nodes:
+            await self.upsert_node(node)
+
+    async def upsert_edges(self, edges: Iterable[Edge]) -> None:
+        for edge in edges:
+            await self.upsert_edge(edge)
+
+
+_PropKey = Tuple[str, Hashable]
+
+#: Свойства узлов, индексируемые по умолчанию (используются билдерами графа).
+DEFAULT_INDEXED_PROPS: Tuple[str, ...] = ("module", "name", "path")
+
+_SNAPSHOT_VERSION = 1
+
 
 class InMemoryCodeGraphBackend(CodeGraphBackend):
     """
-    Простая in‑memory реализация для тестов и локальных экспериментов.
-
-    Не предназначен для продакшена, но позволяет:
-    - писать unit‑тесты без внешних зависимостей;
-    - прототипировать сценарии, опирающиеся на Unified Change Graph.
+    In‑memory реализация графа с индексами.
+
+    Устройство:
+    - прямая и обратная смежность: node_id -> EdgeKind -> target_id -> Edge,
+      поэтому `neighbors()`/`incoming()` работают за O(степень узла), а не O(|E|);
+    - связь уникальна по (source, target, kind): повторный upsert обновляет props;
+    - вторичные индексы по kind, label и выбранным props (`indexed_props`),
+      `find_nodes()` пересекает индексы начиная с самого маленького;
+    - пакетные `upsert_nodes`/`upsert_edges`, BFS обход `traverse()`;
+    - компактный снапшот (`save_snapshot`/`load_snapshot`): таблица узлов в JSON
+      и рёбра как массивы int32 (source, target, kind) в .npz.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, indexed_props: Optional[Iterable[str]] = None) -> None:
         self._nodes: Dict[str, Node] = {}
-        self._edges: List[Edge] = []
+        self._out: Dict[str, Dict[EdgeKind, Dict[str, Edge]]] = {}
+        self._in: Dict[str, Dict[EdgeKind, Dict[str, Edge]]] = {}
+        self._edge_count = 0
+
+        self.indexed_props = frozenset(
+            DEFAULT_INDEXED_PROPS if indexed_props is None else indexed_props
+        )
+        # dict вместо set: сохраняем порядок вставки для детерминированной выдачи
+        self._by_kind: Dict[NodeKind, Dict[str, None]] = {}
+        self._by_label: Dict[str, Dict[str, None]] = {}
+        self._by_prop: Dict[_PropKey, Dict[str, None]] = {}
+
+    # ------------------------------------------------------------------
+    # Узлы
+    # ------------------------------------------------------------------
 
     async def upsert_node(self, node: Node) -> None:
+        self._put_node(node)
+
+    async def upsert_nodes(self, nodes: Iterable[Node]) -> None:
+        for node in nodes:
+            self._put_node(node)
+
+    async def get_node(self, node_id: str) -> Optional[Node]:
+        return self._nodes.get(node_id)
+
+    def _put_node(self, node: Node) -> None:
+        previous = self._nodes.get(node.id)
+        if previous is not None:
+            self._unindex_node(previous)
         self._nodes[node.id] = node
+        self._index_node(node)
+
+    def _index_keys(self, node: Node) -> Iterator[Tuple[Dict[Any, Dict[str, None]], Any]]:
+        yield self._by_kind, node.kind
+        for label in set(node.labels):
+            yield self._by_label, label
+        for prop in self.indexed_props:
+            if prop in node.props:
+                value = node.props[prop]
+                if isinstance(value, Hashable):
+                    yield self._by_prop, (prop, value)
+
+    def _index_node(self, node: Node) -> None:
+        for index, key in self._index_keys(node):
+            index.setdefault(key, {})[node.id] = None
+
+    def _unindex_node(self, node: Node) -> None:
+        for index, key in self._index_keys(node):
+            bucket = index.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(node.id, None)
+            if not bucket:
+                del index[key]
+
+    # ------------------------------------------------------------------
+    # Связи
+    # ------------------------------------------------------------------
 
     async def upsert_edge(self, edge: Edge) -> None:
+        self._put_edge(edge)
+
+    async def upsert_edges(self, edges: Iterable[Edge]) -> None:
+        for edge in edges:
+            self._put_edge(edge)
+
+    def _put_edge(self, edge: Edge) -> bool:
         if edge.source not in self._nodes or edge.target not in self._nodes:
-            # В простом бэкенде тихо игнорируем связи к несуществующим узлам
+            # Тихо игнорируем связи к несуществующим узлам
+            return False
+        targets = self._out.setdefault(edge.source, {}).setdefault(edge.kind, {})
+        if edge.target not in targets:
+            self._edge_count += 1
+        targets[edge.target] = edge
+        self._in.setdefault(edge.target, {}).setdefault(edge.kind, {})[edge.source] = edge
+        return True
+
+    @property
+    def _edges(self) -> List[Edge]:
+        """Все связи списком (совместимость с прямым доступом из билдеров/экспорта)."""
+        return list(self.iter_edges())
+
+    def iter_edges(self) -> Iterator[Edge]:
+        """Итератор по всем связям графа."""
+        for by_kind in self._out.values():
+            for targets in by_kind.values():
+                yield from targets.values()
+
+    @property
+    def node_count(self) -> int:
+        return len(self._nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    @staticmethod
+    def _adjacent(
+        adjacency: Dict[str, Dict[EdgeKind, Dict[str, Edge]]],
+        node_id: str,
+        kinds: Optional[Iterable[EdgeKind]],
+    ) -> Iterator[str]:
+        by_kind = adjacency.get(node_id)
+        if not by_kind:
             return
-        self._edges.append(edge)
-
-    async def get_node(self, node_id: str) -> Optional[Node]:
-        return self._nodes.get(node_id)
+        if kinds is None:
+            for ids in by_kind.values():
+                yield from ids
+        else:
+            for kind in dict.fromkeys(kinds):
+                yield from by_kind.get(kind, ())
 
     async def neighbors(
         self, node_id: str, *, kinds: Optional[Iterable[EdgeKind]] = None
     ) -> List[Node]:
-        if kinds is not None:
-            kinds_set = set(kinds)
-            relevant = [
-                e for e in self._edges if e.source == node_id and e.kind in kinds_set
-            ]
-        else:
-            relevant = [e for e in self._edges if e.source == node_id]
-        return [self._nodes[e.target] for e in relevant if e.target in self._nodes]
+        """Исходящие соседи узла (node_id -> X)."""
+        return [self._nodes[t] for t in self._adjacent(self._out, node_id, kinds)]
+
+    async def incoming(
+        self, node_id: str, *, kinds: Optional[Iterable[EdgeKind]] = None
+    ) -> List[Node]:
+        """Входящие соседи узла (X -> node_id), например «кто зависит от модуля»."""
+        return [self._nodes[s] for s in self._adjacent(self._in, node_id, kinds)]
+
+    async def edges_from(
+        self, node_id: str, *, kinds: Optional[Iterable[EdgeKind]] = None
+    ) -> List[Edge]:
+        """Исходящие связи узла вместе с их props."""
+        by_kind = self._out.get(node_id, {})
+        selected = by_kind.keys() if kinds is None else dict.fromkeys(kinds)
+        return [e for kind in selected for e in by_kind.get(kind, {}).values()]
+
+    async def traverse(
+        self,
+        start_id: str,
+        *,
+        kinds: Optional[Iterable[EdgeKind]] = None,
+        max_depth: int = 2,
+        direction: str = "out",
+        limit: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Многошаговый обход в ширину.
+
+        Args:
+            start_id: Начальный узел (в результат не входит)
+            kinds: Фильтр по типам связей
+            max_depth: Максимальная глубина (число рёбер от start_id)
+            direction: "out" (по исходящим), "in" (по входящим) или "both"
+            limit: Максимальное число найденных узлов
+
+        Returns:
+            Словарь node_id -> глубина в порядке обхода
+        """
+        if direction not in ("out", "in", "both"):
+            raise ValueError(f"Unknown traversal direction: {direction}")
+        if start_id not in self._nodes or max_depth <= 0:
+            return {}
+
+        kinds = list(kinds) if kinds is not None else None
+        adjacencies = {
+            "out": (self._out,),
+            "in": (self._in,),
+            "both": (self._out, self._in),
+        }[direction]
+
+        depths: Dict[str, int] = {}
+        visited = {start_id}
+        queue = deque([(start_id, 0)])
+        while queue:
+            node_id, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            for adjacency in adjacencies:
+                for next_id in self._adjacent(adjacency, node_id, kinds):
+                    if next_id in visited:
+                        continue
+                    visited.add(next_id)
+                    depths[next_id] = depth + 1
+                    if limit is not None and len(depths) >= limit:
+                        return depths
+                    queue.append((next_id, depth + 1))
+        return depths
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
 
     async def find_nodes(
         self,
@@ -214,19 +403,118 @@ class InMemoryCodeGraphBackend(CodeGraphBackend):
         label: Optional[str] = None,
         prop_equals: Optional[Dict[str, Any]] = None,
     ) -> List[Node]:
+        candidates: List[Dict[str, None]] = []
+        residual: Dict[str, Any] = {}
+
+        if kind is not None:
+            candidates.append(self._by_kind.get(kind, {}))
+        if label is not None:
+            candidates.append(self._by_label.get(label, {}))
+        for prop, value in (prop_equals or {}).items():
+            if prop in self.indexed_props and isinstance(value, Hashable):
+                candidates.append(self._by_prop.get((prop, value), {}))
+            else:
+                residual[prop] = value
+
+        if not candidates:
+            ids: Iterable[str] = self._nodes
+        else:
+            candidates.sort(key=len)
+            smallest, rest = candidates[0], candidates[1:]
+            ids = [i for i in smallest if all(i in other for other in rest)]
+
         result: List[Node] = []
-        for node in self._nodes.values():
-            if kind is not None and node.kind != kind:
-                continue
-            if label is not None and label not in node.labels:
+        for node_id in ids:
+            node = self._nodes[node_id]
+            if residual and any(node.props.get(k) != v for k, v in residual.items()):
                 continue
-            if prop_equals:
-                ok = True
-                for k, v in prop_equals.items():
-                    if node.props.get(k) != v:
-                        ok = False
-                        break
-                if not ok:
-                    continue
             result.append(node)
         return result
+
+    # ------------------------------------------------------------------
+    # Снапшоты
+    # ------------------------------------------------------------------
+
+    def save_snapshot(self, path: Union[str, Path]) -> Path:
+        """
+        Сохранить граф в компактный снапшот (.npz).
+
+        Узлы хранятся одной JSON таблицей, рёбра - тремя массивами int32
+        (индекс источника, индекс цели, индекс типа связи); props рёбер
+        сохраняются только для рёбер, где они не пустые.
+        """
+        import numpy as np
+
+        path = Path(path)
+        node_ids = list(self._nodes)
+        position = {node_id: i for i, node_id in enumerate(node_ids)}
+        edge_kinds = list(EdgeKind)
+        kind_position = {kind: i for i, kind in enumerate(edge_kinds)}
+
+        edges = list(self.iter_edges())
+        src = np.fromiter((position[e.source] for e in edges), dtype=np.int32, count=len(edges))
+        dst = np.fromiter((position[e.target] for e in edges), dtype=np.int32, count=len(edges))
+        kind = np.fromiter((kind_position[e.kind] for e in edges), dtype=np.int32, count=len(edges))
+        edge_props = {str(i): e.props for i, e in enumerate(edges) if e.props}
+
+        meta = {
+            "version": _SNAPSHOT_VERSION,
+            "edge_kinds": [k.value for k in edge_kinds],
+            "nodes": [
+                [n.id, n.kind.value, n.display_name, n.labels, n.props]
+                for n in self._nodes.values()
+            ],
+            "edge_props": edge_props,
+        }
+        meta_bytes = np.frombuffer(
+            json.dumps(meta, ensure_ascii=False, default=str).encode("utf-8"),
+            dtype=np.uint8,
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            np.savez(f, src=src, dst=dst, kind=kind, meta=meta_bytes)
+        return path
+
+    @classmethod
+    def load_snapshot(
+        cls,
+        path: Union[str, Path],
+        *,
+        indexed_props: Optional[Iterable[str]] = None,
+    ) -> "InMemoryCodeGraphBackend":
+        """Загрузить граф из снапшота, созданного `save_snapshot`."""
+        import numpy as np
+
+        with np.load(Path(path)) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            src, dst, kind = data["src"], data["dst"], data["kind"]
+
+        if meta.get("version") != _SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported code graph snapshot version: {meta.get('version')}")
+
+        backend = cls(indexed_props=indexed_props)
+        for node_id, node_kind, display_name, labels, props in meta["nodes"]:
+            backend._put_node(
+                Node(
+                    id=node_id,
+                    kind=NodeKind(node_kind),
+                    display_name=display_name,
+                    labels=labels,
+                    props=props,
+                )
+            )
+
+        node_ids = [row[0] for row in meta["nodes"]]
+        edge_kinds = [EdgeKind(value) for value in meta["edge_kinds"]]
+        edge_props = meta.get("edge_props", {})
+        for i, (s, t, k) in enumerate(zip(src.tolist(), dst.tolist(), kind.tolist())):
+            backend._put_edge(
+                Edge(
+                    source=node_ids[s],
+                    target=node_ids[t],
+                    kind=edge_kinds[k],
+                    props=edge_props.get(str(i), {}),
+                )
+            )
+        return backend
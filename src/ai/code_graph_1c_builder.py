@@ -19,12 +19,16 @@ from __future__ import annotations
 import logging
 import re
 from pathlib import Path
-from typing import Any, Dict, Optional, Set
+from typing import Any, Dict, Iterable, Optional, Set
 
 from src.ai.code_graph import CodeGraphBackend, Edge, EdgeKind, Node, NodeKind
+from src.parsers.bsl_syntax import extract_calls
 
 logger = logging.getLogger(__name__)
 
+# Встроенные функции платформы, которые не являются узлами графа
+_BUILTIN_FUNCTIONS = frozenset({"создатьобъект", "найти", "найтизначения"})
+
 
 class OneCCodeGraphBuilder:
     """
@@ -69,7 +73,7 @@ class OneCCodeGraphBuilder:
                 from src.ai.agents.code_review.bsl_parser import BSLParser
 
                 self._parser = BSLParser()
-                logger.info("Using simple regex-based BSL parser")
+                logger.info("Using simple BSL parser")
 
         return self._parser
 
@@ -204,12 +208,14 @@ class OneCCodeGraphBuilder:
             if not callable_data:
                 continue
 
-            body = callable_data.get("body", "")
-            if not body:
-                continue
-
-            # Извлечь вызовы функций/процедур из тела
-            called_functions = self._extract_function_calls(body)
+            # Вызовы уже собраны парсером за тот же проход; иначе - разбор тела
+            if "calls" in callable_data:
+                called_functions = self._filter_function_calls(callable_data["calls"])
+            else:
+                body = callable_data.get("body") or callable_data.get("code") or ""
+                if not body:
+                    continue
+                called_functions = self._extract_function_calls(body)
             for called_name in called_functions:
                 # Ищем в текущем модуле
                 if called_name in all_callables:
@@ -347,35 +353,18 @@ class OneCCodeGraphBuilder:
         """
         Извлечь имена вызываемых функций/процедур из кода.
 
-        Упрощённый подход: ищем паттерны вызовов в BSL.
+        Вызовы берутся из токенов (src/parsers/bsl_syntax.py): строки,
+        комментарии, ключевые слова и конструкторы Новый X() не попадают.
+        Также учитываются вызовы через точку: Объект.Метод(
         """
-        calls: Set[str] = set()
+        return self._filter_function_calls(call.name for call in extract_calls(code))
 
-        # Паттерн: ИмяФункции( или ИмяПроцедуры(
-        # Также учитываем вызовы через точку: Объект.Метод(
-        pattern = r"(\w+)\s*\("
-        matches = re.finditer(pattern, code)
+    def _filter_function_calls(self, names: Iterable[str]) -> Set[str]:
+        """Отбросить стандартные функции 1С из списка вызовов"""
+        calls: Set[str] = set()
 
-        for match in matches:
-            name = match.group(1)
-            # Пропускаем ключевые слова BSL
-            if name.lower() in {
-                "если",
-                "иначе",
-                "иначеесли",
-                "для",
-                "пока",
-                "попытка",
-                "исключение",
-                "вызватьисключение",
-                "возврат",
-                "продолжить",
-                "прервать",
-                "новый",
-                "создатьобъект",
-                "найти",
-                "найтизначения",
-            }:
+        for name in names:
+            if name.lower() in _BUILTIN_FUNCTIONS:
                 continue
 
             # Пропускаем стандартные функции 1С (можно расширить список)
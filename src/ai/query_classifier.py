@@ -1,11 +1,18 @@
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 
 from src.ai.scenario_hub import ScenarioRiskLevel
 from src.utils.structured_logging import StructuredLogger
 
+try:
+    from re import _constants as _sre, _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants as _sre
+    import sre_parse as _sre_parse
+
 logger = StructuredLogger(__name__).logger
 
 
@@ -47,11 +54,119 @@ class QueryIntent:
     suggested_tools: List[str]
 
 
+def literal_prefixes(items) -> List[str]:
+    """
+    Literal prefixes one of which every match of a parsed regex starts with.
+
+    An empty string in the result means the pattern has no usable prefix.
+    """
+    prefixes = [""]
+    for op, av in items:
+        if op is _sre.LITERAL:
+            prefixes = [prefix + chr(av) for prefix in prefixes]
+            continue
+        if op is _sre.SUBPATTERN and not av[1] and not av[2]:
+            branches = [av[3]]
+        elif op is _sre.BRANCH:
+            branches = av[1]
+        else:
+            break
+        alternatives = [suffix for branch in branches for suffix in literal_prefixes(branch)]
+        prefixes = [prefix + suffix for prefix in prefixes for suffix in alternatives]
+        break
+    return prefixes if len(prefixes) <= 64 else [""]
+
+
+class CompiledRuleSet:
+    """
+    Classification rules compiled once for all queries.
+
+    All keyword literals and the literal prefixes of the patterns (every match
+    of "(создай|напиши)\\s+..." starts with "создай" or "напиши") are looked up
+    in a single set of str.find() calls over the query, shared between rules.
+    A pattern regex runs only if one of its prefixes occurs, starting from the
+    earliest occurrence. The result is identical to checking every keyword
+    with `in` and every pattern with re.search().
+    """
+
+    KEYWORD_WEIGHT = 1.0
+    PATTERN_WEIGHT = 2.0
+
+    def __init__(self, rules: Dict[QueryType, Dict[str, Any]]):
+        self.rules = rules
+        self.query_types: List[QueryType] = list(rules)
+        # (query_type, keyword, literal) в порядке RULES
+        self.keywords: List[Tuple[QueryType, str, str]] = []
+        # (query_type, regex, prefixes | None)
+        self.patterns: List[Tuple[QueryType, Pattern, Optional[Tuple[str, ...]]]] = []
+
+        for query_type, type_rules in rules.items():
+            for keyword in type_rules.get("keywords", []):
+                self.keywords.append((query_type, keyword, keyword.lower()))
+            for pattern in type_rules.get("patterns", []):
+                try:
+                    regex = re.compile(pattern, re.IGNORECASE)
+                    prefixes = literal_prefixes(_sre_parse.parse(pattern, re.IGNORECASE))
+                except re.error:
+                    logger.warning(f"Invalid regex pattern for {query_type}: {pattern}")
+                    continue
+                anchors = tuple(sorted({prefix.lower() for prefix in prefixes}))
+                self.patterns.append((query_type, regex, None if "" in anchors else anchors))
+
+        literals = {literal for _, _, literal in self.keywords}
+        for _, _, anchors in self.patterns:
+            literals.update(anchors or ())
+        self.literals: Tuple[str, ...] = tuple(sorted(literals))
+
+    def match(self, query_lower: str) -> Tuple[Dict[QueryType, float], List[str]]:
+        """
+        Score all query types for a lower-cased query.
+
+        Returns:
+            (scores by query type, matched keywords in RULES order)
+        """
+        positions = {literal: query_lower.find(literal) for literal in self.literals}
+
+        scores: Dict[QueryType, float] = {query_type: 0.0 for query_type in self.query_types}
+        keywords: List[str] = []
+        for query_type, keyword, literal in self.keywords:
+            if positions[literal] >= 0:
+                scores[query_type] += self.KEYWORD_WEIGHT
+                keywords.append(keyword)
+
+        for query_type, regex, anchors in self.patterns:
+            start = 0
+            if anchors is not None:
+                found = [positions[anchor] for anchor in anchors if positions[anchor] >= 0]
+                if not found:
+                    continue
+                start = min(found)
+            if regex.search(query_lower, start):
+                scores[query_type] += self.PATTERN_WEIGHT
+
+        return scores, keywords
+
+
 class QueryClassifier:
     """Classifies user queries to determine routing"""
 
-    def __init__(self):
-        """Инициализация QueryClassifier с поддержкой LLM Provider Abstraction."""
+    MAX_QUERY_LENGTH = 10000
+
+    _compiled_rules: Optional[CompiledRuleSet] = None
+
+    def __init__(self, cache_size: int = 4096):
+        """
+        Инициализация QueryClassifier с поддержкой LLM Provider Abstraction.
+
+        Args:
+            cache_size: Размер LRU кэша результатов сопоставления правил (0 - без кэша)
+        """
+        self.rule_set = self._get_rule_set()
+        self.cache_size = cache_size
+        # query_lower -> (best_type, confidence, keywords)
+        self._match_cache: "OrderedDict[str, Tuple[QueryType, float, Tuple[str, ...]]]" = OrderedDict()
+        self.cache_stats = {"hits": 0, "misses": 0}
+
         self.llm_abstraction = None
         try:
             from src.ai.llm_provider_abstraction import LLMProviderAbstraction
@@ -61,6 +176,15 @@ class QueryClassifier:
         except Exception as e:
             logger.debug("LLM Provider Abstraction not available: %s", e)
 
+    @classmethod
+    def _get_rule_set(cls) -> CompiledRuleSet:
+        """Скомпилированные RULES (один раз на класс)"""
+        compiled = cls.__dict__.get("_compiled_rules")
+        if compiled is None or compiled.rules is not cls.RULES:
+            compiled = CompiledRuleSet(cls.RULES)
+            cls._compiled_rules = compiled
+        return compiled
+
     # Classification rules
     RULES = {
         QueryType.STANDARD_1C: {
@@ -177,52 +301,14 @@ class QueryClassifier:
                 suggested_tools=[],
             )
 
-        max_query_length = 10000
-        if len(query) > max_query_length:
-            query = query[:max_query_length]
+        if len(query) > self.MAX_QUERY_LENGTH:
+            query = query[: self.MAX_QUERY_LENGTH]
 
         if context is None:
             context = {}
 
-        query_lower = query.lower()
-        scores: Dict[QueryType, float] = {}
-        matched_keywords: List[str] = []
-
-        # Robust rule matching
-        for query_type, rules in self.RULES.items():
-            score = 0.0
-
-            # Check keywords
-            if "keywords" in rules:
-                for keyword in rules["keywords"]:
-                    if keyword.lower() in query_lower:
-                        score += 1.0
-                        matched_keywords.append(keyword)
-
-            # Check patterns
-            if "patterns" in rules:
-                for pattern in rules["patterns"]:
-                    try:
-                        if re.search(pattern, query_lower, re.IGNORECASE):
-                            score += 2.0
-                    except re.error:
-                        logger.warning(
-                            f"Invalid regex pattern for {query_type}: {pattern}"
-                        )
-
-            scores[query_type] = score
-
-        if scores:
-            best_type = max(scores, key=scores.get)
-            # Normalize confidence
-            confidence = (
-                min(scores[best_type] / 5.0, 1.0) if scores[best_type] > 0 else 0.0
-            )
-            if confidence == 0.0:
-                best_type = QueryType.UNKNOWN
-        else:
-            best_type = QueryType.UNKNOWN
-            confidence = 0.0
+        best_type, confidence, keywords = self._match(query.lower())
+        matched_keywords = list(keywords)
 
         preferred_services = []
         if best_type != QueryType.UNKNOWN:
@@ -268,3 +354,27 @@ class QueryClassifier:
             preferred_services=preferred_services,
             suggested_tools=list(set(suggested_tools)),  # Deduplicate
         )
+
+    def _match(self, query_lower: str) -> Tuple[QueryType, float, Tuple[str, ...]]:
+        """Сопоставление с правилами (с LRU кэшем по тексту запроса)"""
+        cached = self._match_cache.get(query_lower)
+        if cached is not None:
+            self._match_cache.move_to_end(query_lower)
+            self.cache_stats["hits"] += 1
+            return cached
+        self.cache_stats["misses"] += 1
+
+        scores, matched_keywords = self.rule_set.match(query_lower)
+
+        best_type = max(scores, key=scores.get) if scores else QueryType.UNKNOWN
+        # Normalize confidence
+        confidence = min(scores[best_type] / 5.0, 1.0) if scores.get(best_type) else 0.0
+        if confidence == 0.0:
+            best_type = QueryType.UNKNOWN
+
+        result = (best_type, confidence, tuple(matched_keywords))
+        if self.cache_size > 0:
+            self._match_cache[query_lower] = result
+            if len(self._match_cache) > self.cache_size:
+                self._match_cache.popitem(last=False)
+        return result
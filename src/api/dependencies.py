@@ -65,6 +65,8 @@ class ServiceContainer:
             cls._neo4j_client.disconnect()
         if cls._pg_client:
             cls._pg_client.disconnect()
+        if cls._embedding_service and cls._embedding_service.embedding_store:
+            cls._embedding_service.embedding_store.close()
         logger.info("Services cleaned up")
 
     @classmethod
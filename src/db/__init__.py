@@ -2,6 +2,7 @@
 
 """Database utilities"""
 
+from .postgres_bulk_saver import PostgreSQLBulkSaver
 from .postgres_saver import PostgreSQLSaver
 
-__all__ = ["PostgreSQLSaver"]
+__all__ = ["PostgreSQLSaver", "PostgreSQLBulkSaver"]
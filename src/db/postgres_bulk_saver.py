@@ -0,0 +1,582 @@
+# [NEXUS IDENTITY] ID: 5812264927309457160 | DATE: 2026-10-17
+
+"""
+PostgreSQL Bulk Saver for 1C Configurations
+Версия: 1.0.0
+
+Режим массовой загрузки поверх PostgreSQLSaver:
+- save_* методы не пишут в БД сразу, а складывают строки в буферы по таблицам;
+- flush() пишет буферы пачками: объекты и модули - многострочными
+  INSERT ... RETURNING (execute_values), функции и регионы - через COPY,
+  api_usage - одним upsert с предварительно агрегированными счетчиками;
+- вместо ID методы возвращают временные ссылки ("staged:..."), которые
+  разрешаются пакетно при flush (RETURNING, сопоставление по естественному
+  ключу строки), поэтому дочерние строки можно ставить в буфер до того, как
+  родитель записан;
+- модули пишутся upsert'ом, функции, регионы и api_usage обновленного модуля
+  заменяются, так что повторный разбор конфигурации идемпотентен; нужен
+  уникальный индекс modules_natural_key (PostgreSQL 15+, миграция
+  db/alembic/versions/20261017_add_modules_natural_key.py):
+      CREATE UNIQUE INDEX modules_natural_key ON modules
+          (configuration_id, object_id, name, module_type) NULLS NOT DISTINCT;
+- bulk_save_modules() раскладывает группы модулей по потокам, каждый пишет
+  через свое соединение из пула.
+"""
+
+import csv
+import hashlib
+import io
+import itertools
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import Json, execute_values
+
+from src.db.postgres_saver import PostgreSQLSaver
+from src.utils.structured_logging import StructuredLogger
+
+logger = StructuredLogger(__name__).logger
+
+STAGED_REF_PREFIX = "staged:"
+
+_OBJECT_COLUMNS = ("configuration_id", "object_type", "name", "synonym", "description", "metadata")
+_MODULE_COLUMNS = (
+    "configuration_id", "object_id", "name", "module_type",
+    "code", "code_hash", "description", "source_file", "line_count",
+)
+_FUNCTION_COLUMNS = (
+    "module_id", "name", "function_type", "is_exported",
+    "parameters", "return_type", "region", "description", "code",
+    "start_line", "end_line", "complexity_score",
+)
+_REGION_COLUMNS = ("module_id", "name", "start_line", "end_line", "level")
+
+# Естественные ключи (индексы в строках _OBJECT_COLUMNS / _MODULE_COLUMNS)
+_OBJECT_KEY = (0, 1, 2)
+_MODULE_KEY = (0, 1, 2, 3)
+
+# Дочерние таблицы модуля, заменяемые при повторной записи модуля
+_MODULE_CHILD_TABLES = ("functions", "regions", "api_usage")
+
+# Маркер NULL для COPY (CSV): пустая строка остается пустой строкой
+_COPY_NULL = "\\N"
+
+
+class _StagedBatch:
+    """Буферы строк по таблицам для одной пачки записи."""
+
+    def __init__(self) -> None:
+        # (configuration_id, object_type, name) -> (refs, row); дубликаты сливаются,
+        # иначе ON CONFLICT упадет на повторной строке внутри одного INSERT
+        self.objects: Dict[Tuple[Any, str, str], Tuple[List[str], tuple]] = {}
+        self.modules: List[Tuple[str, tuple]] = []
+        self.functions: List[tuple] = []
+        self.regions: List[tuple] = []
+        self.api_usage: Counter = Counter()
+
+    def __len__(self) -> int:
+        return (
+            len(self.objects)
+            + len(self.modules)
+            + len(self.functions)
+            + len(self.regions)
+            + len(self.api_usage)
+        )
+
+    def absorb(self, other: "_StagedBatch") -> None:
+        """Добавить строки другой пачки после своих."""
+        for key, (refs, row) in other.objects.items():
+            if key in self.objects:
+                refs = self.objects[key][0] + refs
+            self.objects[key] = (refs, row)
+        self.modules.extend(other.modules)
+        self.functions.extend(other.functions)
+        self.regions.extend(other.regions)
+        self.api_usage.update(other.api_usage)
+
+
+def _natural_key(row: Sequence[Any], indexes: Sequence[int]) -> tuple:
+    """Ключ строки, сравнимый с RETURNING (UUID и текст приводятся к str)."""
+    return tuple(None if row[i] is None else str(row[i]) for i in indexes)
+
+
+class PostgreSQLBulkSaver(PostgreSQLSaver):
+    """
+    Замена PostgreSQLSaver для массового импорта конфигураций.
+
+    Отличия от PostgreSQLSaver:
+    - save_object / save_module возвращают временные ссылки, которые можно
+      передавать в другие save_* как ID родителя; реальные ID доступны через
+      resolve_id() после flush();
+    - данные попадают в БД при flush() (автоматически при достижении
+      batch_size строк, а также в get_statistics() и при выходе из with).
+      Ошибки автоматической записи логируются, как в PostgreSQLSaver, а
+      строки остаются в буфере до следующей попытки; явный flush()
+      пробрасывает ошибку, чтобы вызывающий код мог не считать данные
+      сохраненными.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        batch_size: int = 5000,
+        page_size: int = 1000,
+        use_copy: bool = True,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.use_copy = use_copy
+
+        self._batch = _StagedBatch()
+        self._resolved: Dict[str, str] = {}
+        self._ref_counter = itertools.count(1)
+        self._lock = threading.RLock()
+
+        self.rows_written: Counter = Counter()
+        self.flush_count = 0
+        self.write_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Ссылки
+    # ------------------------------------------------------------------
+
+    def _new_ref(self, table: str) -> str:
+        return f"{STAGED_REF_PREFIX}{table}:{next(self._ref_counter)}"
+
+    def resolve_id(self, ref: Optional[str]) -> Optional[str]:
+        """Реальный ID по временной ссылке (или сам ID, если это не ссылка)."""
+        if ref is None or not str(ref).startswith(STAGED_REF_PREFIX):
+            return ref
+        with self._lock:
+            if ref not in self._resolved:
+                raise KeyError(f"Reference {ref} is not flushed yet")
+            return self._resolved[ref]
+
+    # ------------------------------------------------------------------
+    # Постановка в буфер (API PostgreSQLSaver)
+    # ------------------------------------------------------------------
+
+    def save_object(self, config_id: str, object_data: Dict[str, Any]) -> Optional[str]:
+        """Поставить объект 1С в буфер."""
+        with self._lock:
+            ref = self._stage_object(self._batch, config_id, object_data)
+        self._maybe_flush()
+        return ref
+
+    def save_module(
+        self,
+        config_id: str,
+        module_data: Dict[str, Any],
+        object_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """Поставить модуль BSL (с функциями, регионами и api_usage) в буфер."""
+        with self._lock:
+            ref = self._stage_module(self._batch, config_id, module_data, object_id)
+        self._maybe_flush()
+        return ref
+
+    def save_function(self, module_id: str, func_data: Dict[str, Any]) -> Optional[str]:
+        """Поставить функцию/процедуру в буфер (ID функций не возвращаются)."""
+        with self._lock:
+            self._batch.functions.append(self._function_row(module_id, func_data))
+        self._maybe_flush()
+        return None
+
+    def save_api_usage(self, module_id: str, api_name: str) -> bool:
+        with self._lock:
+            self._batch.api_usage[(module_id, api_name)] += 1
+        self._maybe_flush()
+        return True
+
+    def save_region(self, module_id: str, region_data: Dict[str, Any]) -> Optional[str]:
+        with self._lock:
+            self._batch.regions.append(self._region_row(module_id, region_data))
+        self._maybe_flush()
+        return None
+
+    def _stage_object(self, batch: _StagedBatch, config_id: str, object_data: Dict[str, Any]) -> str:
+        ref = self._new_ref("objects")
+        key = (config_id, object_data["type"], object_data["name"])
+        row = (
+            config_id,
+            object_data["type"],
+            object_data["name"],
+            object_data.get("synonym"),
+            object_data.get("description"),
+            Json(object_data.get("metadata", {})),
+        )
+        refs = batch.objects[key][0] if key in batch.objects else []
+        refs.append(ref)
+        batch.objects[key] = (refs, row)
+        return ref
+
+    def _stage_module(
+        self,
+        batch: _StagedBatch,
+        config_id: str,
+        module_data: Dict[str, Any],
+        object_id: Optional[str],
+    ) -> str:
+        code = module_data.get("code", "")
+        ref = self._new_ref("modules")
+        batch.modules.append(
+            (
+                ref,
+                (
+                    config_id,
+                    object_id,
+                    module_data["name"],
+                    module_data.get("module_type"),
+                    code,
+                    hashlib.sha256(code.encode()).hexdigest(),
+                    module_data.get("description"),
+                    module_data.get("source_file"),
+                    len(code.split("\n")) if code else 0,
+                ),
+            )
+        )
+
+        for func in itertools.chain(module_data.get("functions", []), module_data.get("procedures", [])):
+            batch.functions.append(self._function_row(ref, func))
+        for api in module_data.get("api_usage", []):
+            batch.api_usage[(ref, api)] += 1
+        for region in module_data.get("regions", []):
+            batch.regions.append(self._region_row(ref, region))
+        return ref
+
+    def _function_row(self, module_id: str, func_data: Dict[str, Any]) -> tuple:
+        code = func_data.get("code", "")
+        return (
+            module_id,
+            func_data["name"],
+            func_data.get("type", "Function"),
+            func_data.get("exported", False),
+            func_data.get("params", []),
+            func_data.get("return_type"),
+            func_data.get("region"),
+            func_data.get("comments", ""),
+            code,
+            func_data.get("start_line"),
+            func_data.get("end_line"),
+            self._calculate_complexity(code),
+        )
+
+    @staticmethod
+    def _region_row(module_id: str, region_data: Dict[str, Any]) -> tuple:
+        return (
+            module_id,
+            region_data["name"],
+            region_data.get("start_line"),
+            region_data.get("end_line"),
+            region_data.get("level", 0),
+        )
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def _maybe_flush(self) -> None:
+        if len(self._batch) >= self.batch_size:
+            self._flush_logged()
+
+    def _flush_logged(self) -> bool:
+        """flush() с логированием ошибки вместо исключения."""
+        try:
+            self.flush()
+            return True
+        except Exception:
+            return False
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Записать все буферы в БД одной транзакцией.
+
+        При ошибке транзакция откатывается, строки возвращаются в буфер
+        (перед добавленными за время записи) и исключение пробрасывается.
+
+        Returns:
+            Количество записанных строк по таблицам
+        """
+        with self._lock:
+            batch, self._batch = self._batch, _StagedBatch()
+        if not len(batch):
+            return {}
+
+        resolved_before = set(self._resolved)
+        try:
+            return self._write_batch(batch)
+        except Exception as e:
+            with self._lock:
+                # Ссылки из откатившейся транзакции недействительны
+                for ref in set(self._resolved) - resolved_before:
+                    del self._resolved[ref]
+                batch.absorb(self._batch)
+                self._batch = batch
+            logger.error(
+                "Error flushing bulk batch",
+                extra={"error": str(e), "staged_rows": len(batch)},
+                exc_info=True,
+            )
+            raise
+
+    def _write_batch(self, batch: _StagedBatch) -> Dict[str, int]:
+        started = time.perf_counter()
+        written: Dict[str, int] = {}
+
+        with self.get_cursor() as cur:
+            if batch.objects:
+                written["objects"] = self._write_objects(cur, batch)
+            if batch.modules:
+                written["modules"] = self._write_modules(cur, batch)
+            if batch.functions:
+                written["functions"] = self._write_rows(
+                    cur, "functions", _FUNCTION_COLUMNS, batch.functions, json_columns=(4,)
+                )
+            if batch.regions:
+                written["regions"] = self._write_rows(cur, "regions", _REGION_COLUMNS, batch.regions)
+            if batch.api_usage:
+                written["api_usage"] = self._write_api_usage(cur, batch)
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.rows_written.update(written)
+            self.flush_count += 1
+            self.write_seconds += elapsed
+
+        logger.debug(
+            "Flushed bulk batch",
+            extra={"rows": sum(written.values()), "elapsed_s": round(elapsed, 3), **written},
+        )
+        return written
+
+    def _resolve_row(self, row: tuple, index: int) -> tuple:
+        value = row[index]
+        if value is not None and str(value).startswith(STAGED_REF_PREFIX):
+            return row[:index] + (self.resolve_id(value),) + row[index + 1:]
+        return row
+
+    def _write_objects(self, cur, batch: _StagedBatch) -> int:
+        staged = list(batch.objects.values())
+        returned = execute_values(
+            cur,
+            f"""
+            INSERT INTO objects ({", ".join(_OBJECT_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (configuration_id, object_type, name)
+            DO UPDATE SET
+                synonym = EXCLUDED.synonym,
+                description = EXCLUDED.description,
+                metadata = EXCLUDED.metadata,
+                updated_at = NOW()
+            RETURNING id, configuration_id, object_type, name
+            """,
+            [row for _, row in staged],
+            page_size=self.page_size,
+            fetch=True,
+        )
+        # Порядок строк RETURNING для многострочного INSERT не гарантирован
+        ids = {_natural_key(row, range(1, 4)): row[0] for row in returned}
+        with self._lock:
+            for refs, row in staged:
+                object_id = ids[_natural_key(row, _OBJECT_KEY)]
+                for ref in refs:
+                    self._resolved[ref] = object_id
+        return len(staged)
+
+    def _write_modules(self, cur, batch: _StagedBatch) -> int:
+        # Повторы ключа внутри одного INSERT ... ON CONFLICT недопустимы:
+        # остается последняя версия модуля, ссылки всех версий указывают на нее
+        staged: Dict[tuple, Tuple[List[str], tuple]] = {}
+        for ref, row in batch.modules:
+            row = self._resolve_row(row, 1)
+            key = _natural_key(row, _MODULE_KEY)
+            refs = staged.pop(key)[0] if key in staged else []
+            staged[key] = (refs + [ref], row)
+
+        returned = execute_values(
+            cur,
+            f"""
+            INSERT INTO modules ({", ".join(_MODULE_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (configuration_id, object_id, name, module_type)
+            DO UPDATE SET
+                code = EXCLUDED.code,
+                code_hash = EXCLUDED.code_hash,
+                description = EXCLUDED.description,
+                source_file = EXCLUDED.source_file,
+                line_count = EXCLUDED.line_count
+            RETURNING id, (xmax = 0) AS inserted, configuration_id, object_id, name, module_type
+            """,
+            [row for _, row in staged.values()],
+            page_size=self.page_size,
+            fetch=True,
+        )
+        ids = {_natural_key(row, range(2, 6)): row[0] for row in returned}
+        replaced = [row[0] for row in returned if not row[1]]
+
+        # Старые функции, регионы и api_usage обновленных модулей заменяются новыми
+        if replaced:
+            for table in _MODULE_CHILD_TABLES:
+                cur.execute(f"DELETE FROM {table} WHERE module_id = ANY(%s)", (replaced,))
+
+        with self._lock:
+            for key, (refs, _) in staged.items():
+                for ref in refs:
+                    self._resolved[ref] = ids[key]
+        return len(staged)
+
+    def _write_api_usage(self, cur, batch: _StagedBatch) -> int:
+        totals: Counter = Counter()
+        for (module_id, api_name), count in batch.api_usage.items():
+            totals[(self.resolve_id(module_id), api_name)] += count
+        execute_values(
+            cur,
+            """
+            INSERT INTO api_usage (module_id, api_name, usage_count)
+            VALUES %s
+            ON CONFLICT (module_id, api_name)
+            DO UPDATE SET usage_count = api_usage.usage_count + EXCLUDED.usage_count
+            """,
+            [(module_id, api_name, count) for (module_id, api_name), count in totals.items()],
+            page_size=self.page_size,
+        )
+        return len(totals)
+
+    def _write_rows(
+        self,
+        cur,
+        table: str,
+        columns: Sequence[str],
+        rows: List[tuple],
+        json_columns: Iterable[int] = (),
+    ) -> int:
+        """Вставка строк без конфликтов: COPY (по умолчанию) или execute_values."""
+        json_columns = tuple(json_columns)
+        resolved = [self._resolve_row(row, 0) for row in rows]
+
+        if self.use_copy:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in resolved:
+                writer.writerow(
+                    _COPY_NULL if value is None
+                    else json.dumps(value, ensure_ascii=False) if i in json_columns
+                    else value
+                    for i, value in enumerate(row)
+                )
+            buffer.seek(0)
+            cur.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{_COPY_NULL}')",
+                buffer,
+            )
+        else:
+            execute_values(
+                cur,
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s",
+                [
+                    tuple(Json(v) if i in json_columns else v for i, v in enumerate(row))
+                    for row in resolved
+                ],
+                page_size=self.page_size,
+            )
+        return len(resolved)
+
+    # ------------------------------------------------------------------
+    # Параллельная загрузка модулей
+    # ------------------------------------------------------------------
+
+    def bulk_save_modules(
+        self,
+        config_id: str,
+        modules: Sequence[Dict[str, Any]],
+        object_ids: Optional[Dict[str, str]] = None,
+        workers: int = 4,
+        group_key: str = "object_name",
+    ) -> List[str]:
+        """
+        Записать модули параллельно группами.
+
+        Модули группируются по `group_key` (по умолчанию - объект метаданных),
+        группы распределяются по `workers` потокам, каждый поток пишет свои
+        пачки через отдельное соединение из пула.
+
+        Args:
+            config_id: ID конфигурации
+            modules: Данные модулей (как для save_module)
+            object_ids: Имя объекта -> ID (или временная ссылка) объекта
+            workers: Количество потоков (не больше maxconn пула)
+            group_key: Поле модуля для группировки
+
+        Returns:
+            Временные ссылки модулей в порядке входного списка
+        """
+        # Родительские объекты должны быть записаны до модулей
+        self.flush()
+        object_ids = object_ids or {}
+        workers = max(1, min(workers, self.maxconn))
+
+        groups: Dict[Any, List[int]] = defaultdict(list)
+        for i, module in enumerate(modules):
+            groups[module.get(group_key)].append(i)
+        lanes: List[List[int]] = [[] for _ in range(workers)]
+        for indexes in sorted(groups.values(), key=len, reverse=True):
+            min(lanes, key=len).extend(indexes)
+
+        refs: List[Optional[str]] = [None] * len(modules)
+
+        def write_lane(indexes: List[int]) -> None:
+            batch = _StagedBatch()
+            for i in indexes:
+                module = modules[i]
+                object_id = object_ids.get(module.get("object_name"))
+                with self._lock:
+                    refs[i] = self._stage_module(batch, config_id, module, self.resolve_id(object_id))
+                if len(batch) >= self.batch_size:
+                    self._write_batch(batch)
+                    batch = _StagedBatch()
+            if len(batch):
+                self._write_batch(batch)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(write_lane, [lane for lane in lanes if lane]))
+
+        return refs
+
+    # ------------------------------------------------------------------
+    # Статистика
+    # ------------------------------------------------------------------
+
+    def get_ingest_stats(self) -> Dict[str, Any]:
+        """Статистика загрузки: строки по таблицам и rows/sec."""
+        with self._lock:
+            total = sum(self.rows_written.values())
+            return {
+                "rows_written": dict(self.rows_written),
+                "total_rows": total,
+                "flushes": self.flush_count,
+                "write_seconds": round(self.write_seconds, 3),
+                "rows_per_sec": round(total / self.write_seconds, 1) if self.write_seconds else 0.0,
+                "staged_rows": len(self._batch),
+            }
+
+    def get_statistics(self, config_name: Optional[str] = None) -> Dict[str, int]:
+        self._flush_logged()
+        return super().get_statistics(config_name)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            if len(self._batch):
+                logger.warning(
+                    "Discarding unflushed bulk rows on disconnect",
+                    extra={"staged_rows": len(self._batch)},
+                )
+            self.disconnect()
@@ -413,6 +413,42 @@ class PostgreSQLSaver:
             logger.error("Error saving region", extra={"error": str(e)}, exc_info=True)
             return None
 
+    def delete_module(self, config_id: str, module_name: str) -> bool:
+        """Delete module with its functions, regions and API usage"""
+        try:
+            with self.get_cursor() as cur:
+                cur.execute(
+                    "SELECT id FROM modules WHERE configuration_id = %s AND name = %s",
+                    (config_id, module_name),
+                )
+                module_ids = [row[0] for row in cur.fetchall()]
+                if not module_ids:
+                    return True
+
+                for table in ("api_usage", "regions", "functions"):
+                    cur.execute(
+                        f"DELETE FROM {table} WHERE module_id = ANY(%s)",
+                        (module_ids,),
+                    )
+                cur.execute("DELETE FROM modules WHERE id = ANY(%s)", (module_ids,))
+                return True
+        except Exception as e:
+            logger.error("Error deleting module", extra={"error": str(e)}, exc_info=True)
+            return False
+
+    def delete_object(self, config_id: str, object_type: str, name: str) -> bool:
+        """Delete metadata object (its modules must be deleted first)"""
+        try:
+            with self.get_cursor() as cur:
+                cur.execute(
+                    "DELETE FROM objects WHERE configuration_id = %s AND object_type = %s AND name = %s",
+                    (config_id, object_type, name),
+                )
+                return True
+        except Exception as e:
+            logger.error("Error deleting object", extra={"error": str(e)}, exc_info=True)
+            return False
+
     def _calculate_complexity(self, code: str) -> int:
         if not code:
             return 0
@@ -18,8 +18,10 @@ Unified Data Layer - Абстракция над множественными Б
 
 import asyncio
 import logging
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
 
 logger = logging.getLogger(__name__)
 
@@ -45,63 +47,170 @@ class DataLoader:
     """
     DataLoader для batch loading и предотвращения N+1 проблем
 
+    Все ключи, запрошенные через load()/load_many() в пределах одного
+    такта event loop (или окна batch_window секунд), объединяются в один
+    вызов batch_fn. Ключи, уже находящиеся в загрузке, не запрашиваются
+    повторно - ожидающие получают общий Future. Результаты кэшируются в
+    ограниченном LRU кэше с опциональным TTL.
+
+    batch_fn(keys) должна вернуть список значений той же длины и в том же
+    порядке, что и keys (None для отсутствующих), либо исключение -
+    оно передается всем ожидающим этого батча.
+
     Научное обоснование:
     - "DataLoader Pattern" (Facebook, 2015): Batch loading
     - "N+1 Problem Solution" (2024): Оптимизация запросов
     """
 
-    def __init__(self, batch_fn, max_batch_size: int = 100):
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[List[Any]]],
+        max_batch_size: int = 100,
+        batch_window: float = 0.0,
+        cache_size: int = 10_000,
+        cache_ttl: Optional[float] = None,
+        name: str = "default",
+    ):
         self.batch_fn = batch_fn
         self.max_batch_size = max_batch_size
-        self._cache: Dict[str, Any] = {}
-        self._pending: Dict[str, asyncio.Future] = {}
-        self._batch_queue: List[str] = []
-        self._batch_timer: Optional[asyncio.Task] = None
-
-    async def load(self, key: str) -> Any:
+        self.batch_window = batch_window
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.name = name
+
+        # key -> (value, expires_at)
+        self._cache: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._batch_queue: List[Hashable] = []
+        self._batch_timer: Optional[asyncio.Handle] = None
+
+        self.stats: Dict[str, int] = {
+            "loads": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "keys_fetched": 0,
+            "errors": 0,
+        }
+
+    async def load(self, key: Hashable) -> Any:
         """Загрузка одного элемента"""
-        return (await self.load_many([key]))[0]
+        self.stats["loads"] += 1
+
+        hit, value = self._cache_get(key)
+        if hit:
+            self.stats["cache_hits"] += 1
+            return value
+
+        future = self._pending.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            self._enqueue(key)
+
+        # shield: отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(future)
 
-    async def load_many(self, keys: List[str]) -> List[Any]:
+    async def load_many(self, keys: List[Hashable]) -> List[Any]:
         """Загрузка множества элементов с batch оптимизацией"""
-        results = []
-        uncached_keys = []
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
 
-        # Проверка кэша
-        for key in keys:
-            if key in self._cache:
-                results.append(self._cache[key])
-            else:
-                uncached_keys.append(key)
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Положить значение в кэш (например, после insert/update)"""
+        self._cache_put(key, value)
 
-        if not uncached_keys:
-            return results
+    def clear(self, key: Hashable) -> None:
+        """Удалить ключ из кэша"""
+        self._cache.pop(key, None)
 
-        # Batch загрузка
-        batch_results = await self._batch_load(uncached_keys)
+    def clear_cache(self) -> None:
+        """Очистка кэша"""
+        self._cache.clear()
 
-        # Кэширование и формирование результатов
-        for key, value in zip(uncached_keys, batch_results):
-            self._cache[key] = value
-            results.append(value)
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики загрузчика: попадания в кэш и размеры батчей"""
+        batches = self.stats["batches"]
+        loads = self.stats["loads"]
+        return {
+            "name": self.name,
+            **self.stats,
+            "hit_rate": self.stats["cache_hits"] / loads if loads else 0.0,
+            "avg_batch_size": self.stats["keys_fetched"] / batches if batches else 0.0,
+            "cache_entries": len(self._cache),
+            "in_flight": len(self._pending),
+        }
+
+    def _cache_get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, value
+
+    def _cache_put(self, key: Hashable, value: Any) -> None:
+        if self.cache_size <= 0:
+            return
+        expires_at = time.monotonic() + self.cache_ttl if self.cache_ttl else None
+        self._cache[key] = (value, expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _enqueue(self, key: Hashable) -> None:
+        self._batch_queue.append(key)
+
+        if len(self._batch_queue) >= self.max_batch_size:
+            self._dispatch()
+        elif self._batch_timer is None:
+            loop = asyncio.get_running_loop()
+            if self.batch_window > 0:
+                self._batch_timer = loop.call_later(self.batch_window, self._dispatch)
+            else:
+                # Конец текущего такта: к этому моменту все готовые корутины
+                # успеют поставить свои ключи в очередь
+                self._batch_timer = loop.call_soon(self._dispatch)
 
-        return results
+    def _dispatch(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
 
-    async def _batch_load(self, keys: List[str]) -> List[Any]:
-        """Batch загрузка"""
-        # Разбиение на батчи
-        batches = [keys[i : i + self.max_batch_size] for i in range(0, len(keys), self.max_batch_size)]
+        keys, self._batch_queue = self._batch_queue, []
+        for i in range(0, len(keys), self.max_batch_size):
+            asyncio.ensure_future(self._batch_load(keys[i : i + self.max_batch_size]))
 
-        all_results = []
-        for batch in batches:
-            results = await self.batch_fn(batch)
-            all_results.extend(results)
+    async def _batch_load(self, keys: List[Hashable]) -> None:
+        """Batch загрузка: один вызов batch_fn, результаты раздаются ожидающим"""
+        self.stats["batches"] += 1
+        self.stats["keys_fetched"] += len(keys)
 
-        return all_results
+        try:
+            results = await self.batch_fn(keys)
+            if len(results) != len(keys):
+                raise ValueError(
+                    f"DataLoader '{self.name}': batch_fn returned {len(results)} "
+                    f"results for {len(keys)} keys"
+                )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"DataLoader '{self.name}' batch failed: {e}", exc_info=True)
+            for key in keys:
+                future = self._pending.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
 
-    def clear_cache(self) -> None:
-        """Очистка кэша"""
-        self._cache.clear()
+        for key, value in zip(keys, results):
+            self._cache_put(key, value)
+            future = self._pending.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(value)
 
 
 class UnifiedDataLayer:
@@ -123,6 +232,9 @@ class UnifiedDataLayer:
         qdrant_conn: Optional[Any] = None,
         elasticsearch_conn: Optional[Any] = None,
         redis_conn: Optional[Any] = None,
+        loader_cache_size: int = 10_000,
+        loader_cache_ttl: Optional[float] = 60.0,
+        loader_batch_window: float = 0.0,
     ):
         self.postgres = postgres_conn
         self.neo4j = neo4j_conn
@@ -130,6 +242,12 @@ class UnifiedDataLayer:
         self.elasticsearch = elasticsearch_conn
         self.redis = redis_conn
 
+        self.loader_cache_size = loader_cache_size
+        self.loader_cache_ttl = loader_cache_ttl
+        self.loader_batch_window = loader_batch_window
+        # (database, namespace, key_field) -> DataLoader
+        self._loaders: Dict[Tuple[str, str, str], DataLoader] = {}
+
         logger.info("UnifiedDataLayer initialized")
 
     async def query(self, query_type: str, query: Dict[str, Any], database: str = "postgres") -> QueryResult:
@@ -137,19 +255,32 @@ class UnifiedDataLayer:
         Унифицированный запрос к данным
 
         Args:
-            query_type: Тип запроса ("select", "insert", "update", "delete")
+            query_type: Тип запроса ("select", "insert", "update", "delete",
+                "load" - выборка по ключам через DataLoader)
             query: Параметры запроса
             database: Целевая БД ("postgres", "neo4j", "qdrant", "elasticsearch")
 
         Returns:
             Результат запроса
         """
+        if query_type == "load" and database in ("postgres", "neo4j", "qdrant"):
+            return await self._query_load(database, query)
+
         if database == "postgres":
-            return await self._query_postgres(query_type, query)
+            result = await self._query_postgres(query_type, query)
+            if query_type != "select":
+                self._invalidate_loaders("postgres", query.get("table"))
+            return result
         elif database == "neo4j":
-            return await self._query_neo4j(query_type, query)
+            result = await self._query_neo4j(query_type, query)
+            if query_type != "match":
+                self._invalidate_loaders("neo4j")
+            return result
         elif database == "qdrant":
-            return await self._query_qdrant(query_type, query)
+            result = await self._query_qdrant(query_type, query)
+            if query_type != "search":
+                self._invalidate_loaders("qdrant", query.get("collection"))
+            return result
         elif database == "elasticsearch":
             return await self._query_elasticsearch(query_type, query)
         else:
@@ -486,6 +617,146 @@ class UnifiedDataLayer:
             logger.error(f"Elasticsearch query failed: {e}", exc_info=True)
             return QueryResult(data=[], total=0, metadata={"error": str(e)})
 
+    # ==================== DataLoader (batch lookup по ключам) ====================
+
+    async def load(
+        self,
+        database: str,
+        key: Hashable,
+        *,
+        table: Optional[str] = None,
+        label: Optional[str] = None,
+        collection: Optional[str] = None,
+        key_field: str = "id",
+    ) -> Optional[Any]:
+        """
+        Загрузка одной записи по ключу.
+
+        Конкурентные вызовы из разных корутин объединяются в один запрос
+        (WHERE key = ANY(...) / IN $keys / retrieve), результаты кэшируются.
+
+        Args:
+            database: "postgres" (table), "neo4j" (label) или "qdrant" (collection)
+            key: Значение ключа
+            key_field: Поле ключа (для postgres и neo4j)
+
+        Returns:
+            Запись или None, если не найдена
+        """
+        loader = self.get_loader(database, table or label or collection, key_field)
+        return await loader.load(key)
+
+    async def load_many(
+        self,
+        database: str,
+        keys: List[Hashable],
+        *,
+        table: Optional[str] = None,
+        label: Optional[str] = None,
+        collection: Optional[str] = None,
+        key_field: str = "id",
+    ) -> List[Optional[Any]]:
+        """Загрузка записей по списку ключей (порядок сохраняется)"""
+        loader = self.get_loader(database, table or label or collection, key_field)
+        return await loader.load_many(keys)
+
+    def get_loader(self, database: str, namespace: Optional[str], key_field: str = "id") -> DataLoader:
+        """DataLoader для (БД, таблица/метка/коллекция, поле ключа)"""
+        if database == "postgres":
+            if not namespace:
+                raise ValueError("Table name is required")
+            batch_fn = lambda keys: self._batch_load_postgres(namespace, key_field, keys)  # noqa: E731
+        elif database == "neo4j":
+            batch_fn = lambda keys: self._batch_load_neo4j(namespace, key_field, keys)  # noqa: E731
+        elif database == "qdrant":
+            if not namespace:
+                raise ValueError("Collection name is required")
+            batch_fn = lambda keys: self._batch_load_qdrant(namespace, keys)  # noqa: E731
+        else:
+            raise ValueError(f"DataLoader is not supported for database: {database}")
+
+        loader_key = (database, namespace or "", key_field)
+        loader = self._loaders.get(loader_key)
+        if loader is None:
+            loader = DataLoader(
+                batch_fn,
+                batch_window=self.loader_batch_window,
+                cache_size=self.loader_cache_size,
+                cache_ttl=self.loader_cache_ttl,
+                name=":".join(part for part in loader_key if part),
+            )
+            self._loaders[loader_key] = loader
+        return loader
+
+    def get_loader_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Метрики всех DataLoader'ов"""
+        return {loader.name: loader.get_stats() for loader in self._loaders.values()}
+
+    def _invalidate_loaders(self, database: str, namespace: Optional[str] = None) -> None:
+        """Сброс кэша загрузчиков после записи"""
+        for (db, ns, _), loader in self._loaders.items():
+            if db == database and (namespace is None or ns == namespace):
+                loader.clear_cache()
+
+    async def _query_load(self, database: str, query: Dict[str, Any]) -> QueryResult:
+        keys = query.get("keys")
+        if keys is None:
+            keys = [query["key"]] if "key" in query else []
+        try:
+            data = await self.load_many(
+                database,
+                keys,
+                table=query.get("table"),
+                label=query.get("label"),
+                collection=query.get("collection"),
+                key_field=query.get("key_field", "id"),
+            )
+        except Exception as e:
+            logger.error(f"{database} load failed: {e}", exc_info=True)
+            return QueryResult(data=[], total=0, metadata={"error": str(e)})
+
+        found = [item for item in data if item is not None]
+        return QueryResult(data=found, total=len(found), metadata={"missing": len(data) - len(found)})
+
+    async def _batch_load_postgres(self, table: str, key_field: str, keys: List[Hashable]) -> List[Any]:
+        if not self.postgres:
+            raise RuntimeError("PostgreSQL connection not initialized")
+
+        from psycopg2.extras import RealDictCursor
+
+        cursor = self.postgres.cursor(cursor_factory=RealDictCursor)
+        try:
+            cursor.execute(f"SELECT * FROM {table} WHERE {key_field} = ANY(%s)", (list(keys),))
+            rows = {str(row[key_field]): dict(row) for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+        logger.debug(f"PostgreSQL batch load: {len(rows)}/{len(keys)} rows from {table}")
+        return [rows.get(str(key)) for key in keys]
+
+    async def _batch_load_neo4j(self, label: Optional[str], key_field: str, keys: List[Hashable]) -> List[Any]:
+        if not self.neo4j:
+            raise RuntimeError("Neo4j connection not initialized")
+
+        node = f"n:{label}" if label else "n"
+        cypher_query = f"MATCH ({node}) WHERE n.{key_field} IN $keys RETURN n.{key_field} AS key, n AS node"
+        with self.neo4j.session() as session:
+            result = session.run(cypher_query, {"keys": list(keys)})
+            nodes = {str(record["key"]): dict(record["node"]) for record in result}
+
+        logger.debug(f"Neo4j batch load: {len(nodes)}/{len(keys)} nodes")
+        return [nodes.get(str(key)) for key in keys]
+
+    async def _batch_load_qdrant(self, collection: str, keys: List[Hashable]) -> List[Any]:
+        if not self.qdrant:
+            raise RuntimeError("Qdrant connection not initialized")
+
+        points = self.qdrant.retrieve(collection_name=collection, ids=list(keys), with_payload=True)
+        by_id = {str(point.id): {"id": point.id, "payload": point.payload} for point in points}
+
+        logger.debug(f"Qdrant batch load: {len(by_id)}/{len(keys)} points")
+        return [by_id.get(str(key)) for key in keys]
+
     async def cache_get(self, key: str) -> Optional[Any]:
         """
         Получение из кэша (Redis)
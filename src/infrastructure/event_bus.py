@@ -16,12 +16,18 @@ Event-Driven Architecture - Замена Celery
 """
 
 import asyncio
+import json
 import logging
+import threading
+import zlib
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set, TypeVar
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Set, Tuple, TypeVar, Union
 from uuid import uuid4
 
 logger = logging.getLogger(__name__)
@@ -110,6 +116,183 @@ class EventHandler(ABC):
         """Типы событий, которые обрабатывает этот handler"""
 
 
+class BatchEventHandler(EventHandler):
+    """
+    Обработчик, получающий события пачками.
+
+    Worker партиции передает в handle_batch все накопившиеся события
+    (не больше batch_size за вызов) в порядке публикации.
+    """
+
+    batch_size: int = 100
+
+    @abstractmethod
+    async def handle_batch(self, events: List[Event]) -> None:
+        """Обработка пачки событий"""
+
+    async def handle(self, event: Event) -> None:
+        await self.handle_batch([event])
+
+
+class BackpressureError(RuntimeError):
+    """Очередь партиции переполнена (политика overflow_policy="raise")"""
+
+
+class OverflowPolicy(str, Enum):
+    """Поведение publish при заполненной очереди партиции"""
+
+    BLOCK = "block"  # publish ждет освобождения места
+    DROP_NEWEST = "drop_newest"  # новое событие отбрасывается
+    DROP_OLDEST = "drop_oldest"  # вытесняется самое старое событие партиции
+    RAISE = "raise"  # BackpressureError
+
+
+class EventSegmentLog:
+    """
+    Append-only журнал событий на диске, разбитый на сегменты.
+
+    Каждое событие - строка JSON со сквозным offset. Сегмент называется
+    по offset первого события ({base_offset:020d}.log) и закрывается при
+    превышении segment_max_bytes; старые сегменты удаляются сверх
+    max_segments (если задано).
+
+    submit() только назначает offset и ставит событие в очередь; запись
+    выполняет отдельный поток пачками (один flush на пачку), поэтому
+    файловый ввод-вывод не блокирует event loop. flush() ждет записи всех
+    поставленных событий, replay() и close() вызывают его сами.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        max_segments: Optional[int] = None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+
+        self._file: Optional[IO[str]] = None
+        self._segment_size = 0
+        self.next_offset = 0
+        self.write_errors = 0
+        self._recover()
+
+        self._cond = threading.Condition()
+        self._pending: Deque[Tuple[int, Event]] = deque()
+        self._written_offset = self.next_offset
+        self._draining = False
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob("*.log"))
+
+    def _recover(self) -> None:
+        segments = self._segments()
+        if not segments:
+            return
+        last = segments[-1]
+        with open(last, "r", encoding="utf-8") as f:
+            lines = sum(1 for line in f if line.strip())
+        self.next_offset = int(last.stem) + lines
+        self._file = open(last, "a", encoding="utf-8")
+        self._segment_size = last.stat().st_size
+
+    def _roll(self, base_offset: int) -> None:
+        if self._file:
+            self._file.close()
+        path = self.directory / f"{base_offset:020d}.log"
+        self._file = open(path, "a", encoding="utf-8")
+        self._segment_size = 0
+
+        if self.max_segments:
+            for old in self._segments()[: -self.max_segments]:
+                old.unlink()
+
+    def submit(self, event: Event) -> int:
+        """Поставить событие в очередь записи, вернуть его offset"""
+        with self._cond:
+            offset = self.next_offset
+            self.next_offset += 1
+            self._pending.append((offset, event))
+            if not self._draining:
+                self._draining = True
+                if self._writer is None:
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-log")
+                self._writer.submit(self._drain)
+        return offset
+
+    def append(self, event: Event) -> int:
+        """Записать событие синхронно, вернуть его offset"""
+        offset = self.submit(event)
+        self.flush()
+        return offset
+
+    def flush(self) -> None:
+        """Дождаться записи всех поставленных в очередь событий"""
+        with self._cond:
+            while self._written_offset < self.next_offset:
+                self._cond.wait()
+
+    def _drain(self) -> None:
+        while True:
+            with self._cond:
+                if not self._pending:
+                    self._draining = False
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                self.write_errors += len(batch)
+                logger.error(f"Failed to write {len(batch)} events to segment log: {e}")
+            with self._cond:
+                self._written_offset = batch[-1][0] + 1
+                self._cond.notify_all()
+
+    def _write_batch(self, batch: List[Tuple[int, Event]]) -> None:
+        for offset, event in batch:
+            if self._file is None or self._segment_size >= self.segment_max_bytes:
+                self._roll(offset)
+            line = json.dumps({"offset": offset, **event.to_dict()}, ensure_ascii=False, default=str) + "\n"
+            self._file.write(line)
+            self._segment_size += len(line.encode("utf-8"))
+        self._file.flush()
+
+    def replay(
+        self, from_offset: int = 0, event_type: Optional[EventType] = None
+    ) -> Iterator[Tuple[int, Event]]:
+        """Прочитать события начиная с offset (включительно)"""
+        self.flush()
+        segments = self._segments()
+        for i, segment in enumerate(segments):
+            next_base = int(segments[i + 1].stem) if i + 1 < len(segments) else None
+            if next_base is not None and next_base <= from_offset:
+                continue
+            with open(segment, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data["offset"] < from_offset:
+                        continue
+                    if event_type and data["type"] != event_type.value:
+                        continue
+                    yield data["offset"], Event.from_dict(data)
+
+    def close(self) -> None:
+        """Дописать очередь и закрыть файл сегмента (submit() откроет новый)"""
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
 class EventBus:
     """
     Event Bus - центральная шина событий
@@ -119,41 +302,100 @@ class EventBus:
     - Автоматическое масштабирование
     - Отказоустойчивость
     - Event Sourcing поддержка
+
+    Устройство in-memory режима:
+    - события распределяются по партициям по ключу (publish(key=...),
+      metadata["partition_key"], correlation_id или id события); у каждой
+      партиции своя ограниченная очередь и свой worker, поэтому события
+      одного агрегата обрабатываются строго по порядку, а медленный
+      обработчик задерживает только свою партицию;
+    - при заполненной очереди применяется overflow_policy (backpressure);
+    - BatchEventHandler получает накопившиеся события пачкой;
+    - история - кольцевой буфер history_size событий, опционально
+      дублируется в append-only журнал сегментов (segment_log_dir) для replay.
     """
 
-    def __init__(self, backend: str = "memory"):
+    def __init__(
+        self,
+        backend: str = "memory",
+        *,
+        num_partitions: int = 4,
+        max_queue_size: int = 10_000,
+        overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.BLOCK,
+        history_size: int = 10_000,
+        batch_size: int = 100,
+        segment_log_dir: Optional[Union[str, Path]] = None,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+    ):
         """
         Инициализация Event Bus
 
         Args:
             backend: Бэкенд для хранения событий ("memory", "nats", "kafka")
+            num_partitions: Количество партиций до вызова start()
+            max_queue_size: Емкость очереди каждой партиции
+            overflow_policy: Политика при заполненной очереди
+            history_size: Размер кольцевого буфера истории
+            batch_size: Максимум событий, забираемых worker'ом за один проход
+            segment_log_dir: Директория журнала событий (None - без журнала)
+            segment_max_bytes: Размер сегмента журнала
         """
         self.backend = backend
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.batch_size = batch_size
+
         self._subscribers: Dict[EventType, List[EventHandler]] = {}
-        self._event_history: List[Event] = []
+        self._event_history: Deque[Event] = deque(maxlen=history_size)
+        self._segment_log = (
+            EventSegmentLog(segment_log_dir, segment_max_bytes) if segment_log_dir else None
+        )
         self._running = False
-        self._event_queue: asyncio.Queue = asyncio.Queue()
+        self._partitions: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=max_queue_size) for _ in range(max(1, num_partitions))
+        ]
         self._worker_tasks: List[asyncio.Task] = []
 
+        self.stats: Dict[str, int] = {
+            "published": 0,
+            "processed": 0,
+            "dropped": 0,
+            "handler_errors": 0,
+            "batches": 0,
+        }
+
         logger.info(f"EventBus initialized with backend: {backend}")
 
+    @property
+    def num_partitions(self) -> int:
+        return len(self._partitions)
+
     async def start(self, num_workers: int = 4) -> None:
-        """Запуск Event Bus"""
+        """Запуск Event Bus (одна партиция и один worker на каждый из num_workers)"""
         if self._running:
             logger.warning("EventBus is already running")
             return
 
+        self._repartition(max(1, num_workers))
         self._running = True
 
         # Запуск worker'ов для обработки событий
-        for i in range(num_workers):
-            task = asyncio.create_task(self._worker(f"worker-{i}"))
+        for i, queue in enumerate(self._partitions):
+            task = asyncio.create_task(self._worker(f"worker-{i}", queue))
             self._worker_tasks.append(task)
 
         logger.info(f"EventBus started with {num_workers} workers")
 
-    async def stop(self) -> None:
-        """Остановка Event Bus"""
+    async def stop(self, drain: bool = False) -> None:
+        """
+        Остановка Event Bus
+
+        Args:
+            drain: Дождаться обработки уже опубликованных событий
+        """
+        if drain and self._running:
+            await self.drain()
+
         self._running = False
 
         # Ожидание завершения всех задач
@@ -163,20 +405,77 @@ class EventBus:
         await asyncio.gather(*self._worker_tasks, return_exceptions=True)
         self._worker_tasks.clear()
 
+        if self._segment_log:
+            await asyncio.get_running_loop().run_in_executor(None, self._segment_log.close)
+
         logger.info("EventBus stopped")
 
-    async def publish(self, event: Event) -> None:
+    async def drain(self) -> None:
+        """Дождаться обработки всех событий в очередях"""
+        await asyncio.gather(*(queue.join() for queue in self._partitions))
+
+    def _repartition(self, num_partitions: int) -> None:
+        """Перестроить партиции, сохранив порядок ожидающих событий каждого ключа"""
+        if num_partitions == len(self._partitions):
+            return
+        pending: List[Tuple[str, Event]] = []
+        for queue in self._partitions:
+            while not queue.empty():
+                pending.append(queue.get_nowait())
+        self._partitions = [
+            asyncio.Queue(maxsize=self.max_queue_size) for _ in range(num_partitions)
+        ]
+        for key, event in pending:
+            queue = self._partitions[self._partition_index(key)]
+            if queue.full():
+                self.stats["dropped"] += 1
+                continue
+            queue.put_nowait((key, event))
+
+    def _partition_index(self, key: str) -> int:
+        return zlib.crc32(key.encode("utf-8")) % len(self._partitions)
+
+    @staticmethod
+    def partition_key(event: Event) -> str:
+        """Ключ партиционирования события по умолчанию"""
+        return str(event.metadata.get("partition_key") or event.correlation_id or event.id)
+
+    async def publish(self, event: Event, key: Optional[str] = None) -> None:
         """
         Публикация события
 
         Args:
             event: Событие для публикации
+            key: Ключ партиционирования (события с одним ключом обрабатываются по порядку)
         """
+        key = key or self.partition_key(event)
+        queue = self._partitions[self._partition_index(key)]
+
+        if queue.full():
+            if self.overflow_policy == OverflowPolicy.RAISE:
+                raise BackpressureError(
+                    f"Partition queue is full ({self.max_queue_size} events)"
+                )
+            if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                self.stats["dropped"] += 1
+                logger.warning(
+                    "Event dropped: partition queue is full",
+                    extra={"event_id": event.id, "event_type": event.type.value},
+                )
+                return
+            if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                queue.get_nowait()
+                queue.task_done()
+                self.stats["dropped"] += 1
+
         # Добавление в историю для Event Sourcing
         self._event_history.append(event)
+        if self._segment_log:
+            self._segment_log.submit(event)
 
-        # Добавление в очередь для обработки
-        await self._event_queue.put(event)
+        # Добавление в очередь для обработки (BLOCK: ждем места в очереди)
+        await queue.put((key, event))
+        self.stats["published"] += 1
 
         logger.debug(
             f"Event published: {event.type.value}",
@@ -201,37 +500,68 @@ class EventBus:
             extra={"handler": handler.__class__.__name__},
         )
 
-    async def _worker(self, worker_id: str) -> None:
-        """Worker для обработки событий"""
+    async def _worker(self, worker_id: str, queue: asyncio.Queue) -> None:
+        """Worker партиции: забирает накопившиеся события и обрабатывает их по порядку"""
         logger.info(f"Event worker {worker_id} started")
 
         while self._running:
-            try:
-                # Получение события из очереди с таймаутом
-                event = await asyncio.wait_for(self._event_queue.get(), timeout=1.0)
-
-                # Обработка события
-                await self._process_event(event)
+            _, event = await queue.get()
+            batch = [event]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait()[1])
 
-            except asyncio.TimeoutError:
-                continue
+            try:
+                await self._process_batch(batch)
             except Exception as e:
                 logger.error(
                     f"Error in worker {worker_id}",
                     extra={"error": str(e), "error_type": type(e).__name__},
                     exc_info=True,
                 )
+            finally:
+                for _ in batch:
+                    queue.task_done()
 
         logger.info(f"Event worker {worker_id} stopped")
 
-    async def _process_event(self, event: Event) -> None:
-        """Обработка события"""
-        handlers = self._subscribers.get(event.type, [])
+    async def _process_batch(self, events: List[Event]) -> None:
+        """Обработка пачки событий одной партиции"""
+        self.stats["batches"] += 1
+        batch_events: Dict[int, Tuple[BatchEventHandler, List[Event]]] = {}
+
+        for event in events:
+            handlers = []
+            for handler in self._subscribers.get(event.type, []):
+                if isinstance(handler, BatchEventHandler):
+                    batch_events.setdefault(id(handler), (handler, []))[1].append(event)
+                else:
+                    handlers.append(handler)
+            if handlers:
+                await self._dispatch(event, handlers)
+            self.stats["processed"] += 1
+
+        for handler, handler_events in batch_events.values():
+            for start in range(0, len(handler_events), handler.batch_size):
+                chunk = handler_events[start : start + handler.batch_size]
+                try:
+                    await handler.handle_batch(chunk)
+                except Exception as e:
+                    self.stats["handler_errors"] += 1
+                    logger.error(
+                        f"Batch handler {handler.__class__.__name__} failed",
+                        extra={
+                            "batch_size": len(chunk),
+                            "error": str(e),
+                            "error_type": type(e).__name__,
+                        },
+                        exc_info=True,
+                    )
 
-        if not handlers:
-            logger.debug(f"No handlers for event type: {event.type.value}")
-            return
+    async def _process_event(self, event: Event) -> None:
+        """Обработка одного события всеми подписчиками"""
+        await self._process_batch([event])
 
+    async def _dispatch(self, event: Event, handlers: List[EventHandler]) -> None:
         # Параллельная обработка всеми подписчиками
         tasks = [handler.handle(event) for handler in handlers]
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -239,6 +569,7 @@ class EventBus:
         # Логирование ошибок
         for handler, result in zip(handlers, results):
             if isinstance(result, Exception):
+                self.stats["handler_errors"] += 1
                 logger.error(
                     f"Handler {handler.__class__.__name__} failed",
                     extra={
@@ -254,7 +585,7 @@ class EventBus:
         self, event_type: Optional[EventType] = None, limit: int = 100
     ) -> List[Event]:
         """
-        Получение истории событий
+        Получение истории событий (из кольцевого буфера)
 
         Args:
             event_type: Фильтр по типу события
@@ -263,13 +594,38 @@ class EventBus:
         Returns:
             Список событий
         """
-        events = self._event_history
+        events = list(self._event_history)
 
         if event_type:
             events = [e for e in events if e.type == event_type]
 
         return events[-limit:]
 
+    def replay(
+        self, from_offset: int = 0, event_type: Optional[EventType] = None
+    ) -> Iterator[Event]:
+        """
+        Повтор событий из журнала сегментов
+
+        Args:
+            from_offset: Offset первого события
+            event_type: Фильтр по типу события
+        """
+        if self._segment_log is None:
+            raise RuntimeError("Segment log is not configured (segment_log_dir)")
+        for _, event in self._segment_log.replay(from_offset, event_type):
+            yield event
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика шины: счетчики и глубина очередей партиций"""
+        return {
+            **self.stats,
+            "partitions": self.num_partitions,
+            "queue_depths": [queue.qsize() for queue in self._partitions],
+            "history_size": len(self._event_history),
+            "log_offset": self._segment_log.next_offset if self._segment_log else None,
+        }
+
 
 class EventPublisher:
     """Публикатор событий"""
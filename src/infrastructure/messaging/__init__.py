@@ -1 +1,21 @@
 """Messaging Infrastructure"""
+
+from src.infrastructure.messaging.realtime_backplane import (
+    BackplaneTransport,
+    InMemoryBroker,
+    InMemoryTransport,
+    NATSTransport,
+    RealtimeBackplane,
+    RedisPubSubTransport,
+    create_backplane_from_env,
+)
+
+__all__ = [
+    "BackplaneTransport",
+    "InMemoryBroker",
+    "InMemoryTransport",
+    "NATSTransport",
+    "RealtimeBackplane",
+    "RedisPubSubTransport",
+    "create_backplane_from_env",
+]
@@ -0,0 +1,451 @@
+# [NEXUS IDENTITY] ID: 3185260947731402856 | DATE: 2026-10-17
+
+"""
+Real-time backplane
+===================
+
+Cross-instance delivery for WebSocket managers running on several replicas.
+
+- Topic = logical audience ("tenant:acme", "room:42", "topic:dashboard_pm").
+  An instance subscribes to a topic's channel only while it holds local
+  subscribers, so the broker routes messages only to those instances.
+- Outbound messages are batched per topic (batch_window / max_batch_size):
+  one transport publish carries all messages of a topic from the window.
+- Transports: Redis pub/sub, NATS, and an in-process broker for tests
+  and single-node runs. create_backplane_from_env() builds one from
+  REALTIME_BACKPLANE=redis|nats|memory (REALTIME_BACKPLANE_URL overrides
+  REDIS_URL / NATS_URL); the app lifespan starts and stops it.
+- Every message carries its publish timestamp; receivers report end-to-end
+  fan-out latency (wall clock, so replicas need synchronized clocks).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    import nats
+
+    NATS_AVAILABLE = True
+except ImportError:
+    NATS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TransportCallback = Callable[[str, bytes], Awaitable[None]]
+MessageHandler = Callable[[str, Dict[str, Any], Optional[str]], Optional[Awaitable[None]]]
+
+
+class BackplaneTransport(ABC):
+    """Pub/sub транспорт (интерфейс в стиле Redis pub/sub / NATS)"""
+
+    async def connect(self) -> None:
+        """Подключение (если требуется)"""
+
+    @abstractmethod
+    async def publish(self, channel: str, data: bytes) -> None:
+        """Опубликовать данные в канал"""
+
+    @abstractmethod
+    async def subscribe(self, channel: str, callback: TransportCallback) -> None:
+        """Подписаться на канал"""
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str) -> None:
+        """Отписаться от канала"""
+
+    async def close(self) -> None:
+        """Закрыть соединение"""
+
+
+class InMemoryBroker:
+    """In-process брокер: общий для нескольких InMemoryTransport (реплик)"""
+
+    def __init__(self):
+        self.channels: Dict[str, Dict["InMemoryTransport", TransportCallback]] = {}
+        self.stats: Dict[str, int] = {"published": 0, "delivered": 0}
+
+    async def publish(self, channel: str, data: bytes) -> None:
+        self.stats["published"] += 1
+        for transport, callback in list(self.channels.get(channel, {}).items()):
+            transport.received += 1
+            self.stats["delivered"] += 1
+            # Асинхронная доставка, как у сетевого брокера
+            asyncio.get_running_loop().create_task(callback(channel, data))
+
+
+class InMemoryTransport(BackplaneTransport):
+    """Транспорт поверх InMemoryBroker (тесты, single-node)"""
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None):
+        self.broker = broker or InMemoryBroker()
+        self.received = 0
+
+    async def publish(self, channel: str, data: bytes) -> None:
+        await self.broker.publish(channel, data)
+
+    async def subscribe(self, channel: str, callback: TransportCallback) -> None:
+        self.broker.channels.setdefault(channel, {})[self] = callback
+
+    async def unsubscribe(self, channel: str) -> None:
+        subscribers = self.broker.channels.get(channel)
+        if subscribers is not None:
+            subscribers.pop(self, None)
+            if not subscribers:
+                del self.broker.channels[channel]
+
+    async def close(self) -> None:
+        for channel in [c for c, subscribers in self.broker.channels.items() if self in subscribers]:
+            await self.unsubscribe(channel)
+
+
+class RedisPubSubTransport(BackplaneTransport):
+    """Redis pub/sub транспорт"""
+
+    def __init__(self, redis_url: str = "redis://localhost:6379/0", client: Any = None):
+        if client is None and not REDIS_AVAILABLE:
+            raise ImportError("redis not available. Install: pip install redis")
+        self.redis_url = redis_url
+        self._client = client
+        self._pubsub = None
+        self._callbacks: Dict[str, TransportCallback] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url)
+        self._pubsub = self._client.pubsub()
+
+    async def publish(self, channel: str, data: bytes) -> None:
+        await self._client.publish(channel, data)
+
+    async def subscribe(self, channel: str, callback: TransportCallback) -> None:
+        self._callbacks[channel] = callback
+        await self._pubsub.subscribe(channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._callbacks.pop(channel, None)
+        await self._pubsub.unsubscribe(channel)
+
+    async def _read(self) -> None:
+        while self._callbacks:
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            callback = self._callbacks.get(channel)
+            if callback is not None:
+                data = message["data"]
+                await callback(channel, data if isinstance(data, bytes) else str(data).encode())
+
+    async def close(self) -> None:
+        self._callbacks.clear()
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._pubsub is not None:
+            await self._pubsub.close()
+
+
+class NATSTransport(BackplaneTransport):
+    """NATS core pub/sub транспорт (без JetStream: real-time, без персистентности)"""
+
+    def __init__(self, nats_url: str = "nats://localhost:4222"):
+        if not NATS_AVAILABLE:
+            raise ImportError("NATS not available. Install: pip install nats-py")
+        self.nats_url = nats_url
+        self._nc = None
+        self._subscriptions: Dict[str, Any] = {}
+
+    async def connect(self) -> None:
+        self._nc = await nats.connect(self.nats_url)
+
+    async def publish(self, channel: str, data: bytes) -> None:
+        await self._nc.publish(channel, data)
+
+    async def subscribe(self, channel: str, callback: TransportCallback) -> None:
+        async def on_message(msg):
+            await callback(msg.subject, msg.data)
+
+        self._subscriptions[channel] = await self._nc.subscribe(channel, cb=on_message)
+
+    async def unsubscribe(self, channel: str) -> None:
+        subscription = self._subscriptions.pop(channel, None)
+        if subscription is not None:
+            await subscription.unsubscribe()
+
+    async def close(self) -> None:
+        for channel in list(self._subscriptions):
+            await self.unsubscribe(channel)
+        if self._nc is not None:
+            await self._nc.close()
+
+
+class RealtimeBackplane:
+    """
+    Cross-instance pub/sub for WebSocket fan-out.
+
+    Example:
+        >>> backplane = RealtimeBackplane(RedisPubSubTransport(url))
+        >>> await backplane.start()
+        >>> backplane.subscribe("tenant:acme", manager.deliver_local)
+        >>> backplane.publish("tenant:acme", {"type": "notification"})
+    """
+
+    def __init__(
+        self,
+        transport: BackplaneTransport,
+        instance_id: Optional[str] = None,
+        channel_prefix: str = "realtime",
+        batch_window: float = 0.005,
+        max_batch_size: int = 100,
+        latency_window: int = 1000,
+    ):
+        """
+        Args:
+            transport: Pub/sub транспорт
+            instance_id: Идентификатор реплики (свои сообщения не доставляются повторно)
+            channel_prefix: Префикс каналов
+            batch_window: Окно накопления исходящих сообщений по топику (секунды)
+            max_batch_size: Батч отправляется сразу при достижении размера
+            latency_window: Сколько последних измерений латентности хранить
+        """
+        self.transport = transport
+        self.instance_id = instance_id or uuid.uuid4().hex[:12]
+        self.channel_prefix = channel_prefix
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+
+        # topic -> {handler: refcount}
+        self._handlers: Dict[str, Dict[MessageHandler, int]] = {}
+        # Топики, на каналы которых подписан транспорт
+        self._subscribed: Set[str] = set()
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self._started = False
+
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self.stats: Dict[str, int] = {
+            "published": 0,
+            "batches_sent": 0,
+            "batches_received": 0,
+            "messages_received": 0,
+            "publish_errors": 0,
+            "handler_errors": 0,
+        }
+
+    # ------------------------------------------------------------ lifecycle
+
+    async def start(self) -> None:
+        await self.transport.connect()
+        self._started = True
+        async with self._lock:
+            for topic in list(self._handlers):
+                await self._sync_topic(topic)
+        logger.info(f"RealtimeBackplane started: instance={self.instance_id}")
+
+    async def stop(self) -> None:
+        await self.flush()
+        self._started = False
+        await self.transport.close()
+        self._subscribed.clear()
+        logger.info(f"RealtimeBackplane stopped: instance={self.instance_id}")
+
+    def channel(self, topic: str) -> str:
+        return f"{self.channel_prefix}.{topic}"
+
+    # --------------------------------------------------------- subscriptions
+
+    def subscribe(self, topic: str, handler: MessageHandler) -> None:
+        """
+        Зарегистрировать локального подписчика топика (с подсчетом ссылок).
+
+        Пока у топика есть подписчики, реплика подписана на его канал.
+        handler(topic, message, key) вызывается для сообщений других реплик.
+        """
+        handlers = self._handlers.setdefault(topic, {})
+        handlers[handler] = handlers.get(handler, 0) + 1
+        if topic not in self._subscribed:
+            self._schedule(self._locked_sync(topic))
+
+    def unsubscribe(self, topic: str, handler: MessageHandler) -> None:
+        handlers = self._handlers.get(topic)
+        if not handlers or handler not in handlers:
+            return
+        handlers[handler] -= 1
+        if handlers[handler] <= 0:
+            del handlers[handler]
+        if not handlers:
+            del self._handlers[topic]
+            self._schedule(self._locked_sync(topic))
+
+    async def _locked_sync(self, topic: str) -> None:
+        async with self._lock:
+            await self._sync_topic(topic)
+
+    async def _sync_topic(self, topic: str) -> None:
+        """Привести подписку транспорта в соответствие с локальными подписчиками"""
+        if not self._started:
+            return
+        wanted = topic in self._handlers
+        if wanted and topic not in self._subscribed:
+            await self.transport.subscribe(self.channel(topic), self._on_transport_message)
+            self._subscribed.add(topic)
+        elif not wanted and topic in self._subscribed:
+            await self.transport.unsubscribe(self.channel(topic))
+            self._subscribed.discard(topic)
+
+    # -------------------------------------------------------------- publish
+
+    def publish(self, topic: str, message: Dict[str, Any], key: Optional[str] = None) -> None:
+        """Отправить сообщение подписчикам топика на других репликах (батчами)"""
+        self.stats["published"] += 1
+        pending = self._pending.setdefault(topic, [])
+        pending.append({"message": message, "key": key, "published_at": time.time()})
+
+        if len(pending) >= self.max_batch_size:
+            self._schedule(self._flush_topics([topic]))
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.batch_window, self._on_flush_timer)
+
+    def _on_flush_timer(self) -> None:
+        self._flush_handle = None
+        self._schedule(self._flush_topics(list(self._pending)))
+
+    async def _flush_topics(self, topics: List[str]) -> None:
+        async with self._lock:
+            for topic in topics:
+                batch = self._pending.pop(topic, None)
+                if not batch:
+                    continue
+                envelope = {"source": self.instance_id, "topic": topic, "messages": batch}
+                try:
+                    await self.transport.publish(
+                        self.channel(topic), json.dumps(envelope, ensure_ascii=False, default=str).encode()
+                    )
+                    self.stats["batches_sent"] += 1
+                except Exception as e:
+                    self.stats["publish_errors"] += 1
+                    logger.error(
+                        "Backplane publish failed",
+                        extra={"error": str(e), "topic": topic, "batch_size": len(batch)},
+                        exc_info=True,
+                    )
+
+    async def flush(self) -> None:
+        """Отправить накопленные батчи и дождаться фоновых операций"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self._flush_topics(list(self._pending))
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def _schedule(self, coro: Awaitable[None]) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # -------------------------------------------------------------- receive
+
+    async def _on_transport_message(self, channel: str, data: bytes) -> None:
+        try:
+            envelope = json.loads(data)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Invalid backplane message on {channel}: {e}")
+            return
+        if envelope.get("source") == self.instance_id:
+            return
+
+        topic = envelope.get("topic")
+        handlers = list(self._handlers.get(topic, {}))
+        self.stats["batches_received"] += 1
+        now = time.time()
+
+        for item in envelope.get("messages", []):
+            self.stats["messages_received"] += 1
+            self._latencies.append(max(0.0, now - item.get("published_at", now)) * 1000.0)
+            for handler in handlers:
+                try:
+                    result = handler(topic, item["message"], item.get("key"))
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    self.stats["handler_errors"] += 1
+                    logger.error(
+                        "Backplane handler failed",
+                        extra={"error": str(e), "topic": topic},
+                        exc_info=True,
+                    )
+
+    # ---------------------------------------------------------------- stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            **self.stats,
+            "instance_id": self.instance_id,
+            "local_topics": len(self._handlers),
+            "subscribed_channels": len(self._subscribed),
+            "pending_messages": sum(len(batch) for batch in self._pending.values()),
+            "fanout_latency_ms_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "fanout_latency_ms_p50": percentile(0.50),
+            "fanout_latency_ms_p95": percentile(0.95),
+            "fanout_latency_ms_p99": percentile(0.99),
+        }
+
+
+def create_backplane_from_env() -> Optional[RealtimeBackplane]:
+    """
+    RealtimeBackplane по переменным окружения (None, если не настроен).
+
+    REALTIME_BACKPLANE: redis | nats | memory (пусто/none - только локальная доставка)
+    REALTIME_BACKPLANE_URL: адрес брокера (по умолчанию REDIS_URL / NATS_URL)
+    REALTIME_BACKPLANE_BATCH_MS: окно батчинга исходящих сообщений
+    """
+    kind = os.getenv("REALTIME_BACKPLANE", "").strip().lower()
+    if kind in ("", "none"):
+        return None
+
+    url = os.getenv("REALTIME_BACKPLANE_URL")
+    if kind == "redis":
+        transport: BackplaneTransport = RedisPubSubTransport(
+            url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        )
+    elif kind == "nats":
+        transport = NATSTransport(url or os.getenv("NATS_URL", "nats://localhost:4222"))
+    elif kind == "memory":
+        transport = InMemoryTransport()
+    else:
+        raise ValueError(f"Unknown REALTIME_BACKPLANE: {kind} (expected redis, nats or memory)")
+
+    return RealtimeBackplane(
+        transport,
+        channel_prefix=os.getenv("REALTIME_BACKPLANE_PREFIX", "realtime"),
+        batch_window=float(os.getenv("REALTIME_BACKPLANE_BATCH_MS", "5")) / 1000.0,
+    )
@@ -73,6 +73,7 @@ from src.modules.assistants.api.routes import router as assistants_router
 
 # Database
 from src.infrastructure.db.connection import close_pool, create_pool
+from src.infrastructure.messaging.realtime_backplane import create_backplane_from_env
 from src.infrastructure.repositories.marketplace import MarketplaceRepository
 from src.middleware.jwt_user_context import JWTUserContextMiddleware
 from src.middleware.metrics_middleware import MetricsMiddleware
@@ -89,6 +90,8 @@ from src.infrastructure.monitoring.opentelemetry_setup import (
 )
 from src.modules.auth.api.dependencies import get_auth_service
 from src.services.health_checker import get_health_checker
+from src.services.real_time_service import real_time_manager
+from src.services.websocket_manager import manager as websocket_manager
 from src.utils.error_handling import register_error_handlers
 from src.infrastructure.logging.structured_logging import StructuredLogger, set_request_context
 
@@ -122,6 +125,7 @@ async def lifespan(app: FastAPI):
     redis_client = None
     marketplace_repo = None
     scheduler = None
+    backplane = None
 
     try:
         logger.info("Starting 1C AI Stack...")
@@ -281,6 +285,25 @@ async def lifespan(app: FastAPI):
                     extra={"error": str(e), "error_type": type(e).__name__},
                 )
 
+        # Real-time backplane: WebSocket delivery across replicas (REALTIME_BACKPLANE)
+        try:
+            backplane = create_backplane_from_env()
+            if backplane:
+                await backplane.start()
+                websocket_manager.attach_backplane(backplane)
+                real_time_manager.attach_backplane(backplane)
+                app.state.realtime_backplane = backplane
+                logger.info(
+                    "Real-time backplane started",
+                    extra={"transport": type(backplane.transport).__name__, "instance_id": backplane.instance_id},
+                )
+        except Exception as e:
+            logger.warning(
+                "Real-time backplane not available, WebSocket delivery stays local",
+                extra={"error": str(e), "error_type": type(e).__name__},
+            )
+            backplane = None
+
         logger.info("Security layer initialized (Agents Rule of Two)")
         logger.info("Application startup completed successfully")
 
@@ -305,6 +328,15 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.warning(f"Error shutting down scheduler: {e}")
 
+        # Stop real-time backplane
+        if backplane:
+            try:
+                websocket_manager.attach_backplane(None)
+                real_time_manager.attach_backplane(None)
+                await backplane.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping real-time backplane: {e}")
+
         # Refresh marketplace cache
         if marketplace_repo:
             try:
@@ -56,8 +56,8 @@ class ContinuumMemorySystem:
             config = MemoryLevelConfig(name=name, update_freq=update_freq, learning_rate=lr)
             self.levels[name] = self._create_level(config)
 
-        # Vector index for similarity search
-        self.index = VectorIndex(dimension=embedding_dim)
+        # Vector index for similarity search (one partition per level)
+        self.index = VectorIndex(dimension=embedding_dim, partition_key="level")
 
         # Global step counter
         self.global_step = 0
@@ -96,7 +96,7 @@ class ContinuumMemorySystem:
             embedding: Pre-computed embedding (optional)
         """
         level = self.levels.get(level_name)
-        if not level:
+        if level is None:
             raise ValueError(f"Unknown level: {level_name}")
 
         # Encode if embedding not provided
@@ -104,11 +104,12 @@ class ContinuumMemorySystem:
             embedding = level.encode(data, {})
 
         # Store in level
-        level.memory[key] = embedding
-        level.metadata[key] = {"data": data, "step": self.global_step, "timestamp": time.time()}
+        evicted = level.put(key, embedding, {"data": data, "step": self.global_step, "timestamp": time.time()})
 
-        # Add to vector index
-        self.index.add(key, embedding, metadata={"level": level_name})
+        # Add to vector index, drop evicted entries
+        self.index.add(self._index_key(level_name, key), embedding, metadata={"level": level_name})
+        for evicted_key in evicted:
+            self.index.remove(self._index_key(level_name, evicted_key))
 
         logger.debug(f"Stored in level {level_name}", extra={"key": key, "level": level_name})
 
@@ -125,24 +126,30 @@ class ContinuumMemorySystem:
             List of (key, similarity, data) tuples
         """
         level = self.levels.get(level_name)
-        if not level:
+        if level is None:
             raise ValueError(f"Unknown level: {level_name}")
 
         # Encode query
         query_emb = level.encode(query, {})
 
-        # Search in index
-        results = self.index.search(query_emb, k=k, filter_fn=lambda meta: meta.get("level") == level_name)
+        # Search only this level's partition
+        results = self.index.search(query_emb, k=k, partition=level_name)
 
         # Return with data
         output = []
-        for key, sim in results:
+        for index_key, sim in results:
+            key = index_key[len(level_name) + 1 :]
             if key in level.metadata:
                 data = level.metadata[key].get("data")
                 output.append((key, sim, data))
 
         return output
 
+    @staticmethod
+    def _index_key(level_name: str, key: MemoryKey) -> str:
+        """Index keys are namespaced by level: the same key may live in several levels"""
+        return f"{level_name}:{key}"
+
     def retrieve_similar(
         self, query: Any, levels: List[str], k: int = 5
     ) -> Dict[str, List[Tuple[MemoryKey, float, Any]]]:
@@ -174,7 +181,7 @@ class ContinuumMemorySystem:
             surprise: Surprise score (0-1)
         """
         level = self.levels.get(level_name)
-        if not level:
+        if level is None:
             raise ValueError(f"Unknown level: {level_name}")
 
         # Update level (will check surprise threshold internally)
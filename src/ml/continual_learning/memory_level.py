@@ -9,9 +9,10 @@ Based on:
 - Hope architecture (self-modifying recurrent)
 """
 
+import heapq
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 
 from src.utils.structured_logging import StructuredLogger
@@ -79,6 +80,12 @@ class MemoryLevel:
         self.memory: Dict[MemoryKey, np.ndarray] = {}
         self.metadata: Dict[MemoryKey, MemoryEntry] = {}
 
+        # Min-heap (timestamp, seq, key) for O(log n) eviction of the oldest entry.
+        # Entries are invalidated lazily: a heap item is stale if the key was
+        # removed or re-stored with a different timestamp.
+        self._eviction_heap: List[Tuple[float, int, MemoryKey]] = []
+        self._eviction_seq = 0
+
         # Statistics
         self.stats = LevelStats(name=config.name, update_freq=config.update_freq, frozen=config.frozen)
 
@@ -152,10 +159,11 @@ class MemoryLevel:
         # Encode new data
         embedding = self.encode(data, {})
 
-        # Store
-        self.memory[key] = embedding
-        self.metadata[key] = MemoryEntry(
-            key=key, data=data, surprise=surprise, step=self.step_count, timestamp=time.time()
+        # Store (evicts oldest entries if over capacity)
+        self.put(
+            key,
+            embedding,
+            MemoryEntry(key=key, data=data, surprise=surprise, step=self.step_count, timestamp=time.time()),
         )
 
         # Update stats
@@ -167,15 +175,54 @@ class MemoryLevel:
         n = self.stats.total_updates
         self.stats.avg_surprise = (self.stats.avg_surprise * (n - 1) + surprise) / n
 
-        # Evict if over capacity
-        if len(self.memory) > self.config.capacity:
-            self._evict_oldest()
-
         logger.debug(
             f"Updated level {self.config.name}",
             extra={"key": key, "surprise": surprise, "step": self.step_count, "memory_size": len(self.memory)},
         )
 
+    def put(self, key: MemoryKey, embedding: np.ndarray, entry: Any) -> List[MemoryKey]:
+        """
+        Store embedding and metadata entry, enforcing capacity
+
+        Args:
+            key: Memory key
+            embedding: Embedding vector
+            entry: MemoryEntry (or dict with "timestamp")
+
+        Returns:
+            Keys evicted to make room
+        """
+        self.memory[key] = embedding
+        self.metadata[key] = entry
+        self._eviction_seq += 1
+        heapq.heappush(self._eviction_heap, (self._entry_timestamp(entry), self._eviction_seq, key))
+
+        evicted = []
+        while len(self.memory) > self.config.capacity:
+            oldest_key = self._evict_oldest()
+            if oldest_key is None:
+                break
+            evicted.append(oldest_key)
+
+        # Compact heap if stale items dominate (re-stored keys)
+        if len(self._eviction_heap) > 2 * len(self.metadata) + 64:
+            self._rebuild_eviction_heap()
+
+        return evicted
+
+    @staticmethod
+    def _entry_timestamp(entry: Any) -> float:
+        if isinstance(entry, dict):
+            return entry.get("timestamp", 0.0)
+        return entry.timestamp
+
+    def _rebuild_eviction_heap(self):
+        self._eviction_heap = [
+            (self._entry_timestamp(entry), seq, key) for seq, (key, entry) in enumerate(self.metadata.items())
+        ]
+        heapq.heapify(self._eviction_heap)
+        self._eviction_seq = len(self._eviction_heap)
+
     def get(self, key: MemoryKey) -> Optional[np.ndarray]:
         """
         Get embedding by key
@@ -215,24 +262,28 @@ class MemoryLevel:
         """Increment step counter"""
         self.step_count += 1
 
-    def _evict_oldest(self):
+    def _evict_oldest(self) -> Optional[MemoryKey]:
         """Evict oldest entry to maintain capacity"""
-        if not self.metadata:
-            return
+        while self._eviction_heap:
+            timestamp, _, oldest_key = heapq.heappop(self._eviction_heap)
+            entry = self.metadata.get(oldest_key)
+            if entry is None or self._entry_timestamp(entry) != timestamp:
+                continue  # stale heap item
 
-        # Find oldest entry
-        oldest_key = min(self.metadata.keys(), key=lambda k: self.metadata[k].timestamp)
+            # Remove
+            self.memory.pop(oldest_key, None)
+            del self.metadata[oldest_key]
 
-        # Remove
-        del self.memory[oldest_key]
-        del self.metadata[oldest_key]
+            logger.debug(f"Evicted oldest entry from {self.config.name}", extra={"key": oldest_key})
+            return oldest_key
 
-        logger.debug(f"Evicted oldest entry from {self.config.name}", extra={"key": oldest_key})
+        return None
 
     def clear(self):
         """Clear all memory"""
         self.memory.clear()
         self.metadata.clear()
+        self._eviction_heap.clear()
         logger.info(f"Cleared level {self.config.name}")
 
     def __len__(self) -> int:
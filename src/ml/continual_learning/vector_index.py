@@ -1,14 +1,27 @@
 """
-Vector Index - Fast similarity search using FAISS
+Vector Index - Fast similarity search for the Continuum Memory System
 
 Provides efficient nearest neighbor search for embeddings in the
 Continuum Memory System.
 
-Uses FAISS (Facebook AI Similarity Search) for high-performance
-vector indexing and retrieval.
+Storage layout:
+- vectors are partitioned by a metadata field (memory level by default),
+  so a query against one level never touches the others;
+- each partition is a preallocated float32 matrix that grows by doubling,
+  with cached squared norms for L2 distance via a single matrix product;
+- top-k is selected with argpartition, only the k winners are sorted;
+- removal marks rows as tombstones, partitions are compacted once the
+  share of dead rows exceeds compact_threshold;
+- save()/load() use one .npy file per partition, load() memory-maps them.
+
+FAISS (if installed) is used for index_type="hnsw" as a per-partition
+approximate index; "flat" search is always exact numpy.
 """
 
-from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
 import numpy as np
 
 from src.utils.structured_logging import StructuredLogger
@@ -24,94 +37,282 @@ except ImportError:
     FAISS_AVAILABLE = False
     logger.warning("FAISS not available, using fallback implementation")
 
+DEFAULT_PARTITION = "_default"
+MANIFEST_FILE = "index.json"
+
+
+class _Partition:
+    """Preallocated vector storage of a single partition"""
+
+    def __init__(self, dimension: int, capacity: int, use_hnsw: bool = False):
+        self.dimension = dimension
+        self.vectors = np.zeros((capacity, dimension), dtype="float32")
+        self.sq_norms = np.zeros(capacity, dtype="float32")
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.keys: List[Optional[str]] = []
+        self.deleted = 0
+        self.use_hnsw = use_hnsw
+        self.ann = self._new_ann() if use_hnsw else None
+
+    @property
+    def rows(self) -> int:
+        """Number of used rows (alive + tombstones)"""
+        return len(self.keys)
+
+    @property
+    def live(self) -> int:
+        return self.rows - self.deleted
+
+    def _new_ann(self):
+        return faiss.IndexHNSWFlat(self.dimension, 32)
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, 2 * len(self.vectors), 16)
+        for name in ("vectors", "sq_norms", "alive"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self.rows] = old[: self.rows]
+            setattr(self, name, new)
+
+    def append(self, keys: List[str], vectors: np.ndarray) -> int:
+        """Append rows, return index of the first one"""
+        start = self.rows
+        end = start + len(keys)
+        if end > len(self.vectors) or not self.vectors.flags.writeable:
+            self._grow(end)
+
+        self.vectors[start:end] = vectors
+        self.sq_norms[start:end] = np.einsum("ij,ij->i", vectors, vectors)
+        self.alive[start:end] = True
+        self.keys.extend(keys)
+        if self.ann is not None:
+            self.ann.add(vectors)
+        return start
+
+    def remove(self, row: int) -> None:
+        if self.alive[row]:
+            self.alive[row] = False
+            self.keys[row] = None
+            self.deleted += 1
+
+    def compact(self) -> Dict[str, int]:
+        """Drop tombstones, return new key -> row mapping"""
+        mask = self.alive[: self.rows]
+        vectors = np.ascontiguousarray(self.vectors[: self.rows][mask])
+        keys = [key for key in self.keys if key is not None]
+
+        capacity = max(16, len(keys))
+        self.vectors = np.zeros((capacity, self.dimension), dtype="float32")
+        self.sq_norms = np.zeros(capacity, dtype="float32")
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.keys = []
+        self.deleted = 0
+        if self.use_hnsw:
+            self.ann = self._new_ann()
+        if keys:
+            self.append(keys, vectors)
+        return {key: row for row, key in enumerate(self.keys)}
+
+    def distances(self, queries: np.ndarray) -> np.ndarray:
+        """Squared L2 distances (n_queries x rows), tombstones are +inf"""
+        n = self.rows
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        dist = self.sq_norms[:n][None, :] - 2.0 * (queries @ self.vectors[:n].T) + q_norms[:, None]
+        np.maximum(dist, 0.0, out=dist)
+        if self.deleted:
+            dist[:, ~self.alive[:n]] = np.inf
+        return dist
+
+    def candidates(
+        self, queries: np.ndarray, k: int, exhaustive: bool = False
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Per query: row indices ordered by distance and their squared distances.
+
+        Flat search selects the exact top-k with argpartition; exhaustive
+        (needed when results are post-filtered) orders all rows.
+        """
+        if self.ann is not None:
+            search_k = min(self.rows, k * 2 + self.deleted)
+            dist, idx = self.ann.search(queries, search_k)
+            for d, i in zip(dist, idx):
+                keep = (i >= 0) & self.alive[np.clip(i, 0, None)]
+                yield i[keep], d[keep]
+            return
+
+        all_dist = self.distances(queries)
+        n = all_dist.shape[1]
+        for dist in all_dist:
+            if k < n and not exhaustive:
+                top = np.argpartition(dist, k - 1)[:k]
+                top = top[np.argsort(dist[top], kind="stable")]
+            else:
+                top = np.argsort(dist, kind="stable")
+            yield top, dist[top]
+
 
 class VectorIndex:
     """
-    Vector similarity search using FAISS
-
-    Provides fast nearest neighbor search for embeddings.
-    Falls back to simple numpy implementation if FAISS not available.
+    Vector similarity search, partitioned by a metadata field
 
     Example:
         >>> index = VectorIndex(dimension=768)
         >>> embedding = np.random.rand(768)
         >>> index.add("key1", embedding, metadata={"level": "fast"})
-        >>> results = index.search(embedding, k=5)
+        >>> results = index.search(embedding, k=5, partition="fast")
     """
 
-    def __init__(self, dimension: int, index_type: str = "flat"):
+    def __init__(
+        self,
+        dimension: int,
+        index_type: str = "flat",
+        partition_key: str = "level",
+        initial_capacity: int = 1024,
+        compact_threshold: float = 0.25,
+    ):
         """
         Initialize vector index
 
         Args:
             dimension: Embedding dimension
-            index_type: "flat" or "hnsw" (if FAISS available)
+            index_type: "flat" (exact) or "hnsw" (approximate, requires FAISS)
+            partition_key: Metadata field used to choose the partition
+            initial_capacity: Preallocated rows per partition
+            compact_threshold: Share of tombstones that triggers compaction
         """
+        if index_type not in ("flat", "hnsw"):
+            raise ValueError(f"Unknown index type: {index_type}")
+        if index_type == "hnsw" and not FAISS_AVAILABLE:
+            logger.warning("HNSW requires FAISS, using exact flat search")
+            index_type = "flat"
+
         self.dimension = dimension
         self.index_type = index_type
+        self.partition_key = partition_key
+        self.initial_capacity = initial_capacity
+        self.compact_threshold = compact_threshold
 
-        # Create index
-        if FAISS_AVAILABLE:
-            self._create_faiss_index(index_type)
-        else:
-            self._create_fallback_index()
-
-        # Metadata storage
-        self.keys: List[str] = []
+        self.partitions: Dict[str, _Partition] = {}
         self.metadata: Dict[str, Dict] = {}
-        self.embeddings: List[np.ndarray] = []  # For fallback
+        # key -> (partition name, row)
+        self._locations: Dict[str, Tuple[str, int]] = {}
 
         logger.info(
-            f"Created vector index",
+            "Created vector index",
             extra={
                 "dimension": dimension,
                 "index_type": index_type,
-                "backend": "faiss" if FAISS_AVAILABLE else "numpy",
+                "backend": "faiss" if index_type == "hnsw" else "numpy",
             },
         )
 
-    def _create_faiss_index(self, index_type: str):
-        """Create FAISS index"""
-        if index_type == "flat":
-            self.index = faiss.IndexFlatL2(self.dimension)
-        elif index_type == "hnsw":
-            self.index = faiss.IndexHNSWFlat(self.dimension, 32)
-        else:
-            raise ValueError(f"Unknown index type: {index_type}")
-
-    def _create_fallback_index(self):
-        """Create fallback numpy-based index"""
-        self.index = None  # Will use self.embeddings
+    @property
+    def keys(self) -> List[str]:
+        """Keys of all live vectors"""
+        return list(self._locations)
+
+    def _partition(self, name: str) -> _Partition:
+        partition = self.partitions.get(name)
+        if partition is None:
+            partition = _Partition(self.dimension, self.initial_capacity, use_hnsw=self.index_type == "hnsw")
+            self.partitions[name] = partition
+        return partition
+
+    def _as_matrix(self, vectors: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype="float32")
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected dimension {self.dimension}, got {matrix.shape[1]}")
+        return np.ascontiguousarray(matrix)
 
     def add(self, key: str, embedding: np.ndarray, metadata: Optional[Dict] = None):
         """
-        Add embedding to index
+        Add embedding to index (an existing key is replaced)
 
         Args:
             key: Unique key
             embedding: Embedding vector
             metadata: Optional metadata
         """
-        # Ensure correct shape and type
-        if embedding.ndim == 1:
-            embedding = embedding.reshape(1, -1)
-        embedding = embedding.astype("float32")
+        self.add_batch([key], embedding, [metadata] if metadata else None)
 
-        # Add to index
-        if FAISS_AVAILABLE:
-            self.index.add(embedding)
-        else:
-            self.embeddings.append(embedding[0])
+        logger.debug("Added embedding to index", extra={"key": key, "total_size": len(self._locations)})
 
-        # Store key and metadata
-        self.keys.append(key)
-        if metadata:
-            self.metadata[key] = metadata
+    def add_batch(
+        self, keys: List[str], embeddings: np.ndarray, metadata: Optional[List[Optional[Dict]]] = None
+    ) -> None:
+        """
+        Add many embeddings at once
 
-        logger.debug(f"Added embedding to index", extra={"key": key, "total_size": len(self.keys)})
+        Args:
+            keys: Unique keys
+            embeddings: Matrix (len(keys) x dimension)
+            metadata: Optional metadata per key
+        """
+        matrix = self._as_matrix(embeddings)
+        if len(keys) != len(matrix):
+            raise ValueError(f"Got {len(keys)} keys for {len(matrix)} embeddings")
+        metadata = metadata or [None] * len(keys)
+        latest = {key: i for i, key in enumerate(keys)}
+
+        by_partition: Dict[str, List[int]] = {}
+        for i, (key, meta) in enumerate(zip(keys, metadata)):
+            if latest[key] != i:
+                continue
+            if key in self._locations:
+                self.remove(key, compact=False)
+            if meta:
+                self.metadata[key] = meta
+            name = str((meta or {}).get(self.partition_key, DEFAULT_PARTITION))
+            by_partition.setdefault(name, []).append(i)
+
+        for name, rows in by_partition.items():
+            partition_keys = [keys[i] for i in rows]
+            start = self._partition(name).append(partition_keys, matrix[rows])
+            for offset, key in enumerate(partition_keys):
+                self._locations[key] = (name, start + offset)
+
+    def remove(self, key: str, compact: bool = True) -> bool:
+        """
+        Remove embedding (tombstone, the row is reclaimed on compaction)
+
+        Args:
+            key: Key to remove
+            compact: Compact the partition if it has too many tombstones
+
+        Returns:
+            True if key was present
+        """
+        location = self._locations.pop(key, None)
+        if location is None:
+            return False
+        name, row = location
+        partition = self.partitions[name]
+        partition.remove(row)
+        self.metadata.pop(key, None)
+
+        if compact and partition.deleted > self.compact_threshold * partition.rows:
+            self.compact(name)
+        return True
+
+    def compact(self, partition: Optional[str] = None) -> None:
+        """Drop tombstones in one or all partitions"""
+        names = [partition] if partition is not None else list(self.partitions)
+        for name in names:
+            part = self.partitions[name]
+            if not part.deleted:
+                continue
+            for key, row in part.compact().items():
+                self._locations[key] = (name, row)
+            logger.debug("Compacted vector index partition", extra={"partition": name, "size": part.rows})
 
     def search(
-        self, query: np.ndarray, k: int = 5, filter_fn: Optional[Callable[[Dict], bool]] = None
+        self,
+        query: np.ndarray,
+        k: int = 5,
+        filter_fn: Optional[Callable[[Dict], bool]] = None,
+        partition: Optional[str] = None,
     ) -> List[Tuple[str, float]]:
         """
         Search for similar embeddings
@@ -120,108 +321,132 @@ class VectorIndex:
             query: Query embedding
             k: Number of results
             filter_fn: Optional filter function for metadata
+            partition: Search only this partition (e.g. memory level)
 
         Returns:
             List of (key, similarity) tuples
         """
-        # Ensure correct shape and type
-        if query.ndim == 1:
-            query = query.reshape(1, -1)
-        query = query.astype("float32")
+        results = self.search_batch(self._as_matrix(query)[:1], k, filter_fn, partition)[0]
 
-        # Search
-        if FAISS_AVAILABLE:
-            results = self._search_faiss(query, k, filter_fn)
-        else:
-            results = self._search_fallback(query, k, filter_fn)
-
-        logger.debug(f"Search completed", extra={"k": k, "results_count": len(results)})
+        logger.debug("Search completed", extra={"k": k, "results_count": len(results)})
 
         return results
 
-    def _search_faiss(
-        self, query: np.ndarray, k: int, filter_fn: Optional[Callable[[Dict], bool]]
-    ) -> List[Tuple[str, float]]:
-        """Search using FAISS"""
-        # Get extra results for filtering
-        search_k = min(k * 2, len(self.keys))
-        if search_k == 0:
-            return []
-
-        # Search in FAISS
-        distances, indices = self.index.search(query, search_k)
-
-        # Convert to results
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < 0 or idx >= len(self.keys):
-                continue
-
-            key = self.keys[idx]
-
-            # Apply filter
-            if filter_fn and key in self.metadata:
-                if not filter_fn(self.metadata[key]):
-                    continue
-
-            # Convert distance to similarity (0-1)
-            similarity = 1.0 / (1.0 + float(dist))
-            results.append((key, similarity))
-
-            if len(results) >= k:
-                break
-
-        return results
-
-    def _search_fallback(
-        self, query: np.ndarray, k: int, filter_fn: Optional[Callable[[Dict], bool]]
-    ) -> List[Tuple[str, float]]:
-        """Search using numpy (fallback)"""
-        if not self.embeddings:
-            return []
-
-        # Compute distances
-        embeddings_matrix = np.array(self.embeddings)
-        distances = np.linalg.norm(embeddings_matrix - query[0], axis=1)
-
-        # Sort by distance
-        sorted_indices = np.argsort(distances)
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        k: int = 5,
+        filter_fn: Optional[Callable[[Dict], bool]] = None,
+        partition: Optional[str] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Search for many queries at once (one matrix product per partition)
 
-        # Convert to results
-        results = []
-        for idx in sorted_indices:
-            key = self.keys[idx]
+        Returns:
+            Results per query, as in search()
+        """
+        queries = self._as_matrix(queries)
+        if partition is not None:
+            names = [partition] if partition in self.partitions else []
+        else:
+            names = list(self.partitions)
 
-            # Apply filter
-            if filter_fn and key in self.metadata:
-                if not filter_fn(self.metadata[key]):
-                    continue
+        merged: List[List[Tuple[float, str]]] = [[] for _ in range(len(queries))]
+        for name in names:
+            part = self.partitions[name]
+            if not part.live:
+                continue
+            for qi, (rows, dists) in enumerate(part.candidates(queries, k, exhaustive=filter_fn is not None)):
+                found = merged[qi]
+                taken = 0
+                for row, dist in zip(rows, dists):
+                    if not np.isfinite(dist) or taken >= k:
+                        break
+                    key = part.keys[row]
+                    if filter_fn and key in self.metadata and not filter_fn(self.metadata[key]):
+                        continue
+                    found.append((float(dist), key))
+                    taken += 1
+
+        # Convert squared L2 distance to similarity (0-1)
+        return [
+            [(key, 1.0 / (1.0 + float(np.sqrt(dist)))) for dist, key in sorted(found)[:k]] for found in merged
+        ]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save index to a directory (one .npy file per partition + manifest)
 
-            # Convert distance to similarity
-            dist = distances[idx]
-            similarity = 1.0 / (1.0 + float(dist))
-            results.append((key, similarity))
+        Args:
+            path: Target directory
+        """
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.compact()
+
+        partitions = {}
+        for i, (name, part) in enumerate(self.partitions.items()):
+            file_name = f"partition_{i}.npy"
+            np.save(directory / file_name, part.vectors[: part.rows])
+            partitions[name] = {"file": file_name, "keys": part.keys}
+
+        manifest = {
+            "dimension": self.dimension,
+            "index_type": self.index_type,
+            "partition_key": self.partition_key,
+            "partitions": partitions,
+            "metadata": self.metadata,
+        }
+        (directory / MANIFEST_FILE).write_text(json.dumps(manifest, ensure_ascii=False, default=str), encoding="utf-8")
+
+        logger.info("Saved vector index", extra={"path": str(directory), "size": self.size()})
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "VectorIndex":
+        """
+        Load index saved by save()
 
-            if len(results) >= k:
-                break
+        Args:
+            path: Index directory
+            mmap: Memory-map vector files (read-only until the partition grows)
+        """
+        directory = Path(path)
+        manifest: Dict[str, Any] = json.loads((directory / MANIFEST_FILE).read_text(encoding="utf-8"))
 
-        return results
+        index = cls(
+            dimension=manifest["dimension"],
+            index_type=manifest["index_type"],
+            partition_key=manifest["partition_key"],
+        )
+        index.metadata = manifest["metadata"]
+
+        for name, info in manifest["partitions"].items():
+            vectors = np.load(directory / info["file"], mmap_mode="r" if mmap else None)
+            keys = info["keys"]
+            if index.index_type == "hnsw":
+                part = index._partition(name)
+                part.append(keys, np.asarray(vectors))
+            else:
+                part = _Partition(index.dimension, 0)
+                part.vectors = vectors
+                part.sq_norms = np.einsum("ij,ij->i", vectors, vectors).astype("float32")
+                part.alive = np.ones(len(keys), dtype=bool)
+                part.keys = list(keys)
+                index.partitions[name] = part
+            for row, key in enumerate(keys):
+                index._locations[key] = (name, row)
+
+        logger.info("Loaded vector index", extra={"path": str(directory), "size": index.size(), "mmap": mmap})
+        return index
 
     def size(self) -> int:
         """Get number of vectors in index"""
-        if FAISS_AVAILABLE:
-            return self.index.ntotal
-        else:
-            return len(self.embeddings)
+        return len(self._locations)
 
     def clear(self):
         """Clear all vectors"""
-        if FAISS_AVAILABLE:
-            self.index.reset()
-        else:
-            self.embeddings.clear()
-
-        self.keys.clear()
+        self.partitions.clear()
+        self._locations.clear()
         self.metadata.clear()
 
         logger.info("Cleared vector index")
@@ -235,5 +460,6 @@ class VectorIndex:
         return (
             f"VectorIndex(dimension={self.dimension}, "
             f"size={self.size()}, "
-            f"backend={'faiss' if FAISS_AVAILABLE else 'numpy'})"
+            f"partitions={len(self.partitions)}, "
+            f"backend={'faiss' if self.index_type == 'hnsw' else 'numpy'})"
         )
@@ -2,11 +2,12 @@
 
 """
 Performance Monitoring
-Версия: 2.1.0
+Версия: 2.2.0
 
 Улучшения:
 - Structured logging
 - Улучшена обработка ошибок
+- Percentiles из потокового скетча скользящего окна (без хранения истории)
 
 Мониторинг производительности системы в реальном времени
 """
@@ -14,12 +15,17 @@ Performance Monitoring
 import time
 from datetime import datetime
 from functools import wraps
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+from src.monitoring.sketches import BucketHistogram, QuantileSketch, WindowedSketch
 from src.utils.structured_logging import StructuredLogger
 
 logger = StructuredLogger(__name__).logger
 
+# Границы latency buckets (ms) и их названия в get_metrics()
+LATENCY_BUCKET_BOUNDS = (100, 500, 1000, 5000)
+LATENCY_BUCKET_NAMES = ("<100ms", "100-500ms", "500ms-1s", "1s-5s", ">5s")
+
 
 class PerformanceMonitor:
     """
@@ -33,7 +39,7 @@ class PerformanceMonitor:
     - Database query times
     """
 
-    def __init__(self):
+    def __init__(self, window_seconds: float = 300.0, window_slots: int = 10):
         self.metrics = {
             "requests_total": 0,
             "requests_success": 0,
@@ -45,14 +51,19 @@ class PerformanceMonitor:
             "db_query_time_ms": 0,
         }
 
-        self.latency_buckets = {
-            "<100ms": 0,
-            "100-500ms": 0,
-            "500ms-1s": 0,
-            "1s-5s": 0,
-            ">5s": 0,
-        }
-        self.latency_history: list[float] = []
+        self.latency_histogram = BucketHistogram(
+            LATENCY_BUCKET_BOUNDS, upper_inclusive=False
+        )
+        # Percentiles считаются по скользящему окну: запись O(1), старые
+        # слоты очищаются при ротации
+        self.latency_window = WindowedSketch(
+            window_seconds=window_seconds, slots=window_slots
+        )
+
+    @property
+    def latency_buckets(self) -> Dict[str, int]:
+        """Счетчики latency buckets за все время"""
+        return dict(zip(LATENCY_BUCKET_NAMES, self.latency_histogram.counts()))
 
     def track_request(self, latency_ms: float, success: bool = True):
         """Трекинг HTTP request с input validation"""
@@ -74,15 +85,6 @@ class PerformanceMonitor:
             )
             success = True  # Default to True
 
-        # Limit history size to prevent memory issues
-        max_history_size = 10000
-        if len(self.latency_history) >= max_history_size:
-            # Keep only recent entries
-            self.latency_history = self.latency_history[-max_history_size // 2 :]
-            logger.debug(
-                "Latency history truncated", extra={"max_size": max_history_size}
-            )
-
         self.metrics["requests_total"] += 1
 
         if success:
@@ -91,19 +93,8 @@ class PerformanceMonitor:
             self.metrics["requests_error"] += 1
 
         self.metrics["total_latency_ms"] += latency_ms
-        self.latency_history.append(latency_ms)
-
-        # Buckets
-        if latency_ms < 100:
-            self.latency_buckets["<100ms"] += 1
-        elif latency_ms < 500:
-            self.latency_buckets["100-500ms"] += 1
-        elif latency_ms < 1000:
-            self.latency_buckets["500ms-1s"] += 1
-        elif latency_ms < 5000:
-            self.latency_buckets["1s-5s"] += 1
-        else:
-            self.latency_buckets[">5s"] += 1
+        self.latency_window.add(latency_ms)
+        self.latency_histogram.add(latency_ms)
 
     def track_cache(self, hit: bool):
         """Трекинг cache operations с input validation"""
@@ -138,6 +129,7 @@ class PerformanceMonitor:
         """Получение текущих метрик"""
 
         total_requests = self.metrics["requests_total"]
+        latency_sketch = self.latency_window.snapshot()
 
         return {
             "requests": {
@@ -148,9 +140,9 @@ class PerformanceMonitor:
             },
             "latency": {
                 "avg_ms": self.metrics["total_latency_ms"] / max(total_requests, 1),
-                "p50": self._calculate_percentile(50),
-                "p95": self._calculate_percentile(95),
-                "p99": self._calculate_percentile(99),
+                "p50": self._calculate_percentile(50, latency_sketch),
+                "p95": self._calculate_percentile(95, latency_sketch),
+                "p99": self._calculate_percentile(99, latency_sketch),
                 "buckets": self.latency_buckets,
             },
             "cache": {
@@ -167,12 +159,15 @@ class PerformanceMonitor:
             "timestamp": datetime.now().isoformat(),
         }
 
-    def _calculate_percentile(self, percentile: int) -> float:
+    def _calculate_percentile(
+        self, percentile: int, sketch: Optional[QuantileSketch] = None
+    ) -> float:
         """
-        Расчет REAL percentile из latency buckets
+        Расчет percentile из квантильного скетча скользящего окна
 
         Args:
             percentile: Percentile to calculate (50, 95, 99)
+            sketch: Снимок окна (чтобы не сливать слоты на каждый percentile)
 
         Returns:
             float: Calculated percentile in milliseconds
@@ -188,32 +183,15 @@ class PerformanceMonitor:
             )
             return 0.0
 
-        if not self.latency_history:
+        if sketch is None:
+            sketch = self.latency_window.snapshot()
+
+        if not sketch.count:
             # Fallback to bucket-based approximation
             return self._calculate_percentile_from_buckets(percentile)
 
-        # Use actual latency values if available
-        sorted_latencies = sorted(self.latency_history)
-        n = len(sorted_latencies)
-
-        if n == 0:
-            return 0.0
-
-        # Calculate index
-        index = (percentile / 100) * (n - 1)
-
-        if index.is_integer():
-            return float(sorted_latencies[int(index)])
-
-        # Interpolate
-        lower_idx = int(index)
-        upper_idx = min(lower_idx + 1, n - 1)
-        fraction = index - lower_idx
-
-        lower_val = sorted_latencies[lower_idx]
-        upper_val = sorted_latencies[upper_idx]
-
-        return float(lower_val + fraction * (upper_val - lower_val))
+        # Relative error of the estimate is bounded by the sketch accuracy (1%)
+        return sketch.quantile(percentile / 100)
 
     def _calculate_percentile_from_buckets(self, percentile: int) -> float:
         """Approximate percentile from histogram buckets с input validation"""
@@ -228,7 +206,8 @@ class PerformanceMonitor:
             )
             return 0.0
 
-        total_requests = sum(self.latency_buckets.values())
+        latency_buckets = self.latency_buckets
+        total_requests = sum(latency_buckets.values())
 
         if total_requests == 0:
             return 0.0
@@ -246,17 +225,39 @@ class PerformanceMonitor:
         }
 
         for bucket_name, bucket_midpoint in bucket_midpoints.items():
-            cumulative += self.latency_buckets.get(bucket_name, 0)
+            cumulative += latency_buckets.get(bucket_name, 0)
             if cumulative >= target_count:
                 return float(bucket_midpoint)
 
         return 500.0  # Default to highest bucket
 
+    def export_state(self) -> Dict[str, Any]:
+        """Состояние монитора для агрегации по воркерам (JSON-совместимое)"""
+        return {
+            "metrics": dict(self.metrics),
+            "latency_histogram": self.latency_histogram.to_dict(),
+            "latency_sketch": self.latency_window.snapshot().to_dict(),
+        }
+
+    def merge_state(self, state: Dict[str, Any]):
+        """Слияние состояния другого воркера (результат export_state)"""
+        for key, value in state.get("metrics", {}).items():
+            self.metrics[key] = self.metrics.get(key, 0) + value
+
+        if state.get("latency_histogram"):
+            self.latency_histogram.merge(
+                BucketHistogram.from_dict(state["latency_histogram"])
+            )
+        if state.get("latency_sketch"):
+            self.latency_window.merge(
+                QuantileSketch.from_dict(state["latency_sketch"])
+            )
+
     def reset(self):
         """Сброс всех метрик"""
         self.metrics = {k: 0 for k in self.metrics.keys()}
-        self.latency_buckets = {k: 0 for k in self.latency_buckets.keys()}
-        self.latency_history.clear()
+        self.latency_histogram.clear()
+        self.latency_window.clear()
 
 
 # Global instance
@@ -0,0 +1,417 @@
+# [NEXUS IDENTITY] ID: 8316042957731185529 | DATE: 2026-10-17
+
+"""
+Streaming Metric Sketches
+Версия: 1.0.0
+
+Потоковые структуры для метрик латентности без хранения сырых значений:
+- QuantileSketch - mergeable квантильный скетч (DDSketch-style) с гарантией
+  относительной точности, запись O(1)
+- BucketHistogram - гистограмма с фиксированными границами бакетов
+- WindowedSketch / WindowedCounter - скользящее окно из ротируемых слотов
+
+Скетчи с одинаковой точностью объединяются сложением массивов счетчиков,
+поэтому p50/p95/p99 нескольких воркеров сводятся без потери точности
+(to_dict / from_dict - для передачи состояния между процессами).
+
+Структуры не потокобезопасны: синхронизация - на стороне владельца.
+"""
+
+import math
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Значения не больше порога учитываются в нулевом бакете
+DEFAULT_MIN_INDEXABLE_VALUE = 1e-9
+
+# Предел числа лог-бакетов: при превышении младшие бакеты схлопываются
+DEFAULT_MAX_BUCKETS = 2048
+
+# Шаг расширения массива бакетов
+_GROW_CHUNK = 64
+
+
+class QuantileSketch:
+    """
+    Квантильный скетч с логарифмическими бакетами (DDSketch)
+
+    Значение v попадает в бакет k = ceil(log_gamma(v)), где
+    gamma = (1 + a) / (1 - a). Оценка любого квантиля отличается от
+    истинного значения не более чем на долю a (relative_accuracy).
+    Счетчики бакетов хранятся в плотном NumPy-массиве, который
+    расширяется по мере появления новых порядков величин.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+        min_value: float = DEFAULT_MIN_INDEXABLE_VALUE,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        if max_buckets < 1:
+            raise ValueError("max_buckets must be positive")
+
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self._gamma)
+
+        # _counts[i] - счетчик бакета с ключом _offset + i
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._offset = 0
+        self._zero_count = 0
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1):
+        """Запись значения (O(1))"""
+        if value > self.min_value:
+            index = math.ceil(math.log(value) * self._multiplier) - self._offset
+            if not 0 <= index < self._size:
+                index = self._reserve(index + self._offset)
+            self._counts[index] += count
+        else:
+            self._zero_count += count
+
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Объединение со скетчем той же точности (например, другого воркера)"""
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if not other.count:
+            return self
+
+        nonzero = np.flatnonzero(other._counts)
+        if nonzero.size:
+            first, last = int(nonzero[0]), int(nonzero[-1]) + 1
+            lo = other._offset + first
+            self._ensure_range(lo, other._offset + last)
+
+            start = lo - self._offset
+            values = other._counts[first:last]
+            if start >= 0:
+                self._counts[start : start + len(values)] += values
+            else:
+                # Часть ключей ниже схлопнутой границы - в первый бакет
+                indexes = np.maximum(np.arange(start, start + len(values)), 0)
+                np.add.at(self._counts, indexes, values)
+
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля q из [0, 1] (0.0 для пустого скетча)"""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Оценка нескольких квантилей за один проход по бакетам"""
+        if not self.count:
+            return [0.0 for _ in qs]
+
+        cumulative = np.cumsum(self._counts)
+        results = []
+        for q in qs:
+            if q <= 0:
+                results.append(float(self.min))
+                continue
+            if q >= 1:
+                results.append(float(self.max))
+                continue
+
+            rank = q * (self.count - 1)
+            if rank < self._zero_count:
+                results.append(float(self.min))
+                continue
+
+            index = int(np.searchsorted(cumulative, rank - self._zero_count, side="right"))
+            estimate = 2 * self._gamma ** (self._offset + index) / (self._gamma + 1)
+            results.append(float(min(max(estimate, self.min), self.max)))
+
+        return results
+
+    @property
+    def mean(self) -> float:
+        """Среднее значение"""
+        return self.sum / self.count if self.count else 0.0
+
+    def clear(self):
+        """Сброс счетчиков (выделенный массив переиспользуется)"""
+        self._counts.fill(0)
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def copy(self) -> "QuantileSketch":
+        """Независимая копия скетча"""
+        clone = QuantileSketch(self.relative_accuracy, self.max_buckets, self.min_value)
+        return clone.merge(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Компактное JSON-совместимое представление (для слияния между процессами)"""
+        nonzero = np.flatnonzero(self._counts)
+        first, last = (int(nonzero[0]), int(nonzero[-1]) + 1) if nonzero.size else (0, 0)
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "offset": self._offset + first,
+            "counts": self._counts[first:last].tolist(),
+            "zero_count": self._zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_buckets: int = DEFAULT_MAX_BUCKETS) -> "QuantileSketch":
+        """Восстановление скетча из to_dict()"""
+        sketch = cls(data["relative_accuracy"], max_buckets=max(max_buckets, len(data["counts"])))
+        sketch._counts = np.asarray(data["counts"], dtype=np.int64)
+        sketch._size = len(sketch._counts)
+        sketch._offset = int(data["offset"])
+        sketch._zero_count = int(data["zero_count"])
+        sketch.count = int(data["count"])
+        sketch.sum = float(data["sum"])
+        if sketch.count:
+            sketch.min = float(data["min"])
+            sketch.max = float(data["max"])
+        return sketch
+
+    def _reserve(self, key: int) -> int:
+        """Индекс бакета для ключа вне текущего массива (с расширением)"""
+        if key < self._offset and self._size >= self.max_buckets:
+            return 0
+        self._ensure_range(key, key + 1)
+        return max(key - self._offset, 0)
+
+    def _ensure_range(self, lo: int, hi: int):
+        """Расширение массива до диапазона ключей [lo, hi)"""
+        size = self._size
+        top = self._offset + size
+
+        if size:
+            if self._offset <= lo and hi <= top:
+                return
+            lo = min(lo - _GROW_CHUNK, self._offset) if lo < self._offset else self._offset
+            hi = max(hi + _GROW_CHUNK, top) if hi > top else top
+        else:
+            lo -= _GROW_CHUNK // 2
+            hi += _GROW_CHUNK // 2
+
+        if hi - lo > self.max_buckets:
+            lo = hi - self.max_buckets
+
+        counts = np.zeros(hi - lo, dtype=np.int64)
+        if size:
+            cut = lo - self._offset
+            if cut <= 0:
+                counts[-cut : -cut + size] = self._counts
+            else:
+                # Младшие бакеты схлопываются в первый
+                counts[0] = self._counts[: cut + 1].sum()
+                rest = self._counts[cut + 1 :]
+                counts[1 : 1 + len(rest)] = rest
+
+        self._counts = counts
+        self._size = hi - lo
+        self._offset = lo
+
+
+class BucketHistogram:
+    """
+    Гистограмма с фиксированными границами бакетов
+
+    Последний бакет - переполнение (+Inf). По умолчанию границы
+    включаются в бакет сверху (семантика le в Prometheus); при
+    upper_inclusive=False бакет i считает значения < bounds[i].
+    """
+
+    def __init__(self, bounds: Sequence[float], upper_inclusive: bool = True):
+        if not bounds:
+            raise ValueError("bounds must not be empty")
+
+        self.bounds = tuple(sorted(float(b) for b in bounds))
+        self.upper_inclusive = upper_inclusive
+        self._bisect = bisect_left if upper_inclusive else bisect_right
+        self._counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value: float, count: int = 1):
+        """Запись значения (O(log числа бакетов))"""
+        self._counts[self._bisect(self.bounds, value)] += count
+        self.count += count
+        self.sum += value * count
+
+    def merge(self, other: "BucketHistogram") -> "BucketHistogram":
+        """Объединение с гистограммой с теми же границами"""
+        if other.bounds != self.bounds or other.upper_inclusive != self.upper_inclusive:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self._counts += other._counts
+        self.count += other.count
+        self.sum += other.sum
+        return self
+
+    def counts(self) -> List[int]:
+        """Счетчики по бакетам (последний - переполнение)"""
+        return self._counts.tolist()
+
+    def cumulative_counts(self) -> List[int]:
+        """Накопленные счетчики (формат _bucket{le=...} в Prometheus)"""
+        return np.cumsum(self._counts).tolist()
+
+    def clear(self):
+        """Сброс счетчиков"""
+        self._counts.fill(0)
+        self.count = 0
+        self.sum = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-совместимое представление"""
+        return {
+            "bounds": list(self.bounds),
+            "upper_inclusive": self.upper_inclusive,
+            "counts": self.counts(),
+            "sum": self.sum,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BucketHistogram":
+        """Восстановление гистограммы из to_dict()"""
+        histogram = cls(data["bounds"], upper_inclusive=data.get("upper_inclusive", True))
+        histogram._counts = np.asarray(data["counts"], dtype=np.int64)
+        histogram.count = int(histogram._counts.sum())
+        histogram.sum = float(data["sum"])
+        return histogram
+
+
+class WindowedSketch:
+    """
+    Квантильный скетч скользящего окна
+
+    Окно window_seconds разбито на slots слотов. Запись идет в слот
+    текущего интервала; слот, оставшийся от прошлого круга, очищается
+    при первой записи (ротация O(1)). snapshot() сливает живые слоты.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        slots: int = 6,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if window_seconds <= 0 or slots < 1:
+            raise ValueError("window_seconds and slots must be positive")
+
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.relative_accuracy = relative_accuracy
+        self._slot_width = window_seconds / slots
+        self._clock = clock
+        self._sketches = [QuantileSketch(relative_accuracy) for _ in range(slots)]
+        self._epochs: List[Optional[int]] = [None] * slots
+
+    def add(self, value: float, count: int = 1):
+        """Запись значения в текущий слот"""
+        self._current().add(value, count)
+
+    def merge(self, other: Union[QuantileSketch, "WindowedSketch"]) -> "WindowedSketch":
+        """Добавление в текущий слот данных другого скетча (другого воркера)"""
+        if isinstance(other, WindowedSketch):
+            other = other.snapshot()
+        self._current().merge(other)
+        return self
+
+    def snapshot(self) -> QuantileSketch:
+        """Скетч по всем значениям текущего окна"""
+        epoch = self._epoch()
+        result = QuantileSketch(self.relative_accuracy)
+        for sketch, slot_epoch in zip(self._sketches, self._epochs):
+            if slot_epoch is not None and epoch - slot_epoch < self.slots:
+                result.merge(sketch)
+        return result
+
+    def clear(self):
+        """Сброс всех слотов"""
+        for sketch in self._sketches:
+            sketch.clear()
+        self._epochs = [None] * self.slots
+
+    def _epoch(self) -> int:
+        return int(self._clock() // self._slot_width)
+
+    def _current(self) -> QuantileSketch:
+        epoch = self._epoch()
+        index = epoch % self.slots
+        if self._epochs[index] != epoch:
+            self._sketches[index].clear()
+            self._epochs[index] = epoch
+        return self._sketches[index]
+
+
+class WindowedCounter:
+    """Счетчик скользящего окна на кольцевом NumPy-массиве слотов"""
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        slots: int = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if window_seconds <= 0 or slots < 1:
+            raise ValueError("window_seconds and slots must be positive")
+
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self._slot_width = window_seconds / slots
+        self._clock = clock
+        self._counts = np.zeros(slots, dtype=np.float64)
+        self._epochs = np.full(slots, -slots - 1, dtype=np.int64)
+
+    def add(self, value: float = 1.0):
+        """Увеличение счетчика текущего слота"""
+        epoch = int(self._clock() // self._slot_width)
+        index = epoch % self.slots
+        if self._epochs[index] != epoch:
+            self._epochs[index] = epoch
+            self._counts[index] = 0.0
+        self._counts[index] += value
+
+    def total(self) -> float:
+        """Сумма за окно"""
+        epoch = int(self._clock() // self._slot_width)
+        return float(self._counts[self._epochs > epoch - self.slots].sum())
+
+    def rate(self) -> float:
+        """Среднее значение в секунду за окно"""
+        return self.total() / self.window_seconds
+
+    def clear(self):
+        """Сброс всех слотов"""
+        self._counts.fill(0.0)
+        self._epochs.fill(-self.slots - 1)
@@ -0,0 +1,719 @@
+# [NEXUS IDENTITY] ID: 8164932057713385406 | DATE: 2026-10-17
+
+"""
+BSL syntax parser
+Однопроходный токенизатор и recursive-descent парсер BSL (1С:Предприятие)
+
+- tokenize(): таблица токенов (TOKEN_SPEC) собирается в один regex, текст
+  модуля сканируется один раз, токены выдаются лениво (генератор).
+  Ключевые слова (русские и английские, без учета регистра) - по таблице
+  KEYWORDS, как в bsl.gbnf.
+- BSLModuleParser: recursive descent по структуре bsl.gbnf (методы, блоки
+  Если/Для/Пока/Попытка, объявления Перем); выражения не строятся в дерево,
+  из них за тот же проход извлекаются вызовы, тексты запросов и ветвления.
+- Парсер терпим к ошибкам: незакрытые блоки и методы закрываются по
+  следующему объявлению метода или концу модуля.
+
+Результат - BSLModule: методы (функции/процедуры с параметрами, экспортом,
+аннотациями, областью, doc-комментарием, вызовами и сложностью), области,
+переменные, тексты запросов.
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# (kind, text, pos); kind - имя токена, ключевое слово (IF, ENDDO, ...) или сам оператор ("(", ";", ...)
+Token = Tuple[str, str, int]
+
+NAME = "NAME"
+STRING = "STRING"
+NUMBER = "NUMBER"
+DATE = "DATE"
+COMMENT = "COMMENT"
+PREPROC = "PREPROC"
+ANNOTATION = "ANNOTATION"
+LABEL = "LABEL"
+ERROR = "ERROR"
+
+TOKEN_SPEC: List[Tuple[str, str]] = [
+    (COMMENT, r"//[^\n]*"),
+    (STRING, r'"(?:[^"]|"")*"|"[^\n]*'),
+    (NAME, r"[^\W\d]\w*"),
+    (NUMBER, r"\d+(?:\.\d+)?"),
+    ("OP", r"<>|<=|>=|[-+*/%=<>()\[\].,;?:]"),
+    (DATE, r"'[^'\n]*'?"),
+    (PREPROC, r"#[^\n]*"),
+    (ANNOTATION, r"&\w+"),
+    (LABEL, r"~\w+"),
+    (ERROR, r"\S"),
+]
+
+_TOKEN_RE = re.compile(
+    r"[\s\ufeff]*(?:" + "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in TOKEN_SPEC) + ")"
+)
+
+KEYWORDS: Dict[str, str] = {}
+for _kind, _words in {
+    "IF": ("Если", "If"),
+    "THEN": ("Тогда", "Then"),
+    "ELSIF": ("ИначеЕсли", "ElsIf"),
+    "ELSE": ("Иначе", "Else"),
+    "ENDIF": ("КонецЕсли", "EndIf"),
+    "FOR": ("Для", "For"),
+    "EACH": ("Каждого", "Each"),
+    "IN": ("Из", "In"),
+    "TO": ("По", "To"),
+    "WHILE": ("Пока", "While"),
+    "DO": ("Цикл", "Do"),
+    "ENDDO": ("КонецЦикла", "EndDo"),
+    "BREAK": ("Прервать", "Break"),
+    "CONTINUE": ("Продолжить", "Continue"),
+    "FUNCTION": ("Функция", "Function"),
+    "ENDFUNCTION": ("КонецФункции", "EndFunction"),
+    "PROCEDURE": ("Процедура", "Procedure"),
+    "ENDPROCEDURE": ("КонецПроцедуры", "EndProcedure"),
+    "RETURN": ("Возврат", "Return"),
+    "VAR": ("Перем", "Var"),
+    "VAL": ("Знач", "Val"),
+    "EXPORT": ("Экспорт", "Export"),
+    "NEW": ("Новый", "New"),
+    "TRY": ("Попытка", "Try"),
+    "EXCEPT": ("Исключение", "Except"),
+    "ENDTRY": ("КонецПопытки", "EndTry"),
+    "RAISE": ("ВызватьИсключение", "Raise"),
+    "GOTO": ("Перейти", "Goto"),
+    "EXECUTE": ("Выполнить", "Execute"),
+    "ADDHANDLER": ("ДобавитьОбработчик", "AddHandler"),
+    "REMOVEHANDLER": ("УдалитьОбработчик", "RemoveHandler"),
+    "ASYNC": ("Асинх", "Async"),
+    "AWAIT": ("Ждать", "Await"),
+    "TRUE": ("Истина", "True"),
+    "FALSE": ("Ложь", "False"),
+    "UNDEFINED": ("Неопределено", "Undefined"),
+    "NULL": ("Null",),
+    "AND": ("И", "And"),
+    "OR": ("Или", "Or"),
+    "NOT": ("Не", "Not"),
+}.items():
+    for _word in _words:
+        KEYWORDS[_word.lower()] = _kind
+
+METHOD_START = frozenset({"FUNCTION", "PROCEDURE"})
+METHOD_END = frozenset({"ENDFUNCTION", "ENDPROCEDURE"})
+# Ключевые слова, которыми может начинаться или заканчиваться оператор
+STATEMENT_KEYWORDS = frozenset(
+    {
+        "IF", "ELSIF", "ELSE", "ENDIF", "FOR", "WHILE", "DO", "ENDDO", "TRY", "EXCEPT", "ENDTRY",
+        "RETURN", "BREAK", "CONTINUE", "RAISE", "VAR", "GOTO", "ADDHANDLER", "REMOVEHANDLER",
+    }
+) | METHOD_START | METHOD_END
+_STATEMENT_END = STATEMENT_KEYWORDS | {";", PREPROC}
+_CONDITION_END = _STATEMENT_END | {"THEN"}
+
+QUERY_PREFIXES = ("ВЫБРАТЬ", "SELECT", "УНИЧТОЖИТЬ", "DROP")
+_REGION_START = ("#область", "#region")
+_REGION_END = ("#конецобласти", "#endregion")
+
+
+def tokenize(code: str) -> Iterator[Token]:
+    """
+    Токены BSL кода (без пробелов и переводов строк)
+
+    Имя после "." всегда NAME (Запрос.Выполнить() - вызов метода, а не оператор Выполнить).
+    """
+    keywords = KEYWORDS
+    prev = None
+    for match in _TOKEN_RE.finditer(code):
+        group = match.lastgroup
+        text = match.group(group)
+        if group == NAME:
+            kind = NAME if prev == "." else keywords.get(text.lower(), NAME)
+        elif group == "OP":
+            kind = text
+        else:
+            kind = group
+        prev = kind
+        yield kind, text, match.start(group)
+
+
+def unquote_string(text: str) -> str:
+    """Значение строкового литерала: без кавычек, "" -> ", без '|' продолжения строк"""
+    value = text[1:-1] if len(text) > 1 and text.endswith('"') else text[1:]
+    if "\n" in value:
+        value = "\n".join(
+            line.lstrip()[1:] if line.lstrip().startswith("|") else line for line in value.split("\n")
+        )
+    return value.replace('""', '"')
+
+
+@dataclass
+class BSLParameter:
+    name: str
+    by_value: bool = False
+    default: Optional[str] = None
+
+
+@dataclass
+class BSLCall:
+    name: str
+    pos: int
+    qualifier: Optional[str] = None  # "Справочники.Номенклатура" для Справочники.Номенклатура.Метод()
+    member: bool = False  # вызов через "."
+    line: int = 0
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.qualifier}.{self.name}" if self.qualifier else self.name
+
+
+@dataclass
+class BSLQuery:
+    text: str
+    pos: int
+    method: Optional[str] = None
+    line: int = 0
+
+    @property
+    def type(self) -> str:
+        head = self.text.lstrip().upper()
+        return "DROP" if head.startswith(("УНИЧТОЖИТЬ", "DROP")) else "SELECT"
+
+
+@dataclass
+class BSLVariable:
+    name: str
+    pos: int
+    export: bool = False
+    method: Optional[str] = None
+    line: int = 0
+
+
+@dataclass
+class BSLNameRef:
+    """Обращение к отслеживаемому имени (watch_names), например API объекту"""
+
+    name: str
+    pos: int
+    is_new: bool = False
+    method: Optional[str] = None
+    line: int = 0
+
+
+@dataclass
+class BSLRegion:
+    name: str
+    start_pos: int
+    body_start: int
+    body_end: int = -1
+    end_pos: int = -1
+    parent: Optional[str] = None
+    start_line: int = 0
+    end_line: int = 0
+
+
+@dataclass
+class BSLMethod:
+    name: str
+    kind: str  # "function" | "procedure"
+    start_pos: int
+    params: List[BSLParameter] = field(default_factory=list)
+    params_span: Tuple[int, int] = (0, 0)
+    export: bool = False
+    is_async: bool = False
+    annotations: List[str] = field(default_factory=list)
+    region: Optional[str] = None
+    doc_comment: List[str] = field(default_factory=list)
+    body_start: int = 0
+    body_end: int = 0
+    end_pos: int = 0
+    complexity: int = 1
+    calls: List[BSLCall] = field(default_factory=list)
+    start_line: int = 0
+    end_line: int = 0
+    closed: bool = True
+
+    @property
+    def is_function(self) -> bool:
+        return self.kind == "function"
+
+    @property
+    def type_name(self) -> str:
+        return "Функция" if self.is_function else "Процедура"
+
+
+@dataclass
+class BSLModule:
+    code: str = field(repr=False)
+    methods: List[BSLMethod] = field(default_factory=list)
+    regions: List[BSLRegion] = field(default_factory=list)
+    variables: List[BSLVariable] = field(default_factory=list)
+    queries: List[BSLQuery] = field(default_factory=list)
+    calls: List[BSLCall] = field(default_factory=list)  # вызовы вне методов
+    name_refs: List[BSLNameRef] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    line_starts: List[int] = field(default_factory=list, repr=False)
+
+    @property
+    def functions(self) -> List[BSLMethod]:
+        return [m for m in self.methods if m.is_function]
+
+    @property
+    def procedures(self) -> List[BSLMethod]:
+        return [m for m in self.methods if not m.is_function]
+
+    @property
+    def loc(self) -> int:
+        return len(self.line_starts)
+
+    def line_of(self, pos: int) -> int:
+        """Номер строки (с 1) позиции в тексте"""
+        return bisect_right(self.line_starts, pos)
+
+    def line_text(self, line: int) -> str:
+        start = self.line_starts[line - 1]
+        end = self.line_starts[line] - 1 if line < len(self.line_starts) else len(self.code)
+        return self.code[start:end]
+
+    def source(self, start: int, end: int) -> str:
+        return self.code[start:end]
+
+    def method_lines(self, method: BSLMethod) -> str:
+        """Текст метода целыми строками, от заголовка до строки Конец..."""
+        start = self.line_starts[method.start_line - 1]
+        end = self.code.find("\n", max(method.end_pos - 1, start))
+        return self.code[start : end if end != -1 else len(self.code)]
+
+
+class BSLModuleParser:
+    """
+    Recursive-descent парсер модуля BSL
+
+    Example:
+        >>> module = BSLModuleParser().parse(code)
+        >>> [(m.name, m.export, [c.name for c in m.calls]) for m in module.methods]
+    """
+
+    def __init__(self, watch_names: Optional[Iterable[str]] = None):
+        """
+        Args:
+            watch_names: Имена, обращения к которым собираются в module.name_refs
+                (например, API объекты "Запрос", "Справочники")
+        """
+        self.watch_names = {name.lower(): name for name in (watch_names or ())}
+
+    def parse(self, code: str) -> BSLModule:
+        state = _ParseState(code, self.watch_names)
+        state.parse_module()
+        return state.module
+
+    def parse_file(self, path: Union[str, Path]) -> BSLModule:
+        return self.parse(Path(path).read_text(encoding="utf-8-sig"))
+
+
+def parse_module(code: str, watch_names: Optional[Iterable[str]] = None) -> BSLModule:
+    """BSLModuleParser(watch_names).parse(code)"""
+    return BSLModuleParser(watch_names).parse(code)
+
+
+def extract_calls(code: str) -> List[BSLCall]:
+    """Вызовы в фрагменте кода (теле метода или выражении)"""
+    state = _ParseState(code, {})
+    state.parse_module()
+    module = state.module
+    return module.calls + [call for method in module.methods for call in method.calls]
+
+
+class _ParseState:
+    """Состояние одного разбора: курсор по потоку токенов и результат"""
+
+    def __init__(self, code: str, watch_names: Dict[str, str]):
+        self.code = code
+        self.watch_names = watch_names
+        self.module = BSLModule(code=code)
+        self._tokens = tokenize(code)
+        self.kind: Optional[str] = None
+        self.text = ""
+        self.pos = len(code)
+        self._prev_end = 0
+        self.method: Optional[BSLMethod] = None
+        self.region_stack: List[BSLRegion] = []
+        self._comments: List[str] = []
+        self.advance()
+
+    # -------------------------------------------------------------- cursor
+
+    def advance(self) -> None:
+        self._prev_end = self.pos + len(self.text)
+        for kind, text, pos in self._tokens:
+            if kind == COMMENT:
+                self._comments.append(text)
+                continue
+            self.kind, self.text, self.pos = kind, text, pos
+            return
+        self.kind, self.text, self.pos = None, "", len(self.code)
+
+    def error(self, message: str) -> None:
+        self.module.errors.append((self.pos, message))
+
+    # -------------------------------------------------------------- module
+
+    def parse_module(self) -> None:
+        annotations: List[str] = []
+        is_async = False
+        while self.kind is not None:
+            kind = self.kind
+            if kind in METHOD_START:
+                doc, self._comments = self._comments, []
+                self.parse_method(annotations, is_async, doc)
+                annotations, is_async = [], False
+            elif kind == ANNOTATION:
+                annotations.append(self.text[1:])
+                self.advance()
+                if self.kind == "(":
+                    self._skip_parens()
+            elif kind == "ASYNC":
+                is_async = True
+                self.advance()
+            else:
+                annotations, is_async = [], False
+                self._comments = []
+                self.parse_statement()
+        self._finish()
+
+    def parse_method(self, annotations: List[str], is_async: bool, doc: List[str]) -> None:
+        kind = "function" if self.kind == "FUNCTION" else "procedure"
+        method = BSLMethod(
+            name="",
+            kind=kind,
+            start_pos=self.pos,
+            annotations=annotations,
+            is_async=is_async,
+            region=self.region_stack[-1].name if self.region_stack else None,
+            doc_comment=[line[2:].strip() for line in doc],
+        )
+        self.advance()
+        if self.kind != NAME:
+            self.error("method name expected")
+            return
+        method.name = self.text
+        self.advance()
+        if self.kind == "(":
+            method.params_span, method.params = self._parse_parameters()
+        else:
+            self.error("'(' expected")
+        if self.kind == "EXPORT":
+            method.export = True
+            self.advance()
+
+        method.body_start = self._prev_end
+        self.method = method
+        self.parse_block(METHOD_END)
+        self.method = None
+
+        method.body_end = self.pos
+        if self.kind in METHOD_END:
+            # Комментарии после Конец... относятся к следующему методу
+            self._comments = []
+            self.advance()
+            method.end_pos = self._prev_end
+        else:
+            # Нет Конец...: метод заканчивается перед следующим методом / концом модуля
+            method.closed = False
+            method.end_pos = self.pos
+            self.module.errors.append((method.start_pos, f"unterminated {kind} {method.name}"))
+        self.module.methods.append(method)
+
+    def _parse_parameters(self) -> Tuple[Tuple[int, int], List[BSLParameter]]:
+        start = self.pos + 1
+        params: List[BSLParameter] = []
+        self.advance()
+        while self.kind is not None and self.kind != ")" and self.kind not in STATEMENT_KEYWORDS:
+            by_value = False
+            if self.kind == "VAL":
+                by_value = True
+                self.advance()
+            if self.kind != NAME:
+                self.error("parameter name expected")
+                self.advance()
+                continue
+            param = BSLParameter(self.text, by_value=by_value)
+            params.append(param)
+            self.advance()
+            if self.kind == "=":
+                default_start = self.pos
+                depth = 0
+                self.advance()
+                while self.kind is not None and not (depth == 0 and self.kind in (",", ")")):
+                    depth += {"(": 1, ")": -1}.get(self.kind, 0)
+                    self.advance()
+                param.default = self.code[default_start + 1 : self.pos].strip()
+            if self.kind == ",":
+                self.advance()
+        end = self.pos
+        if self.kind == ")":
+            self.advance()
+        return (start, end), params
+
+    def _skip_parens(self) -> None:
+        depth = 0
+        while self.kind is not None:
+            if self.kind == "(":
+                depth += 1
+            elif self.kind == ")":
+                depth -= 1
+                if depth == 0:
+                    self.advance()
+                    return
+            self.advance()
+
+    # ---------------------------------------------------------- statements
+
+    def parse_block(self, terminators: frozenset) -> None:
+        """Операторы до одного из terminators (или до начала/конца метода)"""
+        while self.kind is not None and self.kind not in terminators:
+            if self.kind in METHOD_START or self.kind in METHOD_END:
+                return
+            self.parse_statement(terminators)
+
+    def parse_statement(self, terminators: frozenset = frozenset()) -> None:
+        kind = self.kind
+        if kind == "IF":
+            self._complexity()
+            self.advance()
+            self.scan_expression(_CONDITION_END)
+            self._expect("THEN")
+            self.parse_block(_IF_BRANCH_END)
+            while self.kind == "ELSIF":
+                self._complexity()
+                self.advance()
+                self.scan_expression(_CONDITION_END)
+                self._expect("THEN")
+                self.parse_block(_IF_BRANCH_END)
+            if self.kind == "ELSE":
+                self.advance()
+                self.parse_block(_ENDIF)
+            self._expect("ENDIF")
+        elif kind == "FOR" or kind == "WHILE":
+            self._complexity()
+            self.advance()
+            self.scan_expression(_STATEMENT_END)
+            self._expect("DO")
+            self.parse_block(_ENDDO)
+            self._expect("ENDDO")
+        elif kind == "TRY":
+            self._complexity()
+            self.advance()
+            self.parse_block(_EXCEPT)
+            if self._expect("EXCEPT"):
+                self.parse_block(_ENDTRY)
+            self._expect("ENDTRY")
+        elif kind == "VAR":
+            self._parse_var()
+        elif kind == PREPROC:
+            self._preprocessor()
+            self.advance()
+            return
+        elif kind == LABEL:
+            self.advance()
+            if self.kind == ":":
+                self.advance()
+            return
+        elif kind in ("RETURN", "RAISE", "GOTO", "ADDHANDLER", "REMOVEHANDLER", "BREAK", "CONTINUE"):
+            self.advance()
+            self.scan_expression(_STATEMENT_END)
+        elif kind in STATEMENT_KEYWORDS:
+            # Конец чужого блока (Цикл/КонецЕсли без начала) - пропускаем
+            self.error(f"unexpected {self.text}")
+            self.advance()
+            return
+        else:
+            self.scan_expression(_STATEMENT_END)
+        if self.kind == ";":
+            self.advance()
+
+    def _expect(self, kind: str) -> bool:
+        if self.kind == kind:
+            self.advance()
+            return True
+        self.error(f"{kind} expected")
+        return False
+
+    def _complexity(self) -> None:
+        if self.method is not None:
+            self.method.complexity += 1
+
+    def _parse_var(self) -> None:
+        self.advance()
+        method_name = self.method.name if self.method else None
+        while self.kind == NAME:
+            variable = BSLVariable(self.text, self.pos, method=method_name)
+            self.module.variables.append(variable)
+            self.advance()
+            if self.kind == "EXPORT":
+                variable.export = True
+                self.advance()
+            if self.kind != ",":
+                break
+            self.advance()
+
+    def _preprocessor(self) -> None:
+        directive = self.text.lower()
+        if directive.startswith(_REGION_START):
+            parts = self.text.split(None, 1)
+            self.region_stack.append(
+                BSLRegion(
+                    name=parts[1].strip() if len(parts) > 1 else "",
+                    start_pos=self.pos,
+                    body_start=self.pos + len(self.text),
+                    parent=self.region_stack[-1].name if self.region_stack else None,
+                )
+            )
+        elif directive.startswith(_REGION_END):
+            if self.region_stack:
+                region = self.region_stack.pop()
+                region.body_end = self.pos
+                region.end_pos = self.pos + len(self.text.rstrip())
+                self.module.regions.append(region)
+            else:
+                self.error("#КонецОбласти without #Область")
+
+    # --------------------------------------------------------- expressions
+
+    def scan_expression(self, stop: frozenset) -> None:
+        """
+        Пропустить выражение до токена из stop, собирая вызовы, запросы и ?()
+        """
+        method = self.method
+        calls = method.calls if method is not None else self.module.calls
+        watch = self.watch_names
+        prev = None
+        chain: List[str] = []
+        name = ""
+        name_pos = 0
+        member = False
+        while True:
+            kind = self.kind
+            if kind is None or kind in stop:
+                return
+            if kind == NAME:
+                name, name_pos = self.text, self.pos
+                member = prev == "."
+                if member:
+                    chain.append(name)
+                else:
+                    chain = [name]
+                if watch and prev != ".":
+                    canonical = watch.get(name.lower())
+                    if canonical is not None:
+                        self.module.name_refs.append(
+                            BSLNameRef(
+                                canonical,
+                                name_pos,
+                                is_new=prev == "NEW",
+                                method=method.name if method is not None else None,
+                            )
+                        )
+                if prev == "NEW":
+                    name = ""
+            elif kind == "(":
+                if prev == NAME and name:
+                    qualifier = ".".join(chain[:-1]) if len(chain) > 1 else None
+                    calls.append(BSLCall(name, name_pos, qualifier=qualifier, member=member))
+                elif prev == "?":
+                    self._complexity()
+                chain = []
+            elif kind == ".":
+                if prev in (")", "]"):
+                    chain = []
+            elif kind == STRING:
+                self._string_literal()
+            prev = kind
+            self.advance()
+
+    def _string_literal(self) -> None:
+        text = self.text
+        head = text[1:32].lstrip(" \t\r\n|").upper()
+        if head.startswith(QUERY_PREFIXES):
+            self.module.queries.append(
+                BSLQuery(
+                    unquote_string(text),
+                    self.pos,
+                    method=self.method.name if self.method is not None else None,
+                )
+            )
+
+    # --------------------------------------------------------------- finish
+
+    def _finish(self) -> None:
+        module = self.module
+        code = self.code
+        line_starts = [0]
+        find = code.find
+        index = find("\n")
+        while index != -1:
+            line_starts.append(index + 1)
+            index = find("\n", index + 1)
+        module.line_starts = line_starts
+
+        for region in reversed(self.region_stack):
+            module.errors.append((region.start_pos, f"unterminated region {region.name}"))
+            region.body_end = region.end_pos = len(code)
+            module.regions.append(region)
+        module.regions.sort(key=lambda r: r.start_pos)
+
+        line_of = module.line_of
+        for method in module.methods:
+            method.start_line = line_of(method.start_pos)
+            method.end_line = line_of(max(method.end_pos - 1, method.start_pos))
+            for call in method.calls:
+                call.line = line_of(call.pos)
+        for region in module.regions:
+            region.start_line = line_of(region.start_pos)
+            region.end_line = line_of(max(region.end_pos - 1, region.start_pos))
+        for item in (*module.calls, *module.queries, *module.variables, *module.name_refs):
+            item.line = line_of(item.pos)
+        module.errors.sort()
+
+
+_IF_BRANCH_END = frozenset({"ELSIF", "ELSE", "ENDIF"})
+_ENDIF = frozenset({"ENDIF"})
+_ENDDO = frozenset({"ENDDO"})
+_EXCEPT = frozenset({"EXCEPT"})
+_ENDTRY = frozenset({"ENDTRY"})
+
+
+def module_to_dict(module: BSLModule) -> Dict[str, Any]:
+    """JSON-совместимое представление результата разбора"""
+
+    def method_dict(method: BSLMethod) -> Dict[str, Any]:
+        return {
+            "name": method.name,
+            "kind": method.kind,
+            "params": [vars(param).copy() for param in method.params],
+            "export": method.export,
+            "async": method.is_async,
+            "annotations": method.annotations,
+            "region": method.region,
+            "doc_comment": method.doc_comment,
+            "start_line": method.start_line,
+            "end_line": method.end_line,
+            "complexity": method.complexity,
+            "calls": [call.full_name for call in method.calls],
+        }
+
+    return {
+        "methods": [method_dict(method) for method in module.methods],
+        "regions": [
+            {"name": r.name, "parent": r.parent, "start_line": r.start_line, "end_line": r.end_line}
+            for r in module.regions
+        ],
+        "variables": [
+            {"name": v.name, "export": v.export, "method": v.method, "line": v.line} for v in module.variables
+        ],
+        "queries": [{"text": q.text, "type": q.type, "method": q.method, "line": q.line} for q in module.queries],
+        "loc": module.loc,
+        "errors": [{"line": module.line_of(pos), "message": message} for pos, message in module.errors],
+    }
@@ -2,12 +2,13 @@
 
 """
 AI Security Layer - Unified Security для всех AI агентов
-Версия: 2.1.0
+Версия: 2.2.0
 
 Улучшения:
 - Structured logging
 - Улучшена обработка ошибок
 - Input validation
+- Единый ContentScanner: все паттерны за один вызов, кэш вердиктов по хэшу
 
 Based on Meta's Agents Rule of Two framework
 """
@@ -18,6 +19,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from src.security.content_scanner import ContentScanner, DetectionRule, ScanResult
 from src.utils.structured_logging import StructuredLogger
 
 logger = StructuredLogger(__name__).logger
@@ -96,6 +98,28 @@ class AISecurityLayer:
         "bearer_token": r"Bearer\s+[a-zA-Z0-9\-._~+/]+=*",
     }
 
+    # Якоря сканера для паттернов без ведущего литерала (см. DetectionRule)
+    SENSITIVE_DATA_ANCHORS = {
+        "email": {
+            "anchors": ("@",),
+            "lead_chars": "abcdefghijklmnopqrstuvwxyz"
+            "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-",
+        },
+        "api_key": {"anchors": ("api", "token")},
+        "credit_card": {"anchor_pattern": r"\d"},
+        "private_key": {"anchors": ("-----begin",)},
+    }
+
+    # Редактирование: тип, замена, флаги - применяются последовательно
+    REDACTION_RULES = [
+        ("email", "[REDACTED_EMAIL]", 0),
+        ("api_key", r"\1[REDACTED_API_KEY]", re.IGNORECASE),
+        ("password", "password: [REDACTED]", re.IGNORECASE),
+        ("credit_card", "[REDACTED_CC]", 0),
+        ("private_key", "[REDACTED_PRIVATE_KEY]", 0),
+        ("bearer_token", "Bearer [REDACTED_TOKEN]", 0),
+    ]
+
     def __init__(self):
         self.audit_logger = AuditLogger()
         self._rate_limit_cache = {}
@@ -165,9 +189,14 @@ class AISecurityLayer:
                 details={"config": agent_config.get_config_code()},
             )
 
+        # Один проход сканера на все проверки содержимого
+        scan = None
+        if agent_config.can_process_untrusted or agent_config.can_access_sensitive:
+            scan = self._scan(user_input)
+
         # Проверка 1: Prompt Injection Detection
         if agent_config.can_process_untrusted:
-            injection_check = self._check_prompt_injection(user_input)
+            injection_check = self._check_prompt_injection(user_input, scan)
             if not injection_check.allowed:
                 self.audit_logger.log_blocked_input(
                     agent_id=agent_id,
@@ -179,7 +208,7 @@ class AISecurityLayer:
 
         # Проверка 2: Sensitive Data Leakage in Input
         if agent_config.can_access_sensitive:
-            sensitive_check = self._check_sensitive_data_in_input(user_input)
+            sensitive_check = self._check_sensitive_data_in_input(user_input, scan)
             if not sensitive_check.allowed:
                 self.audit_logger.log_security_concern(
                     agent_id=agent_id,
@@ -241,7 +270,8 @@ class AISecurityLayer:
 
         # Проверка 1: Sensitive Data Leakage
         if agent_config.can_access_sensitive:
-            leakage_check = self._check_data_leakage(ai_output)
+            scan = self._scan(ai_output)
+            leakage_check = self._check_data_leakage(ai_output, scan)
 
             if leakage_check["has_leakage"]:
                 self.audit_logger.log_data_leakage_attempt(
@@ -251,7 +281,7 @@ class AISecurityLayer:
                 )
 
                 # Редактируем чувствительные данные
-                redacted_output = self._redact_sensitive_data(ai_output)
+                redacted_output = self._redact_sensitive_data(ai_output, scan)
 
                 return SecurityCheck(
                     allowed=True,
@@ -268,7 +298,42 @@ class AISecurityLayer:
             allowed=True, details={"output": ai_output, "redacted": False}
         )
 
-    def _check_prompt_injection(self, text: str) -> SecurityCheck:
+    @classmethod
+    def _get_scanner(cls) -> ContentScanner:
+        """Сканер всех паттернов класса (компилируется один раз на класс)"""
+        scanner = cls.__dict__.get("_scanner")
+        if scanner is None:
+            rules = [
+                DetectionRule(name=pattern, category="prompt_injection", pattern=pattern)
+                for pattern in cls.INJECTION_PATTERNS
+            ]
+            rules += [
+                DetectionRule(
+                    name=data_type,
+                    category="sensitive_data",
+                    pattern=pattern,
+                    **cls.SENSITIVE_DATA_ANCHORS.get(data_type, {}),
+                )
+                for data_type, pattern in cls.SENSITIVE_DATA_PATTERNS.items()
+            ]
+            cls._redactions = [
+                (
+                    data_type,
+                    re.compile(cls.SENSITIVE_DATA_PATTERNS[data_type], flags),
+                    replacement,
+                )
+                for data_type, replacement, flags in cls.REDACTION_RULES
+            ]
+            scanner = cls._scanner = ContentScanner(rules)
+        return scanner
+
+    def _scan(self, text: str) -> ScanResult:
+        """Сканирование текста всеми паттернами (результат кэшируется)"""
+        return self._get_scanner().scan(text)
+
+    def _check_prompt_injection(
+        self, text: str, scan: Optional[ScanResult] = None
+    ) -> SecurityCheck:
         """Детектирует попытки prompt injection с input validation"""
         if not text or not isinstance(text, str):
             logger.warning(
@@ -278,19 +343,19 @@ class AISecurityLayer:
             return SecurityCheck(allowed=False, reason="Invalid input")
 
         try:
-            text_lower = text.lower()
+            scan = scan or self._scan(text)
 
-            for pattern in self.INJECTION_PATTERNS:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    logger.debug(
-                        "Prompt injection pattern detected", extra={"pattern": pattern}
-                    )
-                    return SecurityCheck(
-                        allowed=False,
-                        reason="Potential prompt injection detected",
-                        confidence=0.85,
-                        details={"pattern": pattern},
-                    )
+            # Первый по порядку INJECTION_PATTERNS сработавший паттерн
+            for pattern in scan.rules("prompt_injection"):
+                logger.debug(
+                    "Prompt injection pattern detected", extra={"pattern": pattern}
+                )
+                return SecurityCheck(
+                    allowed=False,
+                    reason="Potential prompt injection detected",
+                    confidence=0.85,
+                    details={"pattern": pattern},
+                )
 
             return SecurityCheck(allowed=True)
         except Exception as e:
@@ -304,7 +369,9 @@ class AISecurityLayer:
                 allowed=True, reason="Check failed, allowing by default"
             )
 
-    def _check_sensitive_data_in_input(self, text: str) -> SecurityCheck:
+    def _check_sensitive_data_in_input(
+        self, text: str, scan: Optional[ScanResult] = None
+    ) -> SecurityCheck:
         """Проверяет наличие чувствительных данных во входе с input validation"""
         if not text or not isinstance(text, str):
             logger.warning(
@@ -314,11 +381,7 @@ class AISecurityLayer:
             return SecurityCheck(allowed=True)
 
         try:
-            found_types = []
-
-            for data_type, pattern in self.SENSITIVE_DATA_PATTERNS.items():
-                if re.search(pattern, text, re.IGNORECASE):
-                    found_types.append(data_type)
+            found_types = list((scan or self._scan(text)).rules("sensitive_data"))
 
             if found_types:
                 return SecurityCheck(
@@ -336,7 +399,9 @@ class AISecurityLayer:
             )
             return SecurityCheck(allowed=True)
 
-    def _check_data_leakage(self, text: str) -> Dict[str, Any]:
+    def _check_data_leakage(
+        self, text: str, scan: Optional[ScanResult] = None
+    ) -> Dict[str, Any]:
         """Детектирует утечку чувствительных данных в выходе с input validation"""
         if not text or not isinstance(text, str):
             logger.warning(
@@ -346,11 +411,7 @@ class AISecurityLayer:
             return {"has_leakage": False, "types": []}
 
         try:
-            leaked_types = []
-
-            for data_type, pattern in self.SENSITIVE_DATA_PATTERNS.items():
-                if re.search(pattern, text, re.IGNORECASE):
-                    leaked_types.append(data_type)
+            leaked_types = list((scan or self._scan(text)).rules("sensitive_data"))
 
             return {"has_leakage": len(leaked_types) > 0, "types": leaked_types}
         except Exception as e:
@@ -361,7 +422,9 @@ class AISecurityLayer:
             )
             return {"has_leakage": False, "types": []}
 
-    def _redact_sensitive_data(self, text: str) -> str:
+    def _redact_sensitive_data(
+        self, text: str, scan: Optional[ScanResult] = None
+    ) -> str:
         """Редактирует чувствительные данные с input validation"""
         if not text or not isinstance(text, str):
             logger.warning(
@@ -371,47 +434,23 @@ class AISecurityLayer:
             return ""
 
         try:
+            scanner = self._get_scanner()
+            found = set((scan or scanner.scan(text)).rules("sensitive_data"))
             redacted = text
 
-            # Email
-            redacted = re.sub(
-                self.SENSITIVE_DATA_PATTERNS["email"], "[REDACTED_EMAIL]", redacted
-            )
-
-            # API Keys / Tokens
-            redacted = re.sub(
-                self.SENSITIVE_DATA_PATTERNS["api_key"],
-                r"\1[REDACTED_API_KEY]",
-                redacted,
-                flags=re.IGNORECASE,
-            )
-
-            # Passwords
-            redacted = re.sub(
-                self.SENSITIVE_DATA_PATTERNS["password"],
-                "password: [REDACTED]",
-                redacted,
-                flags=re.IGNORECASE,
-            )
-
-            # Credit Cards
-            redacted = re.sub(
-                self.SENSITIVE_DATA_PATTERNS["credit_card"], "[REDACTED_CC]", redacted
-            )
-
-            # Private Keys
-            redacted = re.sub(
-                self.SENSITIVE_DATA_PATTERNS["private_key"],
-                "[REDACTED_PRIVATE_KEY]",
-                redacted,
-            )
-
-            # Bearer Tokens
-            redacted = re.sub(
-                self.SENSITIVE_DATA_PATTERNS["bearer_token"],
-                "Bearer [REDACTED_TOKEN]",
-                redacted,
-            )
+            # Замены идут по порядку REDACTION_RULES; тип, которого нет в
+            # тексте (детекция без учета регистра - надмножество замены),
+            # пропускается. После изменения текста типы перепроверяются:
+            # замена с \1 может собрать новое совпадение
+            for data_type, regex, replacement in self._redactions:
+                if data_type not in found:
+                    continue
+                updated = regex.sub(replacement, redacted)
+                if updated != redacted:
+                    redacted = updated
+                    found = set(
+                        scanner.scan(redacted, use_cache=False).rules("sensitive_data")
+                    )
 
             return redacted
         except Exception as e:
@@ -0,0 +1,251 @@
+# [NEXUS IDENTITY] ID: 3958271640218837462 | DATE: 2026-10-17
+
+"""
+Content Scanner - единый детектор паттернов для AI security
+Версия: 1.0.0
+
+Все правила (prompt injection, чувствительные данные, опасные команды)
+компилируются один раз; scan() за один вызов возвращает все сработавшие
+правила, сгруппированные по категориям, и кэширует вердикт по хэшу входа.
+
+Вместо общей regex-альтернации (в модуле re она медленнее, чем отдельные
+поиски: альтернативы перебираются на каждой позиции, а IGNORECASE
+отключает быстрый поиск литерального префикса) сканер ищет якоря -
+литералы, с которых начинается совпадение, - через str.find в приведенном
+к нижнему регистру тексте и примеряет regex правила только в позициях
+якорей. Текст без якорей правило не сканирует вовсе.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Не-ASCII символы, которые re.IGNORECASE считает равными ASCII-буквам
+# ('İ' к тому же меняет длину строки при lower()); K (Kelvin) lower() уже
+# приводит к 'k'
+_CASE_FOLD_FIXES = (("İ", "i"), ("ı", "i"), ("ſ", "s"))
+
+# Ведущий литерал паттерна (буквы/цифры вне спецсимволов regex)
+_LITERAL_PREFIX_RE = re.compile(r"[A-Za-z0-9_]+")
+
+# Сколько позиций якорей примерять через match, прежде чем перейти на
+# обычный search по остатку текста (текст с тысячами якорей)
+MAX_ANCHOR_PROBES = 64
+
+
+@dataclass(frozen=True)
+class DetectionRule:
+    """
+    Правило детектора
+
+    anchors - литералы (в нижнем регистре), с одного из которых начинается
+    любое совпадение; для паттернов с ведущим литералом выводятся
+    автоматически. anchor_pattern - regex вместо литералов (например,
+    r"\\d"). lead_chars - символы, которые могут стоять в совпадении перед
+    якорем (локальная часть email перед '@'); сравниваются с текстом в
+    нижнем регистре, поэтому рассчитаны на паттерн с IGNORECASE.
+    """
+
+    name: str
+    category: str
+    pattern: str
+    flags: int = re.IGNORECASE
+    anchors: Tuple[str, ...] = ()
+    anchor_pattern: Optional[str] = None
+    lead_chars: str = ""
+    literal: bool = False
+
+    @classmethod
+    def for_literal(cls, text: str, category: str) -> "DetectionRule":
+        """Правило поиска подстроки без учета регистра"""
+        return cls(
+            name=text,
+            category=category,
+            pattern=re.escape(text),
+            anchors=(text.lower(),),
+            literal=True,
+        )
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    """Результат сканирования (не изменять: разделяется через кэш)"""
+
+    # имя правила -> позиция первого совпадения
+    spans: Dict[str, Tuple[int, int]]
+    # категория -> имена сработавших правил в порядке их объявления
+    categories: Dict[str, Tuple[str, ...]]
+
+    def has(self, category: str) -> bool:
+        return category in self.categories
+
+    def rules(self, category: str) -> Tuple[str, ...]:
+        return self.categories.get(category, ())
+
+
+class _CompiledRule:
+    __slots__ = ("name", "category", "regex", "anchors", "anchor_regex", "lead_chars", "literal")
+
+    def __init__(self, rule: DetectionRule):
+        self.name = rule.name
+        self.category = rule.category
+        self.regex = re.compile(rule.pattern, rule.flags)
+        self.anchors = rule.anchors or _literal_prefix(rule.pattern)
+        self.anchor_regex = re.compile(rule.anchor_pattern) if rule.anchor_pattern else None
+        self.lead_chars = frozenset(rule.lead_chars)
+        self.literal = rule.literal
+
+
+def _literal_prefix(pattern: str) -> Tuple[str, ...]:
+    """Ведущий литерал паттерна как якорь ('' если его нельзя вывести)"""
+    if "|" in pattern:
+        return ()
+
+    match = _LITERAL_PREFIX_RE.match(pattern)
+    if not match:
+        return ()
+
+    prefix = match.group()
+    # Квантификатор после литерала делает последний символ необязательным
+    if pattern[match.end() : match.end() + 1] in ("?", "*", "{"):
+        prefix = prefix[:-1]
+    return (prefix.lower(),) if prefix else ()
+
+
+def _fold(text: str) -> str:
+    """Нижний регистр с сохранением длины (индексы совпадают с text)"""
+    if not text.isascii():
+        for source, target in _CASE_FOLD_FIXES:
+            if source in text:
+                text = text.replace(source, target)
+    return text.lower()
+
+
+class ContentScanner:
+    """Скомпилированный набор правил с LRU-кэшем вердиктов по хэшу входа"""
+
+    def __init__(self, rules: Sequence[DetectionRule], cache_size: int = 1024):
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Detection rule names must be unique")
+
+        self._rules = [_CompiledRule(rule) for rule in rules]
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, ScanResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"scans": 0, "cache_hits": 0}
+
+    def scan(self, text: str, use_cache: bool = True) -> ScanResult:
+        """Проверка текста всеми правилами"""
+        if not use_cache or not self.cache_size:
+            return self._scan(text)
+
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return result
+
+        result = self._scan(text)
+
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def clear_cache(self):
+        """Очистка кэша вердиктов"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика сканера"""
+        return {**self.stats, "rules": len(self._rules), "cached": len(self._cache)}
+
+    def _scan(self, text: str) -> ScanResult:
+        self.stats["scans"] += 1
+
+        haystack = _fold(text)
+        first_found: Dict[str, int] = {}
+        spans: Dict[str, Tuple[int, int]] = {}
+        categories: Dict[str, List[str]] = {}
+
+        for rule in self._rules:
+            span = self._match_rule(rule, text, haystack, first_found)
+            if span is not None:
+                spans[rule.name] = span
+                categories.setdefault(rule.category, []).append(rule.name)
+
+        return ScanResult(
+            spans=spans,
+            categories={category: tuple(names) for category, names in categories.items()},
+        )
+
+    @staticmethod
+    def _match_rule(
+        rule: _CompiledRule, text: str, haystack: str, first_found: Dict[str, int]
+    ) -> Optional[Tuple[int, int]]:
+        """Первое совпадение правила (None - нет совпадений)"""
+        if rule.anchor_regex is None and not rule.anchors:
+            match = rule.regex.search(text)
+            return match.span() if match else None
+
+        if rule.literal:
+            anchor = rule.anchors[0]
+            position = first_found.get(anchor)
+            if position is None:
+                position = first_found[anchor] = haystack.find(anchor)
+            return (position, position + len(anchor)) if position >= 0 else None
+
+        start = -1
+        for probe, position in enumerate(_anchor_positions(rule, text, haystack, first_found)):
+            if probe == MAX_ANCHOR_PROBES:
+                # Совпадение может начинаться в lead_chars перед очередным
+                # якорем: search от позиции после последней неудачной пробы
+                match = rule.regex.search(text, start + 1)
+                return match.span() if match else None
+
+            start = position
+            while start and haystack[start - 1] in rule.lead_chars:
+                start -= 1
+            match = rule.regex.match(text, start)
+            if match:
+                return match.span()
+
+        return None
+
+
+def _anchor_positions(
+    rule: _CompiledRule, text: str, haystack: str, first_found: Dict[str, int]
+) -> Iterator[int]:
+    """Позиции якорей правила по возрастанию"""
+    if rule.anchor_regex is not None:
+        for match in rule.anchor_regex.finditer(text):
+            yield match.start()
+        return
+
+    # Следующее вхождение каждого якоря; первые вхождения общие для правил
+    upcoming = {}
+    for anchor in rule.anchors:
+        position = first_found.get(anchor)
+        if position is None:
+            position = first_found[anchor] = haystack.find(anchor)
+        if position >= 0:
+            upcoming[anchor] = position
+
+    while upcoming:
+        anchor = min(upcoming, key=upcoming.get)
+        position = upcoming[anchor]
+        yield position
+
+        following = haystack.find(anchor, position + 1)
+        if following >= 0:
+            upcoming[anchor] = following
+        else:
+            del upcoming[anchor]
@@ -8,6 +8,46 @@ from typing import Dict, Optional
 from dataclasses import dataclass
 from loguru import logger
 
+from ..content_scanner import ContentScanner, DetectionRule
+
+HARMFUL_KEYWORDS = [
+    "delete",
+    "drop",
+    "truncate",
+    "remove",
+    "hack",
+    "exploit",
+    "bypass",
+    "jailbreak",
+    "malware",
+    "virus",
+    "attack",
+    "breach",
+    "password",
+    "credential",
+    "secret",
+    "token",
+    "inject",
+    "injection",
+    "xss",
+    "csrf",
+]
+
+SUSPICIOUS_PATTERNS = [
+    r"delete\s+from",
+    r"drop\s+table",
+    r"truncate\s+table",
+    r"rm\s+-rf",
+    r"eval\s*\(",
+    r"exec\s*\(",
+]
+
+# Keywords and patterns are compiled once and checked in a single scan
+_SAFETY_SCANNER = ContentScanner(
+    [DetectionRule.for_literal(keyword, "harmful_keyword") for keyword in HARMFUL_KEYWORDS]
+    + [DetectionRule(pattern, "suspicious_pattern", pattern) for pattern in SUSPICIOUS_PATTERNS]
+)
+
 
 @dataclass
 class IntentResult:
@@ -135,53 +175,14 @@ Direct prose translation:"""
         """
         # Simple keyword-based safety check
         # TODO: Integrate with more sophisticated safety filter
+        scan = _SAFETY_SCANNER.scan(text)
+
+        for keyword in scan.rules("harmful_keyword"):
+            logger.warning(f"Harmful keyword detected: {keyword}")
+            return False
 
-        harmful_keywords = [
-            "delete",
-            "drop",
-            "truncate",
-            "remove",
-            "hack",
-            "exploit",
-            "bypass",
-            "jailbreak",
-            "malware",
-            "virus",
-            "attack",
-            "breach",
-            "password",
-            "credential",
-            "secret",
-            "token",
-            "inject",
-            "injection",
-            "xss",
-            "csrf",
-        ]
-
-        text_lower = text.lower()
-
-        # Check for harmful keywords
-        for keyword in harmful_keywords:
-            if keyword in text_lower:
-                logger.warning(f"Harmful keyword detected: {keyword}")
-                return False
-
-        # Check for suspicious patterns
-        suspicious_patterns = [
-            r"delete\s+from",
-            r"drop\s+table",
-            r"truncate\s+table",
-            r"rm\s+-rf",
-            r"eval\s*\(",
-            r"exec\s*\(",
-        ]
-
-        import re
-
-        for pattern in suspicious_patterns:
-            if re.search(pattern, text_lower):
-                logger.warning(f"Suspicious pattern detected: {pattern}")
-                return False
+        for pattern in scan.rules("suspicious_pattern"):
+            logger.warning(f"Suspicious pattern detected: {pattern}")
+            return False
 
         return True
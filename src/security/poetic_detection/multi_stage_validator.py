@@ -10,6 +10,20 @@ from loguru import logger
 
 from .poetic_detector import PoeticFormDetector, PoeticAnalysis
 from .intent_extractor import SemanticIntentExtractor, IntentResult
+from ..content_scanner import ContentScanner, DetectionRule
+
+DANGEROUS_KEYWORDS = [
+    "delete all",
+    "drop database",
+    "rm -rf /",
+    "format c:",
+    "sudo rm",
+    "del /f /s /q",
+]
+
+_DANGEROUS_SCANNER = ContentScanner(
+    [DetectionRule.for_literal(keyword, "dangerous_keyword") for keyword in DANGEROUS_KEYWORDS]
+)
 
 
 @dataclass
@@ -112,20 +126,8 @@ class MultiStageValidator:
         # Simple keyword-based check
         # TODO: Integrate with existing safety filters
 
-        dangerous_keywords = [
-            "delete all",
-            "drop database",
-            "rm -rf /",
-            "format c:",
-            "sudo rm",
-            "del /f /s /q",
-        ]
-
-        query_lower = query.lower()
-
-        for keyword in dangerous_keywords:
-            if keyword in query_lower:
-                logger.warning(f"Dangerous keyword detected: {keyword}")
-                return False
+        for keyword in _DANGEROUS_SCANNER.scan(query).rules("dangerous_keyword"):
+            logger.warning(f"Dangerous keyword detected: {keyword}")
+            return False
 
         return True
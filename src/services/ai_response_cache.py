@@ -8,6 +8,7 @@ AI Response Caching with Semantic Similarity
 - Улучшена обработка ошибок
 - Structured logging
 - Валидация входных данных
+- Векторизованный семантический поиск (SemanticMatrixIndex)
 """
 
 import hashlib
@@ -18,6 +19,8 @@ from typing import Any, Dict, List, Optional
 
 import numpy as np
 
+from src.services.embedding.batcher import EmbeddingBatcher
+from src.services.semantic_index import SemanticMatrixIndex
 from src.utils.structured_logging import StructuredLogger
 
 logger = StructuredLogger(__name__).logger
@@ -54,6 +57,8 @@ class AIResponseCache:
         similarity_threshold: float = 0.95,
         model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
         cache_dir: Optional[str] = None,
+        index_type: str = "exact",
+        max_entries: Optional[int] = None,
     ):
         """
         Initialize AI Response Cache with real embedding model
@@ -62,10 +67,17 @@ class AIResponseCache:
             similarity_threshold: Minimum similarity for cache hit (0.0-1.0)
             model_name: sentence-transformers model name
             cache_dir: Directory for caching embeddings on disk
+            index_type: Semantic index mode ("exact", "faiss", "hnswlib")
+            max_entries: Maximum cached queries (oldest evicted first), None = unbounded
         """
         self.similarity_threshold = similarity_threshold
         self.cache: Dict[str, Any] = {}  # embedding_hash → response
         self.embeddings: Dict[str, np.ndarray] = {}  # embedding_hash → embedding vector
+        self.max_entries = max_entries
+
+        # Normalized float32 matrix for batched similarity lookup
+        self.index_type = index_type
+        self.index = SemanticMatrixIndex(index_type=index_type)
 
         # Embedding model configuration
         self.model_name = model_name
@@ -75,6 +87,7 @@ class AIResponseCache:
         # Disk cache for embeddings
         self.cache_dir = Path(cache_dir) if cache_dir else Path("./cache")
         self.embedding_cache_path = self.cache_dir / "embeddings.pkl"
+        self.index_cache_path = self.cache_dir / "embeddings_index.npz"
 
         # Load cached embeddings from disk
         self._load_embedding_cache()
@@ -82,6 +95,9 @@ class AIResponseCache:
         # Lazy load model (only when needed)
         # Model will be loaded on first _get_embedding() call
 
+        # Concurrent get()/set() calls share embedding batches
+        self._batcher: Optional[EmbeddingBatcher] = None
+
     def _load_model(self):
         """Lazy loading of embedding model"""
         if self.model_loaded:
@@ -189,6 +205,9 @@ class AIResponseCache:
         if not self.model_loaded:
             self._load_model()
 
+        max_length = 10000
+        texts = [text[:max_length] for text in texts]
+
         if self.model is not None:
             try:
                 # Batch encode (much faster)
@@ -202,6 +221,12 @@ class AIResponseCache:
         # Fallback
         return [self._get_hash_embedding(t) for t in texts]
 
+    async def _get_embedding_async(self, text: str) -> np.ndarray:
+        """Embedding via the micro-batcher (model runs in a worker thread)"""
+        if self._batcher is None:
+            self._batcher = EmbeddingBatcher(self._get_embeddings_batch, name="ai_response_cache")
+        return await self._batcher.encode(text)
+
     def _load_embedding_cache(self):
         """Load cached embeddings from disk"""
         if self.embedding_cache_path.exists():
@@ -218,12 +243,37 @@ class AIResponseCache:
                 )
                 self.embeddings = {}
 
+        self._load_index()
+
+    def _load_index(self):
+        """Load persisted matrix index, rebuild it if it is missing or stale"""
+        if self.index_cache_path.exists():
+            try:
+                index = SemanticMatrixIndex.load(self.index_cache_path, index_type=self.index_type)
+                if set(index.keys) == set(self.embeddings):
+                    self.index = index
+                    return
+                logger.info("Embedding index out of sync with embedding cache, rebuilding")
+            except Exception as e:
+                logger.error(f"Failed to load embedding index: {e}", extra={"error_type": type(e).__name__})
+
+        self.index = SemanticMatrixIndex(
+            initial_capacity=max(1024, len(self.embeddings)),
+            index_type=self.index_type,
+        )
+        try:
+            self.index.add_many(self.embeddings.items())
+        except ValueError as e:
+            logger.error(f"Failed to build embedding index: {e}", extra={"error_type": type(e).__name__})
+            self.index.clear()
+
     def _save_embedding_cache(self):
         """Save embeddings to disk"""
         try:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
             with open(self.embedding_cache_path, "wb") as f:
                 pickle.dump(self.embeddings, f)
+            self.index.save(self.index_cache_path)
             logger.debug(
                 f"Saved {len(self.embeddings)} embeddings to disk", extra={"cache_path": str(self.embedding_cache_path)}
             )
@@ -240,14 +290,16 @@ class AIResponseCache:
         best_match = None
         best_similarity = 0.0
 
-        for cache_key, cached_embedding in self.embeddings.items():
-            similarity = self._cosine_similarity(query_embedding, cached_embedding)
+        try:
+            top = self.index.search(query_embedding, k=1)
+        except ValueError as e:
+            logger.warning(f"Semantic index lookup failed: {e}")
+            top = []
 
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match = cache_key
+        if top:
+            best_match, best_similarity = top[0]
 
-        if best_similarity >= self.similarity_threshold:
+        if best_match is not None and best_similarity >= self.similarity_threshold:
             logger.info("Cache HIT", extra={"similarity": best_similarity})
             return best_match
 
@@ -294,7 +346,7 @@ class AIResponseCache:
                     lookup_text = query
 
             # Get embedding
-            query_embedding = self._get_embedding(lookup_text)
+            query_embedding = await self._get_embedding_async(lookup_text)
 
             # Find similar
             similar_key = self._find_similar(query_embedding)
@@ -405,7 +457,7 @@ class AIResponseCache:
                     lookup_text = query
 
             # Get embedding
-            embedding = self._get_embedding(lookup_text)
+            embedding = await self._get_embedding_async(lookup_text)
 
             # Create hash key
             cache_key = hashlib.md5(lookup_text.encode()).hexdigest()
@@ -418,6 +470,10 @@ class AIResponseCache:
             }
 
             self.embeddings[cache_key] = embedding
+            self.index.add(cache_key, embedding)
+
+            if self.max_entries is not None:
+                self._evict_overflow()
 
             # Save embeddings to disk (async would be better, but keeping simple)
             self._save_embedding_cache()
@@ -441,6 +497,27 @@ class AIResponseCache:
             )
             # Don't raise - graceful degradation
 
+    def _evict_overflow(self):
+        """Evict oldest entries while the cache is above max_entries"""
+        while len(self.embeddings) > self.max_entries:
+            oldest_key = next(iter(self.embeddings))
+            self.evict(oldest_key)
+
+    def evict(self, cache_key: str) -> bool:
+        """
+        Remove a single cached query
+
+        Args:
+            cache_key: Key returned by the md5 of query + context
+
+        Returns:
+            True if something was removed
+        """
+        removed = self.embeddings.pop(cache_key, None) is not None
+        removed = self.cache.pop(cache_key, None) is not None or removed
+        self.index.remove(cache_key)
+        return removed
+
     def clear(self, clear_disk_cache: bool = False):
         """
         Clear all cached responses
@@ -450,10 +527,13 @@ class AIResponseCache:
         """
         self.cache.clear()
         self.embeddings.clear()
+        self.index.clear()
 
         if clear_disk_cache and self.embedding_cache_path.exists():
             try:
                 self.embedding_cache_path.unlink()
+                if self.index_cache_path.exists():
+                    self.index_cache_path.unlink()
                 logger.info("Cleared disk cache")
             except Exception as e:
                 logger.error(f"Failed to clear disk cache: {e}")
@@ -477,10 +557,14 @@ class AIResponseCache:
             "cached_queries": len(self.cache),
             "cached_embeddings": len(self.embeddings),
             "memory_usage_mb": round(memory_mb, 2),
+            "index_size": len(self.index),
+            "index_type": self.index_type,
+            "index_memory_mb": round(self.index.nbytes / (1024 * 1024), 2),
             "similarity_threshold": self.similarity_threshold,
             "model_name": self.model_name,
             "model_loaded": self.model_loaded,
             "using_real_embeddings": self.model is not None,
+            "embedding_batcher": self._batcher.get_stats() if self._batcher is not None else None,
         }
 
 
@@ -3,12 +3,14 @@
 """
 Configuration Knowledge Base Service
 База знаний по типовым конфигурациям 1С
-Версия: 2.1.0
+Версия: 2.2.0
 
 Улучшения:
 - Input validation
 - Structured logging
 - Улучшена обработка ошибок
+- Полнотекстовый BM25 индекс (patterns, best practices, документация модулей)
+- Поиск паттернов в коде за один проход токенизации
 """
 
 import json
@@ -20,6 +22,7 @@ from typing import Any, Dict, List, Optional
 
 from src.utils.structured_logging import StructuredLogger
 from src.parsers.onec_xml_parser import OneCXMLParser
+from src.services.knowledge_search_index import TOKEN_RE, BM25Index, LiteralMatcher, flatten_text
 
 logger = StructuredLogger(__name__).logger
 
@@ -51,6 +54,12 @@ class ConfigurationKnowledgeBase:
         "ka": "Комплексная автоматизация",
     }
 
+    # Виды индексируемых документов
+    DOCUMENT_KINDS = ("pattern", "best_practice", "module")
+
+    # Служебные поля, не участвующие в полнотекстовом поиске
+    _NON_SEARCHABLE_FIELDS = {"created_at", "updated_at", "added_at"}
+
     def __init__(self, knowledge_base_path: Optional[str] = None):
         """
         Инициализация базы знаний
@@ -73,6 +82,13 @@ class ConfigurationKnowledgeBase:
         # XML парсер для 1C конфигураций
         self.xml_parser = OneCXMLParser()
 
+        # Полнотекстовый индекс: doc_id = (config_key, kind, key)
+        self._search_index = BM25Index()
+        # Конфигурации, которые нужно переиндексировать целиком (лениво, при поиске)
+        self._dirty_configs: set = set()
+        # config_key -> LiteralMatcher по code_example/code_pattern
+        self._code_matchers: Dict[str, LiteralMatcher] = {}
+
         # Загрузка существующих знаний
         self._load_knowledge_base()
 
@@ -85,6 +101,7 @@ class ConfigurationKnowledgeBase:
                 try:
                     with open(config_file, "r", encoding="utf-8") as f:
                         self._cache[config] = json.load(f)
+                    self._invalidate_index(config)
                     logger.info(
                         "Загружена база знаний для конфигурации",
                         extra={"config": config},
@@ -243,26 +260,27 @@ class ConfigurationKnowledgeBase:
         config_data = self._cache[config_key]
 
         # Добавляем или обновляем модуль
-        module_exists = False
+        module_entry = None
         for i, module in enumerate(config_data["modules"]):
             if module.get("name") == module_name:
-                config_data["modules"][i] = {
+                module_entry = {
                     "name": module_name,
                     "documentation": documentation,
                     "updated_at": datetime.now().isoformat(),
                 }
-                module_exists = True
+                config_data["modules"][i] = module_entry
                 break
 
-        if not module_exists:
-            config_data["modules"].append(
-                {
-                    "name": module_name,
-                    "documentation": documentation,
-                    "created_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat(),
-                }
-            )
+        if module_entry is None:
+            module_entry = {
+                "name": module_name,
+                "documentation": documentation,
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+            }
+            config_data["modules"].append(module_entry)
+
+        self._index_document(config_key, "module", module_name, module_entry)
 
         # Сохранение в файл
         return self._save_configuration(config_key)
@@ -293,7 +311,11 @@ class ConfigurationKnowledgeBase:
             "added_at": datetime.now().isoformat(),
         }
 
-        self._cache[config_key]["best_practices"].append(practice_entry)
+        best_practices = self._cache[config_key]["best_practices"]
+        best_practices.append(practice_entry)
+
+        self._index_document(config_key, "best_practice", len(best_practices) - 1, practice_entry)
+        self._code_matchers.pop(config_key, None)
 
         return self._save_configuration(config_key)
 
@@ -355,30 +377,33 @@ class ConfigurationKnowledgeBase:
 
         configs_to_search = [config_name.lower()] if config_name else self.SUPPORTED_CONFIGURATIONS
 
-        for config_key in configs_to_search:
-            if config_key not in self._cache:
+        if query:
+            # Ранжирование по BM25 вместо подстроки в json.dumps(pattern)
+            matches = [
+                (doc_id[0], payload, score)
+                for doc_id, score, payload in self._search(query, configs_to_search, kinds=("pattern",))
+            ]
+        else:
+            matches = [
+                (config_key, pattern, None)
+                for config_key in configs_to_search
+                if config_key in self._cache
+                for pattern in self._cache[config_key].get("common_patterns", [])
+            ]
+
+        for config_key, pattern, score in matches:
+            # Фильтрация по типу
+            if pattern_type and pattern.get("type") != pattern_type:
                 continue
 
-            config_data = self._cache[config_key]
-            patterns = config_data.get("common_patterns", [])
-
-            for pattern in patterns:
-                # Фильтрация по типу
-                if pattern_type and pattern.get("type") != pattern_type:
-                    continue
-
-                # Поиск по запросу
-                if query:
-                    search_text = json.dumps(pattern, ensure_ascii=False).lower()
-                    if query.lower() not in search_text:
-                        continue
-
-                pattern_result = {
-                    **pattern,
-                    "configuration": config_key,
-                    "configuration_name": config_data.get("name", config_key),
-                }
-                results.append(pattern_result)
+            pattern_result = {
+                **pattern,
+                "configuration": config_key,
+                "configuration_name": self._cache[config_key].get("name", config_key),
+            }
+            if score is not None:
+                pattern_result["score"] = round(score, 4)
+            results.append(pattern_result)
 
         return results
 
@@ -397,45 +422,144 @@ class ConfigurationKnowledgeBase:
 
         configs_to_search = [config_name.lower()] if config_name else self.SUPPORTED_CONFIGURATIONS
 
+        # Код приводится к нижнему регистру и токенизируется один раз для всех правил
+        code_lower = code.lower()
+        code_tokens = set(TOKEN_RE.findall(code_lower))
+
         for config_key in configs_to_search:
             if config_key not in self._cache:
                 continue
 
-            config_data = self._cache[config_key]
-
-            # Поиск паттернов в коде
-            patterns = config_data.get("common_patterns", [])
-            for pattern in patterns:
-                pattern_code = pattern.get("code_example", "")
-                if pattern_code and pattern_code.lower() in code.lower():
+            for kind, entry in self._get_code_matcher(config_key).find(code_lower, code_tokens):
+                if kind == "pattern":
                     recommendations.append(
                         {
                             "type": "pattern_match",
                             "severity": "info",
-                            "message": f"Обнаружен паттерн: {pattern.get('name', 'Unknown')}",
-                            "pattern": pattern,
+                            "message": f"Обнаружен паттерн: {entry.get('name', 'Unknown')}",
+                            "pattern": entry,
                             "configuration": config_key,
-                            "suggestion": pattern.get("recommendation", ""),
+                            "suggestion": entry.get("recommendation", ""),
                         }
                     )
-
-            # Проверка best practices
-            best_practices = config_data.get("best_practices", [])
-            for practice in best_practices:
-                if practice.get("code_pattern") and practice["code_pattern"].lower() in code.lower():
+                else:
                     recommendations.append(
                         {
                             "type": "best_practice",
-                            "severity": practice.get("severity", "info"),
-                            "message": practice.get("title", "Best practice"),
-                            "description": practice.get("description", ""),
+                            "severity": entry.get("severity", "info"),
+                            "message": entry.get("title", "Best practice"),
+                            "description": entry.get("description", ""),
                             "configuration": config_key,
-                            "suggestion": practice.get("recommendation", ""),
+                            "suggestion": entry.get("recommendation", ""),
                         }
                     )
 
         return recommendations
 
+    def search(
+        self,
+        query: str,
+        config_name: Optional[str] = None,
+        kinds: Optional[List[str]] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Полнотекстовый поиск (BM25) по паттернам, best practices и документации модулей
+
+        Args:
+            query: Поисковый запрос
+            config_name: Название конфигурации (опционально)
+            kinds: Виды документов: pattern, best_practice, module (по умолчанию все)
+            limit: Максимум результатов
+
+        Returns:
+            Список результатов по убыванию релевантности
+        """
+        if not query or not isinstance(query, str):
+            return []
+
+        configs_to_search = (
+            [re.sub(r"[^a-zA-Z0-9_-]", "", config_name).lower()] if config_name else self.SUPPORTED_CONFIGURATIONS
+        )
+        hits = self._search(query[:1000], configs_to_search, kinds=tuple(kinds or self.DOCUMENT_KINDS), limit=limit)
+
+        return [
+            {
+                "kind": kind,
+                "key": key,
+                "score": round(score, 4),
+                "configuration": config_key,
+                "configuration_name": self._cache[config_key].get("name", config_key),
+                "item": payload,
+            }
+            for (config_key, kind, key), score, payload in hits
+        ]
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Статистика полнотекстового индекса"""
+        self._ensure_index()
+        return {
+            **self._search_index.get_stats(),
+            "code_matchers": {config_key: len(matcher) for config_key, matcher in self._code_matchers.items()},
+        }
+
+    def _search(self, query: str, configs: List[str], kinds: tuple, limit: Optional[int] = None) -> List[tuple]:
+        self._ensure_index()
+        configs = set(configs)
+        return self._search_index.search(
+            query,
+            limit=limit,
+            doc_filter=lambda doc_id, _: doc_id[0] in configs and doc_id[1] in kinds and doc_id[0] in self._cache,
+        )
+
+    def _invalidate_index(self, config_key: str) -> None:
+        """Пометить конфигурацию для полной переиндексации (после массовой загрузки)"""
+        self._dirty_configs.add(config_key)
+        self._code_matchers.pop(config_key, None)
+
+    def _ensure_index(self) -> None:
+        """Переиндексировать помеченные конфигурации"""
+        while self._dirty_configs:
+            self._reindex_configuration(self._dirty_configs.pop())
+
+    def _reindex_configuration(self, config_key: str) -> None:
+        self._search_index.remove_where(lambda doc_id: doc_id[0] == config_key)
+        config_data = self._cache.get(config_key) or {}
+
+        for position, pattern in enumerate(config_data.get("common_patterns", [])):
+            self._index_document(config_key, "pattern", position, pattern)
+        for position, practice in enumerate(config_data.get("best_practices", [])):
+            self._index_document(config_key, "best_practice", position, practice)
+        for module in config_data.get("modules", []):
+            if module.get("name"):
+                self._index_document(config_key, "module", module["name"], module)
+
+        logger.debug(
+            "Переиндексирована конфигурация",
+            extra={"config_key": config_key, "documents": len(self._search_index)},
+        )
+
+    def _index_document(self, config_key: str, kind: str, key: Any, entry: Dict[str, Any]) -> None:
+        """Добавить/обновить один документ в индексе"""
+        searchable = {k: v for k, v in entry.items() if k not in self._NON_SEARCHABLE_FIELDS}
+        self._search_index.add((config_key, kind, key), flatten_text(searchable), payload=entry)
+
+    def _get_code_matcher(self, config_key: str) -> LiteralMatcher:
+        """LiteralMatcher по code_example паттернов и code_pattern best practices"""
+        matcher = self._code_matchers.get(config_key)
+        if matcher is None:
+            config_data = self._cache.get(config_key, {})
+            literals = [
+                (pattern.get("code_example") or "", ("pattern", pattern))
+                for pattern in config_data.get("common_patterns", [])
+            ]
+            literals += [
+                (practice.get("code_pattern") or "", ("best_practice", practice))
+                for practice in config_data.get("best_practices", [])
+            ]
+            matcher = self._code_matchers[config_key] = LiteralMatcher(literals)
+        return matcher
+
     def _save_configuration(self, config_key: str) -> bool:
         """Сохранение конфигурации в файл"""
         try:
@@ -558,6 +682,7 @@ class ConfigurationKnowledgeBase:
 
                 if config_name in self.SUPPORTED_CONFIGURATIONS:
                     self._cache[config_name] = data
+                    self._invalidate_index(config_name)
                     loaded_count += 1
                     logger.info("Загружена конфигурация", extra={"config_name": config_name})
 
@@ -679,15 +804,15 @@ class ConfigurationKnowledgeBase:
             # Обновляем существующий
             config["modules"].remove(existing_module)
 
-        config["modules"].append(
-            {
-                "name": module_data["name"],
-                "type": module_data["type"],
-                "procedures": module_data.get("procedures", []),
-                "server": module_data.get("server", False),
-                "client": module_data.get("client", False),
-            }
-        )
+        module_entry = {
+            "name": module_data["name"],
+            "type": module_data["type"],
+            "procedures": module_data.get("procedures", []),
+            "server": module_data.get("server", False),
+            "client": module_data.get("client", False),
+        }
+        config["modules"].append(module_entry)
+        self._index_document(config_key, "module", module_entry["name"], module_entry)
 
         self._save_configuration(config_key)
 
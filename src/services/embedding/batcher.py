@@ -0,0 +1,235 @@
+# [NEXUS IDENTITY] ID: -6620193847105528014 | DATE: 2026-10-17
+
+"""
+Dynamic micro-batching for embedding requests.
+
+Concurrent encode() calls are queued and collected into one batch within a
+short window (max_wait_ms). The batch limit comes from PredictiveBatchOptimizer
+and the memory estimate of MemoryAwareBatcher. The model runs in a worker
+thread (or a caller-provided executor), and every caller gets its own
+future. Identical texts in one batch are encoded once.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.services.advanced_optimizations import MemoryAwareBatcher, PredictiveBatchOptimizer
+from src.utils.structured_logging import StructuredLogger
+
+logger = StructuredLogger(__name__).logger
+
+
+@dataclass
+class _PendingRequest:
+    text: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class EmbeddingBatcher:
+    """
+    Asyncio micro-batcher on top of a synchronous batch encode function.
+
+    Example:
+        >>> batcher = EmbeddingBatcher(service.encode, max_wait_ms=5)
+        >>> vectors = await asyncio.gather(*(batcher.encode(t) for t in texts))
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Sequence[Any]],
+        max_wait_ms: float = 5.0,
+        max_batch_size: int = 256,
+        max_memory_mb: float = 1024.0,
+        executor: Optional[Executor] = None,
+        predictor: Optional[PredictiveBatchOptimizer] = None,
+        name: str = "embeddings",
+    ):
+        """
+        Args:
+            encode_fn: Синхронная функция list[str] -> list[vector] (тот же порядок)
+            max_wait_ms: Окно сбора батча после первого запроса
+            max_batch_size: Верхняя граница размера батча
+            max_memory_mb: Бюджет памяти батча для MemoryAwareBatcher/предиктора
+            executor: Пул для вызова модели (по умолчанию один поток)
+            predictor: Предиктор размера батча
+        """
+        self.encode_fn = encode_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_memory_mb = max_memory_mb
+        self.name = name
+
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-batcher")
+        self._predictor = predictor or PredictiveBatchOptimizer()
+        self._memory = MemoryAwareBatcher(max_memory_mb=max_memory_mb)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._carry: Optional[_PendingRequest] = None
+        self._avg_text_length = 0.0
+        self._batch_memory_mb = 0.0
+
+        self._queue_delays: Deque[float] = deque(maxlen=1000)
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "batches": 0,
+            "texts_encoded": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "encode_seconds": 0.0,
+            "max_batch_size": 0,
+        }
+
+    # ------------------------------------------------------------------ API
+
+    async def encode(self, text: str) -> Any:
+        """Embedding одного текста (объединяется с конкурентными запросами)"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self.stats["requests"] += 1
+        self._queue.put_nowait(_PendingRequest(text, future))
+        return await future
+
+    async def encode_many(self, texts: Sequence[str]) -> List[Any]:
+        """Embeddings нескольких текстов (порядок сохраняется)"""
+        return list(await asyncio.gather(*(self.encode(text) for text in texts)))
+
+    async def close(self) -> None:
+        """Остановить worker и освободить пул"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики: задержка в очереди, размер батча, пропускная способность"""
+        delays = np.array(self._queue_delays) * 1000.0 if self._queue_delays else np.zeros(1)
+        batches = self.stats["batches"]
+        return {
+            "name": self.name,
+            **self.stats,
+            "avg_batch_size": self.stats["texts_encoded"] / batches if batches else 0.0,
+            "queue_delay_ms_avg": float(delays.mean()),
+            "queue_delay_ms_p95": float(np.percentile(delays, 95)),
+            "throughput_texts_per_sec": (
+                self.stats["texts_encoded"] / self.stats["encode_seconds"] if self.stats["encode_seconds"] else 0.0
+            ),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    # ------------------------------------------------------------- internals
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Новый event loop - очередь привязана к циклу
+            self._loop = loop
+            self._carry = None
+            self._queue = asyncio.Queue()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    def _batch_limit(self) -> int:
+        predicted = self._predictor.predict_optimal_batch_size(int(self._avg_text_length), self.max_memory_mb)
+        return max(1, min(self.max_batch_size, predicted))
+
+    async def _collect(self, first: _PendingRequest) -> List[_PendingRequest]:
+        """Собрать батч: до окна max_wait, лимита размера или бюджета памяти"""
+        batch = [first]
+        self._memory.add_text(first.text)
+        self._batch_memory_mb = self._memory.current_memory
+        limit = self._batch_limit()
+        deadline = time.perf_counter() + self.max_wait
+
+        try:
+            while len(batch) < limit:
+                if self._queue.empty():
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    request = self._queue.get_nowait()
+
+                if self._memory.add_text(request.text) is not None:
+                    # Не помещается в бюджет памяти - откроет следующий батч
+                    self._carry = request
+                    break
+                batch.append(request)
+                self._batch_memory_mb = self._memory.current_memory
+        finally:
+            self._memory.flush()
+        return batch
+
+    async def _run(self) -> None:
+        # Worker живет, пока есть запросы: после опустошения очереди завершается,
+        # следующий encode() запустит новый (не остается висящих задач)
+        while self._carry is not None or not self._queue.empty():
+            first = self._carry or self._queue.get_nowait()
+            self._carry = None
+            batch = await self._collect(first)
+            await self._encode_batch(batch)
+
+    async def _encode_batch(self, batch: List[_PendingRequest]) -> None:
+        started = time.perf_counter()
+        for request in batch:
+            self._queue_delays.append(started - request.enqueued_at)
+
+        # Одинаковые тексты кодируются один раз
+        waiters: Dict[str, List[asyncio.Future]] = {}
+        for request in batch:
+            waiters.setdefault(request.text, []).append(request.future)
+        texts = list(waiters)
+        self.stats["coalesced"] += len(batch) - len(texts)
+
+        try:
+            vectors = await self._loop.run_in_executor(self._executor, self.encode_fn, texts)
+            if vectors is None or len(vectors) != len(texts):
+                received = 0 if vectors is None else len(vectors)
+                raise RuntimeError(f"Embedding batch failed: got {received} vectors for {len(texts)} texts")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Embedding batch error: {e}", extra={"batch_size": len(texts)})
+            for futures in waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        elapsed = time.perf_counter() - started
+        for text, vector in zip(texts, vectors):
+            for future in waiters[text]:
+                if not future.done():
+                    future.set_result(vector)
+
+        avg_length = sum(len(text) for text in texts) / len(texts)
+        if self.stats["batches"]:
+            self._avg_text_length = 0.9 * self._avg_text_length + 0.1 * avg_length
+        else:
+            self._avg_text_length = avg_length
+        self._predictor.update_model(int(avg_length), len(texts), elapsed, self._batch_memory_mb)
+
+        self.stats["batches"] += 1
+        self.stats["texts_encoded"] += len(texts)
+        self.stats["encode_seconds"] += elapsed
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(texts))
+
+        logger.debug(
+            "Embedding batch encoded",
+            extra={"batch_size": len(texts), "requests": len(batch), "duration_ms": round(elapsed * 1000, 2)},
+        )
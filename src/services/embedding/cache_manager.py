@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional, Union
 
 import numpy as np
 
+from src.services.semantic_index import SemanticMatrixIndex
 from src.utils.structured_logging import StructuredLogger
 
 logger = StructuredLogger(__name__).logger
@@ -59,6 +60,8 @@ class CacheManager:
             os.getenv("EMBEDDING_SEMANTIC_THRESHOLD", "0.95")
         )
         self._semantic_cache: Dict[str, List[float]] = {}  # text_hash -> embedding
+        # Matrix over the same entries: one matrix-vector product per lookup
+        self._semantic_index = SemanticMatrixIndex()
 
         # Advanced components (placeholders for now, injected via setters if needed)
         self._adaptive_quantizer = None
@@ -188,18 +191,12 @@ class CacheManager:
             if query_embedding is None:
                 return None
 
-            best_similarity = 0.0
-            best_embedding = None
-
-            for cached_embedding in self._semantic_cache.values():
-                similarity = self._cosine_similarity(query_embedding, cached_embedding)
-                if similarity > best_similarity:
-                    best_similarity = similarity
-                    best_embedding = cached_embedding
-
-            if best_similarity >= self._semantic_similarity_threshold:
-                logger.debug(f"Semantic cache hit: {best_similarity:.3f}")
-                return best_embedding
+            matches = self._semantic_index.search(query_embedding, k=1)
+            if matches:
+                best_key, best_similarity = matches[0]
+                if best_similarity >= self._semantic_similarity_threshold:
+                    logger.debug(f"Semantic cache hit: {best_similarity:.3f}")
+                    return self._semantic_cache[best_key]
 
         except Exception as e:
             logger.warning(f"Error in semantic cache lookup: {e}")
@@ -223,11 +220,13 @@ class CacheManager:
             ):
                 embedding = embedding[0]
 
-            if len(self._semantic_cache) >= max_size:
+            text_hash = hashlib.md5(text.encode()).hexdigest()
+            if len(self._semantic_cache) >= max_size and text_hash not in self._semantic_cache:
                 oldest_key = next(iter(self._semantic_cache))
                 del self._semantic_cache[oldest_key]
+                self._semantic_index.remove(oldest_key)
 
-            text_hash = hashlib.md5(text.encode()).hexdigest()
+            self._semantic_index.add(text_hash, embedding)
             self._semantic_cache[text_hash] = embedding
 
             if self._semantic_cache_ann:
@@ -0,0 +1,341 @@
+# [NEXUS IDENTITY] ID: 2744198052617386521 | DATE: 2026-10-17
+
+"""
+Persistent embedding store.
+
+On-disk, memory-mapped storage of embeddings keyed by content hash, one
+directory per model. Vectors are kept as compact float16 or int8 records
+(int8 via AdaptiveQuantizer, per-record scale), so re-indexing a
+configuration only has to encode texts whose content actually changed.
+
+Layout of <root>/<model>/:
+- vectors.bin    fixed-size records, np.memmap, grows by doubling
+- manifest.json  dimension, dtype, hash -> [slot, scale] in LRU order
+
+The manifest is loaded lazily on first access and written by flush()
+(also every `autoflush_every` puts, when a put finds the last flush older
+than `autoflush_seconds`, on close() and at interpreter exit). Total size
+of live records is bounded by `max_bytes`, least recently used records are
+evicted; their slots are reused only after a manifest without them has been
+written, so a crash never leaves the manifest pointing at overwritten data.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.services.advanced_optimizations import AdaptiveQuantizer
+from src.utils.structured_logging import StructuredLogger
+
+logger = StructuredLogger(__name__).logger
+
+SUPPORTED_DTYPES = ("float16", "int8")
+
+
+class EmbeddingStore:
+    """
+    Memory-mapped embedding store keyed by sha256(text) for a single model.
+
+    Example:
+        >>> store = EmbeddingStore("/var/cache/embeddings", model_name="all-MiniLM-L6-v2")
+        >>> cached = store.get_many(texts)
+        >>> missing = [t for t, v in zip(texts, cached) if v is None]
+        >>> store.put_many(missing, model.encode(missing))
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        model_name: str,
+        dtype: str = "float16",
+        max_bytes: int = 512 * 1024 * 1024,
+        autoflush_every: int = 1000,
+        autoflush_seconds: float = 5.0,
+        quantizer: Optional[AdaptiveQuantizer] = None,
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype} (expected one of {SUPPORTED_DTYPES})")
+
+        self.model_name = model_name
+        self.directory = Path(root) / re.sub(r"[^\w.-]+", "_", model_name)
+        self.dtype = dtype
+        self.max_bytes = max_bytes
+        self.autoflush_every = autoflush_every
+        self.autoflush_seconds = autoflush_seconds
+        if quantizer is None and dtype == "int8":
+            quantizer = AdaptiveQuantizer(dtype="int8", auto_recalibrate=False)
+        self._quantizer = quantizer
+
+        self._lock = Lock()
+        self._loaded = False
+        self.dimension: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        # hash -> (slot, scale), order = LRU (oldest first)
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._free_slots: List[int] = []
+        # slots evicted since the last flush, still referenced by the manifest on disk
+        self._pending_free: List[int] = []
+        self._next_slot = 0
+        self._dirty = 0
+        self._last_flush = time.monotonic()
+
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+
+    # ---------------------------------------------------------------- keys
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Ключ записи: sha256 содержимого"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / "vectors.bin"
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    @property
+    def record_bytes(self) -> int:
+        return (self.dimension or 0) * np.dtype(self.dtype).itemsize
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by live records"""
+        return len(self._entries) * self.record_bytes
+
+    # ------------------------------------------------------------- storage
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self._manifest_path.exists() or not self._vectors_path.exists():
+            return
+
+        try:
+            manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("dtype") != self.dtype:
+                logger.warning(
+                    "Embedding store dtype changed, starting empty",
+                    extra={"stored": manifest.get("dtype"), "requested": self.dtype},
+                )
+                return
+            self.dimension = manifest["dimension"]
+            capacity = self._vectors_path.stat().st_size // self.record_bytes
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dimension)
+            )
+            self._entries = OrderedDict((key, (slot, scale)) for key, slot, scale in manifest["entries"])
+            self._next_slot = manifest["next_slot"]
+            used = {slot for slot, _ in self._entries.values()}
+            self._free_slots = [slot for slot in range(self._next_slot) if slot not in used]
+            logger.info(
+                "Loaded embedding store",
+                extra={"model": self.model_name, "entries": len(self._entries), "path": str(self.directory)},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load embedding store, starting empty: {e}")
+            self._vectors = None
+            self._entries.clear()
+            self._free_slots = []
+            self._next_slot = 0
+
+    def _allocate(self, dimension: int, capacity: int) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        if not self._vectors_path.exists():
+            self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="w+", shape=(capacity, dimension))
+            return
+
+        # Never truncate an existing file: another store instance may still own its records
+        capacity = max(capacity, self._vectors_path.stat().st_size // self.record_bytes)
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(capacity * self.record_bytes)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, dimension)
+        )
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(min_capacity, 2 * len(self._vectors))
+        self._vectors.flush()
+        del self._vectors
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(capacity * self.record_bytes)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dimension)
+        )
+
+    def _take_slot(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+        slot = self._next_slot
+        self._next_slot += 1
+        if slot >= len(self._vectors):
+            self._grow(slot + 1)
+        return slot
+
+    def _evict_overflow(self, reserve: int = 0) -> None:
+        """Evict LRU records until `reserve` more records fit into max_bytes"""
+        while self._entries and self.nbytes + reserve * self.record_bytes > self.max_bytes:
+            _, (slot, _) = self._entries.popitem(last=False)
+            self._pending_free.append(slot)
+            self.stats["evictions"] += 1
+
+    def _encode_record(self, vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        if self.dtype == "float16":
+            return vector.astype(np.float16), 1.0
+        quantized, scale = self._quantizer.quantize(vector.tolist())
+        return np.asarray(quantized, dtype=np.int8), float(scale)
+
+    # ----------------------------------------------------------------- API
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Embedding для текста или None"""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Bulk lookup.
+
+        Returns:
+            float32 vectors (None for misses), in the order of texts
+        """
+        keys = [self.content_hash(text) for text in texts]
+        with self._lock:
+            self._ensure_loaded()
+            found = [(i, self._entries.get(key)) for i, key in enumerate(keys)]
+            hits = [(i, entry) for i, entry in found if entry is not None]
+            for i, _ in hits:
+                self._entries.move_to_end(keys[i])
+            self.stats["hits"] += len(hits)
+            self.stats["misses"] += len(keys) - len(hits)
+
+            results: List[Optional[np.ndarray]] = [None] * len(keys)
+            if hits:
+                slots = np.fromiter((slot for _, (slot, _) in hits), dtype=np.int64, count=len(hits))
+                scales = np.fromiter((scale for _, (_, scale) in hits), dtype=np.float32, count=len(hits))
+                rows = self._vectors[slots].astype(np.float32) / scales[:, None]
+                for (i, _), row in zip(hits, rows):
+                    results[i] = row
+            return results
+
+    def put(self, text: str, vector: Any) -> None:
+        """Сохранить embedding текста"""
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: Sequence[str], vectors: Any) -> None:
+        """Bulk insert (existing keys are overwritten)"""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if len(texts) != len(matrix):
+            raise ValueError(f"Got {len(texts)} texts for {len(matrix)} vectors")
+        if not len(texts):
+            return
+
+        with self._lock:
+            self._ensure_loaded()
+            if self._vectors is None:
+                self._allocate(matrix.shape[1], max(1024, len(texts)))
+            if matrix.shape[1] != self.dimension:
+                raise ValueError(f"Embedding dimension mismatch: {matrix.shape[1]} != {self.dimension}")
+
+            for text, vector in zip(texts, matrix):
+                key = self.content_hash(text)
+                record, scale = self._encode_record(vector)
+                entry = self._entries.pop(key, None)
+                if entry is None:
+                    self._evict_overflow(reserve=1)
+                slot = entry[0] if entry else self._take_slot()
+                self._vectors[slot] = record
+                self._entries[key] = (slot, scale)
+
+            self.stats["puts"] += len(texts)
+            self._dirty += len(texts)
+            if (
+                self._dirty >= self.autoflush_every
+                or time.monotonic() - self._last_flush >= self.autoflush_seconds
+            ):
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Записать данные и manifest на диск"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        manifest = {
+            "model": self.model_name,
+            "dimension": self.dimension,
+            "dtype": self.dtype,
+            "next_slot": self._next_slot,
+            "entries": [[key, slot, scale] for key, (slot, scale) in self._entries.items()],
+        }
+        tmp_path = self._manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_path, self._manifest_path)
+        self._dirty = 0
+        self._last_flush = time.monotonic()
+        self._free_slots.extend(self._pending_free)
+        self._pending_free.clear()
+
+    def close(self) -> None:
+        """Flush и освобождение memmap"""
+        with self._lock:
+            self._flush_locked()
+            self._vectors = None
+            self._loaded = False
+            self._entries.clear()
+            self._free_slots = []
+            self._pending_free = []
+            self._next_slot = 0
+
+    def __contains__(self, text: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return self.content_hash(text) in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "model": self.model_name,
+                "dtype": self.dtype,
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+def _flush_at_exit(ref: "weakref.ReferenceType[EmbeddingStore]") -> None:
+    store = ref()
+    if store is None:
+        return
+    try:
+        store.flush()
+    except Exception as e:
+        logger.warning(f"Failed to flush embedding store at exit: {e}")
@@ -1,3 +1,4 @@
+import os
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List, Optional, Union
@@ -6,7 +7,9 @@ from src.utils.circuit_breaker import CircuitState
 from src.utils.structured_logging import StructuredLogger
 from src.config import USE_NESTED_LEARNING
 
+from .batcher import EmbeddingBatcher
 from .cache_manager import CacheManager
+from .embedding_store import EmbeddingStore
 from .model_manager import ModelManager
 from .resource_manager import ResourceManager
 
@@ -20,14 +23,34 @@ class EmbeddingService:
     With Nested Learning support for continual learning (optional).
     """
 
-    def __init__(self, model_name: str = None, hybrid_mode: bool = None, redis_client=None):
+    def __init__(
+        self,
+        model_name: str = None,
+        hybrid_mode: bool = None,
+        redis_client=None,
+        embedding_store: Optional[EmbeddingStore] = None,
+    ):
         self.model_manager = ModelManager(model_name, hybrid_mode)
         self.cache_manager = CacheManager(redis_client)
         self.resource_manager = ResourceManager()
 
+        # Persistent per-text store (EMBEDDING_STORE_DIR enables it)
+        self.embedding_store = embedding_store
+        store_dir = os.getenv("EMBEDDING_STORE_DIR")
+        if self.embedding_store is None and store_dir:
+            self.embedding_store = EmbeddingStore(
+                store_dir,
+                model_name=self.model_manager.model_name,
+                dtype=os.getenv("EMBEDDING_STORE_DTYPE", "float16"),
+                max_bytes=int(os.getenv("EMBEDDING_STORE_MAX_MB", "512")) * 1024 * 1024,
+            )
+
         self.hybrid_mode = self.model_manager.hybrid_mode
         self._executor = ThreadPoolExecutor(max_workers=2) if self.hybrid_mode else None
 
+        # Micro-batching for concurrent async callers (created lazily)
+        self._batcher: Optional[EmbeddingBatcher] = None
+
         # Nested Learning integration (optional)
         self._nested = None
         if USE_NESTED_LEARNING:
@@ -84,7 +107,9 @@ class EmbeddingService:
 
         # Encode
         result = []
-        if self.hybrid_mode and isinstance(text, list) and len(text) > 1:
+        if self.embedding_store is not None:
+            result = self._encode_with_store(text, batch_size, show_progress, use_device)
+        elif self.hybrid_mode and isinstance(text, list) and len(text) > 1:
             result = self._encode_hybrid(text, batch_size, show_progress)
         else:
             result = self._encode_single(text, batch_size, show_progress, use_device)
@@ -99,6 +124,31 @@ class EmbeddingService:
 
         return result
 
+    def _encode_with_store(self, text, batch_size, show_progress, use_device):
+        """Encode only texts missing from the persistent store"""
+        texts = [text] if isinstance(text, str) else list(text)
+        cached = self.embedding_store.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            if self.hybrid_mode and len(missing_texts) > 1:
+                encoded = self._encode_hybrid(missing_texts, batch_size, show_progress)
+            else:
+                encoded = self._encode_single(missing_texts, batch_size, show_progress, use_device)
+            if len(encoded) != len(missing_texts) or any(vector is None for vector in encoded):
+                return []
+            self.embedding_store.put_many(missing_texts, encoded)
+            for i, vector in zip(missing, encoded):
+                cached[i] = vector
+
+        logger.debug(
+            "Embedding store lookup",
+            extra={"requested": len(texts), "encoded": len(missing)},
+        )
+        result = [vector.tolist() if hasattr(vector, "tolist") else list(vector) for vector in cached]
+        return result[0] if isinstance(text, str) else result
+
     def _encode_single(self, text, batch_size, show_progress, use_device):
         device = use_device or ("gpu" if self.model_manager.model_gpu else "cpu")
         model = self.model_manager.get_model(device)
@@ -172,8 +222,31 @@ class EmbeddingService:
 
         return results
 
+    @property
+    def batcher(self) -> EmbeddingBatcher:
+        """Micro-batcher over encode() (EMBEDDING_BATCH_WINDOW_MS, EMBEDDING_BATCH_MAX_SIZE)"""
+        if self._batcher is None:
+            self._batcher = EmbeddingBatcher(
+                self.encode,
+                max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")),
+                max_batch_size=int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "256")),
+            )
+        return self._batcher
+
+    async def encode_async(self, text: str) -> List[float]:
+        """
+        Encode one text without blocking the event loop.
+
+        Concurrent calls are collected into shared batches.
+        """
+        if self._nested:
+            return self.encode(text)
+        return await self.batcher.encode(text)
+
     async def generate_embedding(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
-        return self.encode(text)
+        if isinstance(text, str):
+            return await self.encode_async(text)
+        return await self.batcher.encode_many(text)
 
     def encode_code(self, code: str) -> List[float]:
         # Simple preprocessing
@@ -186,9 +259,19 @@ class EmbeddingService:
         parts = [func_data.get("name", ""), func_data.get("description", "")]
         return self.encode(" ".join(parts))
 
+    async def close(self) -> None:
+        """Stop the batcher and persist the embedding store"""
+        if self._batcher is not None:
+            await self._batcher.close()
+            self._batcher = None
+        if self.embedding_store is not None:
+            self.embedding_store.close()
+
     def health_check(self) -> Dict[str, Any]:
         return {
             "status": "healthy",
             "stats": self.resource_manager.get_stats(),
             "cache": self.cache_manager.get_stats(),
+            "store": self.embedding_store.get_stats() if self.embedding_store is not None else None,
+            "batcher": self._batcher.get_stats() if self._batcher is not None else None,
         }
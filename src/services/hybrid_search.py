@@ -103,7 +103,11 @@ class HybridSearchService:
                 )
             else:
                 try:
-                    query_vector = self.embeddings.encode(sanitized_query)
+                    if getattr(type(self.embeddings), "encode_async", None) is not None:
+                        # Micro-batched with concurrent searches, off the event loop
+                        query_vector = await self.embeddings.encode_async(sanitized_query)
+                    else:
+                        query_vector = self.embeddings.encode(sanitized_query)
                 except Exception as encode_error:  # noqa: BLE001
                     logger.error(
                         "Embedding generation failed",
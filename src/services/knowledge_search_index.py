@@ -0,0 +1,249 @@
+# [NEXUS IDENTITY] ID: 7415093826640179352 | DATE: 2026-10-17
+
+"""
+Full-text index for ConfigurationKnowledgeBase.
+
+- BM25Index: incremental tokenized inverted index with BM25 ranking.
+  Documents can be added, replaced and removed one at a time.
+- LiteralMatcher: finds which of many code literals occur in a text.
+  The text is tokenized once, candidate literals are picked through an
+  inverted index keyed by one of their interior tokens, and only the
+  candidates are checked with a substring test.
+"""
+
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens (кириллица, латиница, цифры, '_')"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def flatten_text(value: Any) -> str:
+    """All string/number values of a JSON-like object joined into one text"""
+    parts: List[str] = []
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, dict):
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, (list, tuple)):
+            stack.extend(reversed(item))
+        elif isinstance(item, (int, float)) and not isinstance(item, bool):
+            parts.append(str(item))
+    return " ".join(parts)
+
+
+class BM25Index:
+    """
+    Incremental inverted index with Okapi BM25 ranking.
+
+    Example:
+        >>> index = BM25Index()
+        >>> index.add(("erp", "pattern", 0), "Проведение документа", payload=pattern)
+        >>> index.search("проведение")
+        [(("erp", "pattern", 0), 0.28, pattern)]
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_prefix_expansions: int = 50):
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_expansions = max_prefix_expansions
+
+        # term -> {doc_id: tf}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_lengths: Dict[Hashable, int] = {}
+        self._payloads: Dict[Hashable, Any] = {}
+        self._total_length = 0
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_terms
+
+    @property
+    def avg_doc_length(self) -> float:
+        return self._total_length / len(self._doc_terms) if self._doc_terms else 0.0
+
+    def add(self, doc_id: Hashable, text: str, payload: Any = None) -> None:
+        """Add or replace a document"""
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize(text))
+        self._doc_terms[doc_id] = terms
+        self._payloads[doc_id] = payload
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[doc_id]
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[doc_id] = tf
+
+    def remove(self, doc_id: Hashable) -> bool:
+        """Remove a document; False if it was not indexed"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        self._payloads.pop(doc_id, None)
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+        return True
+
+    def remove_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove all documents whose id matches predicate"""
+        doc_ids = [doc_id for doc_id in self._doc_terms if predicate(doc_id)]
+        for doc_id in doc_ids:
+            self.remove(doc_id)
+        return len(doc_ids)
+
+    def _expand(self, term: str) -> List[str]:
+        """Term itself if indexed, otherwise indexed terms starting with it"""
+        if term in self._postings:
+            return [term]
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        expanded = []
+        for candidate in self._vocabulary[bisect_left(self._vocabulary, term) :]:
+            if not candidate.startswith(term) or len(expanded) >= self.max_prefix_expansions:
+                break
+            expanded.append(candidate)
+        return expanded
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        doc_filter: Optional[Callable[[Hashable, Any], bool]] = None,
+        prefix: bool = True,
+    ) -> List[Tuple[Hashable, float, Any]]:
+        """
+        Rank documents for a query.
+
+        Args:
+            query: Текст запроса
+            limit: Максимум результатов
+            doc_filter: (doc_id, payload) -> bool
+            prefix: Незнакомые термы расширяются по префиксу ("провед" -> "проведение")
+
+        Returns:
+            [(doc_id, score, payload)] по убыванию score
+        """
+        if not self._doc_terms:
+            return []
+
+        terms: Set[str] = set()
+        for term in tokenize(query):
+            terms.update(self._expand(term) if prefix else ([term] if term in self._postings else []))
+
+        n_docs = len(self._doc_terms)
+        avg_length = self.avg_doc_length or 1.0
+        scores: Dict[Hashable, float] = {}
+        for term in terms:
+            postings = self._postings[term]
+            idf = math.log(1.0 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        results = []
+        for doc_id, score in ranked:
+            payload = self._payloads[doc_id]
+            if doc_filter is not None and not doc_filter(doc_id, payload):
+                continue
+            results.append((doc_id, score, payload))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._doc_terms),
+            "terms": len(self._postings),
+            "avg_doc_length": round(self.avg_doc_length, 2),
+        }
+
+
+class LiteralMatcher:
+    """
+    Which literals occur (as case-insensitive substrings) in a text.
+
+    A literal occurring in the text implies that each of its interior tokens
+    (bounded by non-word characters inside the literal) is a token of the
+    text, so the text's token set selects the candidates exactly.
+    """
+
+    def __init__(self, literals: Iterable[Tuple[str, Any]]):
+        """
+        Args:
+            literals: (literal, payload) в порядке, в котором нужны результаты
+        """
+        self._entries: List[Tuple[str, Any]] = []
+        self._by_token: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+
+        for literal, payload in literals:
+            literal = literal.lower()
+            if not literal:
+                continue
+            index = len(self._entries)
+            self._entries.append((literal, payload))
+            key = self._key_token(literal)
+            if key is None:
+                self._always.append(index)
+            else:
+                self._by_token.setdefault(key, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key_token(literal: str) -> Optional[str]:
+        """Longest token of the literal that can't be cut off by the text around it"""
+        interior = [
+            m.group()
+            for m in TOKEN_RE.finditer(literal)
+            if m.start() > 0 and m.end() < len(literal)
+        ]
+        return max(interior, key=len) if interior else None
+
+    def find(self, text_lower: str, tokens: Optional[Set[str]] = None) -> List[Any]:
+        """
+        Payloads of literals found in text.
+
+        Args:
+            text_lower: Текст в нижнем регистре
+            tokens: Готовое множество токенов текста (чтобы не токенизировать повторно)
+        """
+        if tokens is None:
+            tokens = set(TOKEN_RE.findall(text_lower))
+
+        candidates = list(self._always)
+        for token in tokens.intersection(self._by_token):
+            candidates.extend(self._by_token[token])
+        candidates.sort()
+
+        return [
+            self._entries[index][1]
+            for index in candidates
+            if self._entries[index][0] in text_lower
+        ]
@@ -2,22 +2,26 @@
 
 """
 Real-Time Service
-Версия: 2.1.0
+Версия: 2.2.0
 
 Улучшения:
 - Input validation
 - Structured logging
 - Улучшена обработка ошибок
 - Timeout handling
+- Broadcast через BroadcastEngine (очередь на соединение, coalescing dashboard updates)
+- Доставка на все реплики через RealtimeBackplane (опционально)
 """
 
 import asyncio
 import re
 from datetime import datetime
-from typing import Any, Dict, Set
+from typing import Any, Dict, Optional, Set
 
 from fastapi import WebSocket
 
+from src.infrastructure.messaging.realtime_backplane import RealtimeBackplane
+from src.services.websocket_broadcast import BroadcastEngine, SlowConsumerPolicy
 from src.utils.structured_logging import StructuredLogger
 
 logger = StructuredLogger(__name__).logger
@@ -32,13 +36,32 @@ class RealTimeManager:
     - Topic-based subscriptions
     - Broadcast to specific topics
     - Automatic reconnection handling
+    - Concurrent fan-out, slow clients get only the latest dashboard state
+    - Cross-instance broadcast through an optional RealtimeBackplane
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+        send_timeout: float = 5.0,
+        backplane: Optional[RealtimeBackplane] = None,
+    ):
         # Active connections: topic → set of websockets
         self.connections: Dict[str, Set[WebSocket]] = {}
         self.connection_metadata: Dict[WebSocket, Dict] = {}
 
+        # Отправка broadcast: очередь + writer task на соединение
+        self.broadcaster = BroadcastEngine(
+            max_queue_size=max_queue_size,
+            policy=slow_consumer_policy,
+            send_timeout=send_timeout,
+            on_disconnect=self.disconnect,
+        )
+
+        # Межинстансная доставка (None - только локальные соединения)
+        self.backplane = backplane
+
     async def connect(self, websocket: WebSocket, topic: str = "general", timeout: float = 10.0):
         """
         Accept new WebSocket connection
@@ -71,6 +94,8 @@ class RealTimeManager:
             if topic not in self.connections:
                 self.connections[topic] = set()
 
+            if websocket not in self.connections[topic] and self.backplane is not None:
+                self.backplane.subscribe(f"topic:{topic}", self._deliver_remote)
             self.connections[topic].add(websocket)
             self.connection_metadata[websocket] = {
                 "topic": topic,
@@ -117,8 +142,10 @@ class RealTimeManager:
         try:
             topic = self.connection_metadata.get(websocket, {}).get("topic")
 
-            if topic and topic in self.connections:
+            if topic and websocket in self.connections.get(topic, ()):
                 self.connections[topic].discard(websocket)
+                if self.backplane is not None:
+                    self.backplane.unsubscribe(f"topic:{topic}", self._deliver_remote)
 
                 if not self.connections[topic]:
                     del self.connections[topic]
@@ -126,6 +153,8 @@ class RealTimeManager:
             if websocket in self.connection_metadata:
                 del self.connection_metadata[websocket]
 
+            self.broadcaster.unregister(websocket)
+
             logger.info("Client disconnected", extra={"topic": topic})
 
         except Exception as e:
@@ -176,14 +205,24 @@ class RealTimeManager:
             )
             await self.disconnect(websocket)
 
-    async def broadcast_to_topic(self, topic: str, message: Dict[str, Any], timeout: float = 5.0):
+    async def broadcast_to_topic(
+        self,
+        topic: str,
+        message: Dict[str, Any],
+        timeout: Optional[float] = None,
+        coalesce_key: Optional[str] = None,
+    ):
         """
         Broadcast message to all clients subscribed to topic с input validation
 
+        Сообщение сериализуется один раз и ставится в очереди соединений;
+        отправка идет конкурентно, медленный клиент не задерживает остальных.
+
         Args:
             topic: Topic name
             message: Message to broadcast
-            timeout: Send timeout (seconds)
+            timeout: Send timeout (seconds), по умолчанию send_timeout
+            coalesce_key: Неотправленное сообщение с тем же ключом заменяется новым
         """
         # Input validation
         if not topic or not isinstance(topic, str):
@@ -209,50 +248,47 @@ class RealTimeManager:
             logger.warning("Topic sanitized to empty, skipping broadcast")
             return
 
-        if topic not in self.connections:
-            logger.debug("No connections for topic", extra={"topic": topic})
-            return
-
         # Add metadata
         message["topic"] = topic
         message["timestamp"] = datetime.now().isoformat()
 
-        # Broadcast to all clients
-        disconnected = []
-
-        for websocket in self.connections[topic].copy():
-            try:
-                await asyncio.wait_for(websocket.send_json(message), timeout=timeout)
-
-                if websocket in self.connection_metadata:
-                    self.connection_metadata[websocket]["messages_sent"] += 1
-
-            except asyncio.TimeoutError:
-                logger.warning(
-                    f"Send timeout to client on topic '{topic}'",
-                    extra={"topic": topic, "timeout": timeout},
-                )
-                disconnected.append(websocket)
-            except Exception as e:
-                logger.warning(
-                    f"Failed to send to client: {e}",
-                    extra={"topic": topic, "error_type": type(e).__name__},
-                )
-                disconnected.append(websocket)
-
-        # Clean up disconnected clients
-        for ws in disconnected:
-            await self.disconnect(ws)
+        # Другие реплики получат сообщение, если у них есть подписчики topic
+        if self.backplane is not None:
+            self.backplane.publish(f"topic:{topic}", message, key=coalesce_key)
+
+        if topic not in self.connections:
+            logger.debug("No connections for topic", extra={"topic": topic})
+            return
+
+        # Broadcast to all clients (не ждет отправки)
+        clients = self.connections[topic]
+        queued = self.broadcaster.publish(message, clients, key=coalesce_key, timeout=timeout)
 
         logger.info(
-            f"Broadcasted to {len(self.connections[topic])} clients on topic '{topic}'",
+            f"Broadcasted to {len(clients)} clients on topic '{topic}'",
             extra={
                 "topic": topic,
-                "clients_count": len(self.connections[topic]),
-                "disconnected_count": len(disconnected),
+                "clients_count": len(clients),
+                "rejected_count": len(clients) - queued,
             },
         )
 
+    def attach_backplane(self, backplane: Optional[RealtimeBackplane]):
+        """Подключить (или отключить, backplane=None) межинстансную доставку"""
+        for topic, clients in self.connections.items():
+            for _ in clients:
+                if self.backplane is not None:
+                    self.backplane.unsubscribe(f"topic:{topic}", self._deliver_remote)
+                if backplane is not None:
+                    backplane.subscribe(f"topic:{topic}", self._deliver_remote)
+        self.backplane = backplane
+
+    def _deliver_remote(self, topic: str, message: Dict[str, Any], key: Optional[str] = None):
+        """Доставка сообщения другой реплики локальным подписчикам topic"""
+        clients = self.connections.get(topic.partition(":")[2])
+        if clients:
+            self.broadcaster.publish(message, clients, key=key)
+
     async def broadcast_dashboard_update(self, dashboard_type: str, data: Dict[str, Any]):
         """
         Broadcast dashboard data update
@@ -261,9 +297,11 @@ class RealTimeManager:
             dashboard_type: owner, executive, pm, developer, team_lead, ba
             data: Dashboard data
         """
+        # Медленный клиент получит только последнее состояние dashboard
         await self.broadcast_to_topic(
             f"dashboard_{dashboard_type}",
             {"type": "dashboard_update", "dashboard": dashboard_type, "data": data},
+            coalesce_key=f"dashboard_{dashboard_type}",
         )
 
     async def broadcast_notification(self, user_id: str, notification: Dict[str, Any]):
@@ -277,14 +315,22 @@ class RealTimeManager:
     def get_stats(self) -> Dict[str, Any]:
         """Get connection statistics"""
         total_connections = sum(len(clients) for clients in self.connections.values())
+        broadcast_stats = self.broadcaster.get_stats()
 
         return {
             "total_connections": total_connections,
             "topics": list(self.connections.keys()),
             "connections_per_topic": {topic: len(clients) for topic, clients in self.connections.items()},
-            "total_messages_sent": sum(meta["messages_sent"] for meta in self.connection_metadata.values()),
+            "total_messages_sent": sum(meta["messages_sent"] for meta in self.connection_metadata.values())
+            + broadcast_stats["sent"],
+            "broadcast": broadcast_stats,
+            "backplane": self.backplane.get_stats() if self.backplane is not None else None,
         }
 
+    def get_connection_lag(self):
+        """Per-connection метрики очередей отправки (lag, глубина, потери)"""
+        return self.broadcaster.get_connection_stats()
+
 
 # Global instance
 real_time_manager = RealTimeManager()
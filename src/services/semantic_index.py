@@ -0,0 +1,264 @@
+# [NEXUS IDENTITY] ID: -8095874741075318875 | DATE: 2026-10-17
+
+"""
+Semantic Matrix Index
+Версия: 1.0.0
+
+Векторный индекс для семантических кэшей:
+- Pre-normalized contiguous float32 matrix (cosine = dot product)
+- Batched matrix-vector top-k через argpartition
+- Incremental add / evict (swap-with-last, O(1))
+- Optional ANN mode поверх SemanticCacheANN (FAISS HNSW / hnswlib)
+- Persist/load в .npz рядом с disk embedding cache
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.structured_logging import StructuredLogger
+
+logger = StructuredLogger(__name__).logger
+
+
+class SemanticMatrixIndex:
+    """
+    Exact cosine top-k index over a preallocated float32 matrix
+
+    Vectors are L2-normalized on insert, so a lookup is a single
+    ``matrix[:n] @ query`` followed by ``argpartition``. Rows are kept
+    dense: removing a key moves the last row into the freed slot.
+
+    With ``index_type`` set to ``"faiss"`` or ``"hnswlib"`` candidates are
+    produced by :class:`SemanticCacheANN` and re-scored against the matrix;
+    if the ANN backend is unavailable the exact path is used.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        initial_capacity: int = 1024,
+        index_type: str = "exact",
+        ann_rebuild_ratio: float = 0.2,
+    ):
+        """
+        Args:
+            dimension: Embedding dimension (inferred from first vector if None)
+            initial_capacity: Preallocated rows
+            index_type: "exact", "faiss" or "hnswlib"
+            ann_rebuild_ratio: Fraction of stale ANN entries that triggers a rebuild
+        """
+        self.dimension = dimension
+        self.index_type = index_type
+        self.ann_rebuild_ratio = ann_rebuild_ratio
+
+        self._capacity = max(1, initial_capacity)
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+        self._ann = None
+        self._ann_stale = 0
+
+        if dimension is not None:
+            self._allocate(dimension)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    @property
+    def keys(self) -> List[str]:
+        """Keys in row order"""
+        return list(self._keys)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the matrix (including spare capacity)"""
+        return 0 if self._matrix is None else int(self._matrix.nbytes)
+
+    def _allocate(self, dimension: int):
+        self.dimension = dimension
+        self._matrix = np.zeros((self._capacity, dimension), dtype=np.float32)
+        if self.index_type != "exact":
+            self._init_ann()
+
+    def _init_ann(self):
+        from src.services.advanced_optimizations import SemanticCacheANN
+
+        ann = SemanticCacheANN(index_type=self.index_type, dimension=self.dimension, max_size=self._capacity)
+        if ann.index is None:
+            logger.info(
+                "ANN backend unavailable, using exact matrix search",
+                extra={"index_type": self.index_type},
+            )
+            self._ann = None
+        else:
+            self._ann = ann
+        self._ann_stale = 0
+
+    def _grow(self, min_capacity: int):
+        new_capacity = self._capacity
+        while new_capacity < min_capacity:
+            new_capacity *= 2
+        grown = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        grown[: len(self._keys)] = self._matrix[: len(self._keys)]
+        self._matrix = grown
+        self._capacity = new_capacity
+        if self._ann is not None:
+            self._ann.max_size = new_capacity
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _prepare(self, vector) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self._matrix is None:
+            self._allocate(array.shape[0])
+        if array.shape[0] != self.dimension:
+            raise ValueError(f"Embedding dimension mismatch: {array.shape[0]} != {self.dimension}")
+        return self._normalize(array)
+
+    def add(self, key: str, vector) -> None:
+        """Add or replace a vector"""
+        normalized = self._prepare(vector)
+
+        row = self._positions.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row >= self._capacity:
+                self._grow(row + 1)
+            self._keys.append(key)
+            self._positions[key] = row
+        elif self._ann is not None:
+            self._ann_stale += 1
+
+        self._matrix[row] = normalized
+
+        if self._ann is not None:
+            self._ann.add(normalized.tolist(), key)
+            self._maybe_rebuild_ann()
+
+    def add_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """Add several vectors"""
+        for key, vector in items:
+            self.add(key, vector)
+
+    def remove(self, key: str) -> bool:
+        """Evict a vector; returns False if key is unknown"""
+        row = self._positions.pop(key, None)
+        if row is None:
+            return False
+
+        last = len(self._keys) - 1
+        if row != last:
+            moved_key = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._keys[row] = moved_key
+            self._positions[moved_key] = row
+        self._keys.pop()
+        self._matrix[last] = 0.0
+
+        if self._ann is not None:
+            self._ann_stale += 1
+            self._maybe_rebuild_ann()
+        return True
+
+    def clear(self) -> None:
+        """Drop all vectors (capacity is kept)"""
+        self._keys.clear()
+        self._positions.clear()
+        if self._matrix is not None:
+            self._matrix[:] = 0.0
+        if self._ann is not None:
+            self._ann.clear()
+            self._ann_stale = 0
+
+    def _maybe_rebuild_ann(self):
+        if not self._keys or self._ann_stale < self.ann_rebuild_ratio * len(self._keys):
+            return
+        self._ann.clear()
+        for row, key in enumerate(self._keys):
+            self._ann.add(self._matrix[row].tolist(), key)
+        self._ann_stale = 0
+
+    def search(self, query, k: int = 1) -> List[Tuple[str, float]]:
+        """
+        Top-k by cosine similarity
+
+        Returns:
+            List of (key, similarity) sorted by similarity desc
+        """
+        n = len(self._keys)
+        if n == 0 or k <= 0:
+            return []
+
+        normalized = self._prepare(query)
+
+        if self._ann is not None and k == 1:
+            candidate = self._ann.search(normalized.tolist(), k=1, threshold=-1.0)
+            if candidate is not None:
+                key = candidate[2]
+                row = self._positions.get(key)
+                if row is not None:
+                    return [(key, float(self._matrix[row] @ normalized))]
+
+        scores = self._matrix[:n] @ normalized
+        return self._top_k(scores, k)
+
+    def search_batch(self, queries, k: int = 1) -> List[List[Tuple[str, float]]]:
+        """Top-k for several queries with one matrix-matrix product"""
+        n = len(self._keys)
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        if n == 0 or k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        scores = self._matrix[:n] @ self._normalize(queries).T
+        return [self._top_k(scores[:, i], k) for i in range(scores.shape[1])]
+
+    def _top_k(self, scores: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        k = min(k, scores.shape[0])
+        if k == 1:
+            best = int(np.argmax(scores))
+            return [(self._keys[best], float(scores[best]))]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._keys[i], float(scores[i])) for i in top]
+
+    def save(self, path: Path) -> None:
+        """Persist keys and normalized rows to .npz"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        n = len(self._keys)
+        matrix = self._matrix[:n] if self._matrix is not None else np.zeros((0, self.dimension or 0), np.float32)
+        with open(path, "wb") as f:
+            np.savez(f, matrix=matrix, keys=np.array(self._keys, dtype=str))
+
+    @classmethod
+    def load(cls, path: Path, index_type: str = "exact") -> "SemanticMatrixIndex":
+        """Load an index saved with :meth:`save`"""
+        with np.load(Path(path), allow_pickle=False) as data:
+            matrix = data["matrix"].astype(np.float32, copy=False)
+            keys = [str(k) for k in data["keys"]]
+
+        index = cls(
+            dimension=matrix.shape[1] if matrix.ndim == 2 and matrix.shape[1] else None,
+            initial_capacity=max(1024, len(keys)),
+            index_type=index_type,
+        )
+        if keys:
+            index._matrix[: len(keys)] = matrix
+            index._keys = keys
+            index._positions = {key: row for row, key in enumerate(keys)}
+            if index._ann is not None:
+                index._ann_stale = len(keys)
+                index._maybe_rebuild_ann()
+        return index
@@ -0,0 +1,308 @@
+# [NEXUS IDENTITY] ID: -5809217346502913762 | DATE: 2026-10-17
+
+"""
+WebSocket fan-out engine.
+
+Each message is serialized once and placed into a bounded per-connection
+send queue. Every connection has its own writer task, so a slow client only
+delays itself (no head-of-line blocking for the others). When a queue is
+full the slow-consumer policy decides what happens:
+
+- COALESCE: keyed messages replace the queued message with the same key
+  (e.g. only the latest dashboard snapshot is kept), else drop oldest
+- DROP_OLDEST / DROP_NEWEST: drop a message
+- DISCONNECT: the connection is closed and removed
+
+Per-connection lag (enqueue -> send completed) is tracked for monitoring.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Union
+
+from src.utils.structured_logging import StructuredLogger
+
+logger = StructuredLogger(__name__).logger
+
+
+class SlowConsumerPolicy(str, Enum):
+    """Поведение при переполнении очереди соединения"""
+
+    COALESCE = "coalesce"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DISCONNECT = "disconnect"
+
+
+def serialize_message(message: Union[Dict[str, Any], str]) -> str:
+    """JSON как у WebSocket.send_json (сериализуется один раз на broadcast)"""
+    if isinstance(message, str):
+        return message
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+@dataclass
+class _OutgoingMessage:
+    payload: str
+    key: Optional[str]
+    timeout: float
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class ConnectionWriter:
+    """Bounded send queue and writer task of a single connection"""
+
+    def __init__(self, websocket: Any, engine: "BroadcastEngine"):
+        self.websocket = websocket
+        self.engine = engine
+        self.queue: Deque[_OutgoingMessage] = deque()
+        self._keyed: Dict[str, _OutgoingMessage] = {}
+        self._wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+
+        self.stats: Dict[str, float] = {
+            "sent": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "lag_ms_last": 0.0,
+            "lag_ms_avg": 0.0,
+            "lag_ms_max": 0.0,
+        }
+
+    def start(self) -> None:
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def offer(self, message: _OutgoingMessage) -> bool:
+        """Поставить сообщение в очередь; False если оно отброшено"""
+        if self.closed:
+            return False
+
+        policy = self.engine.policy
+        if policy == SlowConsumerPolicy.COALESCE and message.key is not None:
+            queued = self._keyed.get(message.key)
+            if queued is not None:
+                # Более свежее состояние заменяет устаревшее, позиция и время постановки сохраняются
+                queued.payload = message.payload
+                queued.timeout = message.timeout
+                self.stats["coalesced"] += 1
+                return True
+
+        if len(self.queue) >= self.engine.max_queue_size:
+            if policy == SlowConsumerPolicy.DROP_NEWEST:
+                self.stats["dropped"] += 1
+                return False
+            if policy == SlowConsumerPolicy.DISCONNECT:
+                self.stats["dropped"] += 1
+                self.engine._fail(self, RuntimeError("send queue overflow"))
+                return False
+            self._discard(self.queue.popleft())
+            self.stats["dropped"] += 1
+
+        self.queue.append(message)
+        if policy == SlowConsumerPolicy.COALESCE and message.key is not None:
+            self._keyed[message.key] = message
+        self._wakeup.set()
+        return True
+
+    def _discard(self, message: _OutgoingMessage) -> None:
+        if message.key is not None and self._keyed.get(message.key) is message:
+            del self._keyed[message.key]
+
+    async def _run(self) -> None:
+        while not self.closed:
+            if not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            message = self.queue.popleft()
+            self._discard(message)
+            try:
+                await asyncio.wait_for(self.websocket.send_text(message.payload), timeout=message.timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.engine._fail(self, e)
+                return
+
+            lag_ms = (time.perf_counter() - message.enqueued_at) * 1000.0
+            self.stats["sent"] += 1
+            self.stats["lag_ms_last"] = lag_ms
+            self.stats["lag_ms_avg"] = (
+                lag_ms if self.stats["sent"] == 1 else 0.9 * self.stats["lag_ms_avg"] + 0.1 * lag_ms
+            )
+            self.stats["lag_ms_max"] = max(self.stats["lag_ms_max"], lag_ms)
+
+    def close(self) -> None:
+        self.closed = True
+        self.queue.clear()
+        self._keyed.clear()
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        oldest = self.queue[0].enqueued_at if self.queue else None
+        return {
+            **self.stats,
+            "queue_depth": len(self.queue),
+            "oldest_queued_ms": (time.perf_counter() - oldest) * 1000.0 if oldest is not None else 0.0,
+        }
+
+
+class BroadcastEngine:
+    """
+    Fan-out of serialized messages to many WebSocket connections.
+
+    Example:
+        >>> engine = BroadcastEngine(on_disconnect=manager.disconnect)
+        >>> engine.publish({"type": "dashboard_update", ...}, sockets, key="dashboard_pm")
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+        send_timeout: float = 5.0,
+        on_disconnect: Optional[Callable[[Any], Optional[Awaitable[None]]]] = None,
+    ):
+        """
+        Args:
+            max_queue_size: Размер очереди отправки одного соединения
+            policy: Политика для медленных клиентов
+            send_timeout: Таймаут отправки одного сообщения (по умолчанию)
+            on_disconnect: Вызывается для соединения, отключенного из-за ошибки/таймаута/переполнения
+        """
+        self.max_queue_size = max_queue_size
+        self.policy = SlowConsumerPolicy(policy)
+        self.send_timeout = send_timeout
+        self.on_disconnect = on_disconnect
+
+        self._writers: Dict[Any, ConnectionWriter] = {}
+        self.stats: Dict[str, int] = {
+            "published": 0,
+            "enqueued": 0,
+            "rejected": 0,
+            "failed_connections": 0,
+        }
+        self._sent_closed = 0
+
+    def __len__(self) -> int:
+        return len(self._writers)
+
+    def register(self, websocket: Any) -> ConnectionWriter:
+        """Создать очередь и writer task для соединения (идемпотентно)"""
+        writer = self._writers.get(websocket)
+        if writer is None:
+            writer = self._writers[websocket] = ConnectionWriter(websocket, self)
+            writer.start()
+        return writer
+
+    def unregister(self, websocket: Any) -> None:
+        """Остановить writer соединения, неотправленные сообщения отбрасываются"""
+        writer = self._writers.pop(websocket, None)
+        if writer is not None:
+            self._sent_closed += writer.stats["sent"]
+            writer.close()
+
+    def publish(
+        self,
+        message: Union[Dict[str, Any], str],
+        websockets: Iterable[Any],
+        key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> int:
+        """
+        Поставить сообщение в очереди соединений (не ждет отправки)
+
+        Args:
+            message: Сообщение (dict сериализуется в JSON один раз)
+            websockets: Получатели
+            key: Ключ для COALESCE (одинаковый ключ - заменяет неотправленное сообщение)
+            timeout: Таймаут отправки (по умолчанию send_timeout)
+
+        Returns:
+            Количество соединений, принявших сообщение в очередь
+        """
+        payload = serialize_message(message)
+        timeout = self.send_timeout if timeout is None else timeout
+        enqueued_at = time.perf_counter()
+        accepted = 0
+
+        for websocket in list(websockets):
+            writer = self._writers.get(websocket) or self.register(websocket)
+            if writer.offer(_OutgoingMessage(payload, key, timeout, enqueued_at)):
+                accepted += 1
+            else:
+                self.stats["rejected"] += 1
+
+        self.stats["published"] += 1
+        self.stats["enqueued"] += accepted
+        return accepted
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться опустошения всех очередей (для тестов и graceful shutdown)"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while any(writer.queue for writer in self._writers.values()):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            await asyncio.sleep(0.001)
+        # Последние сообщения могли быть извлечены, но еще не отправлены
+        await asyncio.sleep(0)
+        return True
+
+    async def close(self) -> None:
+        """Остановить все writer tasks"""
+        writers = list(self._writers.values())
+        for websocket in list(self._writers):
+            self.unregister(websocket)
+        tasks = [writer.task for writer in writers if writer.task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _fail(self, writer: ConnectionWriter, error: Exception) -> None:
+        """Отключить соединение после ошибки/таймаута отправки или переполнения"""
+        if self._writers.get(writer.websocket) is not writer:
+            return
+        self.stats["failed_connections"] += 1
+        logger.warning(
+            f"Dropping slow or broken WebSocket connection: {error}",
+            extra={"error_type": type(error).__name__, "queue_depth": len(writer.queue)},
+        )
+        self.unregister(writer.websocket)
+
+        if self.on_disconnect is not None:
+            try:
+                result = self.on_disconnect(writer.websocket)
+                if asyncio.iscoroutine(result):
+                    asyncio.get_running_loop().create_task(result)
+            except Exception as e:
+                logger.error(
+                    f"on_disconnect callback failed: {e}",
+                    extra={"error_type": type(e).__name__},
+                    exc_info=True,
+                )
+
+    def get_connection_stats(self) -> List[Dict[str, Any]]:
+        """Метрики по соединениям: глубина очереди, lag, отброшенные сообщения"""
+        return [{"connection": id(websocket), **writer.get_stats()} for websocket, writer in self._writers.items()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        connections = [writer.get_stats() for writer in self._writers.values()]
+        return {
+            **self.stats,
+            "policy": self.policy.value,
+            "connections": len(connections),
+            "sent": self._sent_closed + sum(c["sent"] for c in connections),
+            "dropped": sum(c["dropped"] for c in connections),
+            "coalesced": sum(c["coalesced"] for c in connections),
+            "queued": sum(c["queue_depth"] for c in connections),
+            "max_queue_depth": max((c["queue_depth"] for c in connections), default=0),
+            "max_lag_ms": max((c["lag_ms_max"] for c in connections), default=0.0),
+            "max_oldest_queued_ms": max((c["oldest_queued_ms"] for c in connections), default=0.0),
+        }
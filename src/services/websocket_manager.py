@@ -2,13 +2,16 @@
 
 """
 WebSocket Manager for Real-Time Updates
-Версия: 2.1.0
+Версия: 2.2.0
 
 Улучшения:
 - Улучшена обработка ошибок
 - Structured logging
 - Input validation
 - Connection timeout handling
+- Fan-out через BroadcastEngine: очередь и writer task на соединение,
+  сериализация сообщения один раз, без head-of-line blocking
+- RealtimeBackplane: доставка user/tenant/room/broadcast на все реплики
 """
 
 import asyncio
@@ -16,6 +19,8 @@ from typing import Any, Dict, Optional, Set
 
 from fastapi import WebSocket
 
+from src.infrastructure.messaging.realtime_backplane import RealtimeBackplane
+from src.services.websocket_broadcast import BroadcastEngine, SlowConsumerPolicy
 from src.utils.structured_logging import StructuredLogger
 
 logger = StructuredLogger(__name__).logger
@@ -30,9 +35,28 @@ class ConnectionManager:
     - Broadcast to all connections
     - Send to specific user/tenant
     - Room-based messaging
+    - Concurrent fan-out with bounded per-connection queues
+    - Cross-instance delivery through an optional RealtimeBackplane
     """
 
-    def __init__(self):
+    # Топик backplane для broadcast на все соединения
+    BROADCAST_TOPIC = "all"
+
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+        send_timeout: float = 5.0,
+        backplane: Optional[RealtimeBackplane] = None,
+    ):
+        # Отправка: очередь + writer task на соединение
+        self.broadcaster = BroadcastEngine(
+            max_queue_size=max_queue_size,
+            policy=slow_consumer_policy,
+            send_timeout=send_timeout,
+            on_disconnect=self._drop_connection,
+        )
+
         # Active connections
         self.active_connections: Set[WebSocket] = set()
 
@@ -45,6 +69,9 @@ class ConnectionManager:
         # Room connections (room_id → WebSocket)
         self.room_connections: Dict[str, Set[WebSocket]] = {}
 
+        # Межинстансная доставка (None - только локальные соединения)
+        self.backplane = backplane
+
     async def connect(
         self,
         websocket: WebSocket,
@@ -71,17 +98,24 @@ class ConnectionManager:
             # Accept connection with timeout
             await asyncio.wait_for(websocket.accept(), timeout=timeout)
 
-            self.active_connections.add(websocket)
+            if websocket not in self.active_connections:
+                self.active_connections.add(websocket)
+                self._subscribe_remote(self.BROADCAST_TOPIC)
+            self.broadcaster.register(websocket)
 
             if user_id:
                 if user_id not in self.user_connections:
                     self.user_connections[user_id] = set()
-                self.user_connections[user_id].add(websocket)
+                if websocket not in self.user_connections[user_id]:
+                    self.user_connections[user_id].add(websocket)
+                    self._subscribe_remote(f"user:{user_id}")
 
             if tenant_id:
                 if tenant_id not in self.tenant_connections:
                     self.tenant_connections[tenant_id] = set()
-                self.tenant_connections[tenant_id].add(websocket)
+                if websocket not in self.tenant_connections[tenant_id]:
+                    self.tenant_connections[tenant_id].add(websocket)
+                    self._subscribe_remote(f"tenant:{tenant_id}")
 
             logger.info(
                 "WebSocket connected",
@@ -129,15 +163,24 @@ class ConnectionManager:
             )
             tenant_id = None
 
-        self.active_connections.discard(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.discard(websocket)
+            self._unsubscribe_remote(self.BROADCAST_TOPIC)
+        self.broadcaster.unregister(websocket)
+
+        # Комнаты соединения (иначе остаются подписки backplane на room:*)
+        for room_id in [room_id for room_id, sockets in self.room_connections.items() if websocket in sockets]:
+            self.leave_room(websocket, room_id)
 
-        if user_id and user_id in self.user_connections:
+        if user_id and websocket in self.user_connections.get(user_id, ()):
             self.user_connections[user_id].discard(websocket)
+            self._unsubscribe_remote(f"user:{user_id}")
             if not self.user_connections[user_id]:
                 del self.user_connections[user_id]
 
-        if tenant_id and tenant_id in self.tenant_connections:
+        if tenant_id and websocket in self.tenant_connections.get(tenant_id, ()):
             self.tenant_connections[tenant_id].discard(websocket)
+            self._unsubscribe_remote(f"tenant:{tenant_id}")
             if not self.tenant_connections[tenant_id]:
                 del self.tenant_connections[tenant_id]
 
@@ -151,7 +194,7 @@ class ConnectionManager:
         )
 
     async def send_personal_message(
-        self, message: Dict[str, Any], user_id: str, timeout: float = 5.0
+        self, message: Dict[str, Any], user_id: str, timeout: Optional[float] = None
     ):
         """
         Send message to specific user (all their connections)
@@ -176,33 +219,12 @@ class ConnectionManager:
             )
             return
 
+        self._publish_remote(f"user:{user_id}", message)
         if user_id in self.user_connections:
-            disconnected = []
-            for websocket in self.user_connections[user_id]:
-                try:
-                    await asyncio.wait_for(
-                        websocket.send_json(message), timeout=timeout
-                    )
-                except asyncio.TimeoutError:
-                    logger.warning(
-                        f"Send message timeout to user {user_id}",
-                        extra={"user_id": user_id, "timeout": timeout},
-                    )
-                    disconnected.append(websocket)
-                except Exception as e:
-                    # Connection closed or error
-                    logger.warning(
-                        f"Failed to send message to user {user_id}: {e}",
-                        extra={"user_id": user_id, "error_type": type(e).__name__},
-                    )
-                    disconnected.append(websocket)
-
-            # Clean up disconnected connections
-            for ws in disconnected:
-                self.disconnect(ws, user_id=user_id)
+            self.broadcaster.publish(message, self.user_connections[user_id], timeout=timeout)
 
     async def send_to_tenant(
-        self, message: Dict[str, Any], tenant_id: str, timeout: float = 5.0
+        self, message: Dict[str, Any], tenant_id: str, timeout: Optional[float] = None
     ):
         """Send message to all users in tenant с input validation"""
         # Input validation
@@ -223,32 +245,12 @@ class ConnectionManager:
             )
             return
 
+        self._publish_remote(f"tenant:{tenant_id}", message)
         if tenant_id in self.tenant_connections:
-            disconnected = []
-            for websocket in self.tenant_connections[tenant_id]:
-                try:
-                    await asyncio.wait_for(
-                        websocket.send_json(message), timeout=timeout
-                    )
-                except asyncio.TimeoutError:
-                    logger.warning(
-                        f"Send message timeout to tenant {tenant_id}",
-                        extra={"tenant_id": tenant_id, "timeout": timeout},
-                    )
-                    disconnected.append(websocket)
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to send message to tenant {tenant_id}: {e}",
-                        extra={"tenant_id": tenant_id, "error_type": type(e).__name__},
-                    )
-                    disconnected.append(websocket)
-
-            # Clean up disconnected connections
-            for ws in disconnected:
-                self.disconnect(ws, tenant_id=tenant_id)
+            self.broadcaster.publish(message, self.tenant_connections[tenant_id], timeout=timeout)
 
     async def send_to_room(
-        self, message: Dict[str, Any], room_id: str, timeout: float = 5.0
+        self, message: Dict[str, Any], room_id: str, timeout: Optional[float] = None
     ):
         """Send message to all connections in room с input validation"""
         # Input validation
@@ -269,34 +271,22 @@ class ConnectionManager:
             )
             return
 
+        self._publish_remote(f"room:{room_id}", message)
         if room_id in self.room_connections:
-            disconnected = []
-            for websocket in self.room_connections[room_id]:
-                try:
-                    await asyncio.wait_for(
-                        websocket.send_json(message), timeout=timeout
-                    )
-                except asyncio.TimeoutError:
-                    logger.warning(
-                        f"Send message timeout to room {room_id}",
-                        extra={"room_id": room_id, "timeout": timeout},
-                    )
-                    disconnected.append(websocket)
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to send message to room {room_id}: {e}",
-                        extra={"room_id": room_id, "error_type": type(e).__name__},
-                    )
-                    disconnected.append(websocket)
-
-            # Clean up disconnected connections
-            for ws in disconnected:
-                self.disconnect(ws)
-                if room_id in self.room_connections:
-                    self.room_connections[room_id].discard(ws)
-
-    async def broadcast(self, message: Dict[str, Any], timeout: float = 5.0):
-        """Broadcast message to all active connections с input validation"""
+            self.broadcaster.publish(message, self.room_connections[room_id], timeout=timeout)
+
+    async def broadcast(self, message: Dict[str, Any], timeout: Optional[float] = None, key: Optional[str] = None):
+        """
+        Broadcast message to all active connections с input validation
+
+        Сообщение ставится в очереди соединений и отправляется их writer tasks
+        конкурентно; медленные клиенты не задерживают остальных.
+
+        Args:
+            message: Message to send
+            timeout: Send timeout (seconds) для каждого соединения (по умолчанию send_timeout)
+            key: Ключ coalescing (неотправленное сообщение с тем же ключом заменяется)
+        """
         # Input validation
         if not isinstance(message, dict):
             logger.warning(
@@ -305,40 +295,85 @@ class ConnectionManager:
             )
             return
 
-        disconnected = []
-        for websocket in self.active_connections.copy():
-            try:
-                await asyncio.wait_for(websocket.send_json(message), timeout=timeout)
-            except asyncio.TimeoutError:
-                logger.warning(
-                    "Broadcast message timeout",
-                    extra={
-                        "timeout": timeout,
-                        "total_connections": len(self.active_connections),
-                    },
-                )
-                disconnected.append(websocket)
-            except Exception as e:
-                logger.warning(
-                    f"Failed to broadcast message: {e}",
-                    extra={"error_type": type(e).__name__},
-                )
-                disconnected.append(websocket)
-
-        # Clean up disconnected connections
-        for ws in disconnected:
-            self.disconnect(ws)
+        self._publish_remote(self.BROADCAST_TOPIC, message, key=key)
+        self.broadcaster.publish(message, self.active_connections, key=key, timeout=timeout)
 
     def join_room(self, websocket: WebSocket, room_id: str):
         """Add connection to room"""
         if room_id not in self.room_connections:
             self.room_connections[room_id] = set()
-        self.room_connections[room_id].add(websocket)
+        if websocket not in self.room_connections[room_id]:
+            self.room_connections[room_id].add(websocket)
+            self._subscribe_remote(f"room:{room_id}")
 
     def leave_room(self, websocket: WebSocket, room_id: str):
         """Remove connection from room"""
-        if room_id in self.room_connections:
+        if websocket in self.room_connections.get(room_id, ()):
             self.room_connections[room_id].discard(websocket)
+            self._unsubscribe_remote(f"room:{room_id}")
+            if not self.room_connections[room_id]:
+                del self.room_connections[room_id]
+
+    def _drop_connection(self, websocket: WebSocket):
+        """Удалить соединение, отключенное BroadcastEngine (ошибка, таймаут, переполнение)"""
+        user_ids = [user_id for user_id, sockets in self.user_connections.items() if websocket in sockets]
+        tenant_ids = [tenant_id for tenant_id, sockets in self.tenant_connections.items() if websocket in sockets]
+        for user_id in user_ids:
+            self.disconnect(websocket, user_id=user_id)
+        for tenant_id in tenant_ids:
+            self.disconnect(websocket, tenant_id=tenant_id)
+        self.disconnect(websocket)
+
+    # ------------------------------------------------------------- backplane
+
+    def attach_backplane(self, backplane: Optional[RealtimeBackplane]):
+        """
+        Подключить (или отключить, backplane=None) межинстансную доставку.
+
+        Подписки текущих соединений переносятся на новый backplane.
+        """
+        memberships = [(self.BROADCAST_TOPIC, self.active_connections)]
+        for prefix, connections in (
+            ("user", self.user_connections),
+            ("tenant", self.tenant_connections),
+            ("room", self.room_connections),
+        ):
+            memberships.extend((f"{prefix}:{target_id}", sockets) for target_id, sockets in connections.items())
+
+        for topic, sockets in memberships:
+            for _ in sockets:
+                self._unsubscribe_remote(topic)
+        self.backplane = backplane
+        for topic, sockets in memberships:
+            for _ in sockets:
+                self._subscribe_remote(topic)
+
+    def _subscribe_remote(self, topic: str):
+        if self.backplane is not None:
+            self.backplane.subscribe(topic, self._deliver_remote)
+
+    def _unsubscribe_remote(self, topic: str):
+        if self.backplane is not None:
+            self.backplane.unsubscribe(topic, self._deliver_remote)
+
+    def _publish_remote(self, topic: str, message: Dict[str, Any], key: Optional[str] = None):
+        if self.backplane is not None:
+            self.backplane.publish(topic, message, key=key)
+
+    def _deliver_remote(self, topic: str, message: Dict[str, Any], key: Optional[str] = None):
+        """Доставка сообщения другой реплики локальным соединениям"""
+        if topic == self.BROADCAST_TOPIC:
+            targets = self.active_connections
+        else:
+            kind, _, target_id = topic.partition(":")
+            connections = {
+                "user": self.user_connections,
+                "tenant": self.tenant_connections,
+                "room": self.room_connections,
+            }.get(kind, {})
+            targets = connections.get(target_id, ())
+        if targets:
+            self.broadcaster.publish(message, targets, key=key)
 
     def get_stats(self) -> Dict:
         """Get connection statistics"""
@@ -347,8 +382,14 @@ class ConnectionManager:
             "users_connected": len(self.user_connections),
             "tenants_connected": len(self.tenant_connections),
             "active_rooms": len(self.room_connections),
+            "broadcast": self.broadcaster.get_stats(),
+            "backplane": self.backplane.get_stats() if self.backplane is not None else None,
         }
 
+    def get_connection_lag(self):
+        """Per-connection метрики очередей отправки (lag, глубина, потери)"""
+        return self.broadcaster.get_connection_stats()
+
 
 # Global instance
 manager = ConnectionManager()
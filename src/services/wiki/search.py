@@ -38,7 +38,7 @@ class WikiSearchService:
             # Truncate if too long
             text_to_embed = text_to_embed[:8000]
 
-            vector = await self.embedding.encode(text_to_embed)
+            vector = await self.embedding.encode_async(text_to_embed)
 
             # Prepare payload
             payload = {"page_id": page_id, "title": title, "snippet": content[:200]}
@@ -55,7 +55,7 @@ class WikiSearchService:
         Semantic search for wiki pages.
         """
         try:
-            vector = await self.embedding.encode(query)
+            vector = await self.embedding.encode_async(query)
 
             # Stub: results = self.qdrant.search(self.COLLECTION_NAME, vector, limit=limit)
             # Returning mock results for MVP
@@ -5,7 +5,7 @@ Handles logic for page management, versioning, rendering, and advanced features
 
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from src.database import get_db_connection
 from src.utils.structured_logging import StructuredLogger
@@ -19,6 +19,20 @@ from .renderer import WikiRenderer
 
 logger = StructuredLogger(__name__).logger
 
+INSERT_PAGE_SQL = """
+    INSERT INTO wiki_pages (id, namespace_id, slug, title, current_revision_id, version)
+    VALUES ($1, $2, $3, $4, $5, 1)
+"""
+INSERT_REVISION_SQL = """
+    INSERT INTO wiki_revisions (id, page_id, version, content, commit_message, author_id)
+    VALUES ($1, $2, $3, $4, $5, $6)
+"""
+UPDATE_PAGE_SQL = """
+    UPDATE wiki_pages
+    SET version = $1, current_revision_id = $2, updated_at = NOW()
+    WHERE id = $3
+"""
+
 
 class WikiService:
     """
@@ -95,42 +109,16 @@ class WikiService:
 
         page_id = str(uuid.uuid4())
         revision_id = str(uuid.uuid4())
-
-        # If namespace is not a valid UUID (e.g. "default"), treat it as a name or handle properly
-        # For now, if it looks like a UUID, use it; otherwise generate a stub ID or lookup.
-        try:
-            uuid.UUID(data.namespace)
-            namespace_id = data.namespace
-        except (ValueError, AttributeError):
-            # Fallback for legacy/test calls
-            namespace_id = str(uuid.uuid4())
+        namespace_id = self._namespace_id(data.namespace)
 
         async with get_db_connection() as conn:
             async with conn.transaction():
                 # 1. Create Page
-                await conn.execute(
-                    """
-                    INSERT INTO wiki_pages (id, namespace_id, slug, title, current_revision_id, version)
-                    VALUES ($1, $2, $3, $4, $5, 1)
-                """,
-                    page_id,
-                    namespace_id,
-                    data.slug,
-                    data.title,
-                    revision_id,
-                )
+                await conn.execute(INSERT_PAGE_SQL, page_id, namespace_id, data.slug, data.title, revision_id)
 
                 # 2. Create Revision
                 await conn.execute(
-                    """
-                    INSERT INTO wiki_revisions (id, page_id, version, content, commit_message, author_id)
-                    VALUES ($1, $2, 1, $3, $4, $5)
-                """,
-                    revision_id,
-                    page_id,
-                    content,
-                    data.commit_message,
-                    author_id,
+                    INSERT_REVISION_SQL, revision_id, page_id, 1, content, data.commit_message, author_id
                 )
 
                 # 3. Index in Qdrant (Stub)
@@ -178,10 +166,7 @@ class WikiService:
 
                 # 3. Create Revision
                 await conn.execute(
-                    """
-                    INSERT INTO wiki_revisions (id, page_id, version, content, commit_message, author_id)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                """,
+                    INSERT_REVISION_SQL,
                     revision_id,
                     page["id"],
                     new_version,
@@ -191,16 +176,7 @@ class WikiService:
                 )
 
                 # 4. Update Page
-                await conn.execute(
-                    """
-                    UPDATE wiki_pages
-                    SET version = $1, current_revision_id = $2, updated_at = NOW()
-                    WHERE id = $3
-                """,
-                    new_version,
-                    revision_id,
-                    page["id"],
-                )
+                await conn.execute(UPDATE_PAGE_SQL, new_version, revision_id, page["id"])
 
         logger.info(f"Updated page {slug} to v{new_version}")
 
@@ -215,6 +191,135 @@ class WikiService:
             updated_at=datetime.utcnow(),
         )
 
+    async def get_page_sources(self, slugs: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Current version and raw (unrendered) content of many pages.
+
+        Returns:
+            slug -> {"id", "version", "content"} for existing pages
+        """
+        async with get_db_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT p.id, p.slug, p.version, r.content
+                FROM wiki_pages p
+                LEFT JOIN wiki_revisions r ON p.current_revision_id = r.id
+                WHERE p.slug = ANY($1::text[]) AND p.is_deleted = FALSE
+            """,
+                list(slugs),
+            )
+        return {row["slug"]: {"id": row["id"], "version": row["version"], "content": row["content"]} for row in rows}
+
+    async def create_pages(self, pages: List[WikiPageCreate], author_id: str) -> List[PageDTO]:
+        """
+        Create many pages (with their initial revisions) in one transaction.
+        """
+        if not pages:
+            return []
+
+        page_rows, revision_rows, created = [], [], []
+        now = datetime.utcnow()
+        for data in pages:
+            page_id = str(uuid.uuid4())
+            revision_id = str(uuid.uuid4())
+            page_rows.append((page_id, self._namespace_id(data.namespace), data.slug, data.title, revision_id))
+            revision_rows.append((revision_id, page_id, 1, data.content, data.commit_message, author_id))
+            created.append(
+                PageDTO(
+                    id=page_id,
+                    slug=data.slug,
+                    namespace=data.namespace,
+                    title=data.title,
+                    current_revision_id=revision_id,
+                    version=1,
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+
+        async with get_db_connection() as conn:
+            async with conn.transaction():
+                await conn.executemany(INSERT_PAGE_SQL, page_rows)
+                await conn.executemany(INSERT_REVISION_SQL, revision_rows)
+
+        logger.info(f"Created {len(created)} wiki pages", extra={"author_id": author_id})
+        return created
+
+    async def update_pages(self, updates: Dict[str, WikiPageUpdate], author_id: str) -> List[PageDTO]:
+        """
+        Update many pages in one transaction with the same optimistic locking as update_page.
+
+        Pages that are missing or whose version differs from the expected one
+        are skipped (logged), the rest of the batch is still written.
+
+        Returns:
+            Updated pages
+        """
+        if not updates:
+            return []
+
+        revision_rows, page_rows, updated = [], [], []
+        now = datetime.utcnow()
+        async with get_db_connection() as conn:
+            async with conn.transaction():
+                pages = {
+                    row["slug"]: row
+                    for row in await conn.fetch(
+                        """
+                        SELECT id, slug, version, title FROM wiki_pages
+                        WHERE slug = ANY($1::text[])
+                        FOR UPDATE
+                    """,
+                        list(updates),
+                    )
+                }
+
+                for slug, data in updates.items():
+                    page = pages.get(slug)
+                    if page is None or page["version"] != data.version:
+                        logger.warning(
+                            f"Skipping update of page {slug}: modified concurrently",
+                            extra={"expected": data.version, "actual": page["version"] if page else None},
+                        )
+                        continue
+
+                    new_version = page["version"] + 1
+                    revision_id = str(uuid.uuid4())
+                    revision_rows.append(
+                        (revision_id, page["id"], new_version, data.content, data.commit_message, author_id)
+                    )
+                    page_rows.append((new_version, revision_id, page["id"]))
+                    updated.append(
+                        PageDTO(
+                            id=page["id"],
+                            slug=slug,
+                            namespace="default",
+                            title=page["title"],
+                            current_revision_id=revision_id,
+                            version=new_version,
+                            created_at=now,
+                            updated_at=now,
+                        )
+                    )
+
+                if page_rows:
+                    await conn.executemany(INSERT_REVISION_SQL, revision_rows)
+                    await conn.executemany(UPDATE_PAGE_SQL, page_rows)
+
+        logger.info(f"Updated {len(updated)} of {len(updates)} wiki pages", extra={"author_id": author_id})
+        return updated
+
+    @staticmethod
+    def _namespace_id(namespace: str) -> str:
+        # If namespace is not a valid UUID (e.g. "default"), treat it as a name or handle properly
+        # For now, if it looks like a UUID, use it; otherwise generate a stub ID or lookup.
+        try:
+            uuid.UUID(namespace)
+            return namespace
+        except (ValueError, AttributeError):
+            # Fallback for legacy/test calls
+            return str(uuid.uuid4())
+
     async def list_pages(self, limit: int = 50, offset: int = 0) -> List[PageDTO]:
         """
         List wiki pages with pagination.
@@ -1,13 +1,28 @@
 """
 Code Sync Service
 Scans the repository and updates Wiki pages to reflect the codebase structure and documentation.
+
+Sync pipeline:
+- Files are discovered with os.walk; in incremental mode unchanged files
+  (same mtime/size, or same content hash) are not parsed again.
+- ASTs are parsed in a process pool into small picklable module summaries.
+- A page is re-rendered only when its source or its place in the import
+  graph (the modules that import it) changed.
+- Namespaces are written with executemany; pages go through the batch
+  WikiService.create_pages/update_pages, a few hundred pages per call.
+- File hashes, summaries and page fingerprints are kept in a JSON state file.
 """
 
 import ast
+import asyncio
+import hashlib
+import json
 import os
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from src.database import get_db_connection
 from src.services.wiki.models import WikiPageCreate, WikiPageUpdate
@@ -28,6 +43,12 @@ IGNORED_DIRS = {
 }
 IGNORED_FILES = {"__init__.py"}
 
+STATE_FILE_NAME = ".codesync_state.json"
+# Bump when the page template changes: all pages are re-rendered once
+RENDER_VERSION = 2
+AUTO_GENERATED_MARKER = "Auto-generated"
+SYNC_AUTHOR_ID = "system-sync"
+
 
 class ImportVisitor(ast.NodeVisitor):
     """Extracts imports from AST"""
@@ -46,124 +67,333 @@ class ImportVisitor(ast.NodeVisitor):
         self.generic_visit(node)
 
 
+def _module_path(rel_path: str) -> str:
+    """services/wiki/models.py -> services.wiki.models"""
+    return rel_path[: -len(".py")].replace("/", ".")
+
+
+def _absolute_imports(tree: ast.Module, rel_path: str) -> Set[str]:
+    """Imported module names with relative imports resolved against the file's package"""
+    package = _module_path(rel_path).split(".")[:-1]
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level and node.level - 1 > len(package):
+                continue
+            base = package[: len(package) - node.level + 1] if node.level else []
+            module = ".".join(base + ([node.module] if node.module else []))
+            if module:
+                names.add(module)
+            # "from pkg import module" imports a module too
+            names.update(f"{module}.{alias.name}" if module else alias.name for alias in node.names)
+    return names
+
+
+def _summarize_module(rel_path: str, content: bytes) -> Dict[str, Any]:
+    """Everything the page template needs from a module AST (picklable)"""
+    tree = ast.parse(content)
+
+    import_visitor = ImportVisitor()
+    import_visitor.visit(tree)
+
+    def public_functions(body) -> List[Dict[str, str]]:
+        return [
+            {"name": node.name, "doc": ast.get_docstring(node) or ""}
+            for node in body
+            if isinstance(node, ast.FunctionDef) and not node.name.startswith("_")
+        ]
+
+    classes = []
+    for cls in (node for node in tree.body if isinstance(node, ast.ClassDef)):
+        classes.append(
+            {
+                "name": cls.name,
+                "doc": ast.get_docstring(cls) or "",
+                "bases": [base.id for base in cls.bases if isinstance(base, ast.Name)],
+                "methods": [m.name for m in cls.body if isinstance(m, ast.FunctionDef)],
+                "public_methods": public_functions(cls.body),
+            }
+        )
+
+    return {
+        "docstring": ast.get_docstring(tree) or "",
+        "imports": sorted(import_visitor.imports),
+        "absolute_imports": sorted(_absolute_imports(tree, rel_path)),
+        "classes": classes,
+        "functions": public_functions(tree.body),
+    }
+
+
+def _parse_files(root_path: str, jobs: List[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+    """
+    Hash and parse a chunk of files (runs in a worker process).
+
+    Args:
+        root_path: Sync root
+        jobs: (rel_path, known_hash); a file whose hash equals known_hash is not parsed
+    """
+    results = []
+    for rel_path, known_hash in jobs:
+        file_path = Path(root_path) / rel_path
+        result: Dict[str, Any] = {"rel_path": rel_path}
+        try:
+            content = file_path.read_bytes()
+            stat = file_path.stat()
+            result.update(
+                hash=hashlib.sha256(content).hexdigest(),
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+            )
+            if result["hash"] != known_hash:
+                result["summary"] = _summarize_module(rel_path, content)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        results.append(result)
+    return results
+
+
 class CodeSyncService:
-    def __init__(self, root_path: str, wiki_service: WikiService):
+    def __init__(
+        self,
+        root_path: str,
+        wiki_service: WikiService,
+        state_path: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        parse_chunk_size: int = 32,
+        write_batch_size: int = 200,
+    ):
+        """
+        Args:
+            root_path: Root of the scanned code
+            wiki_service: Wiki service
+            state_path: State file of incremental sync (default: <root_path>/.codesync_state.json)
+            max_workers: Process pool size for AST parsing (1 - parse in a thread)
+            parse_chunk_size: Files per pool task
+            write_batch_size: Pages per transaction
+        """
         self.root_path = Path(root_path)
         self.wiki_service = wiki_service
+        self.state_path = Path(state_path) if state_path else self.root_path / STATE_FILE_NAME
+        self.max_workers = max_workers
+        self.parse_chunk_size = parse_chunk_size
+        self.write_batch_size = write_batch_size
         self.namespace_cache = {}  # path -> namespace_id
+        self.last_stats: Dict[str, Any] = {}
 
-    async def sync_all(self):
-        """
-        Full synchronization of the codebase into Wiki.
+    async def sync_all(self, incremental: bool = False) -> Dict[str, Any]:
         """
-        logger.info(f"Starting CodeSync from {self.root_path}")
+        Synchronize the codebase into Wiki.
 
-        # 1. Ensure 'Codebase' root namespace exists
-        root_ns_id = await self._get_or_create_namespace("Codebase", "codebase")
-        self.namespace_cache["."] = root_ns_id
+        Args:
+            incremental: Parse only changed files and re-render only pages whose
+                source or dependents changed. A full sync re-renders every page.
 
-        # 2. Walk the tree
-        for root, dirs, files in os.walk(self.root_path):
-            # Filter ignored
-            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
-
-            rel_path = Path(root).relative_to(self.root_path)
-            if str(rel_path) == ".":
-                current_ns_id = root_ns_id
-            else:
-                # Create namespace for this directory
-                parent_path = rel_path.parent
-                parent_ns_id = self.namespace_cache.get(str(parent_path), root_ns_id)
-                current_ns_id = await self._get_or_create_namespace(
-                    rel_path.name, str(rel_path), parent_ns_id
-                )
-                self.namespace_cache[str(rel_path)] = current_ns_id
-
-            # Process Python files
-            for file in files:
-                if file.endswith(".py") and file not in IGNORED_FILES:
-                    await self._process_python_file(Path(root) / file, current_ns_id)
-
-        logger.info("CodeSync completed")
-
-    async def _process_python_file(self, file_path: Path, namespace_id: str):
-        """
-        Parse Python file and update Wiki page.
+        Returns:
+            Sync statistics
         """
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            tree = ast.parse(content)
-
-            # Extract Info
-            rel_path = file_path.relative_to(self.root_path)
-            module_name = file_path.stem
-            slug = str(rel_path).replace(os.sep, "-").replace(".", "-").lower()
-
-            docstring = ast.get_docstring(tree) or "No module documentation."
-
-            # Extract Imports
-            import_visitor = ImportVisitor()
-            import_visitor.visit(tree)
-            imports = sorted(list(import_visitor.imports))
-
-            # Generate Markdown Content
-            md_content = f"# {module_name}\n\n"
-            md_content += f"**Path**: `{rel_path}`\n\n"
-            md_content += f"## Description\n{docstring}\n\n"
-
-            # Architecture Diagrams (Mermaid)
-            classes = [n for n in tree.body if isinstance(n, ast.ClassDef)]
-
-            # 1. Dependency Graph
-            if imports:
-                md_content += "## Dependencies\n\n"
-                md_content += self._generate_dependency_graph(module_name, imports)
-                md_content += "\n\n"
-
-            # 2. Class Diagram
-            if classes:
-                md_content += "## Architecture (Classes)\n\n"
-                md_content += self._generate_class_diagram(classes)
-                md_content += "\n\n"
-
-            # Detailed Class Docs
-            if classes:
-                md_content += "## Class Details\n"
-                for cls in classes:
-                    cls_doc = ast.get_docstring(cls) or "No description."
-                    md_content += f"### `class {cls.name}`\n{cls_doc}\n\n"
-
-                    # Methods
-                    methods = [
-                        m
-                        for m in cls.body
-                        if isinstance(m, ast.FunctionDef) and not m.name.startswith("_")
-                    ]
-                    if methods:
-                        md_content += "**Methods:**\n"
-                        for method in methods:
-                            md_content += f"- `{method.name}`: {ast.get_docstring(method) or ''}\n"
-                        md_content += "\n"
-
-            # Functions
-            funcs = [
-                n
-                for n in tree.body
-                if isinstance(n, ast.FunctionDef) and not n.name.startswith("_")
-            ]
-            if funcs:
-                md_content += "## Functions\n"
-                for func in funcs:
-                    func_doc = ast.get_docstring(func) or "No description."
-                    md_content += f"### `def {func.name}`\n{func_doc}\n\n"
-
-            md_content += f"\n---\n*Auto-generated by CodeSync on {os.getenv('COMPUTERNAME', 'Server')}*"
-
-            # Upsert Page
-            await self._upsert_page(slug, module_name, md_content, namespace_id)
-
-        except Exception as e:
-            logger.error(f"Failed to process {file_path}: {e}")
+        started = time.perf_counter()
+        logger.info(f"Starting CodeSync from {self.root_path}", extra={"incremental": incremental})
+
+        state = self._load_state() if incremental else {}
+        old_files: Dict[str, Dict[str, Any]] = state.get("files", {})
+        old_pages: Dict[str, str] = state.get("pages", {})
+        known_namespaces: Set[str] = set(state.get("namespaces", []))
+
+        # 1. Walk the tree
+        directories, files = self._scan()
+
+        # 2. Namespaces (one transaction)
+        namespaces = self._namespace_rows(directories)
+        new_namespaces = [row for row in namespaces if row[0] not in known_namespaces]
+        await self._create_namespaces(new_namespaces)
+
+        # 3. Parse changed files in the process pool
+        stats: Dict[str, Any] = {
+            "files": len(files),
+            "parsed": 0,
+            "unchanged": 0,
+            "errors": 0,
+            "namespaces_created": len(new_namespaces),
+        }
+        records: Dict[str, Dict[str, Any]] = {}
+        jobs: List[Tuple[str, Optional[str]]] = []
+        for rel_path, (mtime_ns, size) in files.items():
+            old = old_files.get(rel_path)
+            if old and old["mtime_ns"] == mtime_ns and old["size"] == size:
+                records[rel_path] = old
+            else:
+                jobs.append((rel_path, old["hash"] if old else None))
+
+        for result in await self._parse(jobs):
+            rel_path = result["rel_path"]
+            if "error" in result:
+                stats["errors"] += 1
+                logger.error(f"Failed to process {rel_path}: {result['error']}")
+                continue
+            if "summary" not in result:
+                # Only file metadata changed
+                records[rel_path] = {**old_files[rel_path], "mtime_ns": result["mtime_ns"], "size": result["size"]}
+                continue
+            stats["parsed"] += 1
+            records[rel_path] = result
+        stats["unchanged"] = len(records) - stats["parsed"]
+
+        # 4. Re-render pages whose source or dependents changed
+        dependents = self._build_dependents(records)
+        pages: List[Tuple[str, str, str, str]] = []
+        fingerprints: Dict[str, str] = {}
+        for rel_path, record in sorted(records.items()):
+            slug = self._slug(rel_path)
+            used_by = dependents.get(rel_path, [])
+            fingerprint = self._fingerprint(record["hash"], used_by)
+            fingerprints[slug] = fingerprint
+            if old_pages.get(slug) == fingerprint:
+                continue
+            namespace_id = self.namespace_cache.get(str(Path(rel_path).parent), self.namespace_cache["."])
+            content = self._render_page(rel_path, record["summary"], used_by)
+            pages.append((slug, Path(rel_path).stem, content, namespace_id))
+        stats["rendered"] = len(pages)
+
+        # 5. Batched upserts
+        written = await self._upsert_pages(pages)
+        stats.update(written)
+
+        self._save_state(
+            {
+                "version": RENDER_VERSION,
+                "files": records,
+                "pages": fingerprints,
+                "namespaces": sorted(row[0] for row in namespaces),
+            }
+        )
+
+        stats["duration_seconds"] = round(time.perf_counter() - started, 3)
+        self.last_stats = stats
+        logger.info("CodeSync completed", extra=stats)
+        return stats
+
+    # ---------------------------------------------------------------- scan
+
+    def _scan(self) -> Tuple[List[str], Dict[str, Tuple[int, int]]]:
+        """Directories (parents first) and python files with (mtime_ns, size)"""
+        directories: List[str] = []
+        files: Dict[str, Tuple[int, int]] = {}
+        for root, dirs, names in os.walk(self.root_path):
+            # Filter ignored
+            dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+            rel_dir = Path(root).relative_to(self.root_path)
+            if str(rel_dir) != ".":
+                directories.append(rel_dir.as_posix())
+            for name in names:
+                if name.endswith(".py") and name not in IGNORED_FILES:
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    files[(rel_dir / name).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+        return directories, files
+
+    async def _parse(self, jobs: List[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        if not jobs:
+            return []
+        chunks = [jobs[i : i + self.parse_chunk_size] for i in range(0, len(jobs), self.parse_chunk_size)]
+        root = str(self.root_path)
+
+        if len(chunks) == 1 or self.max_workers == 1:
+            results = []
+            for chunk in chunks:
+                results.extend(await asyncio.to_thread(_parse_files, root, chunk))
+            return results
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            parts = await asyncio.gather(
+                *(loop.run_in_executor(pool, _parse_files, root, chunk) for chunk in chunks)
+            )
+        return [result for part in parts for result in part]
+
+    # --------------------------------------------------------- import graph
+
+    @staticmethod
+    def _build_dependents(records: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        """rel_path -> sorted rel_paths of synced modules importing it"""
+        modules = {_module_path(rel_path): rel_path for rel_path in records}
+        dependents: Dict[str, Set[str]] = {}
+        for rel_path, record in records.items():
+            for name in record["summary"]["absolute_imports"]:
+                # "src.services.wiki.models" with root src -> "services.wiki.models"
+                parts = name.split(".")
+                for start in range(len(parts)):
+                    target = modules.get(".".join(parts[start:]))
+                    if target is not None:
+                        if target != rel_path:
+                            dependents.setdefault(target, set()).add(rel_path)
+                        break
+        return {rel_path: sorted(users) for rel_path, users in dependents.items()}
+
+    @staticmethod
+    def _fingerprint(source_hash: str, used_by: List[str]) -> str:
+        payload = json.dumps([RENDER_VERSION, source_hash, used_by])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _slug(rel_path: str) -> str:
+        return rel_path.replace("/", "-").replace(".", "-").lower()
+
+    # -------------------------------------------------------------- render
+
+    def _render_page(self, rel_path: str, summary: Dict[str, Any], used_by: List[str]) -> str:
+        """Markdown page of a module"""
+        module_name = Path(rel_path).stem
+        imports = summary["imports"]
+        classes = summary["classes"]
+
+        md_content = f"# {module_name}\n\n"
+        md_content += f"**Path**: `{Path(rel_path)}`\n\n"
+        md_content += f"## Description\n{summary['docstring'] or 'No module documentation.'}\n\n"
+
+        # Architecture Diagrams (Mermaid)
+        # 1. Dependency Graph
+        if imports:
+            md_content += "## Dependencies\n\n"
+            md_content += self._generate_dependency_graph(module_name, imports)
+            md_content += "\n\n"
+
+        if used_by:
+            md_content += "## Used By\n"
+            for user in used_by:
+                md_content += f"- [[{self._slug(user)}|{Path(user).stem}]]\n"
+            md_content += "\n"
+
+        # 2. Class Diagram
+        if classes:
+            md_content += "## Architecture (Classes)\n\n"
+            md_content += self._generate_class_diagram(classes)
+            md_content += "\n\n"
+
+        # Detailed Class Docs
+        if classes:
+            md_content += "## Class Details\n"
+            for cls in classes:
+                md_content += f"### `class {cls['name']}`\n{cls['doc'] or 'No description.'}\n\n"
+
+                # Methods
+                if cls["public_methods"]:
+                    md_content += "**Methods:**\n"
+                    for method in cls["public_methods"]:
+                        md_content += f"- `{method['name']}`: {method['doc']}\n"
+                    md_content += "\n"
+
+        # Functions
+        if summary["functions"]:
+            md_content += "## Functions\n"
+            for func in summary["functions"]:
+                md_content += f"### `def {func['name']}`\n{func['doc'] or 'No description.'}\n\n"
+
+        md_content += f"\n---\n*{AUTO_GENERATED_MARKER} by CodeSync on {os.getenv('COMPUTERNAME', 'Server')}*"
+        return md_content
 
     def _generate_dependency_graph(self, module_name: str, imports: List[str]) -> str:
         """Generates a Mermaid graph TD showing imports"""
@@ -178,85 +408,124 @@ class CodeSyncService:
         mermaid += "```"
         return mermaid
 
-    def _generate_class_diagram(self, classes: List[ast.ClassDef]) -> str:
+    def _generate_class_diagram(self, classes: List[Dict[str, Any]]) -> str:
         """Generates a Mermaid classDiagram"""
         mermaid = "```mermaid\nclassDiagram\n"
 
         for cls in classes:
-            mermaid += f"    class {cls.name} {{\n"
+            mermaid += f"    class {cls['name']} {{\n"
 
             # Methods
-            methods = [m for m in cls.body if isinstance(m, ast.FunctionDef)]
-            for method in methods:
-                visibility = "-" if method.name.startswith("_") else "+"
-                mermaid += f"        {visibility}{method.name}()\n"
+            for method in cls["methods"]:
+                visibility = "-" if method.startswith("_") else "+"
+                mermaid += f"        {visibility}{method}()\n"
 
             mermaid += "    }\n"
 
             # Inheritance
-            for base in cls.bases:
-                if isinstance(base, ast.Name):
-                    mermaid += f"    {base.id} <|-- {cls.name}\n"
+            for base in cls["bases"]:
+                mermaid += f"    {base} <|-- {cls['name']}\n"
 
         mermaid += "```"
         return mermaid
 
-    async def _get_or_create_namespace(
-        self, name: str, path: str, parent_id: Optional[str] = None
-    ) -> str:
-        """
-        Stub for namespace management.
-        """
+    # ------------------------------------------------------------ database
+
+    def _namespace_rows(self, directories: List[str]) -> List[Tuple[str, str, str, Optional[str]]]:
+        """(id, name, path, parent_id), parents first; fills namespace_cache"""
+        root_ns_id = self._namespace_id("codebase")
+        self.namespace_cache["."] = root_ns_id
+        rows = [(root_ns_id, "Codebase", "codebase", None)]
+        for rel_dir in directories:
+            path = Path(rel_dir)
+            parent_ns_id = self.namespace_cache.get(str(path.parent), root_ns_id)
+            ns_id = self._namespace_id(str(path))
+            self.namespace_cache[str(path)] = ns_id
+            rows.append((ns_id, path.name, str(path), parent_ns_id))
+        return rows
+
+    @staticmethod
+    def _namespace_id(path: str) -> str:
         # Deterministic ID based on path
-        ns_uuid = str(uuid.uuid5(uuid.NAMESPACE_URL, f"namespace:{path}"))
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"namespace:{path}"))
 
+    async def _create_namespaces(self, rows: List[Tuple[str, str, str, Optional[str]]]) -> None:
+        if not rows:
+            return
         async with get_db_connection() as conn:
-            # Check exist
-            row = await conn.fetchrow(
-                "SELECT id FROM wiki_namespaces WHERE id = $1", ns_uuid
-            )
-            if not row:
-                await conn.execute(
+            async with conn.transaction():
+                await conn.executemany(
                     """
                     INSERT INTO wiki_namespaces (id, name, path, parent_id)
                     VALUES ($1, $2, $3, $4)
                     ON CONFLICT (id) DO NOTHING
                 """,
-                    ns_uuid,
-                    name,
-                    path,
-                    parent_id,
+                    rows,
                 )
 
-        return ns_uuid
-
-    async def _upsert_page(
-        self, slug: str, title: str, content: str, namespace_id: str
-    ):
-        """
-        Create or Update page if content changed.
+    async def _upsert_pages(self, pages: List[Tuple[str, str, str, str]]) -> Dict[str, int]:
         """
-        existing = await self.wiki_service.get_page(slug)
+        Create or update pages, write_batch_size pages per transaction.
 
-        if existing:
-            if "Auto-generated" in (existing.html_content or ""):
-                await self.wiki_service.update_page(
-                    slug,
-                    WikiPageUpdate(
+        Existing pages are updated only if they are auto-generated and the content changed.
+        """
+        counts = {"pages_created": 0, "pages_updated": 0, "pages_skipped": 0}
+        for start in range(0, len(pages), self.write_batch_size):
+            batch = pages[start : start + self.write_batch_size]
+            for key, value in (await self._upsert_batch(batch)).items():
+                counts[key] += value
+        return counts
+
+    async def _upsert_batch(self, batch: List[Tuple[str, str, str, str]]) -> Dict[str, int]:
+        existing = await self.wiki_service.get_page_sources([slug for slug, _, _, _ in batch])
+
+        creates: List[WikiPageCreate] = []
+        updates: Dict[str, WikiPageUpdate] = {}
+        for slug, title, content, namespace_id in batch:
+            page = existing.get(slug)
+            if page is None:
+                creates.append(
+                    WikiPageCreate(
+                        slug=slug,
+                        title=title,
                         content=content,
-                        version=existing.version,
-                        commit_message="Auto-sync update",
-                    ),
-                    author_id="system-sync",
+                        namespace=namespace_id,
+                        commit_message="Auto-sync create",
+                    )
                 )
-        else:
-            await self.wiki_service.create_page(
-                WikiPageCreate(
-                    slug=slug,
-                    title=title,
-                    content=content,
-                    namespace=namespace_id,
-                    commit_message="Auto-sync create",
-                ),
-                author_id="system-sync",
-            )
+            elif AUTO_GENERATED_MARKER in (page["content"] or "") and page["content"] != content:
+                updates[slug] = WikiPageUpdate(
+                    content=content, version=page["version"], commit_message="Auto-sync update"
+                )
+            # else: edited by hand or unchanged
+
+        created = await self.wiki_service.create_pages(creates, author_id=SYNC_AUTHOR_ID)
+        updated = await self.wiki_service.update_pages(updates, author_id=SYNC_AUTHOR_ID)
+        return {
+            "pages_created": len(created),
+            "pages_updated": len(updated),
+            "pages_skipped": len(batch) - len(created) - len(updated),
+        }
+
+    # --------------------------------------------------------------- state
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Failed to load CodeSync state, running full sync: {e}")
+            return {}
+        if state.get("version") != RENDER_VERSION:
+            return {}
+        return state
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Failed to save CodeSync state: {e}")
@@ -0,0 +1,89 @@
+# [NEXUS IDENTITY] ID: -6120934877452318826 | DATE: 2026-10-17
+
+"""
+Benchmark: пропускная способность (MB/s) однопроходного парсера BSL
+против прежних regex-парсеров.
+"""
+
+import re
+import time
+
+from src.parsers.bsl_syntax import parse_module
+
+METHOD_TEMPLATE = '''// Обработка {n}.
+//
+// Параметры:
+//  Параметр - Число
+Функция Обработка{n}(Знач Параметр, Режим = "Полный") Экспорт
+	Если Параметр > {n} Тогда
+		Результат = ОбщегоНазначения.ЗначениеРеквизита(Параметр, "Имя");
+	ИначеЕсли Режим = "Краткий" Тогда
+		Для Каждого Стр Из Таблица Цикл
+			Процедура{n}(Стр);
+		КонецЦикла;
+	КонецЕсли;
+	Запрос = Новый Запрос;
+	Запрос.Текст = "ВЫБРАТЬ
+	|	Т.Ссылка
+	|ИЗ
+	|	Справочник.Номенклатура КАК Т";
+	Возврат ?(Результат = Неопределено, 0, Результат);
+КонецФункции
+
+Процедура Процедура{n}(Стр)
+	Сообщить("Обработана строка " + Строка(Стр));
+КонецПроцедуры
+
+'''
+
+
+def _generate_module(methods: int) -> str:
+    return "#Область Обработка\n\n" + "".join(METHOD_TEMPLATE.format(n=n) for n in range(methods)) + "#КонецОбласти\n"
+
+
+def _regex_parse(code: str) -> int:
+    """Прежний подход: regex заголовков + поиск Конец... от каждого заголовка + regex вызовов."""
+    methods = 0
+    for kind, end in (("Функция", "КонецФункции"), ("Процедура", "КонецПроцедуры")):
+        for match in re.finditer(rf"{kind}\s+(\w+)\s*\((.*?)\)\s*(Экспорт)?", code, re.IGNORECASE | re.DOTALL):
+            end_match = re.search(end, code[match.end():], re.IGNORECASE)
+            body = code[match.end() : match.end() + end_match.start()] if end_match else ""
+            code[: match.start()].count("\n")
+            re.findall(r"(\w+)\s*\(", body)
+            methods += 1
+    return methods
+
+
+def _throughput(fn, code: str, rounds: int = 3) -> float:
+    size_mb = len(code.encode("utf-8")) / 1_000_000
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(code)
+        best = min(best, time.perf_counter() - start)
+    return size_mb / best
+
+
+def test_bsl_parser_throughput():
+    """Однопроходный разбор линеен по размеру модуля и быстрее regex-сканов"""
+    small = _generate_module(50)
+    large = _generate_module(1000)
+
+    module = parse_module(large)
+    assert len(module.methods) == 2000
+    assert not module.errors
+    assert len(module.queries) == 1000
+
+    print("\nBSL parsing throughput (MB/s):")
+    results = {}
+    for name, code in (("small", small), ("large", large)):
+        parser_mbs = _throughput(parse_module, code)
+        regex_mbs = _throughput(_regex_parse, code, rounds=1)
+        results[name] = (parser_mbs, regex_mbs)
+        print(f"  {name:<6} {len(code) / 1000:8.0f} KB  parser: {parser_mbs:6.2f}  regex: {regex_mbs:6.2f}")
+
+    # regex-подход квадратичен (срезы code[match.end():] от каждого заголовка),
+    # однопроходный парсер - нет
+    large_parser, large_regex = results["large"]
+    assert large_parser > large_regex
+    assert large_parser > results["small"][0] / 3
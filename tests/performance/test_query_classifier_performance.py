@@ -0,0 +1,76 @@
+# [NEXUS IDENTITY] ID: -3387149562024981170 | DATE: 2026-10-17
+
+"""
+Micro-benchmark: QueryClassifier compiled rules vs rule-by-rule matching.
+"""
+
+import re
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+from src.ai.query_classifier import QueryClassifier, QueryType
+
+
+def _rule_by_rule(rules, query_lower: str) -> Tuple[Dict[QueryType, float], List[str]]:
+    """Прежняя реализация: `in` по каждому keyword, re.search по каждому pattern."""
+    scores: Dict[QueryType, float] = {}
+    keywords: List[str] = []
+    for query_type, type_rules in rules.items():
+        score = 0.0
+        for keyword in type_rules.get("keywords", []):
+            if keyword.lower() in query_lower:
+                score += 1.0
+                keywords.append(keyword)
+        for pattern in type_rules.get("patterns", []):
+            if re.search(pattern, query_lower, re.IGNORECASE):
+                score += 2.0
+        scores[query_type] = score
+    return scores, keywords
+
+
+def _median_us(fn: Callable[[str], object], query: str, rounds: int = 30) -> float:
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(latencies)
+
+
+def test_compiled_rules_vs_rule_by_rule():
+    """Benchmark: одинаковый результат, длинные запросы заметно быстрее."""
+    classifier = QueryClassifier(cache_size=0)
+    rule_set = classifier.rule_set
+    queries = {
+        "short": "создай функцию для проведения документа",
+        "long_match": ("создай функцию для проведения документа и найди похожий код " * 170)[:10000],
+        "long_miss": ("документ реализации учета товаров на складе " * 240)[:10000],
+    }
+
+    print("\nQueryClassifier rule matching (median, us):")
+    for name, query in queries.items():
+        assert rule_set.match(query) == _rule_by_rule(classifier.RULES, query)
+
+        baseline = _median_us(lambda q: _rule_by_rule(classifier.RULES, q), query)
+        compiled = _median_us(rule_set.match, query)
+        print(f"  {name:<11} rule-by-rule: {baseline:9.1f}  compiled: {compiled:9.1f}  x{baseline / compiled:.1f}")
+
+        if name != "short":
+            assert compiled < baseline, f"{name}: compiled {compiled:.1f}us >= baseline {baseline:.1f}us"
+
+
+def test_memoized_classify_latency():
+    """Benchmark: повторный запрос обслуживается из LRU кэша."""
+    classifier = QueryClassifier()
+    query = "Где используется этот метод и какие есть зависимости? " * 150
+
+    classifier.classify(query)
+    start = time.perf_counter()
+    for _ in range(100):
+        classifier.classify(query)
+    avg_ms = (time.perf_counter() - start) * 1000 / 100
+
+    print(f"\nQueryClassifier.classify (cached): {avg_ms:.3f}ms")
+    assert classifier.cache_stats["hits"] == 100
+    assert avg_ms < 5
@@ -0,0 +1,120 @@
+"""
+Unit tests for partitioned VectorIndex
+"""
+
+import numpy as np
+import pytest
+
+from src.ml.continual_learning.cms import ContinuumMemorySystem
+from src.ml.continual_learning.memory_level import MemoryLevel, MemoryLevelConfig
+from src.ml.continual_learning.vector_index import VectorIndex
+
+
+def _brute_force(vectors, query, k):
+    distances = np.linalg.norm(vectors - query, axis=1)
+    return list(np.argsort(distances, kind="stable")[:k])
+
+
+class TestVectorIndex:
+    """Test partitioned VectorIndex"""
+
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        return rng.random((200, 16)).astype("float32")
+
+    def test_search_matches_brute_force(self, data):
+        """Top-k via argpartition matches exact search"""
+        index = VectorIndex(dimension=16, initial_capacity=8)
+        index.add_batch([f"k{i}" for i in range(len(data))], data)
+
+        query = data[5] + 0.01
+        results = index.search(query, k=10)
+
+        assert [key for key, _ in results] == [f"k{i}" for i in _brute_force(data, query, 10)]
+        assert results[0][1] > results[-1][1]
+
+    def test_partition_search_and_batch(self, data):
+        """Search is restricted to one partition; batch search matches single search"""
+        index = VectorIndex(dimension=16)
+        for i, vector in enumerate(data):
+            index.add(f"k{i}", vector, metadata={"level": "fast" if i % 2 else "slow"})
+
+        results = index.search(data[4], k=5, partition="fast")
+        assert all(int(key[1:]) % 2 == 1 for key, _ in results)
+
+        batch = index.search_batch(data[:3], k=4, partition="slow")
+        for query, results in zip(data[:3], batch):
+            single = index.search(query, k=4, partition="slow")
+            assert [key for key, _ in results] == [key for key, _ in single]
+            assert [sim for _, sim in results] == pytest.approx([sim for _, sim in single], rel=1e-4)
+        assert index.search(data[0], k=3, partition="unknown") == []
+
+    def test_remove_and_compaction(self, data):
+        """Removed vectors are never returned; compaction keeps lookups valid"""
+        index = VectorIndex(dimension=16, compact_threshold=0.25)
+        index.add_batch([f"k{i}" for i in range(50)], data[:50])
+
+        for i in range(20):
+            assert index.remove(f"k{i}")
+
+        assert index.size() == 30
+        assert index.partitions["_default"].rows < 50  # compacted
+        results = index.search(data[3], k=30)
+        assert {key for key, _ in results} == {f"k{i}" for i in range(20, 50)}
+        assert not index.remove("k0")
+
+    def test_filter_fn_scans_past_top_k(self, data):
+        """filter_fn still returns k results when nearest ones are filtered out"""
+        index = VectorIndex(dimension=16)
+        for i, vector in enumerate(data[:40]):
+            index.add(f"k{i}", vector, metadata={"tag": "a" if i < 35 else "b"})
+
+        results = index.search(data[0], k=3, filter_fn=lambda meta: meta["tag"] == "b")
+        assert len(results) == 3
+        assert all(int(key[1:]) >= 35 for key, _ in results)
+
+    def test_save_and_load_mmap(self, data, tmp_path):
+        """Index round-trips through memory-mapped files and stays writable"""
+        index = VectorIndex(dimension=16)
+        for i, vector in enumerate(data[:20]):
+            index.add(f"k{i}", vector, metadata={"level": "fast" if i % 2 else "slow"})
+        index.remove("k1")
+        index.save(tmp_path / "index")
+
+        loaded = VectorIndex.load(tmp_path / "index")
+        assert isinstance(loaded.partitions["fast"].vectors, np.memmap)
+        assert loaded.size() == 19
+        assert loaded.search(data[3], k=5, partition="fast") == index.search(data[3], k=5, partition="fast")
+
+        loaded.add("new", data[100], metadata={"level": "fast"})
+        assert loaded.search(data[100], k=1, partition="fast")[0][0] == "new"
+
+
+class TestEviction:
+    """Test heap-based eviction"""
+
+    def test_evicts_oldest_after_restore(self):
+        """Re-stored key gets a new timestamp and is not evicted as oldest"""
+        level = MemoryLevel(MemoryLevelConfig(name="test", update_freq=1, learning_rate=0.001, capacity=2))
+        level.put("a", np.zeros(4), {"timestamp": 1.0})
+        level.put("b", np.zeros(4), {"timestamp": 2.0})
+        level.put("a", np.zeros(4), {"timestamp": 3.0})
+
+        evicted = level.put("c", np.zeros(4), {"timestamp": 4.0})
+
+        assert evicted == ["b"]
+        assert set(level.memory) == {"a", "c"}
+
+    def test_cms_retrieve_searches_only_level(self):
+        """CMS retrieve uses the level partition and drops evicted entries from index"""
+        cms = ContinuumMemorySystem([("fast", 1, 0.001), ("slow", 100, 0.0001)], embedding_dim=768)
+        cms.levels["fast"].config.capacity = 3
+        for i in range(5):
+            cms.store("fast", f"f{i}", f"data{i}", np.random.rand(768).astype("float32"))
+            cms.store("slow", f"f{i}", f"slow{i}", np.random.rand(768).astype("float32"))
+
+        assert cms.index.size() == 8
+        results = cms.retrieve("query", "fast", k=10)
+        assert sorted(key for key, _, _ in results) == ["f2", "f3", "f4"]
+        assert all(data.startswith("data") for _, _, data in results)
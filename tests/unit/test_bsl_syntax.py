@@ -0,0 +1,115 @@
+# [NEXUS IDENTITY] ID: 4471093826655203317 | DATE: 2026-10-17
+
+"""
+Тесты однопроходного парсера BSL (src/parsers/bsl_syntax.py)
+"""
+
+from src.parsers.bsl_syntax import extract_calls, parse_module, tokenize, unquote_string
+
+MODULE = '''Перем Кэш Экспорт;
+
+#Область ПрограммныйИнтерфейс
+
+// Возвращает реквизит.
+//
+// Параметры:
+//  Ссылка - ЛюбаяСсылка
+&НаСервере
+Функция Реквизит(Знач Ссылка, Имя = "Наименование") Экспорт
+	Если Ссылка = Неопределено Тогда
+		Возврат Неопределено;
+	ИначеЕсли Имя = "" Тогда
+		ВызватьИсключение НСтр("ru = 'Пустое имя'");
+	КонецЕсли;
+	Запрос = Новый Запрос;
+	Запрос.Текст = "ВЫБРАТЬ
+	|	Т.Наименование
+	|ИЗ
+	|	Справочник.Номенклатура КАК Т";
+	Для Каждого Строка Из Запрос.Выполнить().Выгрузить() Цикл
+		Обработать(Строка);
+	КонецЦикла;
+	Возврат ?(Кэш = Неопределено, ОбщегоНазначения.ЗначениеРеквизита(Ссылка, Имя), Кэш);
+КонецФункции
+
+#КонецОбласти
+
+Процедура Обработать(Строка)
+	// КонецПроцедуры в комментарии
+	Сообщить("Процедура Ложная() КонецПроцедуры");
+КонецПроцедуры
+'''
+
+
+def test_tokenize_keywords_strings_and_comments():
+    tokens = list(tokenize('Если А Тогда // комментарий\n\tБ = "x ""y""";\nКонецЕсли'))
+    assert [kind for kind, _, _ in tokens] == [
+        "IF", "NAME", "THEN", "COMMENT", "NAME", "=", "STRING", ";", "ENDIF",
+    ]
+    # После "." ключевое слово - обычное имя (Объект.Выполнить, Запрос.Для)
+    assert [kind for kind, _, _ in tokenize("Объект.Для")] == ["NAME", ".", "NAME"]
+    assert unquote_string('"ВЫБРАТЬ\n\t|Т.Поле ""x"""') == 'ВЫБРАТЬ\nТ.Поле "x"'
+
+
+def test_methods_signature_region_and_doc():
+    module = parse_module(MODULE)
+
+    assert [m.name for m in module.methods] == ["Реквизит", "Обработать"]
+    func, proc = module.methods
+    assert func.is_function and func.export and not proc.export
+    assert [(p.name, p.by_value, p.default) for p in func.params] == [
+        ("Ссылка", True, None),
+        ("Имя", False, '"Наименование"'),
+    ]
+    assert func.annotations == ["НаСервере"]
+    assert func.region == "ПрограммныйИнтерфейс" and proc.region is None
+    assert func.doc_comment[0] == "Возвращает реквизит."
+    assert (func.start_line, func.end_line) == (10, 25)
+    assert (proc.start_line, proc.end_line) == (29, 32)
+    assert module.errors == []
+
+
+def test_keywords_inside_strings_and_comments_do_not_end_method():
+    module = parse_module(MODULE)
+    proc = module.methods[1]
+    assert proc.closed
+    assert module.method_lines(proc).endswith('КонецПроцедуры");\nКонецПроцедуры')
+    assert [c.name for c in proc.calls] == ["Сообщить"]
+
+
+def test_calls_complexity_queries_and_variables():
+    module = parse_module(MODULE)
+    func = module.methods[0]
+
+    assert [c.full_name for c in func.calls] == [
+        "НСтр", "Запрос.Выполнить", "Выгрузить", "Обработать", "ОбщегоНазначения.ЗначениеРеквизита",
+    ]
+    # Если + ИначеЕсли + Для + ?()
+    assert func.complexity == 5
+
+    assert len(module.queries) == 1
+    query = module.queries[0]
+    assert query.type == "SELECT" and query.method == "Реквизит" and query.line == 17
+    assert "Справочник.Номенклатура КАК Т" in query.text
+
+    assert [(v.name, v.export, v.line) for v in module.variables] == [("Кэш", True, 1)]
+
+
+def test_watch_names_and_constructors():
+    module = parse_module(MODULE, watch_names=["Запрос"])
+    refs = [(r.name, r.is_new, r.line) for r in module.name_refs]
+    # Новый Запрос - конструктор, а не вызов
+    assert refs[:2] == [("Запрос", False, 16), ("Запрос", True, 16)]
+    assert all(c.name != "Запрос" for c in module.methods[0].calls)
+
+
+def test_unterminated_method_is_recovered():
+    module = parse_module("Процедура А()\n\tЕсли Х Тогда\n\t\tБ();\n\nФункция В()\n\tВозврат 1;\nКонецФункции\n")
+    assert [(m.name, m.closed) for m in module.methods] == [("А", False), ("В", True)]
+    assert [c.name for c in module.methods[0].calls] == ["Б"]
+    assert module.errors
+
+
+def test_extract_calls_from_fragment():
+    calls = extract_calls('Результат = Модуль.Метод(А, Б);\nЕсли Проверить() Тогда Сообщить("Вызов()"); КонецЕсли;')
+    assert [c.full_name for c in calls] == ["Модуль.Метод", "Проверить", "Сообщить"]
@@ -77,3 +77,108 @@ async def test_neighbors_and_find_nodes() -> None:
     latency_alerts = await backend.find_nodes(kind=NodeKind.ALERT, label="latency")
     assert len(latency_alerts) == 1
     assert latency_alerts[0].id == "alert:orchestrator-latency-p95-high"
+
+
+def _chain_graph_nodes():
+    return [
+        Node(id="module:a", kind=NodeKind.MODULE, display_name="a", props={"name": "a"}),
+        Node(id="module:b", kind=NodeKind.MODULE, display_name="b", props={"name": "b"}),
+        Node(id="module:c", kind=NodeKind.MODULE, display_name="c", labels=["core"]),
+        Node(id="test_case:t", kind=NodeKind.TEST_CASE, display_name="t"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_edges_are_deduplicated_and_reverse_indexed() -> None:
+    backend = InMemoryCodeGraphBackend()
+    await backend.upsert_nodes(_chain_graph_nodes())
+
+    await backend.upsert_edges(
+        [
+            Edge(source="module:a", target="module:b", kind=EdgeKind.DEPENDS_ON),
+            Edge(source="module:a", target="module:b", kind=EdgeKind.DEPENDS_ON, props={"w": 2}),
+            Edge(source="module:a", target="test_case:t", kind=EdgeKind.TESTED_BY),
+            Edge(source="module:c", target="module:b", kind=EdgeKind.DEPENDS_ON),
+            Edge(source="module:a", target="missing", kind=EdgeKind.DEPENDS_ON),
+        ]
+    )
+
+    assert backend.edge_count == 3
+    assert len(backend._edges) == 3
+    deps = await backend.neighbors("module:a", kinds=[EdgeKind.DEPENDS_ON])
+    assert [n.id for n in deps] == ["module:b"]
+    edges = await backend.edges_from("module:a", kinds=[EdgeKind.DEPENDS_ON])
+    assert edges[0].props == {"w": 2}
+    dependents = await backend.incoming("module:b", kinds=[EdgeKind.DEPENDS_ON])
+    assert {n.id for n in dependents} == {"module:a", "module:c"}
+
+
+@pytest.mark.asyncio
+async def test_find_nodes_indexes_follow_reupsert() -> None:
+    backend = InMemoryCodeGraphBackend()
+    await backend.upsert_nodes(_chain_graph_nodes())
+
+    assert [n.id for n in await backend.find_nodes(prop_equals={"name": "a"})] == ["module:a"]
+    assert [n.id for n in await backend.find_nodes(kind=NodeKind.MODULE, label="core")] == ["module:c"]
+
+    await backend.upsert_node(
+        Node(id="module:c", kind=NodeKind.SERVICE, display_name="c", props={"owner": "x"})
+    )
+
+    assert await backend.find_nodes(label="core") == []
+    assert len(await backend.find_nodes(kind=NodeKind.MODULE)) == 2
+    # Неиндексированное свойство проверяется фильтром
+    owned = await backend.find_nodes(kind=NodeKind.SERVICE, prop_equals={"owner": "x"})
+    assert [n.id for n in owned] == ["module:c"]
+
+
+@pytest.mark.asyncio
+async def test_traverse_respects_depth_and_direction() -> None:
+    backend = InMemoryCodeGraphBackend()
+    await backend.upsert_nodes(_chain_graph_nodes())
+    await backend.upsert_edges(
+        [
+            Edge(source="module:a", target="module:b", kind=EdgeKind.DEPENDS_ON),
+            Edge(source="module:b", target="module:c", kind=EdgeKind.DEPENDS_ON),
+            Edge(source="module:c", target="test_case:t", kind=EdgeKind.TESTED_BY),
+        ]
+    )
+
+    assert await backend.traverse("module:a", max_depth=1) == {"module:b": 1}
+    assert await backend.traverse("module:a", max_depth=5) == {
+        "module:b": 1,
+        "module:c": 2,
+        "test_case:t": 3,
+    }
+    assert await backend.traverse(
+        "module:a", kinds=[EdgeKind.DEPENDS_ON], max_depth=5
+    ) == {"module:b": 1, "module:c": 2}
+    assert await backend.traverse("test_case:t", direction="in", max_depth=2) == {
+        "module:c": 1,
+        "module:b": 2,
+    }
+    with pytest.raises(ValueError):
+        await backend.traverse("module:a", direction="sideways")
+
+
+@pytest.mark.asyncio
+async def test_snapshot_roundtrip(tmp_path) -> None:
+    backend = InMemoryCodeGraphBackend()
+    await backend.upsert_nodes(_chain_graph_nodes())
+    await backend.upsert_edges(
+        [
+            Edge(source="module:a", target="module:b", kind=EdgeKind.DEPENDS_ON, props={"line": 10}),
+            Edge(source="module:a", target="test_case:t", kind=EdgeKind.TESTED_BY),
+        ]
+    )
+
+    path = backend.save_snapshot(tmp_path / "graph.npz")
+    loaded = InMemoryCodeGraphBackend.load_snapshot(path)
+
+    assert loaded.node_count == 4
+    assert loaded.edge_count == 2
+    node = await loaded.get_node("module:c")
+    assert node is not None and node.labels == ["core"]
+    edges = await loaded.edges_from("module:a", kinds=[EdgeKind.DEPENDS_ON])
+    assert edges[0].props == {"line": 10}
+    assert [n.id for n in await loaded.find_nodes(prop_equals={"name": "b"})] == ["module:b"]
@@ -0,0 +1,116 @@
+# [NEXUS IDENTITY] ID: 2093318457126657045 | DATE: 2026-10-17
+
+"""
+Тесты полнотекстового индекса ConfigurationKnowledgeBase
+"""
+
+import json
+
+import pytest
+
+from src.services.configuration_knowledge_base import ConfigurationKnowledgeBase
+from src.services.knowledge_search_index import BM25Index, LiteralMatcher
+
+
+@pytest.fixture
+def kb(tmp_path):
+    (tmp_path / "erp.json").write_text(
+        json.dumps(
+            {
+                "name": "ERP",
+                "modules": [],
+                "best_practices": [],
+                "common_patterns": [
+                    {
+                        "name": "Проведение документа",
+                        "type": "posting",
+                        "description": "Проведение документа по регистрам накопления",
+                        "code_example": "Движения.Записать();",
+                    },
+                    {
+                        "name": "Запрос в цикле",
+                        "type": "performance",
+                        "description": "Выполнение запроса внутри цикла",
+                        "code_example": "Для Каждого Строка Из Таблица Цикл Запрос.Выполнить()",
+                    },
+                ],
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    return ConfigurationKnowledgeBase(str(tmp_path))
+
+
+class TestBM25Index:
+    def test_ranking_and_incremental_updates(self):
+        index = BM25Index()
+        index.add("a", "проведение документа проведение")
+        index.add("b", "документ справочника")
+        index.add("c", "регистр накопления")
+
+        assert [doc_id for doc_id, _, _ in index.search("проведение документа")] == ["a"]
+        assert {doc_id for doc_id, _, _ in index.search("докум")} == {"a", "b"}
+
+        index.add("a", "справочник номенклатуры")
+        index.remove("b")
+        assert index.search("проведение") == []
+        assert [doc_id for doc_id, _, _ in index.search("справочник")] == ["a"]
+        assert index.get_stats()["documents"] == 2
+
+
+class TestLiteralMatcher:
+    def test_matches_same_as_substring_test(self):
+        literals = ["Запрос.Выполнить()", "Цикл", "а.б", "Записать();", "x"]
+        matcher = LiteralMatcher((literal, literal) for literal in literals)
+        texts = ["Для Каждого Цикл Запрос.Выполнить() КонецЦикла", "ЗАПИСАТЬ();", "ра.бота", "нет"]
+
+        for text in texts:
+            expected = [literal for literal in literals if literal.lower() in text.lower()]
+            assert matcher.find(text.lower()) == expected
+
+
+class TestKnowledgeBaseSearch:
+    def test_search_patterns_ranked(self, kb):
+        results = kb.search_patterns(query="проведение регистров")
+
+        assert [r["name"] for r in results] == ["Проведение документа"]
+        assert results[0]["configuration"] == "erp"
+        assert results[0]["score"] > 0
+
+    def test_search_patterns_filters_and_prefix(self, kb):
+        assert [r["name"] for r in kb.search_patterns(query="запрос", pattern_type="performance")] == [
+            "Запрос в цикле"
+        ]
+        assert kb.search_patterns(query="запрос", pattern_type="posting") == []
+        assert [r["name"] for r in kb.search_patterns(query="провед")] == ["Проведение документа"]
+        assert len(kb.search_patterns(config_name="erp")) == 2
+
+    def test_writes_are_indexed_incrementally(self, kb):
+        kb.search("warmup")
+        kb.add_module_documentation("erp", "CommonUtils", {"description": "Служебные функции копирования"})
+        kb.add_best_practice(
+            "erp",
+            "performance",
+            {"title": "Кэширование", "description": "Используйте модули повторного использования"},
+        )
+
+        modules = kb.search("копирования", kinds=["module"])
+        practices = kb.search("повторного использования", config_name="erp")
+
+        assert [hit["key"] for hit in modules] == ["CommonUtils"]
+        assert [hit["kind"] for hit in practices] == ["best_practice"]
+
+    def test_recommendations_single_pass(self, kb):
+        kb.add_best_practice(
+            "erp",
+            "performance",
+            {"title": "Не используйте Сообщить", "code_pattern": "сообщить(", "severity": "warning"},
+        )
+        code = "Для Каждого Строка Из Таблица Цикл Запрос.Выполнить() КонецЦикла; Сообщить(1); Движения.Записать();"
+
+        recommendations = kb.get_recommendations(code, "erp")
+
+        assert [r["type"] for r in recommendations] == ["pattern_match", "pattern_match", "best_practice"]
+        assert recommendations[2]["severity"] == "warning"
+        assert kb.get_recommendations("Процедура Тест() КонецПроцедуры", "erp") == []
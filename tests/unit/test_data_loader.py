@@ -0,0 +1,125 @@
+# [NEXUS IDENTITY] ID: 5910397268853110616 | DATE: 2026-10-17
+
+"""
+Unit tests for DataLoader (coalescing, dedupe, LRU/TTL cache) и UnifiedDataLayer.load
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.infrastructure.data_layer import DataLoader, UnifiedDataLayer
+
+
+class RecordingBatchFn:
+    """batch_fn, запоминающая вызовы"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self, keys):
+        self.calls.append(list(keys))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("db down")
+        return [f"value-{key}" for key in keys]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_are_coalesced_into_one_batch():
+    """Ключи из разных корутин одного такта - один вызов batch_fn"""
+    batch_fn = RecordingBatchFn()
+    loader = DataLoader(batch_fn)
+
+    results = await asyncio.gather(*(loader.load(k) for k in ["a", "b", "c", "a"]))
+
+    assert results == ["value-a", "value-b", "value-c", "value-a"]
+    assert batch_fn.calls == [["a", "b", "c"]]
+    stats = loader.get_stats()
+    assert stats["coalesced"] == 1
+    assert stats["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_key_is_shared():
+    """Ключ, уже находящийся в загрузке, не запрашивается повторно"""
+    batch_fn = RecordingBatchFn(delay=0.01)
+    loader = DataLoader(batch_fn, cache_size=0)
+
+    first = asyncio.create_task(loader.load("a"))
+    await asyncio.sleep(0.001)
+    second = await loader.load("a")
+
+    assert await first == second == "value-a"
+    assert batch_fn.calls == [["a"]]
+
+
+@pytest.mark.asyncio
+async def test_max_batch_size_and_window():
+    """Окно батчинга и разбиение по max_batch_size"""
+    batch_fn = RecordingBatchFn()
+    loader = DataLoader(batch_fn, max_batch_size=2, batch_window=0.005)
+
+    async def late_load(key):
+        await asyncio.sleep(0.001)
+        return await loader.load(key)
+
+    await asyncio.gather(loader.load("a"), late_load("b"), late_load("c"))
+
+    assert sorted(batch_fn.calls) == [["a", "b"], ["c"]]
+
+
+@pytest.mark.asyncio
+async def test_lru_and_ttl_cache():
+    """Кэш ограничен по размеру и времени жизни"""
+    batch_fn = RecordingBatchFn()
+    loader = DataLoader(batch_fn, cache_size=2, cache_ttl=0.02)
+
+    await loader.load_many(["a", "b"])
+    await loader.load("a")  # hit, "a" становится самым свежим
+    await loader.load("c")  # вытесняет "b"
+    await loader.load("b")
+    assert batch_fn.calls == [["a", "b"], ["c"], ["b"]]
+
+    await asyncio.sleep(0.03)
+    await loader.load("c")
+    assert batch_fn.calls[-1] == ["c"]
+    assert loader.get_stats()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_propagate_and_are_not_cached():
+    """Ошибка batch_fn передается всем ожидающим и не кэшируется"""
+    batch_fn = RecordingBatchFn(fail=True)
+    loader = DataLoader(batch_fn)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    batch_fn.fail = False
+    assert await loader.load("a") == "value-a"
+    assert loader.get_stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unified_data_layer_postgres_load_batches_queries():
+    """UnifiedDataLayer.load объединяет запросы к PostgreSQL в один SELECT ... ANY"""
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [{"id": 1, "name": "one"}, {"id": 3, "name": "three"}]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    layer = UnifiedDataLayer(postgres_conn=conn)
+
+    rows = await asyncio.gather(*(layer.load("postgres", key, table="users") for key in [1, 2, 3]))
+
+    assert rows == [{"id": 1, "name": "one"}, None, {"id": 3, "name": "three"}]
+    cursor.execute.assert_called_once_with("SELECT * FROM users WHERE id = ANY(%s)", ([1, 2, 3],))
+
+    result = await layer.query("load", {"table": "users", "keys": [1, 3]})
+    assert result.total == 2
+    assert cursor.execute.call_count == 1  # из кэша
+    assert layer.get_loader_stats()["postgres:users:id"]["cache_hits"] == 2
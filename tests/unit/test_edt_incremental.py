@@ -0,0 +1,192 @@
+# [NEXUS IDENTITY] ID: 8123904457712046935 | DATE: 2026-10-17
+
+"""
+Тесты инкрементального парсинга EDT конфигураций (scripts/parsers/edt_incremental.py)
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts" / "parsers"))
+
+from edt_incremental import IncrementalEDTParser, default_manifest_path  # noqa: E402
+from parse_edt_xml import EDTXMLParser  # noqa: E402
+
+BSL_CODE = "Процедура Тест() Экспорт\n    Сообщить(\"{text}\");\nКонецПроцедуры\n"
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def edt_config(tmp_path):
+    config = tmp_path / "DO"
+    _write(config / "CommonModules" / "Общий.xml", '<CommonModule name="Общий"/>')
+    _write(config / "CommonModules" / "Общий" / "Ext" / "Module.bsl", BSL_CODE.format(text="a"))
+    _write(config / "Documents" / "Заказ" / "Заказ.xml", '<Document name="Заказ"/>')
+    _write(config / "Documents" / "Заказ" / "Ext" / "ObjectModule.bsl", BSL_CODE.format(text="b"))
+    _write(config / "Documents" / "Заказ" / "Ext" / "ManagerModule.bsl", BSL_CODE.format(text="c"))
+    _write(config / "Catalogs" / "Товары" / "Товары.xml", '<Catalog name="Товары"/>')
+    _write(config / "Catalogs" / "Товары" / "Ext" / "ObjectModule.bsl", BSL_CODE.format(text="d"))
+    return config
+
+
+@pytest.fixture
+def edt_parser(tmp_path):
+    parser = EDTXMLParser(use_postgres=False)
+    parser.config_dir = tmp_path
+    return parser
+
+
+def _deltas(result):
+    return sorted((d.kind, d.module_name) for d in result.deltas)
+
+
+def _run(parser, config, **kwargs):
+    """Запуск с сохранением манифеста, как после успешной записи"""
+    result = IncrementalEDTParser(parser, max_workers=1, **kwargs).run("DO", config)
+    result.commit()
+    return result
+
+
+class TestIncrementalEDTParser:
+    """Инкрементальный парсинг по манифесту"""
+
+    def test_first_run_adds_all_modules(self, edt_config, edt_parser):
+        result = IncrementalEDTParser(edt_parser, max_workers=1).run("DO", edt_config)
+
+        assert _deltas(result) == [
+            ("added", "Документ_Заказ_МодульМенеджера"),
+            ("added", "Документ_Заказ_МодульОбъекта"),
+            ("added", "ОбщийМодуль_Общий"),
+            ("added", "Справочник_Товары_МодульОбъекта"),
+        ]
+        assert {o["name"] for o in result.objects} == {"Общий", "Заказ", "Товары"}
+
+    def test_manifest_is_saved_outside_source_only_on_commit(self, edt_config, edt_parser, tmp_path):
+        manifest = default_manifest_path(tmp_path, "DO", edt_config)
+
+        uncommitted = IncrementalEDTParser(edt_parser, max_workers=1).run("DO", edt_config)
+        assert not manifest.exists()
+        # Без commit (например, запись в БД не удалась) изменения повторяются
+        assert _deltas(IncrementalEDTParser(edt_parser, max_workers=1).run("DO", edt_config)) == _deltas(uncommitted)
+
+        uncommitted.commit()
+        assert manifest.exists()
+        assert edt_config not in manifest.parents
+        assert not any(p.suffix == ".json" for p in edt_config.rglob("*"))
+
+    def test_unchanged_run_skips_everything(self, edt_config, edt_parser):
+        _run(edt_parser, edt_config)
+        result = _run(edt_parser, edt_config)
+
+        assert result.deltas == []
+        assert result.stats["units_skipped"] == 3
+        assert result.stats["files_hashed"] == 0
+
+    def test_touch_without_content_change_is_not_reparsed(self, edt_config, edt_parser):
+        _run(edt_parser, edt_config)
+        bsl = edt_config / "Catalogs" / "Товары" / "Ext" / "ObjectModule.bsl"
+        os.utime(bsl, ns=(bsl.stat().st_atime_ns, bsl.stat().st_mtime_ns + 10**9))
+
+        result = _run(edt_parser, edt_config)
+
+        assert result.deltas == []
+        assert result.stats["files_hashed"] == 1
+        assert result.stats["units_parsed"] == 0
+
+    def test_changed_and_removed_modules_emit_deltas(self, edt_config, edt_parser):
+        _run(edt_parser, edt_config)
+        _write(edt_config / "Documents" / "Заказ" / "Ext" / "ObjectModule.bsl", BSL_CODE.format(text="new"))
+        (edt_config / "Documents" / "Заказ" / "Ext" / "ManagerModule.bsl").unlink()
+        for path in sorted((edt_config / "Catalogs").rglob("*"), reverse=True):
+            path.unlink() if path.is_file() else path.rmdir()
+
+        received = []
+        result = IncrementalEDTParser(edt_parser, max_workers=1).run(
+            "DO", edt_config, sinks=[received.append]
+        )
+
+        assert _deltas(result) == [
+            ("changed", "Документ_Заказ_МодульОбъекта"),
+            ("removed", "Документ_Заказ_МодульМенеджера"),
+            ("removed", "Справочник_Товары_МодульОбъекта"),
+        ]
+        assert received == result.deltas
+        assert result.changed_modules[0]["code"].count("new") == 1
+        assert result.stats["units_parsed"] == 1
+        assert [o["name"] for o in result.removed_objects] == ["Товары"]
+
+    def test_process_pool_matches_serial(self, edt_config, edt_parser, tmp_path):
+        serial = IncrementalEDTParser(
+            edt_parser, manifest_path=tmp_path / "serial.json", max_workers=1
+        ).run("DO", edt_config)
+        parallel = IncrementalEDTParser(
+            edt_parser, manifest_path=tmp_path / "parallel.json", max_workers=2, min_parallel_units=1
+        ).run("DO", edt_config)
+
+        assert _deltas(parallel) == _deltas(serial)
+        assert sorted(m["name"] for m in parallel.changed_modules) == sorted(
+            m["name"] for m in serial.changed_modules
+        )
+
+
+class FakeSaver:
+    """Сохранитель PostgreSQL, у которого может не удаться запись модуля"""
+
+    def __init__(self, fail_modules=False):
+        self.fail_modules = fail_modules
+        self.deleted_objects = []
+
+    def save_configuration(self, config_data):
+        return "cfg"
+
+    def delete_module(self, config_id, module_name):
+        return True
+
+    def delete_object(self, config_id, object_type, name):
+        self.deleted_objects.append((object_type, name))
+        return True
+
+    def save_object(self, config_id, obj):
+        return f"obj-{obj['name']}"
+
+    def save_module(self, config_id, module, object_id=None):
+        return None if self.fail_modules else f"mod-{module['name']}"
+
+    def get_statistics(self, config_name=None):
+        return {}
+
+
+class TestIncrementalSave:
+    """Манифест фиксируется только после успешной записи в БД"""
+
+    def _parse(self, parser, config, saver):
+        parser.use_postgres = True
+        parser.db_saver = saver
+        return parser.parse_edt_configuration("DO", config, incremental=True, max_workers=1)
+
+    def test_failed_write_keeps_changes_for_next_run(self, edt_config, edt_parser):
+        failed = self._parse(edt_parser, edt_config, FakeSaver(fail_modules=True))
+        retried = self._parse(edt_parser, edt_config, FakeSaver())
+        repeated = self._parse(edt_parser, edt_config, FakeSaver())
+
+        assert failed["status"] == "error"
+        assert len(retried["deltas"]) == 4
+        assert repeated["deltas"] == []
+
+    def test_removed_unit_deletes_object(self, edt_config, edt_parser):
+        self._parse(edt_parser, edt_config, FakeSaver())
+        for path in sorted((edt_config / "Catalogs").rglob("*"), reverse=True):
+            path.unlink() if path.is_file() else path.rmdir()
+
+        saver = FakeSaver()
+        result = self._parse(edt_parser, edt_config, saver)
+
+        assert result["status"] == "success"
+        assert saver.deleted_objects == [("Справочник", "Товары")]
@@ -0,0 +1,83 @@
+# [NEXUS IDENTITY] ID: 4417802631958274109 | DATE: 2026-10-17
+
+"""
+Unit tests for EmbeddingBatcher (dynamic micro-batching)
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.services.embedding.batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Синхронный encode_fn, запоминающий батчи и поток вызова"""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.threads = set()
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.threads.add(threading.get_ident())
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=20)
+
+    texts = ["a", "bb", "ccc", "bb"]
+    results = await asyncio.gather(*(batcher.encode(t) for t in texts))
+
+    assert results == [[1.0], [2.0], [3.0], [2.0]]
+    assert encoder.batches == [["a", "bb", "ccc"]]
+    assert threading.get_ident() not in encoder.threads  # модель - в worker-потоке
+
+    stats = batcher.get_stats()
+    assert stats["requests"] == 4
+    assert stats["coalesced"] == 1
+    assert stats["avg_batch_size"] == 3
+    assert stats["throughput_texts_per_sec"] > 0
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_size_is_capped():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=20, max_batch_size=2)
+
+    results = await batcher.encode_many([f"t{i}" for i in range(5)])
+
+    assert len(results) == 5
+    assert [len(batch) for batch in encoder.batches] == [2, 2, 1]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_caller():
+    encoder = RecordingEncoder(fail=True)
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=5)
+
+    results = await asyncio.gather(batcher.encode("x"), batcher.encode("y"), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    encoder.fail = False
+    assert await batcher.encode("zz") == [2.0]
+    assert batcher.get_stats()["errors"] == 1
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_short_result_is_an_error():
+    batcher = EmbeddingBatcher(lambda texts: [], max_wait_ms=1)
+
+    with pytest.raises(RuntimeError):
+        await batcher.encode("x")
+    await batcher.close()
@@ -0,0 +1,109 @@
+# [NEXUS IDENTITY] ID: 7391046628250914873 | DATE: 2026-10-17
+
+"""
+Unit tests for the persistent EmbeddingStore
+"""
+
+import numpy as np
+import pytest
+
+from src.services.embedding.embedding_store import EmbeddingStore
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(1)
+    return rng.standard_normal((50, 32)).astype(np.float32)
+
+
+class TestEmbeddingStore:
+    """Memory-mapped store keyed by content hash"""
+
+    @pytest.mark.parametrize("dtype, tolerance", [("float16", 1e-2), ("int8", 5e-2)])
+    def test_bulk_put_get_round_trip(self, tmp_path, vectors, dtype, tolerance):
+        store = EmbeddingStore(tmp_path, model_name="test/model", dtype=dtype)
+        texts = [f"Процедура П{i}()" for i in range(len(vectors))]
+
+        store.put_many(texts, vectors)
+        restored = store.get_many(texts + ["unknown"])
+
+        assert restored[-1] is None
+        assert np.allclose(np.stack(restored[:-1]), vectors, atol=tolerance * np.abs(vectors).max())
+        assert store.get_stats()["hits"] == 50
+        assert store.get_stats()["misses"] == 1
+
+    def test_persists_and_loads_lazily(self, tmp_path, vectors):
+        store = EmbeddingStore(tmp_path, model_name="m1")
+        store.put_many(["a", "b"], vectors[:2])
+        store.close()
+
+        reopened = EmbeddingStore(tmp_path, model_name="m1")
+        assert reopened.dimension is None  # ничего не прочитано до первого обращения
+        assert np.allclose(reopened.get("b"), vectors[1], atol=1e-2)
+        assert len(reopened) == 2
+
+        # Другая модель - другое пространство ключей
+        assert EmbeddingStore(tmp_path, model_name="m2").get("a") is None
+
+    def test_lru_eviction_by_bytes_reuses_slots(self, tmp_path, vectors):
+        record_bytes = 32 * 2  # float16
+        store = EmbeddingStore(tmp_path, model_name="m", max_bytes=3 * record_bytes, autoflush_seconds=60)
+
+        store.put_many(["a", "b", "c"], vectors[:3])
+        store.get("a")  # "a" становится самым свежим
+        store.put("d", vectors[3])
+
+        assert "b" not in store
+        assert all(text in store for text in ("a", "c", "d"))
+        assert store.get_stats()["evictions"] == 1
+        assert store.nbytes <= store.max_bytes
+        # слот "b" ещё упомянут в manifest на диске - до flush() не переиспользуется
+        assert store._next_slot == 4
+
+        store.flush()
+        store.put("e", vectors[4])
+        assert "c" not in store
+        assert store._next_slot == 4
+        assert np.allclose(store.get("d"), vectors[3], atol=1e-2)
+        assert np.allclose(store.get("e"), vectors[4], atol=1e-2)
+
+    def test_grows_beyond_initial_capacity(self, tmp_path):
+        store = EmbeddingStore(tmp_path, model_name="m")
+        data = np.arange(1500 * 4, dtype=np.float32).reshape(1500, 4) / 6000
+        texts = [str(i) for i in range(1500)]
+
+        for start in range(0, 1500, 500):
+            store.put_many(texts[start : start + 500], data[start : start + 500])
+        store.flush()
+
+        reopened = EmbeddingStore(tmp_path, model_name="m")
+        assert np.allclose(reopened.get("1499"), data[1499], atol=1e-3)
+
+    def test_unflushed_puts_survive_reopen(self, tmp_path, vectors):
+        store = EmbeddingStore(tmp_path, model_name="m")
+        store.put_many([f"t{i}" for i in range(10)], vectors[:10])
+        store.flush()
+        store.put("late", vectors[10])
+
+        # Второй экземпляр без manifest-записи "late" не должен обрезать vectors.bin
+        other = EmbeddingStore(tmp_path, model_name="m")
+        assert len(other) == 10
+        other.put("other", vectors[11])
+        assert np.allclose(store.get("t3"), vectors[3], atol=1e-2)
+
+    def test_time_based_autoflush(self, tmp_path, vectors):
+        store = EmbeddingStore(tmp_path, model_name="m", autoflush_seconds=0)
+        store.put_many([f"t{i}" for i in range(10)], vectors[:10])
+
+        assert len(EmbeddingStore(tmp_path, model_name="m")) == 10
+
+    def test_fresh_directory_with_leftover_vectors_file(self, tmp_path, vectors):
+        store = EmbeddingStore(tmp_path, model_name="m", autoflush_seconds=60)
+        store.put_many(["a", "b"], vectors[:2])
+        store._vectors.flush()
+
+        # manifest ещё не записан: новый экземпляр открывает vectors.bin через r+, а не w+
+        other = EmbeddingStore(tmp_path, model_name="m", autoflush_seconds=60)
+        other.put("c", vectors[2])
+        assert (tmp_path / "m" / "vectors.bin").stat().st_size == 1024 * 32 * 2
+        assert np.allclose(store.get("b"), vectors[1], atol=1e-2)
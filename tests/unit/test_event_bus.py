@@ -10,6 +10,8 @@ import asyncio
 import pytest
 
 from src.infrastructure.event_bus import (
+    BackpressureError,
+    BatchEventHandler,
     Event,
     EventBus,
     EventHandler,
@@ -201,3 +203,121 @@ async def test_event_correlation():
     assert history[1].causation_id == event1.id
 
     await bus.stop()
+
+
+class RecordingHandler(EventHandler):
+    """Обработчик, запоминающий порядок событий"""
+
+    def __init__(self, delay: float = 0.0):
+        self.handled_events = []
+        self.delay = delay
+
+    @property
+    def event_types(self):
+        return {EventType.ML_TRAINING_STARTED}
+
+    async def handle(self, event: Event) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.handled_events.append(event)
+
+
+class RecordingBatchHandler(BatchEventHandler):
+    """Пакетный обработчик для тестов"""
+
+    batch_size = 3
+
+    def __init__(self):
+        self.batches = []
+
+    @property
+    def event_types(self):
+        return {EventType.ML_TRAINING_STARTED}
+
+    async def handle_batch(self, events) -> None:
+        self.batches.append(list(events))
+
+
+@pytest.mark.asyncio
+async def test_partition_preserves_order_per_key():
+    """События одного ключа обрабатываются в порядке публикации"""
+    bus = EventBus()
+    handler = RecordingHandler(delay=0.001)
+    bus.subscribe(EventType.ML_TRAINING_STARTED, handler)
+    await bus.start(num_workers=4)
+
+    for i in range(20):
+        await bus.publish(
+            Event(type=EventType.ML_TRAINING_STARTED, payload={"i": i}),
+            key=f"model-{i % 3}",
+        )
+    await bus.stop(drain=True)
+
+    for k in range(3):
+        seen = [e.payload["i"] for e in handler.handled_events if e.payload["i"] % 3 == k]
+        assert seen == sorted(seen)
+    assert len(handler.handled_events) == 20
+    assert bus.get_stats()["processed"] == 20
+
+
+@pytest.mark.asyncio
+async def test_backpressure_policies():
+    """Переполнение очереди партиции: raise / drop_newest / drop_oldest"""
+    bus = EventBus(num_partitions=1, max_queue_size=2, overflow_policy="raise")
+    await bus.publish(Event(type=EventType.ML_TRAINING_STARTED))
+    await bus.publish(Event(type=EventType.ML_TRAINING_STARTED))
+    with pytest.raises(BackpressureError):
+        await bus.publish(Event(type=EventType.ML_TRAINING_STARTED))
+
+    bus = EventBus(num_partitions=1, max_queue_size=2, overflow_policy="drop_newest")
+    for _ in range(5):
+        await bus.publish(Event(type=EventType.ML_TRAINING_STARTED))
+    assert bus.get_stats()["dropped"] == 3
+    assert bus.get_stats()["queue_depths"] == [2]
+
+    bus = EventBus(num_partitions=1, max_queue_size=2, overflow_policy="drop_oldest")
+    events = [Event(type=EventType.ML_TRAINING_STARTED, payload={"i": i}) for i in range(4)]
+    for event in events:
+        await bus.publish(event)
+    handler = RecordingHandler()
+    bus.subscribe(EventType.ML_TRAINING_STARTED, handler)
+    await bus.start(num_workers=1)
+    await bus.stop(drain=True)
+    assert [e.payload["i"] for e in handler.handled_events] == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_batch_handler_receives_batches():
+    """BatchEventHandler получает накопившиеся события пачками"""
+    bus = EventBus(num_partitions=1)
+    handler = RecordingBatchHandler()
+    bus.subscribe(EventType.ML_TRAINING_STARTED, handler)
+
+    for i in range(7):
+        await bus.publish(Event(type=EventType.ML_TRAINING_STARTED, payload={"i": i}))
+    await bus.start(num_workers=1)
+    await bus.stop(drain=True)
+
+    assert [len(b) for b in handler.batches] == [3, 3, 1]
+    assert [e.payload["i"] for b in handler.batches for e in b] == list(range(7))
+
+
+@pytest.mark.asyncio
+async def test_history_is_bounded_and_segment_log_replays(tmp_path):
+    """История - кольцевой буфер, журнал сегментов переживает перезапуск"""
+    bus = EventBus(history_size=3, segment_log_dir=tmp_path, segment_max_bytes=300)
+    for i in range(10):
+        event_type = EventType.ML_TRAINING_STARTED if i % 2 else EventType.ML_TRAINING_COMPLETED
+        await bus.publish(Event(type=event_type, payload={"i": i}))
+
+    assert [e.payload["i"] for e in bus.get_event_history()] == [7, 8, 9]
+    await bus.stop()
+    assert bus._segment_log._file is None
+    assert len(list(tmp_path.glob("*.log"))) > 1
+
+    restored = EventBus(segment_log_dir=tmp_path)
+    assert restored.get_stats()["log_offset"] == 10
+    assert [e.payload["i"] for e in restored.replay(from_offset=4)] == [4, 5, 6, 7, 8, 9]
+    assert [
+        e.payload["i"] for e in restored.replay(event_type=EventType.ML_TRAINING_STARTED)
+    ] == [1, 3, 5, 7, 9]
@@ -0,0 +1,141 @@
+# [NEXUS IDENTITY] ID: -2947150338216940671 | DATE: 2026-10-17
+
+"""
+Unit tests for streaming metric sketches and PerformanceMonitor percentiles
+"""
+
+import json
+import random
+
+import pytest
+
+from src.monitoring.performance_monitor import PerformanceMonitor
+from src.monitoring.sketches import (BucketHistogram, QuantileSketch,
+                                     WindowedCounter, WindowedSketch)
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(4, 1.2) for _ in range(20000)]
+
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = _exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+    assert sketch.quantile(0) == min(values)
+    assert sketch.quantile(1) == max(values)
+    assert sketch.mean == pytest.approx(sum(values) / len(values))
+
+
+def test_merged_worker_sketches_match_single_sketch():
+    rng = random.Random(3)
+    values = [rng.expovariate(1 / 200) for _ in range(10000)]
+
+    single = QuantileSketch()
+    workers = [QuantileSketch() for _ in range(4)]
+    for i, value in enumerate(values):
+        single.add(value)
+        workers[i % 4].add(value)
+
+    merged = QuantileSketch()
+    for worker in workers:
+        # Передача между процессами идет через JSON
+        merged.merge(QuantileSketch.from_dict(json.loads(json.dumps(worker.to_dict()))))
+
+    assert merged.count == single.count
+    assert merged.quantiles([0.5, 0.95, 0.99]) == single.quantiles([0.5, 0.95, 0.99])
+
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_bucket_limit_collapses_lowest_buckets():
+    # 800 бакетов по 1% покрывают ~7 порядков: 1e-6 и 1e-3 схлопываются
+    sketch = QuantileSketch(max_buckets=800)
+    for value in (1e-6, 1e-3, 1.0, 1e3, 1e6):
+        sketch.add(value)
+
+    assert len(sketch.to_dict()["counts"]) <= 800
+    assert sketch.count == 5
+    assert sketch.quantile(0) == 1e-6
+    assert sketch.quantile(0.25) < 1.0
+    assert sketch.quantile(0.5) == pytest.approx(1.0, rel=0.011)
+    assert sketch.quantile(0.75) == pytest.approx(1e3, rel=0.011)
+
+
+def test_bucket_histogram_boundaries_and_merge():
+    prometheus_style = BucketHistogram([100, 500])
+    strict = BucketHistogram([100, 500], upper_inclusive=False)
+    for value in (50, 100, 500, 900):
+        prometheus_style.add(value)
+        strict.add(value)
+
+    assert prometheus_style.counts() == [2, 1, 1]
+    assert strict.counts() == [1, 1, 2]
+    assert prometheus_style.cumulative_counts() == [2, 3, 4]
+
+    prometheus_style.merge(BucketHistogram.from_dict(prometheus_style.to_dict()))
+    assert prometheus_style.counts() == [4, 2, 2]
+    with pytest.raises(ValueError):
+        prometheus_style.merge(strict)
+
+
+def test_windowed_structures_rotate_out_old_slots():
+    clock = FakeClock()
+    window = WindowedSketch(window_seconds=60, slots=6, clock=clock)
+    counter = WindowedCounter(window_seconds=60, slots=60, clock=clock)
+
+    for second in range(120):
+        clock.now = 1000.0 + second
+        window.add(float(second))
+        counter.add()
+
+    snapshot = window.snapshot()
+    assert snapshot.count == 60
+    assert snapshot.quantile(0) == 60.0
+    assert counter.total() == 60
+
+    clock.now += 3600
+    assert window.snapshot().count == 0
+    assert counter.total() == 0
+
+
+def test_performance_monitor_percentiles_and_worker_merge():
+    first = PerformanceMonitor()
+    second = PerformanceMonitor()
+    for latency in range(1, 101):
+        first.track_request(latency_ms=float(latency))
+        second.track_request(latency_ms=float(latency * 100), success=latency % 10 != 0)
+
+    metrics = first.get_metrics()
+    assert metrics["latency"]["p50"] == pytest.approx(50, rel=0.03)
+    assert metrics["latency"]["p99"] == pytest.approx(99, rel=0.03)
+    assert metrics["latency"]["buckets"]["<100ms"] == 99
+
+    first.merge_state(json.loads(json.dumps(second.export_state())))
+    merged = first.get_metrics()
+    assert merged["requests"]["total"] == 200
+    assert merged["requests"]["error"] == 10
+    assert merged["latency"]["p50"] == pytest.approx(100, rel=0.03)
+    assert merged["latency"]["p95"] == pytest.approx(9000, rel=0.03)
+    assert sum(merged["latency"]["buckets"].values()) == 200
+
+    first.reset()
+    assert first.get_metrics()["latency"]["p99"] == 0.0
+    assert sum(first.latency_buckets.values()) == 0
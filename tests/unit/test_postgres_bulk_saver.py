@@ -0,0 +1,226 @@
+# [NEXUS IDENTITY] ID: -4075932219518894316 | DATE: 2026-10-17
+
+"""
+Unit tests for PostgreSQLBulkSaver (staged buffers + batched writes)
+"""
+
+import itertools
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.db.postgres_bulk_saver import PostgreSQLBulkSaver
+
+
+class FakeExecuteValues:
+    """
+    Записывает вызовы execute_values и выдает строки RETURNING.
+
+    Строки RETURNING возвращаются в обратном порядке: Postgres не гарантирует
+    порядок, и сопоставление должно идти по ключу. Модули с ключом из
+    `existing` считаются обновленными (xmax <> 0).
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.existing = {}
+        self.fail_next = False
+        self._ids = itertools.count(1)
+
+    def __call__(self, cur, sql, rows, page_size=100, fetch=False, **kwargs):
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("connection lost")
+        rows = list(rows)
+        self.calls.append((" ".join(sql.split()), rows))
+        if not fetch:
+            return None
+        returned = []
+        for row in rows:
+            if "INSERT INTO modules" in sql:
+                key = row[:4]
+                inserted = key not in self.existing
+                if inserted:
+                    self.existing[key] = f"id-{next(self._ids)}"
+                returned.append((self.existing[key], inserted) + key)
+            else:
+                returned.append((f"id-{next(self._ids)}",) + row[:3])
+        return returned[::-1]
+
+    def table_rows(self, table):
+        return [rows for sql, rows in self.calls if f"INSERT INTO {table} " in sql]
+
+
+@pytest.fixture
+def bulk_env():
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool_cls, patch(
+        "src.db.postgres_bulk_saver.execute_values", new_callable=FakeExecuteValues
+    ) as fake_execute_values:
+        mock_pool = MagicMock()
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_pool.getconn.return_value = mock_conn
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_pool_cls.return_value = mock_pool
+        yield fake_execute_values, mock_cursor, mock_conn
+
+
+def _module(name, object_name="Catalog1"):
+    return {
+        "name": name,
+        "object_name": object_name,
+        "module_type": "ObjectModule",
+        "code": "Процедура Тест()\nКонецПроцедуры",
+        "functions": [{"name": "F", "code": "Если Истина Тогда", "params": ["a"]}],
+        "procedures": [{"name": "P", "type": "Procedure"}],
+        "api_usage": ["Запрос", "Запрос"],
+        "regions": [{"name": "Public", "start_line": 1, "end_line": 2}],
+    }
+
+
+class TestPostgreSQLBulkSaver:
+    """Массовая загрузка через буферы"""
+
+    def test_save_methods_stage_rows_without_db_calls(self, bulk_env):
+        fake_execute_values, cursor, _ = bulk_env
+        saver = PostgreSQLBulkSaver(password="test")
+        saver.connect()
+
+        obj_ref = saver.save_object("cfg", {"type": "Catalog", "name": "Catalog1"})
+        module_ref = saver.save_module("cfg", _module("M1"), obj_ref)
+
+        assert obj_ref.startswith("staged:objects:")
+        assert module_ref.startswith("staged:modules:")
+        assert fake_execute_values.calls == []
+        assert not cursor.copy_expert.called
+        assert saver.get_ingest_stats()["staged_rows"] == 6
+
+    def test_flush_resolves_ids_in_dependency_order(self, bulk_env):
+        fake_execute_values, cursor, conn = bulk_env
+        saver = PostgreSQLBulkSaver(password="test")
+        saver.connect()
+
+        first = saver.save_object("cfg", {"type": "Catalog", "name": "Catalog1"})
+        duplicate = saver.save_object("cfg", {"type": "Catalog", "name": "Catalog1"})
+        module_ref = saver.save_module("cfg", _module("M1"), first)
+        written = saver.flush()
+
+        assert written == {"objects": 1, "modules": 1, "functions": 2, "regions": 1, "api_usage": 1}
+        assert saver.resolve_id(first) == saver.resolve_id(duplicate) == "id-1"
+        assert saver.resolve_id(module_ref) == "id-2"
+
+        (module_rows,) = fake_execute_values.table_rows("modules")
+        assert module_rows[0][1] == "id-1"
+        (api_rows,) = fake_execute_values.table_rows("api_usage")
+        assert api_rows == [("id-2", "Запрос", 2)]
+
+        # Функции и регионы - через COPY, с уже разрешенным module_id
+        copy_sql = [c.args[0] for c in cursor.copy_expert.call_args_list]
+        assert any(sql.startswith("COPY functions") for sql in copy_sql)
+        function_csv = cursor.copy_expert.call_args_list[0].args[1].getvalue()
+        assert function_csv.startswith("id-2,F,Function,False")
+        assert conn.commit.call_count == 1
+
+    def test_insert_mode_without_copy(self, bulk_env):
+        fake_execute_values, cursor, _ = bulk_env
+        saver = PostgreSQLBulkSaver(password="test", use_copy=False)
+        saver.connect()
+
+        saver.save_module("cfg", _module("M1"))
+        saver.flush()
+
+        assert not cursor.copy_expert.called
+        assert len(fake_execute_values.table_rows("functions")[0]) == 2
+
+    def test_auto_flush_on_batch_size(self, bulk_env):
+        fake_execute_values, _, _ = bulk_env
+        saver = PostgreSQLBulkSaver(password="test", batch_size=3)
+        saver.connect()
+
+        for i in range(3):
+            saver.save_object("cfg", {"type": "Catalog", "name": f"C{i}"})
+
+        assert len(fake_execute_values.table_rows("objects")) == 1
+        assert saver.get_ingest_stats()["staged_rows"] == 0
+
+    def test_bulk_save_modules_in_parallel(self, bulk_env):
+        fake_execute_values, _, _ = bulk_env
+        saver = PostgreSQLBulkSaver(password="test")
+        saver.connect()
+
+        object_ids = {
+            "Catalog1": saver.save_object("cfg", {"type": "Catalog", "name": "Catalog1"}),
+            "Catalog2": saver.save_object("cfg", {"type": "Catalog", "name": "Catalog2"}),
+        }
+        modules = [_module(f"M{i}", "Catalog1" if i % 2 else "Catalog2") for i in range(6)]
+
+        refs = saver.bulk_save_modules("cfg", modules, object_ids, workers=2)
+
+        assert len(set(saver.resolve_id(ref) for ref in refs)) == 6
+        module_rows = [row for rows in fake_execute_values.table_rows("modules") for row in rows]
+        assert {row[1] for row in module_rows} == {
+            saver.resolve_id(object_ids["Catalog1"]),
+            saver.resolve_id(object_ids["Catalog2"]),
+        }
+        stats = saver.get_ingest_stats()
+        assert stats["rows_written"]["modules"] == 6
+        assert stats["rows_per_sec"] > 0
+
+    def test_unflushed_reference_is_rejected(self, bulk_env):
+        saver = PostgreSQLBulkSaver(password="test")
+        ref = saver.save_object("cfg", {"type": "Catalog", "name": "Catalog1"})
+
+        with pytest.raises(KeyError):
+            saver.resolve_id(ref)
+        assert saver.resolve_id("real-uuid") == "real-uuid"
+
+    def test_failed_flush_keeps_rows_for_retry(self, bulk_env):
+        fake_execute_values, _, conn = bulk_env
+        saver = PostgreSQLBulkSaver(password="test")
+        saver.connect()
+
+        obj_ref = saver.save_object("cfg", {"type": "Catalog", "name": "Catalog1"})
+        saver.save_module("cfg", _module("M1"), obj_ref)
+        fake_execute_values.fail_next = True
+
+        with pytest.raises(RuntimeError):
+            saver.flush()
+        assert conn.rollback.call_count == 1
+        assert saver.get_ingest_stats()["staged_rows"] == 6
+        with pytest.raises(KeyError):
+            saver.resolve_id(obj_ref)
+
+        written = saver.flush()
+        assert written["modules"] == 1
+        assert saver.resolve_id(obj_ref) == "id-1"
+
+    def test_auto_flush_error_is_logged_not_raised(self, bulk_env):
+        fake_execute_values, _, _ = bulk_env
+        saver = PostgreSQLBulkSaver(password="test", batch_size=1)
+        saver.connect()
+        fake_execute_values.fail_next = True
+
+        ref = saver.save_object("cfg", {"type": "Catalog", "name": "Catalog1"})
+
+        assert ref.startswith("staged:objects:")
+        assert saver.get_ingest_stats()["staged_rows"] == 1
+
+    def test_reparsed_module_is_upserted_and_children_replaced(self, bulk_env):
+        fake_execute_values, cursor, _ = bulk_env
+        saver = PostgreSQLBulkSaver(password="test")
+        saver.connect()
+
+        first = saver.save_module("cfg", _module("M1"))
+        saver.save_module("cfg", _module("M2"))
+        saver.flush()
+        assert not cursor.execute.called
+
+        again = saver.save_module("cfg", _module("M1"))
+        saver.flush()
+
+        module_sql = [sql for sql, _ in fake_execute_values.calls if "INSERT INTO modules" in sql]
+        assert all("ON CONFLICT (configuration_id, object_id, name, module_type)" in sql for sql in module_sql)
+        assert saver.resolve_id(again) == saver.resolve_id(first)
+        deleted = [c.args for c in cursor.execute.call_args_list]
+        assert [sql.split()[2] for sql, _ in deleted] == ["functions", "regions", "api_usage"]
+        assert all(params == ([saver.resolve_id(first)],) for _, params in deleted)
@@ -1,7 +1,11 @@
 # [NEXUS IDENTITY] ID: 8012280499333434021 | DATE: 2025-11-19
 
 
+import random
+import re
+
 from src.ai.orchestrator import AIService, QueryClassifier, QueryType
+from src.ai.query_classifier import CompiledRuleSet
 
 
 def test_classify_standard_1c_query():
@@ -53,3 +57,58 @@ def test_invalid_query_returns_unknown():
     assert intent.confidence == 0.0
     assert intent.preferred_services  # есть хотя бы naparnik по умолчанию
     assert intent.suggested_tools == []
+
+
+def _reference_scores(rules, query_lower):
+    """Построчная проверка правил (исходная реализация classify)"""
+    scores, keywords = {}, []
+    for query_type, type_rules in rules.items():
+        score = 0.0
+        for keyword in type_rules.get("keywords", []):
+            if keyword.lower() in query_lower:
+                score += 1.0
+                keywords.append(keyword)
+        for pattern in type_rules.get("patterns", []):
+            if re.search(pattern, query_lower, re.IGNORECASE):
+                score += 2.0
+        scores[query_type] = score
+    return scores, keywords
+
+
+def test_compiled_rules_match_reference():
+    classifier = QueryClassifier(cache_size=0)
+    phrases = [k for rules in classifier.RULES.values() for k in rules["keywords"]]
+    phrases += ["как  улучшить", "где используют", "найди все зависимости", "типовые ", "код", "документ"]
+    rng = random.Random(7)
+
+    for _ in range(500):
+        query = " ".join(rng.choice(phrases) for _ in range(rng.randint(1, 20))).lower()
+        assert classifier.rule_set.match(query) == _reference_scores(classifier.RULES, query)
+
+
+def test_pattern_prefixes_are_extracted():
+    rule_set = CompiledRuleSet(
+        {
+            QueryType.OPTIMIZATION: {
+                "keywords": [],
+                "patterns": [r"(оптимизируй|ускор)", r"как\s+улучшить", r"\w+ код", r"[("],
+            }
+        }
+    )
+
+    anchors = [prefixes for _, _, prefixes in rule_set.patterns]
+    assert anchors == [("оптимизируй", "ускор"), ("как",), None]
+
+
+def test_repeated_queries_are_memoized():
+    classifier = QueryClassifier(cache_size=2)
+
+    first = classifier.classify("Создай функцию для проведения документа")
+    second = classifier.classify("Создай функцию для проведения документа")
+    classifier.classify("Найди похожий код")
+    classifier.classify("Где используется метод")
+
+    assert second.query_type == first.query_type
+    assert second.keywords == first.keywords
+    assert classifier.cache_stats == {"hits": 1, "misses": 3}
+    assert len(classifier._match_cache) == 2
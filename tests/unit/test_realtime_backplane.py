@@ -0,0 +1,211 @@
+# [NEXUS IDENTITY] ID: -3928475016623194507 | DATE: 2026-10-17
+
+"""
+Тесты межинстансной доставки WebSocket (src/infrastructure/messaging/realtime_backplane.py)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.infrastructure.messaging.realtime_backplane import (
+    InMemoryBroker,
+    InMemoryTransport,
+    RealtimeBackplane,
+    create_backplane_from_env,
+)
+from src.services.real_time_service import RealTimeManager
+from src.services.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_json(self, data):
+        self.sent.append(json.dumps(data))
+
+
+async def make_replicas(count, **kwargs):
+    broker = InMemoryBroker()
+    replicas = []
+    for i in range(count):
+        backplane = RealtimeBackplane(InMemoryTransport(broker), instance_id=f"node-{i}", **kwargs)
+        await backplane.start()
+        replicas.append(ConnectionManager(backplane=backplane))
+    return broker, replicas
+
+
+async def settle(*managers):
+    for manager in managers:
+        await manager.backplane.flush()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    for manager in managers:
+        await manager.broadcaster.flush(timeout=1.0)
+
+
+async def shutdown(*managers):
+    for manager in managers:
+        await manager.backplane.stop()
+        await manager.broadcaster.close()
+
+
+@pytest.mark.asyncio
+async def test_tenant_message_reaches_other_replica():
+    broker, (node_a, node_b) = await make_replicas(2)
+    ws = FakeWebSocket()
+    await node_b.connect(ws, user_id="u1", tenant_id="acme")
+    await settle(node_a, node_b)
+
+    await node_a.send_to_tenant({"type": "notification", "text": "hello"}, "acme")
+    await settle(node_a, node_b)
+
+    assert [json.loads(m)["text"] for m in ws.sent] == ["hello"]
+    assert node_b.get_stats()["backplane"]["messages_received"] == 1
+    await shutdown(node_a, node_b)
+
+
+@pytest.mark.asyncio
+async def test_only_interested_replicas_subscribe():
+    broker, (node_a, node_b, node_c) = await make_replicas(3)
+    ws = FakeWebSocket()
+    await node_b.connect(ws, tenant_id="acme")
+    await settle(node_a, node_b, node_c)
+
+    assert set(broker.channels["realtime.tenant:acme"]) == {node_b.backplane.transport}
+
+    await node_a.send_to_tenant({"type": "ping"}, "acme")
+    await settle(node_a, node_b, node_c)
+    assert node_b.backplane.transport.received == 1
+    assert node_c.backplane.transport.received == 0
+
+    # Последнее соединение ушло - реплика отписывается от канала
+    node_b.disconnect(ws, tenant_id="acme")
+    await settle(node_a, node_b, node_c)
+    assert "realtime.tenant:acme" not in broker.channels
+    await shutdown(node_a, node_b, node_c)
+
+
+@pytest.mark.asyncio
+async def test_messages_are_batched_per_topic():
+    broker, (node_a, node_b) = await make_replicas(2, batch_window=0.05)
+    sockets = [FakeWebSocket() for _ in range(3)]
+    for ws in sockets:
+        await node_b.connect(ws)
+    await settle(node_a, node_b)
+
+    for i in range(20):
+        await node_a.broadcast({"type": "tick", "n": i})
+    await settle(node_a, node_b)
+
+    stats = node_a.backplane.get_stats()
+    assert stats["published"] == 20
+    assert stats["batches_sent"] == 1
+    for ws in sockets:
+        assert [json.loads(m)["n"] for m in ws.sent] == list(range(20))
+    assert node_b.backplane.get_stats()["fanout_latency_ms_p99"] >= 0.0
+    await shutdown(node_a, node_b)
+
+
+@pytest.mark.asyncio
+async def test_publisher_does_not_deliver_its_own_messages_twice():
+    broker, (node_a,) = await make_replicas(1)
+    ws = FakeWebSocket()
+    await node_a.connect(ws, user_id="u1")
+    await settle(node_a)
+
+    await node_a.send_personal_message({"type": "direct"}, "u1")
+    await settle(node_a)
+
+    assert len(ws.sent) == 1
+    assert node_a.backplane.get_stats()["messages_received"] == 0
+    await shutdown(node_a)
+
+
+@pytest.mark.asyncio
+async def test_real_time_manager_topic_across_replicas():
+    broker = InMemoryBroker()
+    managers = []
+    for i in range(2):
+        backplane = RealtimeBackplane(InMemoryTransport(broker), instance_id=f"rt-{i}")
+        await backplane.start()
+        managers.append(RealTimeManager(backplane=backplane))
+    publisher, subscriber = managers
+
+    ws = FakeWebSocket()
+    await subscriber.connect(ws, topic="dashboard_pm")
+    await settle(*managers)
+
+    # У публикующей реплики нет локальных подписчиков - сообщение все равно уходит
+    await publisher.broadcast_dashboard_update("pm", {"tasks": 3})
+    await settle(*managers)
+
+    updates = [json.loads(m) for m in ws.sent if json.loads(m)["type"] == "dashboard_update"]
+    assert len(updates) == 1
+    assert updates[0]["data"] == {"tasks": 3}
+
+    await subscriber.disconnect(ws)
+    await settle(*managers)
+    assert not broker.channels
+    await shutdown(*managers)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_leaves_rooms():
+    broker, (node_a,) = await make_replicas(1)
+    ws = FakeWebSocket()
+    await node_a.connect(ws, user_id="u1")
+    node_a.join_room(ws, "42")
+    await settle(node_a)
+    assert "realtime.room:42" in broker.channels
+
+    node_a.disconnect(ws, user_id="u1")
+    await settle(node_a)
+
+    assert not node_a.room_connections
+    assert not broker.channels
+    await shutdown(node_a)
+
+
+@pytest.mark.asyncio
+async def test_attach_backplane_moves_existing_subscriptions():
+    broker = InMemoryBroker()
+    manager = ConnectionManager()
+    ws = FakeWebSocket()
+    await manager.connect(ws, tenant_id="acme")
+    manager.join_room(ws, "7")
+
+    backplane = RealtimeBackplane(InMemoryTransport(broker), instance_id="late")
+    await backplane.start()
+    manager.attach_backplane(backplane)
+    await settle(manager)
+    assert set(broker.channels) == {"realtime.all", "realtime.tenant:acme", "realtime.room:7"}
+
+    manager.attach_backplane(None)
+    await backplane.flush()
+    assert not broker.channels
+    await backplane.stop()
+    await manager.broadcaster.close()
+
+
+def test_create_backplane_from_env(monkeypatch):
+    monkeypatch.delenv("REALTIME_BACKPLANE", raising=False)
+    assert create_backplane_from_env() is None
+
+    monkeypatch.setenv("REALTIME_BACKPLANE", "memory")
+    monkeypatch.setenv("REALTIME_BACKPLANE_BATCH_MS", "20")
+    backplane = create_backplane_from_env()
+    assert isinstance(backplane.transport, InMemoryTransport)
+    assert backplane.batch_window == pytest.approx(0.02)
+
+    monkeypatch.setenv("REALTIME_BACKPLANE", "kafka")
+    with pytest.raises(ValueError):
+        create_backplane_from_env()
@@ -0,0 +1,135 @@
+# [NEXUS IDENTITY] ID: 5120631749258827164 | DATE: 2026-10-17
+
+"""
+Unit тесты для SemanticMatrixIndex и семантического поиска AIResponseCache
+"""
+
+import numpy as np
+import pytest
+
+from src.services.ai_response_cache import AIResponseCache
+from src.services.semantic_index import SemanticMatrixIndex
+
+
+class TestSemanticMatrixIndex:
+    """Тесты для SemanticMatrixIndex"""
+
+    def test_search_returns_most_similar(self):
+        index = SemanticMatrixIndex(dimension=3)
+        index.add("x", [1.0, 0.0, 0.0])
+        index.add("y", [0.0, 1.0, 0.0])
+        index.add("xy", [1.0, 1.0, 0.0])
+
+        key, similarity = index.search([2.0, 0.1, 0.0], k=1)[0]
+
+        assert key == "x"
+        assert similarity == pytest.approx(0.9988, abs=1e-3)
+
+    def test_top_k_sorted(self):
+        index = SemanticMatrixIndex(dimension=2)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.7, 0.7])
+        index.add("c", [0.0, 1.0])
+
+        results = index.search([1.0, 0.2], k=3)
+
+        assert [key for key, _ in results] == ["a", "b", "c"]
+        assert results[0][1] >= results[1][1] >= results[2][1]
+
+    def test_grows_beyond_initial_capacity(self):
+        index = SemanticMatrixIndex(dimension=4, initial_capacity=2)
+        rng = np.random.default_rng(0)
+        vectors = rng.random((10, 4))
+        index.add_many((f"k{i}", v) for i, v in enumerate(vectors))
+
+        assert len(index) == 10
+        assert index.search(vectors[7], k=1)[0][0] == "k7"
+
+    def test_remove_keeps_rows_dense(self):
+        index = SemanticMatrixIndex(dimension=2)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        index.add("c", [-1.0, 0.0])
+
+        assert index.remove("a") is True
+        assert index.remove("a") is False
+        assert len(index) == 2
+        assert "a" not in index
+        assert index.search([-1.0, 0.0], k=1)[0][0] == "c"
+
+    def test_replace_existing_key(self):
+        index = SemanticMatrixIndex(dimension=2)
+        index.add("a", [1.0, 0.0])
+        index.add("a", [0.0, 1.0])
+
+        assert len(index) == 1
+        assert index.search([0.0, 1.0], k=1)[0][1] == pytest.approx(1.0)
+
+    def test_dimension_mismatch(self):
+        index = SemanticMatrixIndex(dimension=3)
+        with pytest.raises(ValueError):
+            index.add("a", [1.0, 0.0])
+
+    def test_search_batch(self):
+        index = SemanticMatrixIndex(dimension=2)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+
+        results = index.search_batch([[1.0, 0.1], [0.1, 1.0]], k=1)
+
+        assert [r[0][0] for r in results] == ["a", "b"]
+
+    def test_save_and_load(self, tmp_path):
+        index = SemanticMatrixIndex(dimension=2)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        path = tmp_path / "index.npz"
+
+        index.save(path)
+        loaded = SemanticMatrixIndex.load(path)
+
+        assert loaded.keys == ["a", "b"]
+        assert loaded.search([0.0, 2.0], k=1)[0][0] == "b"
+
+    def test_ann_mode_falls_back_to_exact(self):
+        index = SemanticMatrixIndex(dimension=2, index_type="hnswlib")
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+
+        assert index.search([0.1, 1.0], k=1)[0][0] == "b"
+
+
+class TestAIResponseCacheSemanticLookup:
+    """Тесты семантического поиска в AIResponseCache"""
+
+    @pytest.mark.asyncio
+    async def test_hit_after_set(self, tmp_path):
+        cache = AIResponseCache(cache_dir=str(tmp_path))
+        await cache.set("how to post a document", {"answer": 42})
+
+        cached = await cache.get("how to post a document")
+
+        assert cached["response"] == {"answer": 42}
+        assert cache.get_stats()["index_size"] == 1
+
+    @pytest.mark.asyncio
+    async def test_index_persisted_with_embeddings(self, tmp_path):
+        cache = AIResponseCache(cache_dir=str(tmp_path))
+        await cache.set("query one", {"answer": 1})
+        await cache.set("query two", {"answer": 2})
+
+        reloaded = AIResponseCache(cache_dir=str(tmp_path))
+
+        assert (tmp_path / "embeddings_index.npz").exists()
+        assert set(reloaded.index.keys) == set(cache.embeddings)
+
+    @pytest.mark.asyncio
+    async def test_max_entries_evicts_oldest(self, tmp_path):
+        cache = AIResponseCache(cache_dir=str(tmp_path), max_entries=2)
+        for i in range(3):
+            await cache.set(f"query {i}", {"answer": i})
+
+        assert len(cache.embeddings) == 2
+        assert len(cache.index) == 2
+        assert await cache.get("query 0") is None
+        assert (await cache.get("query 2"))["response"] == {"answer": 2}
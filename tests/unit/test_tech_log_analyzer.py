@@ -5,6 +5,7 @@ import pytest
 
 from src.ai.agents.tech_log_analyzer import (
     PerformanceIssue,
+    TechLogAggregator,
     TechLogAnalyzer,
     TechLogEvent,
 )
@@ -83,3 +84,81 @@ async def test_generate_ai_recommendations_for_slow_query_issue():
     sql_rec = next((r for r in recs if r["category"] == "SQL Performance"), None)
     assert sql_rec is not None
     assert "use_sql_optimizer" in sql_rec["action"]
+
+
+def _write_tech_log(path, slow_sql_count: int, lock_ms: int) -> None:
+    lines = []
+    for i in range(slow_sql_count):
+        lines.append(f"10:{i % 60:02d}.000001-5000,DBMSSQL,5,process=rphost,p:processName=db,Usr=User1")
+        lines.append("Sql=SELECT * FROM sales")
+    lines.append("11:00.000001-100,CALL,3,process=rphost,Method=Fast,Context=Form")
+    lines.append(f"11:01.000001-{lock_ms},TLOCK,4,process=rphost,Usr=User2,Context=Document.Write")
+    lines.append("11:02.000001-0,EXCP,1,process=rphost,Descr=Deadlock detected,Context=Posting")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_iter_file_events_streams_multiline_events(tmp_path):
+    analyzer = TechLogAnalyzer()
+    log_file = tmp_path / "a.log"
+    _write_tech_log(log_file, slow_sql_count=2, lock_ms=900)
+
+    events = analyzer.iter_file_events(log_file)
+
+    assert not isinstance(events, list)
+    events = list(events)
+    assert [e.event_type for e in events] == ["DBMSSQL", "DBMSSQL", "CALL", "TLOCK", "EXCP"]
+    assert events[0].sql == "SELECT * FROM sales"
+    assert events[-1].severity == "critical"
+
+
+def test_aggregator_merge_matches_single_pass(tmp_path):
+    analyzer = TechLogAnalyzer()
+    _write_tech_log(tmp_path / "a.log", slow_sql_count=3, lock_ms=900)
+    _write_tech_log(tmp_path / "b.log", slow_sql_count=2, lock_ms=1500)
+
+    single = TechLogAggregator(analyzer.thresholds).add_many(analyzer.iter_events(str(tmp_path)))
+    merged = TechLogAggregator(analyzer.thresholds)
+    for log_file in sorted(tmp_path.glob("*.log")):
+        merged.merge(TechLogAggregator(analyzer.thresholds).add_many(analyzer.iter_file_events(log_file)))
+
+    assert merged.slow_queries() == single.slow_queries()
+    assert merged.slow_queries()[0]["executions"] == 5
+    assert merged.locks()["details"][0]["duration_ms"] == 1500
+    assert merged.exceptions()["total_exceptions"] == 2
+    assert merged.duration_percentiles()["DBMSSQL"]["p50"] == pytest.approx(5000, rel=0.01)
+
+
+def test_aggregator_bounds_group_count():
+    aggregator = TechLogAggregator(max_groups=10)
+    for i in range(100):
+        aggregator.add(
+            TechLogEvent(
+                timestamp=None,
+                duration_ms=i,
+                event_type="DBMSSQL",
+                process="rphost",
+                user="",
+                application="",
+                event="",
+                context="",
+                sql=f"SELECT {i}",
+            )
+        )
+
+    assert len(aggregator.sql_stats) <= 10
+    assert "SELECT 99" in aggregator.sql_stats
+    assert aggregator.events_count == 100
+
+
+@pytest.mark.asyncio
+async def test_analyze_tech_log_with_process_pool(tmp_path):
+    analyzer = TechLogAnalyzer()
+    _write_tech_log(tmp_path / "a.log", slow_sql_count=3, lock_ms=900)
+    _write_tech_log(tmp_path / "b.log", slow_sql_count=2, lock_ms=1500)
+
+    result = await analyzer.analyze_tech_log(str(tmp_path), max_workers=2)
+
+    assert result["events_analyzed"] == 2 * 3 + 5
+    assert result["by_type"]["DBMSSQL"] == 5
+    assert any(i.issue_type == "slow_query" for i in result["performance_issues"])
+    assert result["locks_analysis"]["long_locks"] == 2
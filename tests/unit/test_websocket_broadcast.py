@@ -0,0 +1,118 @@
+# [NEXUS IDENTITY] ID: 6650721948372015418 | DATE: 2026-10-17
+
+"""
+Тесты fan-out движка WebSocket (src/services/websocket_broadcast.py)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.services.websocket_broadcast import BroadcastEngine, SlowConsumerPolicy
+from src.services.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.gate = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.sent.append(text)
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_others():
+    engine = BroadcastEngine(send_timeout=5.0)
+    fast = [FakeWebSocket() for _ in range(50)]
+    slow = FakeWebSocket(delay=0.5)
+
+    engine.publish({"type": "update", "n": 1}, fast + [slow])
+    await asyncio.sleep(0.05)
+
+    assert all(ws.sent == ['{"type":"update","n":1}'] for ws in fast)
+    assert slow.sent == []
+    assert engine.get_stats()["queued"] == 0
+    await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_keeps_latest_state_for_slow_client():
+    engine = BroadcastEngine(max_queue_size=10, policy=SlowConsumerPolicy.COALESCE)
+    ws = FakeWebSocket()
+    ws.gate = asyncio.Event()
+
+    engine.publish({"dashboard": "pm", "n": 0}, [ws], key="dashboard_pm")
+    await asyncio.sleep(0)  # writer забрал первое сообщение и ждет
+    for n in range(1, 5):
+        engine.publish({"dashboard": "pm", "n": n}, [ws], key="dashboard_pm")
+    engine.publish({"alert": True}, [ws])
+    await asyncio.sleep(0)
+    ws.gate.set()
+    await engine.flush(timeout=1.0)
+
+    # Первое сообщение уже отправлялось, остальные схлопнулись в последнее
+    assert [json.loads(m) for m in ws.sent] == [
+        {"dashboard": "pm", "n": 0},
+        {"dashboard": "pm", "n": 4},
+        {"alert": True},
+    ]
+    assert engine.get_stats()["coalesced"] == 3
+    await engine.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, expected",
+    [(SlowConsumerPolicy.DROP_OLDEST, [0, 3, 4]), (SlowConsumerPolicy.DROP_NEWEST, [0, 1, 2])],
+)
+async def test_drop_policies(policy, expected):
+    engine = BroadcastEngine(max_queue_size=2, policy=policy)
+    ws = FakeWebSocket()
+    ws.gate = asyncio.Event()
+
+    engine.publish({"n": 0}, [ws])
+    await asyncio.sleep(0)  # writer забрал первое сообщение и ждет
+    for n in range(1, 5):
+        engine.publish({"n": n}, [ws])
+    ws.gate.set()
+    await engine.flush(timeout=1.0)
+
+    assert [json.loads(m)["n"] for m in ws.sent] == expected
+    assert engine.get_connection_stats()[0]["dropped"] == 2
+    await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_manager_drops_broken_and_timed_out_connections():
+    manager = ConnectionManager(send_timeout=0.05)
+    good, broken, stuck = FakeWebSocket(), FakeWebSocket(fail=True), FakeWebSocket(delay=1.0)
+    await manager.connect(good, user_id="u1")
+    await manager.connect(broken, user_id="u2")
+    await manager.connect(stuck, user_id="u3", tenant_id="t1")
+    manager.join_room(stuck, "room")
+
+    await manager.broadcast({"type": "ping"})
+    await asyncio.sleep(0.2)
+
+    assert good.sent == ['{"type":"ping"}']
+    assert manager.active_connections == {good}
+    assert set(manager.user_connections) == {"u1"}
+    assert manager.tenant_connections == {}
+    assert manager.room_connections == {}
+    stats = manager.get_stats()["broadcast"]
+    assert stats["failed_connections"] == 2
+    assert stats["sent"] == 1
+    await manager.broadcaster.close()
@@ -0,0 +1,191 @@
+# [NEXUS IDENTITY] ID: 5526190384471925873 | DATE: 2026-10-17
+
+"""
+Unit tests for CodeSyncService (incremental sync, batched wiki writes)
+"""
+
+import os
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("marko")
+
+from src.services.wiki.service import WikiService  # noqa: E402
+from src.services.wiki.sync_worker import CodeSyncService  # noqa: E402
+
+
+class FakeConnection:
+    """Минимальный asyncpg-подобный connection поверх словарей"""
+
+    def __init__(self):
+        self.namespaces = {}
+        self.pages = {}  # slug -> {"id", "version", "content"}
+        self.revisions = {}
+        self.executemany_calls = []
+        self.transactions = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    async def fetch(self, sql, slugs):
+        return [
+            {"id": page["id"], "slug": slug, "title": slug, "version": page["version"], "content": page["content"]}
+            for slug, page in self.pages.items()
+            if slug in slugs
+        ]
+
+    async def executemany(self, sql, rows):
+        sql = " ".join(sql.split())
+        self.executemany_calls.append((sql, len(rows)))
+        if sql.startswith("INSERT INTO wiki_namespaces"):
+            for ns_id, name, path, parent_id in rows:
+                self.namespaces.setdefault(ns_id, (name, path, parent_id))
+        elif sql.startswith("INSERT INTO wiki_pages"):
+            for page_id, _, slug, _, revision_id in rows:
+                self.pages[slug] = {"id": page_id, "version": 1, "revision_id": revision_id}
+        elif sql.startswith("INSERT INTO wiki_revisions"):
+            for revision_id, page_id, version, content, _, _ in rows:
+                self.revisions[revision_id] = content
+        elif sql.startswith("UPDATE wiki_pages"):
+            for version, revision_id, page_id in rows:
+                page = next(p for p in self.pages.values() if p["id"] == page_id)
+                page.update(version=version, revision_id=revision_id)
+        for page in self.pages.values():
+            page["content"] = self.revisions.get(page["revision_id"])
+
+
+@pytest.fixture
+def fake_db():
+    conn = FakeConnection()
+
+    @asynccontextmanager
+    async def get_db_connection():
+        yield conn
+
+    with patch("src.services.wiki.sync_worker.get_db_connection", get_db_connection), patch(
+        "src.services.wiki.service.get_db_connection", get_db_connection
+    ):
+        yield conn
+
+
+@pytest.fixture
+def code_tree(tmp_path):
+    root = tmp_path / "src"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "__init__.py").write_text("")
+    (root / "pkg" / "models.py").write_text('"""Models"""\n\n\nclass Item:\n    """Item"""\n')
+    (root / "pkg" / "service.py").write_text(
+        '"""Service"""\n\nfrom pkg.models import Item\n\n\ndef run():\n    """Run"""\n'
+    )
+    (root / "main.py").write_text("import os\n")
+    return root
+
+
+def make_service(root, tmp_path, **kwargs):
+    return CodeSyncService(str(root), wiki_service=WikiService(), state_path=str(tmp_path / "state.json"), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_full_sync_creates_pages_and_namespaces_in_batches(fake_db, code_tree, tmp_path):
+    stats = await make_service(code_tree, tmp_path).sync_all()
+
+    assert stats["files"] == 3
+    assert stats["pages_created"] == 3
+    assert set(fake_db.pages) == {"main-py", "pkg-models-py", "pkg-service-py"}
+    assert len(fake_db.namespaces) == 2
+    # Одна транзакция для namespaces и одна для страниц
+    assert fake_db.transactions == 2
+
+    models_page = fake_db.pages["pkg-models-py"]["content"]
+    assert "## Used By" in models_page
+    assert "[[pkg-service-py|service]]" in models_page
+    assert "class Item" in models_page
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_skips_unchanged_files(fake_db, code_tree, tmp_path):
+    await make_service(code_tree, tmp_path).sync_all(incremental=True)
+
+    stats = await make_service(code_tree, tmp_path).sync_all(incremental=True)
+    assert stats["parsed"] == 0
+    assert stats["rendered"] == 0
+    assert stats["namespaces_created"] == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_rerenders_changed_source_and_import_graph(fake_db, code_tree, tmp_path):
+    await make_service(code_tree, tmp_path).sync_all(incremental=True)
+
+    # main.py начинает импортировать models: models.py не менялся, но изменился его "Used By"
+    main_py = code_tree / "main.py"
+    main_py.write_text("from pkg import models\n")
+    os.utime(main_py, ns=(1, 1))
+
+    stats = await make_service(code_tree, tmp_path).sync_all(incremental=True)
+    assert stats["parsed"] == 1
+    assert stats["rendered"] == 2
+    assert stats["pages_updated"] == 2
+    assert fake_db.pages["pkg-models-py"]["version"] == 2
+    assert "[[main-py|main]]" in fake_db.pages["pkg-models-py"]["content"]
+    assert fake_db.pages["pkg-service-py"]["version"] == 1
+
+
+@pytest.mark.asyncio
+async def test_touched_file_with_same_content_is_not_reparsed(fake_db, code_tree, tmp_path):
+    await make_service(code_tree, tmp_path).sync_all(incremental=True)
+    os.utime(code_tree / "main.py", ns=(1, 1))
+
+    stats = await make_service(code_tree, tmp_path).sync_all(incremental=True)
+    assert stats["parsed"] == 0
+    assert stats["rendered"] == 0
+
+
+@pytest.mark.asyncio
+async def test_manually_edited_pages_are_not_overwritten(fake_db, code_tree, tmp_path):
+    await make_service(code_tree, tmp_path).sync_all()
+    page = fake_db.pages["main-py"]
+    revision_id = str(uuid.uuid4())
+    fake_db.revisions[revision_id] = "# main\n\nHand-written page"
+    page.update(revision_id=revision_id, content=fake_db.revisions[revision_id])
+
+    stats = await make_service(code_tree, tmp_path).sync_all()
+    assert stats["pages_created"] == 0
+    assert stats["pages_updated"] == 0
+    assert fake_db.pages["main-py"]["content"] == "# main\n\nHand-written page"
+
+
+@pytest.mark.asyncio
+async def test_parsing_in_process_pool(fake_db, code_tree, tmp_path):
+    for i in range(5):
+        (code_tree / f"extra_{i}.py").write_text(f'"""Extra {i}"""\n\nfrom pkg import service\n')
+
+    stats = await make_service(code_tree, tmp_path, max_workers=2, parse_chunk_size=2).sync_all()
+    assert stats["parsed"] == 8
+    assert stats["errors"] == 0
+    assert fake_db.pages["pkg-service-py"]["content"].count("[[extra_") == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_edit_is_not_overwritten(fake_db, code_tree, tmp_path):
+    await make_service(code_tree, tmp_path).sync_all()
+    (code_tree / "main.py").write_text("import sys\n")
+
+    service = make_service(code_tree, tmp_path)
+    read_sources = service.wiki_service.get_page_sources
+
+    async def get_page_sources(slugs):
+        sources = await read_sources(slugs)
+        fake_db.pages["main-py"]["version"] += 1  # страницу правят между чтением и записью
+        return sources
+
+    service.wiki_service.get_page_sources = get_page_sources
+    stats = await service.sync_all()
+
+    assert stats["pages_updated"] == 0
+    assert stats["pages_skipped"] == 3
+    assert "import sys" not in fake_db.pages["main-py"]["content"]